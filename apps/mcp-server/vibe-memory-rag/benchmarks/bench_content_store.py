@@ -0,0 +1,162 @@
+"""
+Benchmark: disk footprint and RSS of the legacy chunk layout vs. the normalized content store.
+
+The legacy layout stores the context-enhanced chunk as the vector store document and
+copies original_content, url and title into every chunk's metadata. The normalized layout
+keeps only filter metadata in the vector store and writes page fields once per memory and
+compressed chunk text once per chunk. Each layout is ingested and queried (top-k with
+text) in its own process, so peak RSS figures do not mix.
+
+Usage:
+    python benchmarks/bench_content_store.py [--pages 2000 --chunks-per-page 6 --chunk-chars 3000 --dim 384 --backend chroma]
+"""
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Iterator, List, Tuple
+
+import numpy as np
+
+SRC = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src")
+sys.path.insert(0, SRC)
+
+def directory_bytes(path: str) -> int:
+    total = 0
+    for root, _, files in os.walk(path):
+        for name in files:
+            total += os.path.getsize(os.path.join(root, name))
+    return total
+
+def current_rss_bytes() -> int:
+    with open("/proc/self/statm") as statm:
+        return int(statm.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+
+def synthetic_pages(args: argparse.Namespace) -> Iterator[Tuple[int, str, str, List[str]]]:
+    """Pages of Zipf-distributed words (compresses roughly like real prose)."""
+    rng = np.random.default_rng(7)
+    vocabulary = ["".join(rng.choice(list("abcdefghijklmnopqrstuvwxyz"), size=rng.integers(2, 10)))
+                  for _ in range(20000)]
+    weights = 1.0 / np.arange(1, len(vocabulary) + 1)
+    weights /= weights.sum()
+    for page in range(args.pages):
+        chunks = []
+        for _ in range(args.chunks_per_page):
+            words = rng.choice(len(vocabulary), size=args.chunk_chars // 6, p=weights)
+            chunks.append(" ".join(vocabulary[word] for word in words)[:args.chunk_chars])
+        yield page, f"https://site{page % 50}.example.com/articles/{page}", f"Article {page} about {vocabulary[page % 500]}", chunks
+
+def run_layout(args: argparse.Namespace) -> None:
+    """Child process: ingest one layout into args.workdir, query it, print JSON measurements."""
+    os.environ["VIBE_INDEX_DB_PATH"] = os.path.join(args.workdir, "index.db")
+    os.environ["CHROMA_DB_PATH"] = os.path.join(args.workdir, "chroma")
+    os.environ["VECTOR_STORE_BACKEND"] = args.backend
+    os.environ["VECTOR_STORE_PATH"] = os.path.join(args.workdir, "vectors")
+
+    from vector_store import get_vector_store, flush_vector_stores
+    from content_store import get_content_store, attach_content
+    from utils import enhance_chunk_with_context, format_chunk_result
+
+    store = get_vector_store()
+    content_store = get_content_store()
+    rng = np.random.default_rng(11)
+    now = time.time()
+
+    start = time.perf_counter()
+    for page, url, title, texts in synthetic_pages(args):
+        memory_id = f"m{page}"
+        ids = [f"{memory_id}_{number + 1}" for number in range(len(texts))]
+        vectors = rng.normal(size=(len(texts), args.dim)).astype(np.float32)
+        vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+        metadatas = []
+        for index, text in enumerate(texts):
+            metadata = {
+                "memory_id": memory_id, "chunk_number": index + 1, "chunk_size": len(text),
+                "word_count": len(text.split()), "source_id": url.split("/")[2],
+                "created_timestamp": now - page, "created_datetime": "2026-01-01T00:00:00+00:00",
+                "chunk_index": index, "total_chunks": len(texts), "content_type": "general", "quality_score": 0.5
+            }
+            if args.layout == "legacy":
+                metadata.update({"url": url, "title": title, "original_content": text})
+            else:
+                metadata["content_bytes"] = len(text.encode("utf-8"))
+            metadatas.append(metadata)
+
+        if args.layout == "legacy":
+            documents = [enhance_chunk_with_context(text, title, url, index) for index, text in enumerate(texts)]
+        else:
+            documents = [""] * len(texts)
+            content_store.put_page(memory_id, "browser_user", url, title, url.split("/")[2], now - page, "")
+            content_store.put_chunks(memory_id, ids, texts)
+        store.add(ids=ids, embeddings=vectors.tolist(), documents=documents, metadatas=metadatas)
+    flush_vector_stores()
+    ingest_seconds = time.perf_counter() - start
+
+    latencies = []
+    returned_chars = 0
+    for _ in range(args.queries):
+        query = rng.normal(size=args.dim).astype(np.float32)
+        query /= np.linalg.norm(query)
+        start = time.perf_counter()
+        results = store.query(query_embeddings=[query.tolist()], n_results=args.k, include=["documents", "metadatas", "distances"])
+        chunks = [
+            format_chunk_result(chunk_id, document, metadata, 1.0 - distance)
+            for chunk_id, document, metadata, distance in zip(
+                results["ids"][0], results["documents"][0], results["metadatas"][0], results["distances"][0]
+            )
+        ]
+        attach_content(chunks)
+        latencies.append(time.perf_counter() - start)
+        returned_chars += sum(len(chunk["content"]) for chunk in chunks)
+
+    print(json.dumps({
+        "ingest_seconds": ingest_seconds,
+        "disk_bytes": directory_bytes(args.workdir),
+        "rss_bytes": current_rss_bytes(),
+        "peak_rss_bytes": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024,
+        "query_p50_ms": float(np.percentile(latencies, 50) * 1000),
+        "returned_chars": returned_chars
+    }))
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--pages", type=int, default=2000)
+    parser.add_argument("--chunks-per-page", type=int, default=6)
+    parser.add_argument("--chunk-chars", type=int, default=3000)
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--queries", type=int, default=100)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--backend", default="chroma", choices=["chroma", "flat", "hnsw"])
+    parser.add_argument("--layout", choices=["legacy", "normalized"], help=argparse.SUPPRESS)
+    parser.add_argument("--workdir", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.layout:
+        run_layout(args)
+        return
+
+    print(f"{args.pages} pages x {args.chunks_per_page} chunks of {args.chunk_chars} chars, dim {args.dim}, "
+          f"{args.backend} backend, {args.queries} top-{args.k} queries")
+    measurements = {}
+    for layout in ("legacy", "normalized"):
+        with tempfile.TemporaryDirectory() as workdir:
+            command = [sys.executable, os.path.abspath(__file__), "--layout", layout, "--workdir", workdir]
+            for name in ("pages", "chunks_per_page", "chunk_chars", "dim", "queries", "k", "backend"):
+                command += [f"--{name.replace('_', '-')}", str(getattr(args, name))]
+            output = subprocess.run(command, check=True, capture_output=True, text=True).stdout
+            measurements[layout] = json.loads(output.strip().splitlines()[-1])
+        result = measurements[layout]
+        print(f"{layout:<11} ingest {result['ingest_seconds']:7.2f} s   disk {result['disk_bytes'] / 2**20:8.1f} MiB   "
+              f"RSS {result['rss_bytes'] / 2**20:7.1f} MiB   peak RSS {result['peak_rss_bytes'] / 2**20:7.1f} MiB   "
+              f"query p50 {result['query_p50_ms']:6.2f} ms")
+
+    legacy, normalized = measurements["legacy"], measurements["normalized"]
+    for key, label in (("disk_bytes", "disk"), ("rss_bytes", "RSS"), ("peak_rss_bytes", "peak RSS")):
+        print(f"{label} reduction: {(1 - normalized[key] / legacy[key]) * 100:5.1f}%")
+
+if __name__ == "__main__":
+    main()
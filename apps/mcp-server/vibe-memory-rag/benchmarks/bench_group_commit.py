@@ -0,0 +1,107 @@
+"""
+Benchmark: chunk write throughput with 1, 10 and 100 concurrent ingestions, direct vs. group commit.
+
+Each ingestion waits a simulated embedding latency, then writes its chunks. "direct" is one
+blocking store.add per ingestion (the previous behaviour); "group" sends them through the
+group-commit writer. A reader polls the chunk count during the run and checks that it only
+ever sees whole ingestions.
+
+Usage:
+    python benchmarks/bench_group_commit.py [--concurrency 1 10 100 --memories 300 --chunks 8 --dim 384 --embed-ms 20 --backend chroma]
+"""
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import time
+from typing import Any, List
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+def open_store(backend: str, workdir: str) -> Any:
+    """Fresh chunk store in workdir, as the server would create it at startup."""
+    import chroma_setup
+    import local_db
+    import vector_store
+
+    local_db.reset_local_db()
+    chroma_setup.reset_chroma_client()
+    os.environ["VIBE_INDEX_DB_PATH"] = os.path.join(workdir, "index.db")
+    os.environ["CHROMA_DB_PATH"] = os.path.join(workdir, "chroma")
+    vector_store.VECTOR_STORE_BACKEND = backend
+    vector_store.VECTOR_STORE_PATH = os.path.join(workdir, "vectors")
+    vector_store.reset_vector_stores()
+    return vector_store.get_vector_store()
+
+async def run(mode: str, concurrency: int, args: argparse.Namespace, vectors: List[List[float]]) -> None:
+    import group_writer
+    from chroma_setup import CONTENT_ROLE
+
+    with tempfile.TemporaryDirectory() as workdir:
+        store = open_store(args.backend, workdir)
+        group_writer._group_writer = None
+        writer = group_writer.get_group_writer()
+        rng = np.random.default_rng(concurrency)
+        latencies = []
+        torn_reads = 0
+        done = asyncio.Event()
+
+        async def ingest(pipeline: int) -> None:
+            for number in range(pipeline, args.memories, concurrency):
+                await asyncio.sleep(rng.uniform(0.5, 1.5) * args.embed_ms / 1000.0)
+                ids = [f"m{number}_{chunk}" for chunk in range(args.chunks)]
+                embeddings = vectors[number * args.chunks:(number + 1) * args.chunks]
+                metadatas = [{"memory_id": f"m{number}", "chunk_index": chunk} for chunk in range(args.chunks)]
+                start = time.perf_counter()
+                if mode == "group":
+                    await writer.write(CONTENT_ROLE, "browser_user", ids, embeddings, [""] * args.chunks, metadatas)
+                else:
+                    store.add(ids=ids, embeddings=embeddings, documents=[""] * args.chunks, metadatas=metadatas)
+                latencies.append(time.perf_counter() - start)
+
+        async def read() -> None:
+            nonlocal torn_reads
+            while not done.is_set():
+                if await asyncio.to_thread(store.count) % args.chunks:
+                    torn_reads += 1
+                await asyncio.sleep(0.005)
+
+        reader = asyncio.create_task(read())
+        start = time.perf_counter()
+        await asyncio.gather(*(ingest(pipeline) for pipeline in range(concurrency)))
+        elapsed = time.perf_counter() - start
+        done.set()
+        await reader
+        assert store.count() == args.memories * args.chunks
+
+    stats = writer.stats()
+    groups = f"{stats['groups']:5d} groups, {stats['avg_records_per_group']:7.1f} rec/group" if mode == "group" else " " * 34
+    print(f"{concurrency:>4} {mode:<7} {elapsed:7.2f} s   {args.memories * args.chunks / elapsed:8.0f} chunks/s   "
+          f"write p50 {np.percentile(latencies, 50) * 1000:7.2f} ms   p95 {np.percentile(latencies, 95) * 1000:7.2f} ms   "
+          f"{groups}   torn reads {torn_reads}")
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 10, 100])
+    parser.add_argument("--memories", type=int, default=300)
+    parser.add_argument("--chunks", type=int, default=8, help="Chunks per ingestion")
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--embed-ms", type=float, default=20.0, help="Simulated embedding latency per ingestion")
+    parser.add_argument("--backend", default="chroma", choices=["chroma", "flat", "hnsw"])
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(7)
+    vectors = rng.normal(size=(args.memories * args.chunks, args.dim)).astype(np.float32)
+    vectors = (vectors / np.linalg.norm(vectors, axis=1, keepdims=True)).tolist()
+
+    print(f"{args.memories} ingestions x {args.chunks} chunks, dim {args.dim}, {args.backend} backend, "
+          f"~{args.embed_ms:.0f} ms embedding per ingestion")
+    for concurrency in args.concurrency:
+        for mode in ("direct", "group"):
+            asyncio.run(run(mode, concurrency, args, vectors))
+
+if __name__ == "__main__":
+    main()
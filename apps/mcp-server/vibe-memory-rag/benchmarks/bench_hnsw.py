@@ -0,0 +1,92 @@
+"""
+Benchmark: recall/latency tradeoffs of Chroma HNSW settings (space, M, ef_construction, ef_search).
+Builds in-memory collections over synthetic unit vectors and compares top-k against exact search.
+
+Usage:
+    python benchmarks/bench_hnsw.py [--vectors 20000 --dim 256 --queries 200 --k 10]
+"""
+import argparse
+import time
+import uuid
+from typing import List
+
+import numpy as np
+import chromadb
+from chromadb.api import ClientAPI
+from chromadb.config import Settings
+
+def normalize(matrix: np.ndarray) -> np.ndarray:
+    return matrix / np.linalg.norm(matrix, axis=-1, keepdims=True)
+
+def run_config(
+    client: ClientAPI,
+    vectors: np.ndarray,
+    queries: np.ndarray,
+    exact: List[np.ndarray],
+    k: int,
+    space: str,
+    m: int,
+    construction_ef: int,
+    search_ef: int
+) -> None:
+    collection = client.create_collection(
+        name=f"bench_{uuid.uuid4().hex[:8]}",
+        metadata={
+            "hnsw:space": space,
+            "hnsw:M": m,
+            "hnsw:construction_ef": construction_ef,
+            "hnsw:search_ef": search_ef,
+        }
+    )
+    ids = [str(i) for i in range(len(vectors))]
+    start = time.perf_counter()
+    for offset in range(0, len(vectors), 5000):
+        collection.add(ids=ids[offset:offset + 5000], embeddings=vectors[offset:offset + 5000].tolist())
+    build_seconds = time.perf_counter() - start
+
+    latencies = []
+    recalls = []
+    for query, expected in zip(queries, exact):
+        start = time.perf_counter()
+        result = collection.query(query_embeddings=[query.tolist()], n_results=k, include=["distances"])
+        latencies.append(time.perf_counter() - start)
+        recalls.append(len(set(map(int, result["ids"][0])) & set(expected.tolist())) / k)
+
+    client.delete_collection(collection.name)
+    print(f"{space:<7} M={m:<3} ef_c={construction_ef:<4} ef_s={search_ef:<4} "
+          f"build {build_seconds:6.2f} s   p50 {np.percentile(latencies, 50) * 1000:6.2f} ms   "
+          f"p95 {np.percentile(latencies, 95) * 1000:6.2f} ms   recall@{k} {np.mean(recalls):.3f}")
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--vectors", type=int, default=20000)
+    parser.add_argument("--dim", type=int, default=256)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=10)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(7)
+    centers = normalize(rng.normal(size=(args.vectors // 50, args.dim)))
+    vectors = normalize(centers[rng.integers(0, len(centers), args.vectors)]
+                        + 0.7 * normalize(rng.normal(size=(args.vectors, args.dim)))).astype(np.float32)
+    queries = normalize(vectors[rng.integers(0, args.vectors, args.queries)]
+                        + 0.5 * normalize(rng.normal(size=(args.queries, args.dim)))).astype(np.float32)
+    exact = [np.argpartition(-(vectors @ query), args.k)[:args.k] for query in queries]
+
+    client = chromadb.EphemeralClient(settings=Settings(anonymized_telemetry=False, allow_reset=True))
+    print(f"{args.vectors} vectors, dim {args.dim}, {args.queries} queries")
+    configs = [
+        ("l2", 16, 100, 10),
+        ("cosine", 16, 100, 10),
+        ("cosine", 16, 100, 50),
+        ("cosine", 16, 100, 100),
+        ("cosine", 16, 200, 200),
+        ("cosine", 8, 100, 100),
+        ("cosine", 32, 200, 100),
+        ("ip", 16, 100, 100),
+    ]
+    for space, m, construction_ef, search_ef in configs:
+        run_config(client, vectors, queries, exact, args.k, space, m, construction_ef, search_ef)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+"""
+Benchmark: per-result CPU and allocation of memory record parsing.
+Compares the previous per-request regex/line parsing with the cached MemoryRecord model.
+
+Usage:
+    python benchmarks/bench_memory_records.py [--memories 2000] [--requests 20]
+"""
+import argparse
+import os
+import re
+import sys
+import time
+import tracemalloc
+from typing import Any, Callable, Dict, List, Optional
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from memory_record import MemoryRecord  # noqa: E402
+
+def make_memories(count: int) -> List[Dict[str, Any]]:
+    """Mix of metadata-backed, structured-text and legacy free-text memories."""
+    memories = []
+    for i in range(count):
+        url = f"https://www.site{i % 50}.com/articles/{i}"
+        title = f"Article number {i} about topic {i % 17}"
+        kind = i % 3
+        if kind == 0:
+            memories.append({
+                "id": f"m{i}",
+                "memory": f"Visited: {title}\nURL: {url}\nSummary: Visited: {title}\nTags: browser, tab",
+                "created_at": "2025-01-01T10:00:00+00:00",
+                "metadata": {"url": url, "title": title, "domain": f"site{i % 50}.com",
+                             "synopsis": f"Visited: {title}", "content_type": "browser_tab"}
+            })
+        elif kind == 1:
+            memories.append({
+                "id": f"m{i}",
+                "memory": f"Visited: {title}\nURL: {url}\nSummary: Something\nTags: browser, tab",
+                "created_at": "2025-01-01T10:00:00+00:00",
+                "metadata": {}
+            })
+        else:
+            memories.append({
+                "id": f"m{i}",
+                "memory": f"I visited {title} at {url} and read about things",
+                "created_at": "2025-01-01T10:00:00+00:00",
+                "metadata": {}
+            })
+    return memories
+
+def legacy_parse(memory_obj: Dict[str, Any]) -> Dict[str, str]:
+    """The inline parsing previously repeated in the search tools."""
+    memory_content = memory_obj.get("memory", "")
+    metadata = memory_obj.get("metadata", {})
+    if metadata and metadata.get("content_type") == "browser_tab":
+        url = metadata.get("url", "Unknown")
+        title = metadata.get("title", "Untitled")
+        synopsis = metadata.get("synopsis", memory_content)
+        domain = metadata.get("domain", "Unknown")
+    else:
+        if "Visited:" in memory_content and "URL:" in memory_content:
+            title, url, synopsis = "Untitled", "Unknown", memory_content
+            for line in memory_content.split('\n'):
+                if line.startswith("Visited:"):
+                    title = line.replace("Visited:", "").strip()
+                elif line.startswith("URL:"):
+                    url = line.replace("URL:", "").strip()
+                elif line.startswith("Summary:"):
+                    synopsis = line.replace("Summary:", "").strip()
+        else:
+            url, title, synopsis = "Unknown", "Untitled", memory_content
+            url_match = re.search(r'https?://[^\s]+', memory_content)
+            if url_match:
+                url = url_match.group(0)
+            title_match = re.search(r'I visited\s+(.+?)\s+at\s+https?://', memory_content)
+            if title_match:
+                title = title_match.group(1).strip()
+            elif len(memory_content) > 10:
+                title = memory_content[:50] + "..."
+        domain = "Unknown"
+        if url != "Unknown":
+            from urllib.parse import urlparse
+            domain = urlparse(url).netloc.lower()
+            if domain.startswith('www.'):
+                domain = domain[4:]
+    return {"id": memory_obj.get("id", ""), "url": url, "title": title,
+            "synopsis": synopsis, "domain": domain, "content": memory_content}
+
+def measure(label: str, func: Callable[[Dict[str, Any]], Any], memories: List[Dict[str, Any]], requests: int) -> Optional[List[Any]]:
+    tracemalloc.start()
+    start = time.perf_counter()
+    kept = None
+    for _ in range(requests):
+        kept = [func(memory) for memory in memories]
+    elapsed = time.perf_counter() - start
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    per_result_us = elapsed / (requests * len(memories)) * 1e6
+    print(f"{label:<22} {per_result_us:8.2f} us/result   peak {peak / 1024:9.1f} KiB   "
+          f"retained {current / 1024:9.1f} KiB")
+    return kept
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--memories", type=int, default=2000)
+    parser.add_argument("--requests", type=int, default=20)
+    args = parser.parse_args()
+
+    memories = make_memories(args.memories)
+    print(f"{args.memories} memories x {args.requests} requests")
+    measure("legacy inline parsing", legacy_parse, memories, args.requests)
+    measure("MemoryRecord", MemoryRecord.from_mem0, memories, args.requests)
+
+if __name__ == "__main__":
+    main()
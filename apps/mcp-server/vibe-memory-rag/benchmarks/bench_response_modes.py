@@ -0,0 +1,130 @@
+"""
+Benchmark: payload size and shaping + serialization latency per search response mode.
+Uses synthetic unified_search / search_content responses shaped like the real tools
+(5 memories x 3 chunks of ~3000 characters by default).
+
+Usage:
+    python benchmarks/bench_response_modes.py [--results 5] [--chunks 3] [--iterations 500]
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from typing import Any, Callable, Dict
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+import response_format  # noqa: E402
+from response_format import RESPONSE_MODES, shape_unified_search, shape_content_search  # noqa: E402
+
+SENTENCE = "The quick analysis of flight prices to Paris shows the cheapest fares leave on Tuesday mornings. "
+
+def make_chunk(memory_index: int, chunk_index: int, chunk_chars: int) -> Dict[str, Any]:
+    content = (SENTENCE * (chunk_chars // len(SENTENCE) + 1))[:chunk_chars]
+    return {
+        "id": f"mem{memory_index}_{chunk_index}",
+        "url": f"https://www.site{memory_index}.com/page",
+        "title": f"Page {memory_index}",
+        "content": content,
+        "source_id": f"site{memory_index}.com",
+        "similarity": 0.81,
+        "rerank_score": 4.2,
+        "created_timestamp": 1735725600.0,
+        "created_datetime": "2025-01-01T10:00:00",
+        "metadata": {
+            "memory_id": f"mem{memory_index}",
+            "chunk_number": chunk_index,
+            "chunk_size": chunk_chars,
+            "word_count": chunk_chars // 6,
+            "chunk_index": chunk_index,
+            "total_chunks": 4,
+            "content_type": "general",
+            "quality_score": 0.7
+        }
+    }
+
+def make_unified_result(results: int, chunks: int, chunk_chars: int) -> Dict[str, Any]:
+    return {
+        "type": "unified_search",
+        "query": "cheap flights to paris",
+        "results": [
+            {
+                "id": f"mem{i}",
+                "memory_summary": f"Visited: Page {i}\nURL: https://www.site{i}.com/page\nSummary: Flight deals",
+                "score": 0.9 - i * 0.05,
+                "created_at": "2025-01-01T10:00:00+00:00",
+                "source": "mem0",
+                "detailed_content": [make_chunk(i, c, chunk_chars) for c in range(chunks)],
+                "ranking_method": "semantic_only",
+                "intent_confidence": 0.2,
+                "source_url": f"https://www.site{i}.com/page",
+                "source_domain": f"site{i}.com"
+            }
+            for i in range(results)
+        ],
+        "total_memories": results,
+        "enriched_results": results,
+        "domains_searched": results,
+        "temporal_intelligence": {
+            "intent": "semantic_primary",
+            "confidence": 0.2,
+            "strategy": "semantic_only",
+            "explanation": "Ranking explanation line\n" * 20
+        }
+    }
+
+def make_content_result(results: int, chunk_chars: int) -> Dict[str, Any]:
+    return {
+        "type": "content_search",
+        "query": "cheap flights to paris",
+        "source_filter": None,
+        "content_chunks": [make_chunk(i, 0, chunk_chars) for i in range(results)]
+    }
+
+def measure(
+    label: str,
+    shape: Callable[[Dict[str, Any], str], Dict[str, Any]],
+    payload: Dict[str, Any],
+    mode: str,
+    iterations: int,
+    fast_json: bool
+) -> None:
+    response_format.USE_FAST_JSON = fast_json
+    start = time.perf_counter()
+    for _ in range(iterations):
+        output = response_format.dumps(shape(payload, mode))
+    elapsed_us = (time.perf_counter() - start) / iterations * 1e6
+    size = len(output.encode("utf-8"))
+    print(f"{label:<16} {mode:<8} {'orjson' if fast_json else 'json':<7} "
+          f"{size:>9,} bytes   {elapsed_us:9.1f} us")
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--results", type=int, default=5)
+    parser.add_argument("--chunks", type=int, default=3)
+    parser.add_argument("--chunk-chars", type=int, default=3000)
+    parser.add_argument("--iterations", type=int, default=500)
+    args = parser.parse_args()
+
+    serializers = [False]
+    if response_format.orjson is not None:
+        serializers.append(True)
+    else:
+        print("orjson not installed, measuring json only")
+
+    unified = make_unified_result(args.results, args.chunks, args.chunk_chars)
+    content = make_content_result(args.results, args.chunk_chars)
+    # Baseline: the previous tools serialized the full response with json.dumps
+    baseline = len(json.dumps(unified, ensure_ascii=False).encode("utf-8"))
+    print(f"unified_search baseline (json.dumps, full): {baseline:,} bytes")
+
+    for mode in RESPONSE_MODES:
+        for fast_json in serializers:
+            measure("unified_search", shape_unified_search, unified, mode, args.iterations, fast_json)
+    for mode in RESPONSE_MODES:
+        for fast_json in serializers:
+            measure("search_content", shape_content_search, content, mode, args.iterations, fast_json)
+
+if __name__ == "__main__":
+    main()
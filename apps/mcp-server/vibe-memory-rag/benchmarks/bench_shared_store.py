@@ -0,0 +1,132 @@
+"""
+Benchmark: RSS and startup of separate Mem0 / content Chroma clients vs. one shared client.
+
+"separate" opens Mem0's collection in its own PersistentClient (MEM0_DB_PATH) next to the
+content store's client (CHROMA_DB_PATH), each with its own OpenAI client; "shared" opens
+all collections in one client with one OpenAI client (SHARED_STORE_CLIENT=true). Every
+run is a fresh process that opens the stores and answers one query per collection, like a
+server's first search. Reports startup time, RSS, open SQLite handles and threads (median
+of --runs). OpenAI clients are only created when the openai package is installed.
+
+Usage:
+    python benchmarks/bench_shared_store.py [--memories 5000 --chunks 40000 --dim 1536 --runs 5]
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+MEM0_COLLECTION = "vibe_memories"
+CONTENT_COLLECTIONS = ("vibe_content_chunks", "vibe_page_vectors")
+
+def rss_mb() -> float:
+    with open("/proc/self/status") as status:
+        for line in status:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1]) / 1024.0
+    return 0.0
+
+def sqlite_handles() -> int:
+    count = 0
+    for fd in os.listdir("/proc/self/fd"):
+        try:
+            count += os.readlink(f"/proc/self/fd/{fd}").endswith(".sqlite3")
+        except OSError:
+            pass
+    return count
+
+def child(layout: str, workdir: str, dim: int) -> None:
+    """One server start: open the stores, query every collection once, report."""
+    start = time.perf_counter()
+    import numpy as np
+    import chromadb
+    from chromadb.config import Settings
+
+    settings = Settings(anonymized_telemetry=False, allow_reset=True)
+    if layout == "shared":
+        content_client = mem0_client = chromadb.PersistentClient(path=os.path.join(workdir, "shared"), settings=settings)
+    else:
+        content_client = chromadb.PersistentClient(path=os.path.join(workdir, "chroma_db"), settings=settings)
+        mem0_client = chromadb.PersistentClient(path=os.path.join(workdir, "chroma_db_mem0"), settings=settings)
+
+    openai_clients = 0
+    try:
+        from openai import OpenAI
+        clients = [OpenAI(api_key="sk-benchmark")]
+        if layout == "separate":
+            clients += [OpenAI(api_key="sk-benchmark"), OpenAI(api_key="sk-benchmark")]  # Mem0's embedder and LLM
+        openai_clients = len(clients)
+    except ImportError:
+        pass
+
+    query = np.random.default_rng(1).normal(size=dim).astype(np.float32).tolist()
+    mem0_client.get_collection(MEM0_COLLECTION).query(query_embeddings=[query], n_results=10)
+    for name in CONTENT_COLLECTIONS:
+        content_client.get_collection(name).query(query_embeddings=[query], n_results=10)
+    elapsed = time.perf_counter() - start
+
+    print(json.dumps({"startup_s": elapsed, "rss_mb": rss_mb(), "sqlite_handles": sqlite_handles(),
+                      "threads": len(os.listdir("/proc/self/task")), "openai_clients": openai_clients}))
+
+def populate(workdir: str, args: argparse.Namespace) -> None:
+    import numpy as np
+    import chromadb
+    from chromadb.config import Settings
+
+    rng = np.random.default_rng(5)
+    sizes = {MEM0_COLLECTION: args.memories, CONTENT_COLLECTIONS[0]: args.chunks, CONTENT_COLLECTIONS[1]: args.memories}
+    for layout in ("separate", "shared"):
+        for name, count in sizes.items():
+            if layout == "shared":
+                path = "shared"
+            else:
+                path = "chroma_db_mem0" if name == MEM0_COLLECTION else "chroma_db"
+            client = chromadb.PersistentClient(path=os.path.join(workdir, path), settings=Settings(anonymized_telemetry=False))
+            collection = client.get_or_create_collection(name)
+            for start in range(0, count, 2000):
+                size = min(2000, count - start)
+                collection.add(
+                    ids=[f"{name}{index}" for index in range(start, start + size)],
+                    embeddings=rng.normal(size=(size, args.dim)).astype(np.float32).tolist(),
+                    metadatas=[{"user_id": "browser_user", "memory_id": f"m{index % max(args.memories, 1)}"}
+                               for index in range(start, start + size)]
+                )
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--memories", type=int, default=5000)
+    parser.add_argument("--chunks", type=int, default=40000)
+    parser.add_argument("--dim", type=int, default=1536)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--child", nargs=2, metavar=("LAYOUT", "WORKDIR"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        child(args.child[0], args.child[1], args.dim)
+        return
+
+    with tempfile.TemporaryDirectory() as workdir:
+        print(f"{args.memories} memories, {args.chunks} chunks, dim {args.dim}, median of {args.runs} cold starts")
+        populate(workdir, args)
+        for layout in ("separate", "shared"):
+            runs = []
+            for _ in range(args.runs):
+                start = time.perf_counter()
+                output = subprocess.run(
+                    [sys.executable, os.path.abspath(__file__), "--dim", str(args.dim), "--child", layout, workdir],
+                    capture_output=True, text=True, check=True
+                ).stdout
+                result = json.loads(output.strip().splitlines()[-1])
+                result["process_s"] = time.perf_counter() - start
+                runs.append(result)
+            median = {key: statistics.median(run[key] for run in runs) for key in runs[0]}
+            print(f"{layout:<9} startup {median['startup_s'] * 1000:7.0f} ms (process {median['process_s'] * 1000:6.0f} ms)   "
+                  f"RSS {median['rss_mb']:7.1f} MB   sqlite handles {median['sqlite_handles']:3.0f}   "
+                  f"threads {median['threads']:3.0f}   openai clients {median['openai_clients']:.0f}")
+
+if __name__ == "__main__":
+    main()
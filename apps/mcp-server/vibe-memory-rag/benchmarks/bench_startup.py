@@ -0,0 +1,284 @@
+"""
+Benchmark: cold-start profile of the server with an import-time breakdown and a regression gate.
+
+Import breakdown: every listed module is imported in a fresh interpreter with
+-X importtime (warm OS page cache, cold Python), reporting its cumulative import time and,
+for main, the top-level imports that dominate it.
+
+Server phases: the server is started as a subprocess on a free port with temporary data
+directories and OPENAI_BASE_URL pointing at a local OpenAI stub (deterministic embeddings
+and completions, no network; reranking is disabled so no model is downloaded). Measured
+from process spawn: time until the SSE port listens, until the first health_check
+succeeds and until the first unified_search returns. Needs fastmcp and the mcp client
+package; without them these phases are reported as skipped.
+
+Medians of --runs are compared to a baseline JSON; a metric slower than
+baseline * (1 + --tolerance) + --slack-ms is a regression and the script exits with 1.
+Without a baseline file the gate cannot pass and the script exits with 2: record one
+on the machine that runs the check with --write-baseline, then run without it.
+
+Usage:
+    python benchmarks/bench_startup.py --write-baseline   # once per reference machine
+    python benchmarks/bench_startup.py [--runs 3 --tolerance 0.25 --slack-ms 50 --baseline benchmarks/startup_baseline.json]
+"""
+import argparse
+import asyncio
+import base64
+import hashlib
+import importlib.util
+import json
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Tuple
+
+import numpy as np
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+SRC = os.path.join(ROOT, "src")
+DEFAULT_BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "startup_baseline.json")
+
+# Project modules first (what the tools import lazily), then the heavy third-party packages behind them
+IMPORT_MODULES = [
+    "main", "mem0_utils", "utils", "chroma_setup", "vector_store", "temporal_intelligence", "prewarm",
+    "mem0", "chromadb", "numpy", "openai", "fastmcp", "sentence_transformers", "langchain_text_splitters",
+]
+
+# ---- import-time breakdown ----
+
+def parse_importtime(stderr: str) -> List[Tuple[str, int, int, int]]:
+    """(name, depth, self_us, cumulative_us) for every line of -X importtime output."""
+    entries = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "imported package" in line:
+            continue
+        fields = line[len("import time:"):].split("|")
+        if len(fields) != 3:
+            continue
+        self_us, cumulative_us, name = fields[0], fields[1], fields[2][1:]
+        # Nested imports are indented by two spaces per level
+        depth = (len(name) - len(name.lstrip(" "))) // 2
+        entries.append((name.strip(), depth, int(self_us), int(cumulative_us)))
+    return entries
+
+def import_profile(module: str) -> Dict[str, Any]:
+    """Cumulative import time of module in a fresh interpreter, plus its heaviest direct imports."""
+    start = time.perf_counter()
+    process = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=SRC, env={**os.environ, "PYTHONPATH": SRC}, capture_output=True, text=True
+    )
+    wall = time.perf_counter() - start
+    if process.returncode != 0:
+        lines = [line for line in process.stderr.splitlines() if not line.startswith("import time:")]
+        return {"error": lines[-1] if lines else f"exit code {process.returncode}"}
+    entries = parse_importtime(process.stderr)
+    target = next((entry for entry in reversed(entries) if entry[0] == module and entry[1] == 0), None)
+    if target is None:
+        return {"error": "no importtime entry"}
+    # Entries are printed children first, so the target's direct imports precede it at depth 1
+    index = entries.index(target)
+    children = []
+    for name, depth, _, cumulative in reversed(entries[:index]):
+        if depth == 0:
+            break
+        if depth == 1:
+            children.append((name, cumulative / 1000.0))
+    children.sort(key=lambda child: -child[1])
+    return {"cumulative_ms": target[3] / 1000.0, "process_ms": wall * 1000.0, "top_imports": children[:6]}
+
+# ---- local OpenAI stub ----
+
+class _OpenAIStub(BaseHTTPRequestHandler):
+    """Answers the OpenAI endpoints the server uses with deterministic local data."""
+
+    def log_message(self, format: str, *args: Any) -> None:
+        pass
+
+    def _reply(self, payload: Dict[str, Any]) -> None:
+        body = json.dumps(payload).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self) -> None:
+        self._reply({"object": "list", "data": [{"id": "text-embedding-3-small", "object": "model", "created": 0, "owned_by": "stub"}]})
+
+    def do_POST(self) -> None:
+        request = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+        if self.path.endswith("/embeddings"):
+            inputs = request.get("input")
+            inputs = inputs if isinstance(inputs, list) else [inputs]
+            data = []
+            for index, text in enumerate(inputs):
+                seed = int.from_bytes(hashlib.sha256(str(text).encode()).digest()[:8], "little")
+                vector = np.random.default_rng(seed).normal(size=request.get("dimensions") or 1536).astype(np.float32)
+                vector /= np.linalg.norm(vector)
+                embedding = (base64.b64encode(vector.tobytes()).decode() if request.get("encoding_format") == "base64"
+                             else vector.tolist())
+                data.append({"object": "embedding", "index": index, "embedding": embedding})
+            self._reply({"object": "list", "data": data, "model": request.get("model", ""),
+                         "usage": {"prompt_tokens": 1, "total_tokens": 1}})
+        else:
+            content = json.dumps({"synopsis": "Stub synopsis.", "tags": ["stub"], "facts": []})
+            self._reply({"id": "stub", "object": "chat.completion", "created": 0, "model": request.get("model", ""),
+                         "choices": [{"index": 0, "finish_reason": "stop", "message": {"role": "assistant", "content": content}}],
+                         "usage": {"prompt_tokens": 1, "completion_tokens": 1, "total_tokens": 2}})
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+# ---- server phases ----
+
+async def call_tool_until_ok(url: str, name: str, arguments: Dict[str, Any], deadline: float) -> float:
+    """Call an MCP tool over SSE until it answers; returns the monotonic time of the answer."""
+    from mcp import ClientSession
+    from mcp.client.sse import sse_client
+
+    last_error = None
+    while time.monotonic() < deadline:
+        try:
+            async with sse_client(url) as (read, write):
+                async with ClientSession(read, write) as session:
+                    await session.initialize()
+                    result = await session.call_tool(name, arguments)
+                    if not result.isError:
+                        return time.monotonic()
+                    last_error = result.content
+        except Exception as e:
+            last_error = e
+        await asyncio.sleep(0.05)
+    raise TimeoutError(f"{name} did not succeed: {last_error}")
+
+def server_run(stub_url: str, timeout: float) -> Dict[str, float]:
+    """One cold start of the server; milliseconds from spawn to each phase."""
+    port = free_port()
+    with tempfile.TemporaryDirectory() as workdir:
+        env = {
+            **os.environ,
+            "MCP_SERVER_PORT": str(port),
+            "OPENAI_API_KEY": "sk-stub",
+            "OPENAI_BASE_URL": stub_url,
+            "OPENAI_API_BASE": stub_url,
+            "CHROMA_DB_PATH": os.path.join(workdir, "chroma_db"),
+            "MEM0_DB_PATH": os.path.join(workdir, "chroma_db_mem0"),
+            "MEM0_DIR": os.path.join(workdir, "mem0"),
+            "MEM0_TELEMETRY": "False",
+            "VIBE_INDEX_DB_PATH": os.path.join(workdir, "vibe_index.db"),
+            "USE_RERANKING": "false",
+            "LOG_LEVEL": "WARNING",
+        }
+        spawned = time.monotonic()
+        deadline = spawned + timeout
+        server = subprocess.Popen([sys.executable, os.path.join(SRC, "main.py")], cwd=ROOT, env=env,
+                                  stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True)
+        try:
+            listening = None
+            while listening is None and time.monotonic() < deadline:
+                if server.poll() is not None:
+                    raise RuntimeError(f"server exited: {server.stderr.read()[-500:]}")
+                try:
+                    with socket.create_connection(("127.0.0.1", port), timeout=0.2):
+                        listening = time.monotonic()
+                except OSError:
+                    time.sleep(0.01)
+            if listening is None:
+                raise TimeoutError("server did not listen")
+            url = f"http://127.0.0.1:{port}/sse"
+            health = asyncio.run(call_tool_until_ok(url, "health_check", {}, deadline))
+            search = asyncio.run(call_tool_until_ok(url, "unified_search", {"query": "what did I read about rust"}, deadline))
+        finally:
+            server.terminate()
+            try:
+                server.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                server.kill()
+    return {
+        "server.listening_ms": (listening - spawned) * 1000.0,
+        "server.first_health_check_ms": (health - spawned) * 1000.0,
+        "server.first_unified_search_ms": (search - spawned) * 1000.0,
+    }
+
+# ---- regression gate ----
+
+def check_regressions(metrics: Dict[str, float], baseline: Dict[str, float], tolerance: float, slack_ms: float) -> List[str]:
+    regressions = []
+    for name, value in sorted(metrics.items()):
+        if name not in baseline:
+            continue
+        limit = baseline[name] * (1 + tolerance) + slack_ms
+        if value > limit:
+            regressions.append(f"{name}: {value:.0f} ms > {limit:.0f} ms (baseline {baseline[name]:.0f} ms)")
+    return regressions
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--tolerance", type=float, default=0.25, help="Allowed slowdown vs. the baseline (0.25 = 25%%)")
+    parser.add_argument("--slack-ms", type=float, default=50.0, help="Absolute slack added to every limit")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE)
+    parser.add_argument("--write-baseline", action="store_true", help="Record the measured medians as the baseline")
+    parser.add_argument("--timeout", type=float, default=120.0, help="Seconds per server start")
+    parser.add_argument("--skip-server", action="store_true")
+    args = parser.parse_args()
+
+    metrics = {}
+    print(f"Import times (median of {args.runs} fresh interpreters)")
+    for module in IMPORT_MODULES:
+        profiles = [import_profile(module) for _ in range(args.runs)]
+        if "error" in profiles[0]:
+            print(f"  {module:<26} unavailable ({profiles[0]['error']})")
+            continue
+        cumulative = statistics.median(profile["cumulative_ms"] for profile in profiles)
+        process = statistics.median(profile["process_ms"] for profile in profiles)
+        metrics[f"import.{module}_ms"] = cumulative
+        heaviest = ", ".join(f"{name} {ms:.0f}" for name, ms in profiles[0]["top_imports"][:4])
+        print(f"  {module:<26} {cumulative:8.1f} ms   (process {process:6.0f} ms)   {heaviest}")
+
+    missing = [package for package in ("fastmcp", "mcp") if importlib.util.find_spec(package) is None]
+    if args.skip_server or missing:
+        print(f"Server phases skipped ({'--skip-server' if args.skip_server else 'missing ' + ', '.join(missing)})")
+    else:
+        stub = ThreadingHTTPServer(("127.0.0.1", 0), _OpenAIStub)
+        threading.Thread(target=stub.serve_forever, daemon=True).start()
+        stub_url = f"http://127.0.0.1:{stub.server_address[1]}/v1"
+        runs = [server_run(stub_url, args.timeout) for _ in range(args.runs)]
+        stub.shutdown()
+        print(f"Server cold start (median of {args.runs}, OpenAI stubbed locally)")
+        for name in runs[0]:
+            metrics[name] = statistics.median(run[name] for run in runs)
+            print(f"  {name:<34} {metrics[name]:8.0f} ms")
+
+    if args.write_baseline:
+        with open(args.baseline, "w") as baseline_file:
+            json.dump({name: round(value, 1) for name, value in sorted(metrics.items())}, baseline_file, indent=2)
+        print(f"Baseline written to {args.baseline}")
+        return
+    if not os.path.exists(args.baseline):
+        print(f"No baseline at {args.baseline}; record one on this machine with --write-baseline")
+        sys.exit(2)
+    with open(args.baseline) as baseline_file:
+        baseline = json.load(baseline_file)
+    unchecked = sorted(set(baseline) - set(metrics))
+    if unchecked:
+        print(f"Baseline metrics not measured in this run: {', '.join(unchecked)}")
+    regressions = check_regressions(metrics, baseline, args.tolerance, args.slack_ms)
+    if regressions:
+        print("Regressions:")
+        for regression in regressions:
+            print(f"  {regression}")
+        sys.exit(1)
+    print(f"No regressions against {args.baseline} (tolerance {args.tolerance:.0%} + {args.slack_ms:.0f} ms)")
+
+if __name__ == "__main__":
+    main()
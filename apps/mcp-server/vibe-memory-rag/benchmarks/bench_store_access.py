@@ -0,0 +1,142 @@
+"""
+Benchmark: concurrent searches and ingestions on the chunk store, with and without the single-writer model.
+
+Readers run top-k queries followed by a count of the same store; writers add whole
+ingestions. A read is torn when its count is not a whole number of ingestions. The event
+loop lag shows how long store calls kept other coroutines waiting.
+
+Usage:
+    python benchmarks/bench_store_access.py [--readers 32 --writers 8 --ingestions 40 --chunks 8 --dim 384 --seed-ingestions 500 --backend chroma]
+"""
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import time
+from typing import Any, Dict, List, Tuple
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+def open_store(backend: str, workdir: str) -> Any:
+    """Fresh chunk store in workdir, as the server would create it at startup."""
+    import chroma_setup
+    import local_db
+    import vector_store
+
+    local_db.reset_local_db()
+    chroma_setup.reset_chroma_client()
+    os.environ["VIBE_INDEX_DB_PATH"] = os.path.join(workdir, "index.db")
+    os.environ["CHROMA_DB_PATH"] = os.path.join(workdir, "chroma")
+    vector_store.VECTOR_STORE_BACKEND = backend
+    vector_store.VECTOR_STORE_PATH = os.path.join(workdir, "vectors")
+    vector_store.reset_vector_stores()
+    return vector_store.get_vector_store()
+
+def unit_vectors(rng: np.random.Generator, count: int, dim: int) -> List[List[float]]:
+    vectors = rng.normal(size=(count, dim)).astype(np.float32)
+    return (vectors / np.linalg.norm(vectors, axis=1, keepdims=True)).tolist()
+
+async def run(single_writer: bool, args: argparse.Namespace) -> None:
+    import store_access
+
+    store_access.STORE_SINGLE_WRITER = single_writer
+    store_access.shutdown_store_access()
+    with tempfile.TemporaryDirectory() as workdir:
+        store = open_store(args.backend, workdir)
+        rng = np.random.default_rng(3)
+        for number in range(args.seed_ingestions):
+            store.add(
+                ids=[f"seed{number}_{chunk}" for chunk in range(args.chunks)],
+                embeddings=unit_vectors(rng, args.chunks, args.dim),
+                documents=[""] * args.chunks,
+                metadatas=[{"memory_id": f"seed{number}", "chunk_index": chunk} for chunk in range(args.chunks)]
+            )
+
+        read_latencies, write_latencies, errors = [], [], []
+        torn_reads = 0
+        lag = [0.0]
+        done = asyncio.Event()
+
+        def search_then_count(query: List[float]) -> Tuple[Dict[str, Any], int]:
+            results = store.query(query_embeddings=[query], n_results=10, include=["metadatas", "distances"])
+            return results, store.count()
+
+        async def reader(seed: int) -> None:
+            nonlocal torn_reads
+            queries = unit_vectors(np.random.default_rng(seed), 16, args.dim)
+            position = 0
+            while not done.is_set():
+                start = time.perf_counter()
+                try:
+                    _, count = await store_access.read_store(
+                        store_access.CHUNK_STORE, search_then_count, queries[position % len(queries)]
+                    )
+                    torn_reads += count % args.chunks != 0
+                except Exception as e:
+                    errors.append(str(e))
+                read_latencies.append(time.perf_counter() - start)
+                position += 1
+
+        async def writer(pipeline: int) -> None:
+            vectors = unit_vectors(np.random.default_rng(100 + pipeline), args.ingestions * args.chunks, args.dim)
+            for number in range(args.ingestions):
+                memory_id = f"w{pipeline}_{number}"
+                start = time.perf_counter()
+                try:
+                    await store_access.write_store(
+                        store_access.CHUNK_STORE, store.add,
+                        ids=[f"{memory_id}_{chunk}" for chunk in range(args.chunks)],
+                        embeddings=vectors[number * args.chunks:(number + 1) * args.chunks],
+                        documents=[""] * args.chunks,
+                        metadatas=[{"memory_id": memory_id, "chunk_index": chunk} for chunk in range(args.chunks)]
+                    )
+                except Exception as e:
+                    errors.append(str(e))
+                write_latencies.append(time.perf_counter() - start)
+                await asyncio.sleep(0)
+
+        async def ticker() -> None:
+            while not done.is_set():
+                start = time.perf_counter()
+                await asyncio.sleep(0.001)
+                lag[0] = max(lag[0], time.perf_counter() - start - 0.001)
+
+        readers = [asyncio.create_task(reader(seed)) for seed in range(args.readers)]
+        tick = asyncio.create_task(ticker())
+        start = time.perf_counter()
+        await asyncio.gather(*(writer(pipeline) for pipeline in range(args.writers)))
+        elapsed = time.perf_counter() - start
+        done.set()
+        await asyncio.gather(tick, *readers)
+        store_access.shutdown_store_access()
+
+    label = "single writer" if single_writer else "unserialized"
+    print(f"{label:<14} {len(read_latencies) / elapsed:7.0f} reads/s   read p50 {np.percentile(read_latencies, 50) * 1000:6.1f} ms"
+          f"   p95 {np.percentile(read_latencies, 95) * 1000:6.1f} ms   "
+          f"{args.writers * args.ingestions * args.chunks / elapsed:6.0f} chunks/s written   "
+          f"write p95 {np.percentile(write_latencies, 95) * 1000:6.1f} ms   torn reads {torn_reads}   "
+          f"errors {len(errors)}   max loop lag {lag[0] * 1000:5.1f} ms")
+    for message in sorted(set(errors))[:3]:
+        print(f"    {message}")
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--readers", type=int, default=32)
+    parser.add_argument("--writers", type=int, default=8)
+    parser.add_argument("--ingestions", type=int, default=40, help="Ingestions per writer")
+    parser.add_argument("--chunks", type=int, default=8, help="Chunks per ingestion")
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--seed-ingestions", type=int, default=500)
+    parser.add_argument("--backend", default="chroma", choices=["chroma", "flat", "hnsw"])
+    args = parser.parse_args()
+
+    print(f"{args.readers} readers, {args.writers} writers x {args.ingestions} ingestions of {args.chunks} chunks, "
+          f"dim {args.dim}, {args.seed_ingestions * args.chunks} seeded chunks, {args.backend} backend")
+    for single_writer in (False, True):
+        asyncio.run(run(single_writer, args))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+"""
+Benchmark: Mem0 collection size and search latency with a separate synopsis memory per page vs. merged records.
+
+Builds a Chroma collection shaped like Mem0's (one vector per memory, payload in the
+metadata, filtered by user_id) twice: "separate" holds each page memory plus its
+synopsis_update record (a near-duplicate vector), "merged" holds one record per page.
+Reports record count, on-disk size, top-k search and get_all latency, and the share of
+search hits that repeat a page already in the same result list.
+
+Usage:
+    python benchmarks/bench_synopsis_merge.py [--pages 5000 --dim 1536 --queries 200 --top-k 10]
+"""
+import argparse
+import os
+import tempfile
+import time
+from typing import Any, List, Tuple
+
+import numpy as np
+
+def unit(vectors: np.ndarray) -> np.ndarray:
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+def directory_bytes(path: str) -> int:
+    return sum(os.path.getsize(os.path.join(root, name)) for root, _, names in os.walk(path) for name in names)
+
+def build(layout: str, workdir: str, page_vectors: List[List[float]], synopsis_vectors: List[List[float]]) -> Tuple[Any, Any]:
+    import chromadb
+
+    client = chromadb.PersistentClient(path=workdir)
+    collection = client.create_collection("mem0", metadata={"hnsw:space": "cosine"})
+    ids, embeddings, metadatas, documents = [], [], [], []
+    for page, vector in enumerate(page_vectors):
+        url = f"https://www.site{page % 200}.com/articles/{page}"
+        synopsis = f"Article {page} explains topic {page % 37} in depth with examples and background."
+        merged = layout == "merged"
+        text = f"Visited: Article {page}\nURL: {url}\nSummary: {synopsis if merged else f'Visited: Article {page}'}\nTags: news, topic{page % 37}"
+        ids.append(f"page{page}")
+        embeddings.append(synopsis_vectors[page] if merged else vector)
+        documents.append(text)
+        metadatas.append({"user_id": "browser_user", "data": text, "url": url, "title": f"Article {page}",
+                          "synopsis": synopsis if merged else f"Visited: Article {page}", "content_type": "browser_tab"})
+        if not merged:
+            ids.append(f"synopsis{page}")
+            embeddings.append(synopsis_vectors[page])
+            documents.append(f"Synopsis: {synopsis}")
+            metadatas.append({"user_id": "browser_user", "data": f"Synopsis: {synopsis}", "type": "synopsis_update",
+                              "memory_id": f"page{page}", "url": url, "title": f"Article {page}"})
+    for start in range(0, len(ids), 1000):
+        collection.add(ids=ids[start:start + 1000], embeddings=embeddings[start:start + 1000],
+                       documents=documents[start:start + 1000], metadatas=metadatas[start:start + 1000])
+    return client, collection
+
+def run(
+    layout: str,
+    args: argparse.Namespace,
+    page_vectors: List[List[float]],
+    synopsis_vectors: List[List[float]],
+    queries: List[List[float]]
+) -> None:
+    with tempfile.TemporaryDirectory() as workdir:
+        client, collection = build(layout, workdir, page_vectors, synopsis_vectors)
+
+        latencies, repeated, hits = [], 0, 0
+        for query in queries:
+            start = time.perf_counter()
+            results = collection.query(query_embeddings=[query], n_results=args.top_k,
+                                       where={"user_id": "browser_user"}, include=["metadatas"])
+            latencies.append(time.perf_counter() - start)
+            pages = [metadata.get("memory_id") or result_id
+                     for result_id, metadata in zip(results["ids"][0], results["metadatas"][0])]
+            hits += len(pages)
+            repeated += len(pages) - len(set(pages))
+
+        start = time.perf_counter()
+        everything = collection.get(where={"user_id": "browser_user"}, include=["metadatas", "documents"])
+        get_all = time.perf_counter() - start
+
+        records = collection.count()
+        size = directory_bytes(workdir)
+        del collection, client
+
+    print(f"{layout:<9} {records:7d} records   {size / 1e6:8.1f} MB   search p50 {np.percentile(latencies, 50) * 1000:6.2f} ms"
+          f"   p95 {np.percentile(latencies, 95) * 1000:6.2f} ms   get_all {get_all * 1000:7.1f} ms ({len(everything['ids'])})"
+          f"   repeated pages in top-{args.top_k} {repeated / max(hits, 1):5.1%}")
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--pages", type=int, default=5000)
+    parser.add_argument("--dim", type=int, default=1536)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--top-k", type=int, default=10)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(11)
+    page_vectors = unit(rng.normal(size=(args.pages, args.dim)).astype(np.float32))
+    # A synopsis embeds close to the page memory it summarizes
+    synopsis_vectors = unit(page_vectors + 0.6 * unit(rng.normal(size=page_vectors.shape).astype(np.float32)))
+    queries = unit(page_vectors[rng.integers(0, args.pages, args.queries)]
+                   + 0.8 * unit(rng.normal(size=(args.queries, args.dim)).astype(np.float32)))
+
+    print(f"{args.pages} pages, dim {args.dim}, {args.queries} queries, top-{args.top_k}")
+    for layout in ("separate", "merged"):
+        run(layout, args, page_vectors.tolist(), synopsis_vectors.tolist(), queries.tolist())
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,142 @@
+"""
+Benchmark: recall@k and latency of two-stage (pages -> chunks) retrieval vs. flat chunk search.
+
+Synthetic mode (default) builds clustered pages with numpy and compares exact flat top-k
+against page selection + chunk search inside the selected pages.
+Store mode (--store) runs against the local ChromaDB collections, using perturbed stored
+chunk embeddings as queries (no embedding API calls).
+
+Usage:
+    python benchmarks/bench_two_stage.py [--pages 2000 --chunks-per-page 8 --queries 200 --k 10]
+    python benchmarks/bench_two_stage.py --store [--queries 100 --k 10]
+"""
+import argparse
+import os
+import sys
+import time
+from typing import Any, Sequence
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+def normalize(matrix: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(matrix, axis=-1, keepdims=True)
+    return matrix / np.where(norms == 0, 1.0, norms)
+
+def recall(expected: Sequence[Any], actual: Sequence[Any]) -> float:
+    return len(set(expected) & set(actual)) / max(1, len(expected))
+
+def run_synthetic(args: argparse.Namespace) -> None:
+    from page_index import build_page_vector
+
+    rng = np.random.default_rng(7)
+    topics = normalize(rng.normal(size=(args.pages // 4 + 1, args.dim)).astype(np.float32))
+    page_topics = rng.integers(0, len(topics), size=args.pages)
+    page_centers = normalize(topics[page_topics] + 0.6 * normalize(rng.normal(size=(args.pages, args.dim))))
+
+    chunk_page = np.repeat(np.arange(args.pages), args.chunks_per_page)
+    chunk_noise = normalize(rng.normal(size=(len(chunk_page), args.dim)))
+    chunks = normalize(page_centers[chunk_page] + args.chunk_spread * chunk_noise).astype(np.float32)
+
+    # Page vectors: chunk centroid blended with a noisy "title/synopsis" embedding
+    summaries = normalize(page_centers + 0.4 * normalize(rng.normal(size=page_centers.shape)))
+    pages = np.asarray([
+        build_page_vector(chunks[page * args.chunks_per_page:(page + 1) * args.chunks_per_page].tolist(),
+                          summaries[page].tolist())
+        for page in range(args.pages)
+    ], dtype=np.float32)
+
+    query_sources = rng.integers(0, len(chunks), size=args.queries)
+    queries = normalize(chunks[query_sources] + 0.8 * normalize(rng.normal(size=(args.queries, args.dim))))
+    queries = queries.astype(np.float32)
+
+    flat_time = 0.0
+    two_stage_time = 0.0
+    recalls = []
+    for query in queries:
+        start = time.perf_counter()
+        expected = np.argpartition(-(chunks @ query), args.k)[:args.k]
+        flat_time += time.perf_counter() - start
+
+        start = time.perf_counter()
+        top_pages = np.argpartition(-(pages @ query), args.page_candidates)[:args.page_candidates]
+        candidate_chunks = np.flatnonzero(np.isin(chunk_page, top_pages))
+        scores = chunks[candidate_chunks] @ query
+        actual = candidate_chunks[np.argsort(-scores)[:args.k]]
+        two_stage_time += time.perf_counter() - start
+
+        recalls.append(recall(expected.tolist(), actual.tolist()))
+
+    print(f"synthetic: {args.pages} pages, {len(chunks)} chunks, dim {args.dim}, "
+          f"{args.page_candidates} candidate pages")
+    print(f"  recall@{args.k} two-stage vs flat: {np.mean(recalls):.3f}")
+    print(f"  brute-force scan per query: flat {flat_time / args.queries * 1000:.2f} ms, "
+          f"two-stage {two_stage_time / args.queries * 1000:.2f} ms")
+
+def run_store(args: argparse.Namespace) -> None:
+    from chroma_setup import get_or_create_content_collection, get_or_create_page_collection
+    from page_index import backfill_page_index, select_candidate_pages, is_page_index_backfilled
+
+    chunks = get_or_create_content_collection()
+    pages = get_or_create_page_collection()
+    if not is_page_index_backfilled():
+        print("Backfilling page index...")
+        print(f"  {backfill_page_index()}")
+
+    total = chunks.count()
+    if total == 0:
+        print("Chunk collection is empty")
+        return
+    print(f"store: {total} chunks, {pages.count()} pages")
+
+    rng = np.random.default_rng(7)
+    offsets = rng.integers(0, total, size=args.queries)
+    flat_time = 0.0
+    two_stage_time = 0.0
+    recalls = []
+    for offset in offsets:
+        sample = chunks.get(include=["embeddings"], limit=1, offset=int(offset))
+        vector = np.asarray(sample["embeddings"][0], dtype=np.float32)
+        query = normalize(vector + 0.5 * np.linalg.norm(vector) * normalize(rng.normal(size=vector.shape)))
+        query = query.tolist()
+
+        start = time.perf_counter()
+        flat = chunks.query(query_embeddings=[query], n_results=args.k, include=["distances"])
+        flat_time += time.perf_counter() - start
+
+        start = time.perf_counter()
+        page_ids = select_candidate_pages(query, limit=args.page_candidates)
+        staged = chunks.query(
+            query_embeddings=[query],
+            n_results=args.k,
+            where={"memory_id": {"$in": page_ids}} if page_ids else None,
+            include=["distances"]
+        )
+        two_stage_time += time.perf_counter() - start
+
+        recalls.append(recall(flat["ids"][0], staged["ids"][0]))
+
+    print(f"  recall@{args.k} two-stage vs flat: {np.mean(recalls):.3f}")
+    print(f"  latency per query: flat {flat_time / args.queries * 1000:.2f} ms, "
+          f"two-stage {two_stage_time / args.queries * 1000:.2f} ms")
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--store", action="store_true", help="Run against the local ChromaDB collections")
+    parser.add_argument("--pages", type=int, default=2000)
+    parser.add_argument("--chunks-per-page", type=int, default=8)
+    parser.add_argument("--dim", type=int, default=256)
+    parser.add_argument("--chunk-spread", type=float, default=1.0, help="Within-page chunk noise")
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--page-candidates", type=int, default=20)
+    args = parser.parse_args()
+
+    if args.store:
+        run_store(args)
+    else:
+        run_synthetic(args)
+
+if __name__ == "__main__":
+    main()
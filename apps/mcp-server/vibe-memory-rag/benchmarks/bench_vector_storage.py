@@ -0,0 +1,122 @@
+"""
+Benchmark: bytes per chunk and recall@k of reduced-dimension index vectors with full-vector rescoring.
+
+Synthetic mode (default) draws vectors with a decaying per-dimension variance (leading
+dimensions carry most of the signal, as in Matryoshka-trained embeddings) and compares
+exact full-vector top-k against reduced search, with and without rescoring the shortlist.
+Store mode (--store) uses stored chunk embeddings from the local ChromaDB collection.
+
+Usage:
+    python benchmarks/bench_vector_storage.py [--vectors 20000 --dim 1536 --reduced 256 512 --queries 200 --k 10]
+    python benchmarks/bench_vector_storage.py --store [--queries 100 --k 10]
+"""
+import argparse
+import os
+import sys
+import time
+from typing import Any, Optional, Sequence, Tuple
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+# Approximate HNSW link storage per vector (level-0 neighbours as int32, M=16)
+HNSW_GRAPH_BYTES = 2 * 16 * 4
+
+def normalize(matrix: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(matrix, axis=-1, keepdims=True)
+    return matrix / np.where(norms == 0, 1.0, norms)
+
+def recall(expected: Sequence[Any], actual: Sequence[Any]) -> float:
+    return len(set(expected) & set(actual)) / max(1, len(expected))
+
+def top_k(matrix: np.ndarray, query: np.ndarray, k: int) -> np.ndarray:
+    scores = matrix @ query
+    best = np.argpartition(-scores, k)[:k]
+    return best[np.argsort(-scores[best])]
+
+def synthetic_data(args: argparse.Namespace) -> Tuple[np.ndarray, np.ndarray]:
+    rng = np.random.default_rng(7)
+    spectrum = (1.0 / (1.0 + np.arange(args.dim) / 16.0)).astype(np.float32)
+    centers = rng.normal(size=(args.vectors // 20 + 1, args.dim)).astype(np.float32) * spectrum
+    vectors = centers[rng.integers(0, len(centers), args.vectors)]
+    vectors = normalize(vectors + 0.6 * rng.normal(size=vectors.shape).astype(np.float32) * spectrum)
+    queries = vectors[rng.integers(0, args.vectors, args.queries)]
+    queries = normalize(queries + 0.5 * rng.normal(size=queries.shape).astype(np.float32) * spectrum)
+    return vectors.astype(np.float32), queries.astype(np.float32)
+
+def store_data(args: argparse.Namespace) -> Tuple[Optional[np.ndarray], Optional[np.ndarray]]:
+    from chroma_setup import get_or_create_content_collection
+
+    collection = get_or_create_content_collection()
+    batch = collection.get(include=["embeddings"], limit=args.vectors)
+    if len(batch["ids"]) == 0:
+        return None, None
+    vectors = normalize(np.asarray(batch["embeddings"], dtype=np.float32))
+    rng = np.random.default_rng(7)
+    queries = vectors[rng.integers(0, len(vectors), args.queries)]
+    queries = normalize(queries + 0.5 * normalize(rng.normal(size=queries.shape)) / np.sqrt(2))
+    return vectors, queries.astype(np.float32)
+
+def quantized_copy(vectors: np.ndarray, vector_format: str) -> Tuple[np.ndarray, int]:
+    from vector_codec import encode_vector, decode_vector
+
+    blob_bytes = len(encode_vector(vectors[0].tolist(), vector_format))
+    decoded = np.asarray([decode_vector(encode_vector(row.tolist(), vector_format), vector_format)
+                          for row in vectors], dtype=np.float32)
+    return normalize(decoded), blob_bytes
+
+def run(args: argparse.Namespace, vectors: np.ndarray, queries: np.ndarray) -> None:
+    from vector_codec import reduce_vector
+
+    count, dim = vectors.shape
+    k = args.k
+    exact = [top_k(vectors, query, k) for query in queries]
+    int8_vectors, int8_bytes = quantized_copy(vectors, "int8")
+
+    print(f"{count} vectors, dim {dim}, {len(queries)} queries, recall@{k} vs exact full-vector search")
+    print(f"{'index':<14}{'rescore':<10}{'bytes/chunk':>12}{'recall':>9}{'ms/query':>10}")
+    print(f"{f'full {dim}':<14}{'-':<10}{dim * 4 + HNSW_GRAPH_BYTES:>12}{1.0:>9.3f}{'':>10}")
+
+    for reduced in args.reduced:
+        if reduced >= dim:
+            continue
+        index = np.asarray([reduce_vector(row, reduced) for row in vectors], dtype=np.float32)
+        index_queries = np.asarray([reduce_vector(query, reduced) for query in queries], dtype=np.float32)
+        index_bytes = reduced * 4 + HNSW_GRAPH_BYTES
+
+        for label, full, side_bytes in (("none", None, 0), ("float32", vectors, dim * 4), ("int8", int8_vectors, int8_bytes)):
+            recalls = []
+            start = time.perf_counter()
+            for query, index_query, expected in zip(queries, index_queries, exact):
+                if full is None:
+                    actual = top_k(index, index_query, k)
+                else:
+                    shortlist = top_k(index, index_query, k * args.oversample)
+                    actual = shortlist[np.argsort(-(full[shortlist] @ query))[:k]]
+                recalls.append(recall(expected.tolist(), actual.tolist()))
+            elapsed = (time.perf_counter() - start) / len(queries) * 1000
+            print(f"{f'reduced {reduced}':<14}{label:<10}{index_bytes + side_bytes:>12}"
+                  f"{np.mean(recalls):>9.3f}{elapsed:>10.2f}")
+
+    print(f"(index bytes include ~{HNSW_GRAPH_BYTES} B of HNSW links; rescoring shortlist = {args.oversample} x k)")
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--store", action="store_true", help="Use embeddings from the local ChromaDB collection")
+    parser.add_argument("--vectors", type=int, default=20000)
+    parser.add_argument("--dim", type=int, default=1536)
+    parser.add_argument("--reduced", type=int, nargs="+", default=[256, 512])
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--oversample", type=int, default=3)
+    args = parser.parse_args()
+
+    vectors, queries = store_data(args) if args.store else synthetic_data(args)
+    if vectors is None:
+        print("Chunk collection is empty")
+        return
+    run(args, vectors, queries)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,137 @@
+"""
+Benchmark: ingest, cold start, query latency and recall of the vector store backends.
+
+Builds each backend (chroma, flat, and hnsw when hnswlib is installed) in a temporary
+directory from the same synthetic chunks, reopens it to time a cold first query, then
+measures unfiltered and metadata-filtered top-k queries against exact search.
+
+Usage:
+    python benchmarks/bench_vector_store.py [--vectors 50000 --dim 512 --chunks-per-page 8 --queries 200 --k 10]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+from typing import Any, Dict, List, Sequence
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+def normalize(matrix: np.ndarray) -> np.ndarray:
+    return matrix / np.linalg.norm(matrix, axis=-1, keepdims=True)
+
+def recall(expected: Sequence[Any], actual: Sequence[Any]) -> float:
+    return len(set(expected) & set(actual)) / max(1, len(expected))
+
+def open_store(backend: str, workdir: str) -> Any:
+    """Fresh store instance for a backend, as the server would create it at startup."""
+    import chroma_setup
+    import local_db
+    import vector_store
+
+    local_db.reset_local_db()
+    chroma_setup.reset_chroma_client()
+    os.environ["VIBE_INDEX_DB_PATH"] = os.path.join(workdir, "index.db")
+    os.environ["CHROMA_DB_PATH"] = os.path.join(workdir, "chroma")
+    vector_store.VECTOR_STORE_BACKEND = backend
+    vector_store.VECTOR_STORE_PATH = os.path.join(workdir, "vectors")
+    vector_store.reset_vector_stores()
+    if backend != "chroma":
+        return vector_store.FlatVectorStore("chunks", path=vector_store.VECTOR_STORE_PATH, use_hnsw=backend == "hnsw")
+    return vector_store.get_vector_store()
+
+def run_backend(
+    backend: str,
+    args: argparse.Namespace,
+    vectors: np.ndarray,
+    metadatas: List[Dict[str, Any]],
+    queries: np.ndarray,
+    exact: List[List[int]],
+    filters: List[Dict[str, Any]],
+    exact_filtered: List[List[int]]
+) -> None:
+    with tempfile.TemporaryDirectory() as workdir:
+        store = open_store(backend, workdir)
+        ids = [f"m{index // args.chunks_per_page}_{index % args.chunks_per_page}" for index in range(len(vectors))]
+        position = {chunk_id: index for index, chunk_id in enumerate(ids)}
+        start = time.perf_counter()
+        for offset in range(0, len(vectors), 1000):
+            store.add(
+                ids=ids[offset:offset + 1000],
+                embeddings=vectors[offset:offset + 1000],
+                documents=[f"chunk {index}" for index in range(offset, min(offset + 1000, len(vectors)))],
+                metadatas=metadatas[offset:offset + 1000]
+            )
+        store.flush()
+        ingest_seconds = time.perf_counter() - start
+
+        # Cold start: new instance over the files on disk, first query included
+        start = time.perf_counter()
+        store = open_store(backend, workdir)
+        store.query(query_embeddings=[queries[0]], n_results=args.k, include=["distances"])
+        cold_seconds = time.perf_counter() - start
+
+        latencies = []
+        recalls = []
+        for query, expected in zip(queries, exact):
+            start = time.perf_counter()
+            result = store.query(query_embeddings=[query], n_results=args.k, include=["documents", "metadatas", "distances"])
+            latencies.append(time.perf_counter() - start)
+            recalls.append(recall(expected, [position[chunk_id] for chunk_id in result["ids"][0]]))
+
+        filtered_latencies = []
+        filtered_recalls = []
+        for query, where, expected in zip(queries, filters, exact_filtered):
+            start = time.perf_counter()
+            result = store.query(query_embeddings=[query], n_results=args.k, where=where, include=["distances"])
+            filtered_latencies.append(time.perf_counter() - start)
+            filtered_recalls.append(recall(expected, [position[chunk_id] for chunk_id in result["ids"][0]]))
+
+    print(f"{backend:<7} ingest {ingest_seconds:7.2f} s   cold query {cold_seconds * 1000:8.1f} ms   "
+          f"p50 {np.percentile(latencies, 50) * 1000:6.2f} ms   p95 {np.percentile(latencies, 95) * 1000:6.2f} ms   "
+          f"recall@{args.k} {np.mean(recalls):.3f}   filtered p50 {np.percentile(filtered_latencies, 50) * 1000:6.2f} ms   "
+          f"recall {np.mean(filtered_recalls):.3f}")
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--vectors", type=int, default=50000)
+    parser.add_argument("--dim", type=int, default=512)
+    parser.add_argument("--chunks-per-page", type=int, default=8)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--filter-pages", type=int, default=20, help="Pages in each memory_id $in filter")
+    parser.add_argument("--backends", nargs="+", default=["chroma", "flat", "hnsw"])
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(7)
+    pages = args.vectors // args.chunks_per_page
+    centers = normalize(rng.normal(size=(pages, args.dim)))
+    page_of = np.arange(args.vectors) // args.chunks_per_page
+    vectors = normalize(centers[page_of] + 0.8 * normalize(rng.normal(size=(args.vectors, args.dim)))).astype(np.float32)
+    metadatas = [{"memory_id": f"m{page}", "created_timestamp": float(page)} for page in page_of]
+    queries = normalize(vectors[rng.integers(0, args.vectors, args.queries)]
+                        + 0.5 * normalize(rng.normal(size=(args.queries, args.dim)))).astype(np.float32)
+
+    exact = [np.argpartition(-(vectors @ query), args.k)[:args.k].tolist() for query in queries]
+    filters = []
+    exact_filtered = []
+    for query in queries:
+        chosen = rng.choice(pages, size=args.filter_pages, replace=False)
+        candidates = np.flatnonzero(np.isin(page_of, chosen))
+        filters.append({"memory_id": {"$in": [f"m{page}" for page in chosen]}})
+        exact_filtered.append(candidates[np.argsort(-(vectors[candidates] @ query))[:args.k]].tolist())
+
+    print(f"{args.vectors} vectors, dim {args.dim}, {args.queries} queries, filters over {args.filter_pages} pages")
+    for backend in args.backends:
+        if backend == "hnsw":
+            try:
+                import hnswlib  # noqa: F401
+            except ImportError:
+                print("hnsw    skipped (hnswlib not installed)")
+                continue
+        run_backend(backend, args, vectors, metadatas, queries, exact, filters, exact_filtered)
+
+if __name__ == "__main__":
+    main()
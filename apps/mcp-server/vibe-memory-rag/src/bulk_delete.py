@@ -0,0 +1,209 @@
+"""
+Bulk deletion of tab memories selected by id list, domain and time range.
+Memories are deleted from Mem0 in batches off the event loop; each batch's chunks, page
+vectors and side-table rows are removed with one filtered delete per store.
+"""
+import os
+import time
+import asyncio
+import logging
+from datetime import datetime
+from typing import List, Dict, Any, Optional, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Memories deleted per batch
+BULK_DELETE_BATCH_SIZE = int(os.getenv("BULK_DELETE_BATCH_SIZE", "100"))
+
+# Matched memories listed in a dry-run report
+DRY_RUN_SAMPLE_SIZE = 10
+
+def parse_time(value: Optional[str]) -> Optional[float]:
+    """Epoch seconds or an ISO 8601 datetime (naive values are local time) as a timestamp."""
+    if value is None or str(value).strip() == "":
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        return datetime.fromisoformat(str(value).strip().replace("Z", "+00:00")).timestamp()
+
+def _matches_domain(domain: str, wanted: str) -> bool:
+    return domain == wanted or domain.endswith("." + wanted)
+
+def delete_chunk_content(user_id: str, memory_ids: List[str]) -> int:
+    """
+    Remove every chunk, page vector and side-table row of the given memories with one
+    delete per store. Returns the number of chunks removed (from the chunk counters).
+    """
+    if not memory_ids:
+        return 0
+
+    from chroma_setup import CONTENT_ROLE, PAGE_ROLE
+    from vector_store import get_vector_store
+    from vector_codec import get_rescore_store
+    from memory_aggregates import get_memory_aggregates
+    from content_store import get_content_store
+    from retention import get_cold_store
+
+    get_vector_store(CONTENT_ROLE, user_id).delete(where={"memory_id": {"$in": memory_ids}})
+    get_vector_store(PAGE_ROLE, user_id).delete(ids=memory_ids)
+    get_rescore_store().delete_memories(memory_ids)
+    get_content_store().delete_memories(memory_ids)
+    get_cold_store().delete_memories(memory_ids)
+    aggregates = get_memory_aggregates()
+    return sum(aggregates.chunks_removed(memory_id) for memory_id in memory_ids)
+
+def _chunk_memory_ids(
+    user_id: str,
+    domain: Optional[str],
+    start_ts: Optional[float],
+    end_ts: Optional[float]
+) -> List[str]:
+    """
+    Memory ids of the user's chunks in the time range whose source is the domain or one of
+    its subdomains (a chunk store read).
+    """
+    from vector_store import get_vector_store
+
+    conditions: List[Dict[str, Any]] = []
+    if start_ts is not None:
+        conditions.append({"created_timestamp": {"$gte": start_ts}})
+    if end_ts is not None:
+        conditions.append({"created_timestamp": {"$lte": end_ts}})
+    where = {"$and": conditions} if len(conditions) > 1 else conditions[0] if conditions else None
+    store = get_vector_store(user_id=user_id)
+    if domain is None:
+        return store.memory_ids(where)
+
+    # Subdomains cannot be expressed as a where clause, so sources are matched here
+    memory_ids: Set[str] = set()
+    offset = 0
+    while True:
+        batch = store.get(where=where, include=["metadatas"], limit=1000, offset=offset)
+        if not batch["ids"]:
+            return sorted(memory_ids)
+        for metadata in batch["metadatas"]:
+            metadata = metadata or {}
+            source = str(metadata.get("source_id", "")).lower().removeprefix("www.")
+            if metadata.get("memory_id") and _matches_domain(source, domain):
+                memory_ids.add(metadata["memory_id"])
+        offset += len(batch["ids"])
+
+async def select_memories(
+    user_id: str,
+    memory_ids: Optional[List[str]] = None,
+    domain: Optional[str] = None,
+    start_ts: Optional[float] = None,
+    end_ts: Optional[float] = None
+) -> Tuple[List[Dict[str, Any]], List[str]]:
+    """
+    Resolve the selection to (Mem0 records, chunk-only memory ids).
+    Domain and time filters narrow an id list; without one they select from all of the
+    user's memories, plus chunks whose memory is no longer in Mem0.
+    """
+    from mem0_utils import find_unknown_memories, get_user_snapshot
+    from memory_record import MemoryRecord
+    from store_access import read_store, CHUNK_STORE, MEM0_STORE
+
+    snapshot = await get_user_snapshot(user_id)
+    domain = (domain or "").lower().removeprefix("www.") or None
+    filtered = domain is not None or start_ts is not None or end_ts is not None
+
+    if memory_ids and not filtered:
+        found: List[Dict[str, Any]] = []
+        missing: List[str] = []
+        for memory_id in dict.fromkeys(memory_ids):
+            record = snapshot.get(user_id, memory_id)
+            if record is None:
+                missing.append(memory_id)
+            else:
+                found.append(record)
+        if not missing:
+            return found, []
+        # The snapshot may lag Mem0: only ids Mem0 confirms it lacks are chunk-only, the
+        # rest are deleted from Mem0 like delete_tab_memory does
+        unknown = await read_store(MEM0_STORE, find_unknown_memories, missing)
+        confirmed = set(unknown)
+        found.extend({"id": memory_id} for memory_id in missing if memory_id not in confirmed)
+        return found, unknown
+
+    records = snapshot.latest(user_id, snapshot.count(user_id), start_ts, end_ts)
+    if domain is not None:
+        records = [record for record in records if _matches_domain(MemoryRecord.from_mem0(record, user_id).domain, domain)]
+    if memory_ids:
+        selected = set(memory_ids)
+        return [record for record in records if record["id"] in selected], []
+
+    # Chunks saved under ids Mem0 never had (or no longer has) match on their own metadata
+    chunk_ids = await read_store(CHUNK_STORE, _chunk_memory_ids, user_id, domain, start_ts, end_ts)
+    known = {record["id"] for record in records}
+    chunk_only = [memory_id for memory_id in chunk_ids if memory_id not in known and snapshot.get(user_id, memory_id) is None]
+    return records, chunk_only
+
+async def delete_memories_bulk(
+    user_id: str,
+    memory_ids: Optional[List[str]] = None,
+    domain: Optional[str] = None,
+    start_ts: Optional[float] = None,
+    end_ts: Optional[float] = None,
+    dry_run: bool = False
+) -> Dict[str, Any]:
+    """Delete the selected memories and their chunks in batches; returns counts and throughput."""
+    from mem0_utils import delete_memories_batch
+    from memory_aggregates import get_memory_aggregates
+    from store_access import write_store, CHUNK_STORE, MEM0_STORE
+
+    started = time.perf_counter()
+    records, chunk_only = await select_memories(user_id, memory_ids, domain, start_ts, end_ts)
+    record_ids = [record["id"] for record in records]
+    report = {
+        "dry_run": dry_run,
+        "user_id": user_id,
+        "matched_memories": len(record_ids),
+        "chunk_only_memories": len(chunk_only)
+    }
+
+    if dry_run:
+        counts = get_memory_aggregates().chunk_counts(record_ids + chunk_only)
+        report["matched_chunks"] = sum(counts.values())
+        report["sample"] = [
+            {
+                "id": record["id"],
+                "url": (record.get("metadata") or {}).get("url", ""),
+                "created_at": record.get("created_at", "")
+            }
+            for record in records[:DRY_RUN_SAMPLE_SIZE]
+        ]
+        report["seconds"] = round(time.perf_counter() - started, 3)
+        return report
+
+    deleted_memories = 0
+    failed = []
+    deleted_chunks = 0
+    batches = 0
+    for start in range(0, len(record_ids), BULK_DELETE_BATCH_SIZE):
+        batch = record_ids[start:start + BULK_DELETE_BATCH_SIZE]
+        result = await write_store(MEM0_STORE, delete_memories_batch, batch)
+        deleted_memories += len(result["deleted"])
+        failed.extend(result["failed"])
+        # Chunks go even when the Mem0 delete failed, like delete_tab_memory
+        deleted_chunks += await write_store(CHUNK_STORE, delete_chunk_content, user_id, batch)
+        batches += 1
+    for start in range(0, len(chunk_only), BULK_DELETE_BATCH_SIZE):
+        deleted_chunks += await write_store(
+            CHUNK_STORE, delete_chunk_content, user_id, chunk_only[start:start + BULK_DELETE_BATCH_SIZE]
+        )
+        batches += 1
+
+    seconds = time.perf_counter() - started
+    report.update({
+        "deleted_memories": deleted_memories,
+        "failed_memory_ids": failed,
+        "deleted_chunks": deleted_chunks,
+        "batches": batches,
+        "seconds": round(seconds, 3),
+        "memories_per_second": round((deleted_memories + len(chunk_only)) / seconds, 1) if seconds else 0.0,
+        "chunks_per_second": round(deleted_chunks / seconds, 1) if seconds else 0.0
+    })
+    logger.info(f"Bulk delete for {user_id}: {report}")
+    return report
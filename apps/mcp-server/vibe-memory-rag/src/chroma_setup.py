@@ -3,15 +3,56 @@ ChromaDB setup for local vector storage.
 Replaces PostgreSQL/Supabase with local ChromaDB collections.
 """
 import os
-import chromadb
-from chromadb.config import Settings
+import time
 import logging
+import threading
+from typing import Any, Dict, Optional
 
 logger = logging.getLogger(__name__)
 
+# Distance space and HNSW parameters for newly created collections
+HNSW_SPACE = os.getenv("CHROMA_HNSW_SPACE", "cosine").lower()
+HNSW_M = int(os.getenv("CHROMA_HNSW_M", "16"))
+HNSW_CONSTRUCTION_EF = int(os.getenv("CHROMA_HNSW_CONSTRUCTION_EF", "100"))
+HNSW_SEARCH_EF = int(os.getenv("CHROMA_HNSW_SEARCH_EF", "100"))
+
+# Collection roles and their default names (a migration can point a role at a new collection)
+CONTENT_ROLE = "chunks"
+PAGE_ROLE = "pages"
+_DEFAULT_COLLECTION_ENV = {
+    CONTENT_ROLE: ("CHROMA_COLLECTION_NAME", "vibe_content_chunks"),
+    PAGE_ROLE: ("CHROMA_PAGE_COLLECTION_NAME", "vibe_page_vectors"),
+}
+_COLLECTION_DESCRIPTIONS = {
+    CONTENT_ROLE: "vibe browser tab content chunks for RAG",
+    PAGE_ROLE: "vibe page-level vectors for two-stage retrieval",
+}
+
+_REGISTRY_SCHEMA = """
+CREATE TABLE IF NOT EXISTS chroma_collections (
+    role TEXT PRIMARY KEY,
+    name TEXT NOT NULL,
+    space TEXT NOT NULL,
+    updated_at REAL NOT NULL
+);
+"""
+
 # Global client cache to prevent multiple instances
 _chroma_client = None
 
+# Collection handles by name, and active collection name by role
+_collections: Dict[str, Any] = {}
+_active_names: Dict[str, str] = {}
+
+# Serializes first access so concurrent writer/reader threads do not both create a collection
+_collections_lock = threading.Lock()
+_client_lock = threading.Lock()
+
+def get_chroma_db_path() -> str:
+    """Directory of the content store's Chroma database."""
+    # Content chunks use separate path from Mem0 to avoid conflicts (unless SHARED_STORE_CLIENT is set)
+    return os.getenv("CHROMA_DB_PATH", "./data/chroma_db")
+
 def get_chroma_client():
     """Get configured ChromaDB client with persistent storage (singleton)."""
     global _chroma_client
@@ -19,43 +60,186 @@ def get_chroma_client():
     if _chroma_client is not None:
         return _chroma_client
     
-    # Content chunks use separate path from Mem0 to avoid conflicts
-    db_path = os.getenv("CHROMA_DB_PATH", "./data/chroma_db")
-    
-    # Ensure directory exists
-    os.makedirs(db_path, exist_ok=True)
-    
-    # Create ChromaDB client with persistent storage
-    _chroma_client = chromadb.PersistentClient(
-        path=db_path,
-        settings=Settings(
-            anonymized_telemetry=False,
-            allow_reset=True
+    with _client_lock:
+        if _chroma_client is not None:
+            return _chroma_client
+        
+        db_path = get_chroma_db_path()
+        
+        # Ensure directory exists
+        os.makedirs(db_path, exist_ok=True)
+        
+        # Imported here so the flat vector store backend never loads chromadb
+        import chromadb
+        from chromadb.config import Settings
+        
+        # Create ChromaDB client with persistent storage
+        _chroma_client = chromadb.PersistentClient(
+            path=db_path,
+            settings=Settings(
+                anonymized_telemetry=False,
+                allow_reset=True
+            )
         )
-    )
     
     return _chroma_client
 
-def get_or_create_content_collection():
-    """Get or create the content chunks collection."""
+def copy_collection_from(source_path: str, name: str, batch_size: int = 500) -> int:
+    """
+    Copy a collection from another Chroma database into this client's database (used when
+    Mem0 moves into the shared client). Nothing is copied if the collection already has
+    records here or the source has no such collection. Returns the number of records copied.
+    """
     client = get_chroma_client()
-    collection_name = os.getenv("CHROMA_COLLECTION_NAME", "vibe_content_chunks")
+    if not os.path.isdir(source_path) or os.path.realpath(source_path) == os.path.realpath(get_chroma_db_path()):
+        return 0
+    try:
+        if client.get_collection(name).count() > 0:
+            return 0
+    except Exception:
+        pass  # Not created here yet
     
+    import chromadb
+    from chromadb.config import Settings
+    source_client = chromadb.PersistentClient(path=source_path, settings=Settings(anonymized_telemetry=False))
     try:
-        # Try to get existing collection
-        collection = client.get_collection(name=collection_name)
+        source = source_client.get_collection(name)
     except Exception:
-        # Create new collection if it doesn't exist
-        collection = client.create_collection(
-            name=collection_name,
-            metadata={
-                "description": "vibe browser tab content chunks for RAG",
-                "created_by": "vibe-memory-rag"
-            }
+        return 0
+    
+    # Same distance space and HNSW settings as the source, so stored scores keep their meaning
+    target = client.get_or_create_collection(name=name, metadata=source.metadata)
+    copied = 0
+    total = source.count()
+    while copied < total:
+        batch = source.get(limit=batch_size, offset=copied, include=["embeddings", "metadatas", "documents"])
+        if not batch["ids"]:
+            break
+        target.add(
+            ids=batch["ids"],
+            embeddings=batch["embeddings"],
+            metadatas=batch["metadatas"],
+            documents=batch["documents"]
+        )
+        copied += len(batch["ids"])
+    logger.info(f"Copied {copied} records of collection {name} from {source_path}")
+    return copied
+
+def get_hnsw_metadata(space: Optional[str] = None) -> dict:
+    """Collection metadata setting the distance space and HNSW parameters."""
+    return {
+        "hnsw:space": (space or HNSW_SPACE).lower(),
+        "hnsw:M": HNSW_M,
+        "hnsw:construction_ef": HNSW_CONSTRUCTION_EF,
+        "hnsw:search_ef": HNSW_SEARCH_EF,
+    }
+
+def get_collection_space(collection: Any) -> str:
+    """Distance space of a collection (Chroma defaults to squared L2 when unset)."""
+    return str((collection.metadata or {}).get("hnsw:space", "l2"))
+
+def distance_to_similarity(distance: float, space: str) -> float:
+    """
+    Convert a Chroma distance into a similarity where 1.0 is identical.
+    cosine/ip distances are 1 - cos/dot; l2 is the squared distance, which for the
+    unit-length OpenAI embeddings equals 2 - 2 * cos.
+    """
+    if space == "l2":
+        return 1.0 - distance / 2.0
+    return 1.0 - distance
+
+def get_active_collection_name(role: str = CONTENT_ROLE) -> str:
+    """Name of the collection currently serving a role."""
+    name = _active_names.get(role)
+    if name is not None:
+        return name
+
+    env_name, default_name = _DEFAULT_COLLECTION_ENV[role]
+    name = os.getenv(env_name, default_name)
+    try:
+        from local_db import get_local_db, get_local_db_lock
+        with get_local_db_lock():
+            db = get_local_db()
+            db.executescript(_REGISTRY_SCHEMA)
+            row = db.execute("SELECT name FROM chroma_collections WHERE role = ?", (role,)).fetchone()
+        if row is not None:
+            name = str(row["name"])
+    except Exception as e:
+        logger.error(f"Failed to read active collection for {role}: {e}")
+    _active_names[role] = name
+    return name
+
+def set_active_collection_name(role: str, name: str, space: str) -> None:
+    """Point a role at another collection (used when a migration swaps collections)."""
+    from local_db import get_local_db, get_local_db_lock
+    with get_local_db_lock():
+        db = get_local_db()
+        db.executescript(_REGISTRY_SCHEMA)
+        db.execute(
+            "INSERT OR REPLACE INTO chroma_collections (role, name, space, updated_at) VALUES (?, ?, ?, ?)",
+            (role, name, space, time.time())
         )
+        db.commit()
+    _active_names[role] = name
+    logger.info(f"Collection role {role} now served by {name} ({space})")
+
+def get_or_create_collection(name: str, description: str = "", space: Optional[str] = None) -> Any:
+    """Get a collection by name, creating it with the configured HNSW settings if missing."""
+    collection = _collections.get(name)
+    if collection is not None:
+        return collection
     
+    with _collections_lock:
+        collection = _collections.get(name)
+        if collection is not None:
+            return collection
+
+        client = get_chroma_client()
+        try:
+            # Try to get existing collection
+            collection = client.get_collection(name=name)
+        except Exception:
+            # Create new collection if it doesn't exist
+            collection = client.create_collection(
+                name=name,
+                metadata={
+                    "description": description,
+                    "created_by": "vibe-memory-rag",
+                    **get_hnsw_metadata(space)
+                }
+            )
+
+        _collections[name] = collection
     return collection
 
+def get_or_create_role_collection(role: str) -> Any:
+    """Get or create the collection currently serving a role."""
+    return get_or_create_collection(get_active_collection_name(role), _COLLECTION_DESCRIPTIONS[role])
+
+def get_or_create_partition_collection(role: str, partition: str) -> Any:
+    """Get or create a per-user partition collection of a role (named after the role's default)."""
+    env_name, default_name = _DEFAULT_COLLECTION_ENV[role]
+    return get_or_create_collection(f"{os.getenv(env_name, default_name)}{partition}", _COLLECTION_DESCRIPTIONS[role])
+
+def get_or_create_content_collection():
+    """Get or create the content chunks collection."""
+    return get_or_create_role_collection(CONTENT_ROLE)
+
+def get_or_create_page_collection() -> Any:
+    """Get or create the page vectors collection (one vector per memory)."""
+    return get_or_create_role_collection(PAGE_ROLE)
+
+def forget_collection(name: str) -> None:
+    """Drop a cached collection handle (after the collection is deleted)."""
+    _collections.pop(name, None)
+
+def drop_collection(name: str) -> None:
+    """Delete a collection and its cached handle."""
+    try:
+        get_chroma_client().delete_collection(name=name)
+    finally:
+        forget_collection(name)
+
 def setup_database():
     """Initialize ChromaDB and create necessary collections."""
     try:
@@ -76,6 +260,8 @@ def reset_chroma_client():
     """Reset the global ChromaDB client cache."""
     global _chroma_client
     _chroma_client = None
+    _collections.clear()
+    _active_names.clear()
 
 def reset_database():
     """Reset ChromaDB collections (use with caution)."""
@@ -84,13 +270,14 @@ def reset_database():
         reset_chroma_client()
         
         client = get_chroma_client()
-        collection_name = os.getenv("CHROMA_COLLECTION_NAME", "vibe_content_chunks")
         
-        # Delete existing collection
-        try:
-            client.delete_collection(name=collection_name)
-        except Exception:
-            pass
+        # Delete existing collections
+        for role in (CONTENT_ROLE, PAGE_ROLE):
+            try:
+                client.delete_collection(name=get_active_collection_name(role))
+            except Exception:
+                pass
+        _collections.clear()
         
         # Recreate collection
         collection = get_or_create_content_collection()
@@ -0,0 +1,228 @@
+"""
+Background garbage collection for content chunks.
+Reconciles the memory ids referenced by each chunk partition against Mem0, deletes chunks
+(plus page and rescoring vectors) of memories that no longer exist, including chunks saved
+under fallback ids that were never Mem0 memories, then compacts stores with many deleted
+vectors. Work is done in small batches that pause and yield while searches are running.
+"""
+import os
+import time
+import asyncio
+import logging
+from typing import Dict, Any, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Run the collector periodically in the background
+CHUNK_GC_ENABLED = os.getenv("CHUNK_GC_ENABLED", "false").lower() == "true"
+
+# Seconds between scheduled runs
+CHUNK_GC_INTERVAL = float(os.getenv("CHUNK_GC_INTERVAL", "21600"))
+
+# Candidate memory ids checked (and deleted) per batch
+CHUNK_GC_BATCH_SIZE = int(os.getenv("CHUNK_GC_BATCH_SIZE", "100"))
+
+# Pause between batches
+CHUNK_GC_BATCH_PAUSE = float(os.getenv("CHUNK_GC_BATCH_PAUSE", "0.2"))
+
+# Batches wait until no search has run for this many seconds
+CHUNK_GC_IDLE_SECONDS = float(os.getenv("CHUNK_GC_IDLE_SECONDS", "2"))
+
+# Chunks younger than this are never collected (their memory may still be settling)
+CHUNK_GC_GRACE_SECONDS = float(os.getenv("CHUNK_GC_GRACE_SECONDS", "3600"))
+
+# Compact a store once this fraction of its vectors is deleted but still on disk
+CHUNK_GC_COMPACT_RATIO = float(os.getenv("CHUNK_GC_COMPACT_RATIO", "0.2"))
+
+_gc_task: Optional[asyncio.Task] = None
+_scheduler_task: Optional[asyncio.Task] = None
+_gc_status: Dict[str, Any] = {"state": "idle"}
+
+# Vectors deleted per (role, user_id) store since its last compaction, for backends
+# that cannot report their retired vectors
+_deleted_since_compaction: Dict[tuple, int] = {}
+
+async def wait_for_idle() -> None:
+    """Sleep between batches, longer while interactive searches are running."""
+    from vector_store import seconds_since_last_query
+    await asyncio.sleep(CHUNK_GC_BATCH_PAUSE)
+    while seconds_since_last_query() < CHUNK_GC_IDLE_SECONDS:
+        await asyncio.sleep(CHUNK_GC_IDLE_SECONDS)
+
+def _measure_batch(user_id: str, memory_ids: List[str]) -> Dict[str, Dict[str, float]]:
+    """Chunk count, bytes and newest chunk time of each memory in a batch (a chunk store read)."""
+    from chroma_setup import CONTENT_ROLE
+    from vector_store import get_vector_store
+    from memory_aggregates import chunk_bytes
+
+    store = get_vector_store(CONTENT_ROLE, user_id)
+    rows = store.get(where={"memory_id": {"$in": memory_ids}}, include=["metadatas", "documents"])
+    measured: Dict[str, Dict[str, float]] = {}
+    for document, metadata in zip(rows["documents"], rows["metadatas"]):
+        entry = measured.setdefault(metadata.get("memory_id", ""), {"newest": 0.0, "bytes": 0, "chunks": 0})
+        entry["newest"] = max(entry["newest"], float(metadata.get("created_timestamp", 0.0) or 0.0))
+        entry["bytes"] += chunk_bytes(document, metadata)
+        entry["chunks"] += 1
+    return measured
+
+def _delete_orphans(user_id: str, orphans: List[str]) -> int:
+    """Delete every chunk, page vector and side-table row of orphan memories; returns warm-tier chunks removed."""
+    from chroma_setup import CONTENT_ROLE, PAGE_ROLE
+    from vector_store import get_vector_store
+    from vector_codec import get_rescore_store
+    from memory_aggregates import get_memory_aggregates
+    from retention import get_cold_store
+    from content_store import get_content_store
+
+    get_vector_store(CONTENT_ROLE, user_id).delete(where={"memory_id": {"$in": orphans}})
+    get_vector_store(PAGE_ROLE, user_id).delete(ids=orphans)
+    get_rescore_store().delete_memories(orphans)
+    get_content_store().delete_memories(orphans)
+    cold_chunks = get_cold_store().delete_memories(orphans)
+    aggregates = get_memory_aggregates()
+    for memory_id in orphans:
+        aggregates.chunks_removed(memory_id)
+    return cold_chunks
+
+async def _collect_batch(user_id: str, memory_ids: List[str], dry_run: bool) -> Dict[str, int]:
+    """Check one batch of referenced memory ids against Mem0 and delete the chunks of orphans."""
+    from chroma_setup import CONTENT_ROLE, PAGE_ROLE
+    from mem0_utils import find_unknown_memories, untrack_memory
+    from store_access import read_store, write_store, CHUNK_STORE, MEM0_STORE
+
+    measured = await read_store(CHUNK_STORE, _measure_batch, user_id, memory_ids)
+    cutoff = time.time() - CHUNK_GC_GRACE_SECONDS
+    settled = [memory_id for memory_id in memory_ids if measured.get(memory_id, {}).get("newest", 0.0) < cutoff]
+    orphans = await read_store(MEM0_STORE, find_unknown_memories, settled)
+    result = {
+        "candidates": len(settled),
+        "orphans": len(orphans),
+        "fallback_ids": sum(1 for memory_id in orphans if memory_id.startswith("memory_")),
+        "chunks": sum(measured.get(memory_id, {}).get("chunks", 0) for memory_id in orphans),
+        "content_bytes": sum(measured.get(memory_id, {}).get("bytes", 0) for memory_id in orphans),
+    }
+    if dry_run or not orphans:
+        return result
+
+    result["chunks"] += await write_store(CHUNK_STORE, _delete_orphans, user_id, orphans)
+    # Memories deleted in Mem0 directly (or never stored there) leave the local indexes too
+    for memory_id in orphans:
+        untrack_memory(memory_id)
+
+    key = (CONTENT_ROLE, user_id)
+    _deleted_since_compaction[key] = _deleted_since_compaction.get(key, 0) + result["chunks"]
+    page_key = (PAGE_ROLE, user_id)
+    _deleted_since_compaction[page_key] = _deleted_since_compaction.get(page_key, 0) + len(orphans)
+    return result
+
+async def collect_orphans(dry_run: bool = False) -> Dict[str, Any]:
+    """Reconcile every chunk partition against Mem0 and delete orphaned chunks."""
+    from vector_store import get_vector_store, list_partition_users
+    from retention import get_cold_store
+    from store_access import read_store, CHUNK_STORE
+
+    report = {}
+    for user_id in await read_store(CHUNK_STORE, list_partition_users):
+        _gc_status["state"] = f"scanning {user_id}"
+        store = get_vector_store(user_id=user_id)
+        referenced = await read_store(CHUNK_STORE, store.memory_ids)
+        # Warm-tier memories have no chunks in the store, only cold copies
+        cold_ids = set(await read_store(CHUNK_STORE, get_cold_store().memory_ids, user_id))
+        referenced += sorted(cold_ids.difference(referenced))
+
+        # Every referenced id is looked up in Mem0 itself: the local snapshot only sees
+        # deletes made through this server
+        totals = {"memories": len(referenced), "candidates": 0,
+                  "orphans": 0, "fallback_ids": 0, "chunks": 0, "content_bytes": 0}
+        for start in range(0, len(referenced), CHUNK_GC_BATCH_SIZE):
+            await wait_for_idle()
+            batch = referenced[start:start + CHUNK_GC_BATCH_SIZE]
+            result = await _collect_batch(user_id, batch, dry_run)
+            for key, value in result.items():
+                totals[key] += value
+            _gc_status["progress"] = {"user_id": user_id, "checked": start + len(batch), **totals}
+        report[user_id] = totals
+    return report
+
+async def compact_stores(force: bool = False) -> Dict[str, Any]:
+    """Compact stores whose deleted share passed CHUNK_GC_COMPACT_RATIO (or all with force)."""
+    from chroma_setup import CONTENT_ROLE, PAGE_ROLE
+    from vector_store import get_vector_store, list_partition_users
+    from store_access import read_store, write_store, CHUNK_STORE
+
+    report = {}
+    for user_id in await read_store(CHUNK_STORE, list_partition_users):
+        for role in (CONTENT_ROLE, PAGE_ROLE):
+            store = get_vector_store(role, user_id)
+            deleted = await read_store(CHUNK_STORE, store.retired_count)
+            if deleted is None:
+                deleted = _deleted_since_compaction.get((role, user_id), 0)
+            remaining = await read_store(CHUNK_STORE, store.count)
+            if not force and (not deleted or deleted < CHUNK_GC_COMPACT_RATIO * (deleted + remaining)):
+                continue
+            await wait_for_idle()
+            _gc_status["state"] = f"compacting {role} of {user_id}"
+            if store.compacts_in_batches:
+                # A Chroma rebuild copies the collection with one short write per batch
+                sizes = await asyncio.to_thread(store.compact)
+            else:
+                sizes = await write_store(CHUNK_STORE, store.compact)
+            _deleted_since_compaction.pop((role, user_id), None)
+            report[f"{user_id}/{role}"] = {**sizes, "reclaimed_bytes": sizes["bytes_before"] - sizes["bytes_after"]}
+    return report
+
+async def run_gc(dry_run: bool = False, compact: bool = False) -> Dict[str, Any]:
+    """One collection pass followed by compaction of stores that need it."""
+    started = time.time()
+    _gc_status.clear()
+    _gc_status.update({"state": "starting", "dry_run": dry_run, "started_at": started})
+    try:
+        partitions = await collect_orphans(dry_run)
+        compaction = {} if dry_run else await compact_stores(force=compact)
+        report = {
+            "dry_run": dry_run,
+            "partitions": partitions,
+            "compaction": compaction,
+            "reclaimed_content_bytes": sum(totals["content_bytes"] for totals in partitions.values()),
+            "reclaimed_disk_bytes": sum(sizes["reclaimed_bytes"] for sizes in compaction.values()),
+            "seconds": round(time.time() - started, 2)
+        }
+        _gc_status.update({"state": "completed", "report": report, "finished_at": time.time()})
+        logger.info(f"Chunk GC finished: {report}")
+        return report
+    except Exception as e:
+        logger.error(f"Chunk GC failed: {e}")
+        _gc_status.update({"state": "failed", "error": str(e)})
+        raise
+
+def start_gc(dry_run: bool = False, compact: bool = False) -> bool:
+    """Start a collection pass in the background; False if one is already running."""
+    global _gc_task
+    if _gc_task is not None and not _gc_task.done():
+        return False
+    _gc_task = asyncio.get_running_loop().create_task(run_gc(dry_run, compact))
+    _gc_task.add_done_callback(lambda task: task.cancelled() or task.exception())
+    return True
+
+async def _gc_scheduler() -> None:
+    while True:
+        await asyncio.sleep(CHUNK_GC_INTERVAL)
+        if not start_gc():
+            logger.info("Chunk GC still running, skipping scheduled run")
+
+def start_gc_scheduler() -> bool:
+    """Schedule periodic collection (when CHUNK_GC_ENABLED); True if the scheduler was started."""
+    global _scheduler_task
+    if not CHUNK_GC_ENABLED or (_scheduler_task is not None and not _scheduler_task.done()):
+        return False
+    try:
+        loop = asyncio.get_running_loop()
+    except RuntimeError:
+        return False
+    _scheduler_task = loop.create_task(_gc_scheduler())
+    logger.info(f"Chunk GC scheduled every {CHUNK_GC_INTERVAL:.0f} s")
+    return True
+
+def get_gc_status() -> Dict[str, Any]:
+    """Progress of the current or last collection pass."""
+    return dict(_gc_status)
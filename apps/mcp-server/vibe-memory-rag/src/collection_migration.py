@@ -0,0 +1,198 @@
+"""
+Background migration of Chroma collections into newly configured ones.
+Copies every record (ids, embeddings, documents, metadata) into a collection created with
+the configured distance space and HNSW parameters, reconciles writes that happened during
+the copy, then swaps the active collection. With VECTOR_STORAGE_MODE=reduced the copy
+also shrinks full-size embeddings (see vector_codec). Searches and saves keep using the old
+collection until the swap.
+"""
+import os
+import time
+import asyncio
+import logging
+import threading
+from typing import Dict, Any, List, Optional
+
+from chroma_setup import (
+    CONTENT_ROLE,
+    PAGE_ROLE,
+    HNSW_SPACE,
+    get_chroma_client,
+    get_active_collection_name,
+    set_active_collection_name,
+    get_or_create_collection,
+    get_collection_space,
+    forget_collection,
+)
+from store_access import write_store_sync, CHUNK_STORE
+
+logger = logging.getLogger(__name__)
+
+# Records copied per batch
+MIGRATION_BATCH_SIZE = int(os.getenv("CHROMA_MIGRATION_BATCH_SIZE", "500"))
+
+# Pause between batches so foreground searches keep priority
+MIGRATION_BATCH_PAUSE = float(os.getenv("CHROMA_MIGRATION_BATCH_PAUSE", "0.05"))
+
+# Keep the old collection after a successful swap (for rollback)
+MIGRATION_KEEP_OLD = os.getenv("CHROMA_MIGRATION_KEEP_OLD", "false").lower() == "true"
+
+_migration_task: Optional[asyncio.Task] = None
+_migration_status: Dict[str, Any] = {"state": "idle"}
+
+# Migrations run outside the writer thread; this keeps the background job and GC compaction apart
+_migration_lock = threading.Lock()
+
+def _all_ids(collection: Any) -> List[str]:
+    """Every id in a collection, read in batches."""
+    ids: List[str] = []
+    offset = 0
+    while True:
+        batch = collection.get(include=[], limit=MIGRATION_BATCH_SIZE, offset=offset)
+        if not batch["ids"]:
+            return ids
+        ids.extend(batch["ids"])
+        offset += len(batch["ids"])
+
+def _index_embeddings(role: str, batch: Dict[str, Any]) -> List[List[float]]:
+    """
+    Embeddings to write into the target collection. In reduced storage mode full-size
+    vectors are truncated, and full chunk vectors are kept in the rescoring side store.
+    """
+    from vector_codec import is_reduced_mode, to_index_vector, get_rescore_store, REDUCED_DIMENSIONS
+    embeddings = [list(embedding) for embedding in batch["embeddings"]]
+    if not is_reduced_mode() or not any(len(embedding) > REDUCED_DIMENSIONS for embedding in embeddings):
+        return embeddings
+    if role == CONTENT_ROLE:
+        full = [(chunk_id, (metadata or {}).get("memory_id", ""), embedding)
+                for chunk_id, metadata, embedding in zip(batch["ids"], batch["metadatas"], embeddings)
+                if len(embedding) > REDUCED_DIMENSIONS]
+        get_rescore_store().put_many(*zip(*full))
+    return [to_index_vector(embedding) for embedding in embeddings]
+
+def _copy_ids(role: str, source: Any, target: Any, ids: List[str]) -> int:
+    """Copy the given records from source to target."""
+    copied = 0
+    for start in range(0, len(ids), MIGRATION_BATCH_SIZE):
+        batch = source.get(ids=ids[start:start + MIGRATION_BATCH_SIZE], include=["embeddings", "documents", "metadatas"])
+        if batch["ids"]:
+            write_store_sync(
+                CHUNK_STORE,
+                target.upsert,
+                ids=batch["ids"],
+                embeddings=_index_embeddings(role, batch),
+                documents=batch["documents"],
+                metadatas=batch["metadatas"]
+            )
+            copied += len(batch["ids"])
+        time.sleep(MIGRATION_BATCH_PAUSE)
+    return copied
+
+def _reconcile(role: str, source: Any, target: Any) -> Dict[str, int]:
+    """Copy records missing from target and delete records no longer in source."""
+    source_ids = set(_all_ids(source))
+    target_ids = set(_all_ids(target))
+    missing = sorted(source_ids - target_ids)
+    stale = sorted(target_ids - source_ids)
+    copied = _copy_ids(role, source, target, missing)
+    for start in range(0, len(stale), MIGRATION_BATCH_SIZE):
+        write_store_sync(CHUNK_STORE, target.delete, ids=stale[start:start + MIGRATION_BATCH_SIZE])
+    return {"copied": copied, "deleted": len(stale)}
+
+def migrate_collection(role: str, space: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Migrate the collection serving `role` into a new collection with the configured
+    space/HNSW settings. Runs synchronously on a worker thread (each batch is its own
+    store write); use start_migration for the background job.
+    """
+    with _migration_lock:
+        return _migrate_collection(role, (space or HNSW_SPACE).lower())
+
+def _migrate_collection(role: str, space: str) -> Dict[str, Any]:
+    source_name = get_active_collection_name(role)
+    source = get_or_create_collection(source_name)
+    source_space = get_collection_space(source)
+
+    target_name = f"{source_name.split('__')[0]}__{space}_{int(time.time())}"
+    target = get_or_create_collection(target_name, (source.metadata or {}).get("description", ""), space)
+    started = time.time()
+    _migration_status.update({"role": role, "source": source_name, "target": target_name, "copied": 0})
+
+    # Bulk copy in offset order; writes landing meanwhile are picked up by reconciliation
+    offset = 0
+    while True:
+        batch = source.get(
+            include=["embeddings", "documents", "metadatas"],
+            limit=MIGRATION_BATCH_SIZE,
+            offset=offset
+        )
+        if not batch["ids"]:
+            break
+        write_store_sync(
+            CHUNK_STORE,
+            target.upsert,
+            ids=batch["ids"],
+            embeddings=_index_embeddings(role, batch),
+            documents=batch["documents"],
+            metadatas=batch["metadatas"]
+        )
+        offset += len(batch["ids"])
+        _migration_status["copied"] = offset
+        time.sleep(MIGRATION_BATCH_PAUSE)
+
+    before_swap = _reconcile(role, source, target)
+
+    def swap() -> Dict[str, int]:
+        # On the writer thread no write can land between the last reconcile and the swap
+        after = _reconcile(role, source, target)
+        set_active_collection_name(role, target_name, space)
+        return after
+
+    after_swap = write_store_sync(CHUNK_STORE, swap)
+
+    if not MIGRATION_KEEP_OLD:
+        try:
+            get_chroma_client().delete_collection(name=source_name)
+            forget_collection(source_name)
+        except Exception as e:
+            logger.error(f"Failed to delete old collection {source_name}: {e}")
+
+    result = {
+        "role": role,
+        "source": source_name,
+        "source_space": source_space,
+        "target": target_name,
+        "target_space": space,
+        "records": target.count(),
+        "reconciled_before_swap": before_swap,
+        "reconciled_after_swap": after_swap,
+        "old_collection_kept": MIGRATION_KEEP_OLD,
+        "seconds": round(time.time() - started, 2)
+    }
+    logger.info(f"Collection migration finished: {result}")
+    return result
+
+def _run_migrations(space: Optional[str]) -> None:
+    results = []
+    try:
+        for role in (CONTENT_ROLE, PAGE_ROLE):
+            _migration_status["state"] = f"migrating {role}"
+            results.append(migrate_collection(role, space))
+        _migration_status.update({"state": "completed", "results": results, "finished_at": time.time()})
+    except Exception as e:
+        logger.error(f"Collection migration failed: {e}")
+        _migration_status.update({"state": "failed", "error": str(e), "results": results})
+
+def start_migration(space: Optional[str] = None) -> bool:
+    """Start migrating the chunk and page collections in the background; False if one is running."""
+    global _migration_task
+    if _migration_task is not None and not _migration_task.done():
+        return False
+    _migration_status.clear()
+    _migration_status.update({"state": "starting", "space": (space or HNSW_SPACE).lower(), "started_at": time.time()})
+    _migration_task = asyncio.get_running_loop().create_task(asyncio.to_thread(_run_migrations, space))
+    return True
+
+def get_migration_status() -> Dict[str, Any]:
+    """Progress of the current or last migration."""
+    return dict(_migration_status)
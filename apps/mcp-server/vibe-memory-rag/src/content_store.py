@@ -0,0 +1,222 @@
+"""
+Normalized content layer for chunk text.
+Page-level fields (url, title, domain, timestamps) are stored once per memory and chunk
+text once per chunk, compressed with zstd (when the zstandard package is installed) or
+zlib. Vector store rows only carry the small metadata used for filtering; search results
+read their text and page fields from here after ranking.
+"""
+import os
+import zlib
+import logging
+from typing import List, Dict, Any, Optional, Sequence, Tuple
+
+from local_db import get_local_db, get_local_db_lock
+
+logger = logging.getLogger(__name__)
+
+# Chunk text compression: "auto" (zstd when installed, else zlib), "zstd" or "zlib"
+CONTENT_COMPRESSION = os.getenv("CONTENT_COMPRESSION", "auto").lower()
+
+# Compression level (empty uses the codec default: 3 for zstd, 6 for zlib)
+CONTENT_COMPRESSION_LEVEL = os.getenv("CONTENT_COMPRESSION_LEVEL", "")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS content_pages (
+    memory_id TEXT PRIMARY KEY,
+    user_id TEXT NOT NULL,
+    url TEXT NOT NULL,
+    title TEXT NOT NULL,
+    domain TEXT NOT NULL,
+    source_id TEXT NOT NULL,
+    created_timestamp REAL NOT NULL,
+    created_datetime TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_content_pages_user ON content_pages (user_id);
+CREATE TABLE IF NOT EXISTS content_chunks (
+    chunk_id TEXT PRIMARY KEY,
+    memory_id TEXT NOT NULL,
+    codec TEXT NOT NULL,
+    raw_bytes INTEGER NOT NULL,
+    blob BLOB NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_content_chunks_memory ON content_chunks (memory_id);
+"""
+
+# Global content store instance
+_content_store = None
+
+# zstd compressor/decompressor, created on first use
+_zstd: Optional[Tuple[Any, Any]] = None
+_zstd_checked = False
+
+def _get_zstd() -> Optional[Tuple[Any, Any]]:
+    """(compressor, decompressor) from zstandard, or None when it is not installed."""
+    global _zstd, _zstd_checked
+    if not _zstd_checked:
+        try:
+            import zstandard
+            level = int(CONTENT_COMPRESSION_LEVEL or 3)
+            _zstd = (zstandard.ZstdCompressor(level=level), zstandard.ZstdDecompressor())
+        except ImportError:
+            pass
+        _zstd_checked = True
+    return _zstd
+
+def compress_text(text: str) -> Tuple[str, bytes]:
+    """Compress text with the configured codec; returns (codec, blob)."""
+    raw = text.encode("utf-8")
+    if CONTENT_COMPRESSION in ("auto", "zstd"):
+        zstd = _get_zstd()
+        if zstd is not None:
+            return "zstd", zstd[0].compress(raw)
+        if CONTENT_COMPRESSION == "zstd":
+            logger.warning("CONTENT_COMPRESSION=zstd but zstandard is not installed, using zlib")
+    return "zlib", zlib.compress(raw, int(CONTENT_COMPRESSION_LEVEL or 6))
+
+def decompress_text(codec: str, blob: bytes) -> str:
+    """Inverse of compress_text for any codec a row was written with."""
+    if codec == "zstd":
+        zstd = _get_zstd()
+        if zstd is None:
+            raise RuntimeError("Chunk text is zstd-compressed but zstandard is not installed")
+        return str(zstd[1].decompress(blob), "utf-8")
+    return zlib.decompress(blob).decode("utf-8")
+
+class ContentStore:
+    """Page rows and compressed chunk text, keyed by memory id and chunk id."""
+
+    def __init__(self) -> None:
+        self._lock = get_local_db_lock()
+        with self._lock:
+            get_local_db().executescript(_SCHEMA)
+
+    def put_page(
+        self,
+        memory_id: str,
+        user_id: str,
+        url: str,
+        title: str,
+        source_id: str,
+        created_timestamp: float,
+        created_datetime: str
+    ) -> None:
+        from memory_aggregates import memory_dimensions
+        domain = memory_dimensions({"url": url})["domain"]
+        with self._lock:
+            db = get_local_db()
+            db.execute(
+                "INSERT OR REPLACE INTO content_pages "
+                "(memory_id, user_id, url, title, domain, source_id, created_timestamp, created_datetime) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (memory_id, user_id, url, title, domain, source_id, created_timestamp, created_datetime)
+            )
+            db.commit()
+
+    def put_chunks(self, memory_id: str, chunk_ids: Sequence[str], texts: Sequence[str]) -> int:
+        """Store chunk texts; returns their uncompressed size in bytes."""
+        rows = []
+        for chunk_id, text in zip(chunk_ids, texts):
+            codec, blob = compress_text(text)
+            rows.append((chunk_id, memory_id, codec, len(text.encode("utf-8")), blob))
+        with self._lock:
+            db = get_local_db()
+            db.executemany(
+                "INSERT OR REPLACE INTO content_chunks (chunk_id, memory_id, codec, raw_bytes, blob) VALUES (?, ?, ?, ?, ?)",
+                rows
+            )
+            db.commit()
+        return sum(row[3] for row in rows)
+
+    def get_texts(self, chunk_ids: Sequence[str]) -> Dict[str, str]:
+        if not chunk_ids:
+            return {}
+        with self._lock:
+            rows = get_local_db().execute(
+                f"SELECT chunk_id, codec, blob FROM content_chunks WHERE chunk_id IN ({','.join('?' * len(chunk_ids))})",
+                list(chunk_ids)
+            ).fetchall()
+        return {row["chunk_id"]: decompress_text(row["codec"], row["blob"]) for row in rows}
+
+    def get_pages(self, memory_ids: Sequence[str]) -> Dict[str, Dict[str, Any]]:
+        if not memory_ids:
+            return {}
+        with self._lock:
+            rows = get_local_db().execute(
+                f"SELECT * FROM content_pages WHERE memory_id IN ({','.join('?' * len(memory_ids))})",
+                list(memory_ids)
+            ).fetchall()
+        return {row["memory_id"]: dict(row) for row in rows}
+
+    def delete_memories(self, memory_ids: Sequence[str]) -> int:
+        """Delete pages and chunk text of memories; returns the number of chunks removed."""
+        deleted = 0
+        with self._lock:
+            db = get_local_db()
+            for start in range(0, len(memory_ids), 500):
+                batch = list(memory_ids[start:start + 500])
+                placeholders = ",".join("?" * len(batch))
+                deleted += db.execute(f"DELETE FROM content_chunks WHERE memory_id IN ({placeholders})", batch).rowcount
+                db.execute(f"DELETE FROM content_pages WHERE memory_id IN ({placeholders})", batch)
+            db.commit()
+        return deleted
+
+    def delete_user(self, user_id: str) -> int:
+        """Delete every page and chunk text of a user; returns the number of chunks removed."""
+        with self._lock:
+            db = get_local_db()
+            deleted = db.execute(
+                "DELETE FROM content_chunks WHERE memory_id IN (SELECT memory_id FROM content_pages WHERE user_id = ?)",
+                (user_id,)
+            ).rowcount
+            db.execute("DELETE FROM content_pages WHERE user_id = ?", (user_id,))
+            db.commit()
+            return deleted
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            db = get_local_db()
+            pages = db.execute("SELECT COUNT(*) AS pages FROM content_pages").fetchone()["pages"]
+            rows = db.execute(
+                "SELECT codec, COUNT(*) AS chunks, COALESCE(SUM(raw_bytes), 0) AS raw_bytes, "
+                "COALESCE(SUM(LENGTH(blob)), 0) AS stored_bytes FROM content_chunks GROUP BY codec"
+            ).fetchall()
+        return {
+            "pages": pages,
+            "chunks": sum(row["chunks"] for row in rows),
+            "raw_bytes": sum(row["raw_bytes"] for row in rows),
+            "stored_bytes": sum(row["stored_bytes"] for row in rows),
+            "codecs": {row["codec"]: row["chunks"] for row in rows}
+        }
+
+def get_content_store() -> ContentStore:
+    """Get the content store (singleton)."""
+    global _content_store
+    if _content_store is None:
+        _content_store = ContentStore()
+    return _content_store
+
+def attach_content(results: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Fill in text, url and title of chunk results stored in the normalized layout (chunks
+    written before it carry them in their metadata and are left as they are).
+    """
+    missing_text = [result["id"] for result in results if not result.get("content")]
+    missing_page = list({
+        result["metadata"]["memory_id"] for result in results
+        if not result.get("url") and result.get("metadata", {}).get("memory_id")
+    })
+    if not missing_text and not missing_page:
+        return results
+
+    store = get_content_store()
+    texts = store.get_texts(missing_text)
+    pages = store.get_pages(missing_page)
+    for result in results:
+        if not result.get("content"):
+            result["content"] = texts.get(result["id"], "")
+        page = pages.get(result.get("metadata", {}).get("memory_id", ""))
+        if page and not result.get("url"):
+            result["url"] = page["url"]
+            result["title"] = result.get("title") or page["title"]
+            result["created_datetime"] = result.get("created_datetime") or page["created_datetime"]
+    return results
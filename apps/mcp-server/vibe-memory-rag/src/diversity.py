@@ -0,0 +1,162 @@
+"""
+Near-duplicate suppression for retrieved chunks.
+Overlapping chunks and repeated visits to similar pages produce candidates with almost
+identical text; these selectors drop them before reranking so the top-k stays diverse.
+"""
+import os
+import re
+import logging
+from collections import OrderedDict
+from typing import List, Dict, Any, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+DIVERSITY_MODES = ("none", "simhash", "mmr")
+
+# Mode used when a caller does not pass one
+DEFAULT_DIVERSITY_MODE = os.getenv("CHUNK_DIVERSITY_MODE", "none").lower()
+
+# Candidates fetched per requested chunk when diversity is on
+DIVERSITY_OVERSAMPLE = int(os.getenv("DIVERSITY_OVERSAMPLE", "2"))
+
+# SimHash fingerprints within this many differing bits are near duplicates
+SIMHASH_MAX_DISTANCE = int(os.getenv("SIMHASH_MAX_DISTANCE", "6"))
+
+# MMR: embedding cosine at or above this is a near duplicate (dropped outright)
+MMR_DUPLICATE_SIMILARITY = float(os.getenv("MMR_DUPLICATE_SIMILARITY", "0.95"))
+
+# MMR: weight of relevance vs. novelty
+MMR_LAMBDA = float(os.getenv("MMR_LAMBDA", "0.7"))
+
+# Max chunk fingerprints kept in memory
+FINGERPRINT_CACHE_SIZE = 10000
+
+_WORD_PATTERN = re.compile(r"\w+")
+
+_HASH_MASK = (1 << 64) - 1
+
+# (chunk id, content length) -> SimHash fingerprint
+_fingerprint_cache: "OrderedDict[Tuple[str, int], int]" = OrderedDict()
+
+# translate() tables mapping a byte to 1 if bit j is set, else 0
+_BIT_TABLES = [bytes((value >> bit) & 1 for value in range(256)) for bit in range(8)]
+
+def resolve_diversity_mode(mode: Optional[str]) -> str:
+    """Normalize a requested diversity mode, falling back to the default."""
+    resolved = (mode or DEFAULT_DIVERSITY_MODE).lower()
+    if resolved not in DIVERSITY_MODES:
+        raise ValueError(f"Invalid diversity mode '{mode}', expected one of: {', '.join(DIVERSITY_MODES)}")
+    return resolved
+
+def simhash(text: str, shingle_size: int = 3) -> int:
+    """64-bit SimHash of word shingles (stable within a process)."""
+    words = _WORD_PATTERN.findall(text.lower())
+    if len(words) < shingle_size:
+        unique_shingles = {tuple(words)} if words else set()
+    else:
+        unique_shingles = set(zip(*(words[offset:] for offset in range(shingle_size))))
+
+    if not unique_shingles:
+        return 0
+
+    # Bit-vote across shingle hashes: each of the 64 bits is set if most hashes set it.
+    # Votes are counted per byte position with bytes.translate/count to stay in C.
+    # Built-in string hashing is salted per process, which is fine: fingerprints are only
+    # compared within one search and never persisted
+    digests = b"".join((hash(shingle) & _HASH_MASK).to_bytes(8, "big") for shingle in unique_shingles)
+
+    fingerprint = 0
+    for byte_index in range(8):
+        column = digests[byte_index::8]
+        for bit in range(8):
+            if column.translate(_BIT_TABLES[bit]).count(1) * 2 > len(unique_shingles):
+                fingerprint |= 1 << ((7 - byte_index) * 8 + bit)
+    return fingerprint
+
+def _chunk_fingerprint(chunk: Dict[str, Any]) -> int:
+    """SimHash of a chunk's content, cached by chunk id (chunk text never changes)."""
+    content = chunk.get("content", "")
+    cache_key = (chunk.get("id", ""), len(content))
+    fingerprint = _fingerprint_cache.get(cache_key)
+    if fingerprint is None:
+        fingerprint = simhash(content)
+        _fingerprint_cache[cache_key] = fingerprint
+        if len(_fingerprint_cache) > FINGERPRINT_CACHE_SIZE:
+            _fingerprint_cache.popitem(last=False)
+    return fingerprint
+
+def select_simhash(chunks: List[Dict[str, Any]], limit: int) -> Tuple[List[Dict[str, Any]], int]:
+    """
+    Keep chunks in rank order, skipping any whose text fingerprint is within
+    SIMHASH_MAX_DISTANCE bits of a chunk already kept.
+    Returns (kept chunks, number of near duplicates removed).
+    """
+    kept: List[Dict[str, Any]] = []
+    fingerprints: List[int] = []
+    removed = 0
+    for chunk in chunks:
+        if len(kept) >= limit:
+            break
+        fingerprint = _chunk_fingerprint(chunk)
+        if any(bin(fingerprint ^ other).count("1") <= SIMHASH_MAX_DISTANCE for other in fingerprints):
+            removed += 1
+            continue
+        kept.append(chunk)
+        fingerprints.append(fingerprint)
+    return kept, removed
+
+def select_mmr(
+    chunks: List[Dict[str, Any]],
+    embeddings: Sequence[Sequence[float]],
+    limit: int
+) -> Tuple[List[Dict[str, Any]], int]:
+    """
+    Maximal marginal relevance over the embeddings already fetched with the candidates.
+    Relevance is each chunk's similarity score; candidates at or above
+    MMR_DUPLICATE_SIMILARITY to a selected chunk are dropped as near duplicates.
+    Returns (selected chunks, number of near duplicates removed).
+    """
+    if not chunks:
+        return [], 0
+
+    import numpy as np
+
+    vectors = np.asarray(embeddings, dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    vectors = vectors / np.where(norms == 0, 1.0, norms)
+    relevance = np.asarray([chunk.get("similarity", 0.0) for chunk in chunks], dtype=np.float32)
+
+    selected: List[int] = []
+    # Highest similarity of each candidate to anything selected so far
+    max_similarity = np.full(len(chunks), -1.0, dtype=np.float32)
+    available = np.ones(len(chunks), dtype=bool)
+    removed = 0
+
+    while len(selected) < limit and available.any():
+        scores = MMR_LAMBDA * relevance - (1.0 - MMR_LAMBDA) * np.maximum(max_similarity, 0.0)
+        scores[~available] = -np.inf
+        best = int(np.argmax(scores))
+        selected.append(best)
+        available[best] = False
+
+        max_similarity = np.maximum(max_similarity, vectors @ vectors[best])
+        duplicates = available & (max_similarity >= MMR_DUPLICATE_SIMILARITY)
+        removed += int(duplicates.sum())
+        available &= ~duplicates
+
+    return [chunks[index] for index in selected], removed
+
+def diversify_chunks(
+    chunks: List[Dict[str, Any]],
+    mode: str,
+    limit: int,
+    embeddings: Optional[Sequence[Sequence[float]]] = None
+) -> Tuple[List[Dict[str, Any]], int]:
+    """Apply a diversity mode to ranked candidates. Returns (chunks, removed count)."""
+    if mode == "mmr" and embeddings is not None and len(embeddings) == len(chunks):
+        return select_mmr(chunks, embeddings, limit)
+    if mode in ("simhash", "mmr"):
+        if mode == "mmr":
+            logger.warning("MMR requested without candidate embeddings, using SimHash")
+        return select_simhash(chunks, limit)
+    return chunks[:limit], 0
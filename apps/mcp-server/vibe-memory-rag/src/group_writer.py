@@ -0,0 +1,204 @@
+"""
+Group-commit writer for chunk and page vector inserts.
+Concurrent ingestions hand their writes to one writer task, which coalesces everything
+queued (up to WRITE_GROUP_MAX_RECORDS, waiting at most WRITE_GROUP_MAX_DELAY_MS) into one
+add/upsert per store. Requests that arrive while a group is being written form the next
+group, so batching needs no added delay under load. The persistent client commits one
+transaction and applies one index update per group instead of one per ingestion. Each
+request stays all-or-nothing (it is never split across groups), and its caller resumes
+only once it is committed.
+"""
+import os
+import asyncio
+import logging
+from dataclasses import dataclass
+from typing import List, Dict, Any, Optional
+
+logger = logging.getLogger(__name__)
+
+# Route vector store writes of ingestions through the group-commit writer
+WRITE_GROUP_COMMIT = os.getenv("WRITE_GROUP_COMMIT", "true").lower() == "true"
+
+# Records after which a group is committed without waiting for more requests
+WRITE_GROUP_MAX_RECORDS = int(os.getenv("WRITE_GROUP_MAX_RECORDS", "1000"))
+
+# Extra time the first request of a group waits for others to join (0 = only what is already queued)
+WRITE_GROUP_MAX_DELAY_MS = float(os.getenv("WRITE_GROUP_MAX_DELAY_MS", "0"))
+
+@dataclass
+class _WriteRequest:
+    role: str
+    user_id: str
+    operation: str
+    ids: List[str]
+    embeddings: List[Any]
+    documents: List[str]
+    metadatas: List[Dict[str, Any]]
+    future: asyncio.Future
+
+class GroupCommitWriter:
+    """Single writer task that coalesces queued vector writes into group commits."""
+
+    def __init__(self) -> None:
+        self._queue: Optional[asyncio.Queue[_WriteRequest]] = None
+        self._task: Optional[asyncio.Task] = None
+        self._stats = {"groups": 0, "requests": 0, "records": 0, "largest_group": 0, "fallbacks": 0}
+
+    def _ensure_running(self) -> asyncio.Queue[_WriteRequest]:
+        """Start the writer task on the running loop if needed; returns its queue."""
+        if (self._queue is None or self._task is None or self._task.done()
+                or self._task.get_loop() is not asyncio.get_running_loop()):
+            self._queue = asyncio.Queue()
+            self._task = asyncio.get_running_loop().create_task(self._run(self._queue))
+        return self._queue
+
+    async def write(
+        self,
+        role: str,
+        user_id: str,
+        ids: List[str],
+        embeddings: List[Any],
+        documents: List[str],
+        metadatas: List[Dict[str, Any]],
+        operation: str = "add"
+    ) -> None:
+        """Queue a write and wait until the group containing it is committed."""
+        if not ids:
+            return
+        queue = self._ensure_running()
+        future = asyncio.get_running_loop().create_future()
+        await queue.put(_WriteRequest(
+            role, user_id, operation, list(ids), list(embeddings), list(documents), list(metadatas), future
+        ))
+        await future
+
+    async def _run(self, queue: asyncio.Queue[_WriteRequest]) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            group = [await queue.get()]
+            records = len(group[0].ids)
+            deadline = loop.time() + WRITE_GROUP_MAX_DELAY_MS / 1000.0
+            while records < WRITE_GROUP_MAX_RECORDS:
+                if not queue.empty():
+                    request = queue.get_nowait()
+                else:
+                    remaining = deadline - loop.time()
+                    if remaining <= 0:
+                        break
+                    try:
+                        request = await asyncio.wait_for(queue.get(), remaining)
+                    except asyncio.TimeoutError:
+                        break
+                group.append(request)
+                records += len(request.ids)
+            try:
+                await self._commit(group)
+            except Exception as e:
+                # _commit settles every future itself; this only guards the loop
+                logger.error(f"Group commit failed: {e}")
+            finally:
+                for _ in group:
+                    queue.task_done()
+
+    async def _commit(self, group: List[_WriteRequest]) -> None:
+        """One add/upsert per (store, operation), falling back to per-request writes on error."""
+        from vector_store import get_vector_store
+        from store_access import write_store, CHUNK_STORE
+
+        batches: Dict[tuple, List[_WriteRequest]] = {}
+        for request in group:
+            batches.setdefault((request.role, request.user_id, request.operation), []).append(request)
+
+        for (role, user_id, operation), requests in batches.items():
+            store = get_vector_store(role, user_id)
+            write = store.add if operation == "add" else store.upsert
+            ids: List[str] = []
+            embeddings: List[Any] = []
+            documents: List[str] = []
+            metadatas: List[Dict[str, Any]] = []
+            for request in requests:
+                ids.extend(request.ids)
+                embeddings.extend(request.embeddings)
+                documents.extend(request.documents)
+                metadatas.extend(request.metadatas)
+            if operation == "upsert" and len(set(ids)) < len(ids):
+                # Later requests win, as if the upserts had run one after another
+                latest = {chunk_id: position for position, chunk_id in enumerate(ids)}
+                keep = sorted(latest.values())
+                ids = [ids[position] for position in keep]
+                embeddings = [embeddings[position] for position in keep]
+                documents = [documents[position] for position in keep]
+                metadatas = [metadatas[position] for position in keep]
+
+            try:
+                await write_store(CHUNK_STORE, write, ids=ids, embeddings=embeddings, documents=documents, metadatas=metadatas)
+                for request in requests:
+                    if not request.future.done():
+                        request.future.set_result(None)
+            except Exception as e:
+                if len(requests) == 1:
+                    if not requests[0].future.done():
+                        requests[0].future.set_exception(e)
+                    continue
+                # Isolate the failing request(s) so the rest of the group still commits
+                logger.warning(f"Group write of {len(requests)} requests failed ({e}), retrying one by one")
+                self._stats["fallbacks"] += 1
+                for request in requests:
+                    try:
+                        await write_store(
+                            CHUNK_STORE, write, ids=request.ids, embeddings=request.embeddings,
+                            documents=request.documents, metadatas=request.metadatas
+                        )
+                        if not request.future.done():
+                            request.future.set_result(None)
+                    except Exception as request_error:
+                        if not request.future.done():
+                            request.future.set_exception(request_error)
+
+        self._stats["groups"] += 1
+        self._stats["requests"] += len(group)
+        group_records = sum(len(request.ids) for request in group)
+        self._stats["records"] += group_records
+        self._stats["largest_group"] = max(self._stats["largest_group"], group_records)
+
+    async def drain(self) -> None:
+        """Wait until every queued write is committed."""
+        if self._queue is not None and self._task is not None and not self._task.done():
+            await self._queue.join()
+
+    def stats(self) -> Dict[str, Any]:
+        groups = self._stats["groups"]
+        return {
+            **self._stats,
+            "pending": self._queue.qsize() if self._queue is not None else 0,
+            "avg_records_per_group": round(self._stats["records"] / groups, 1) if groups else 0.0
+        }
+
+# Global writer instance
+_group_writer: Optional[GroupCommitWriter] = None
+
+def get_group_writer() -> GroupCommitWriter:
+    """Get the group-commit writer (singleton)."""
+    global _group_writer
+    if _group_writer is None:
+        _group_writer = GroupCommitWriter()
+    return _group_writer
+
+async def write_vectors(
+    role: str,
+    user_id: str,
+    ids: List[str],
+    embeddings: List[Any],
+    documents: List[str],
+    metadatas: List[Dict[str, Any]],
+    operation: str = "add"
+) -> None:
+    """Add or upsert vectors, through the group-commit writer unless WRITE_GROUP_COMMIT is off."""
+    if WRITE_GROUP_COMMIT:
+        await get_group_writer().write(role, user_id, ids, embeddings, documents, metadatas, operation)
+        return
+    from vector_store import get_vector_store
+    from store_access import write_store, CHUNK_STORE
+    store = get_vector_store(role, user_id)
+    write = store.add if operation == "add" else store.upsert
+    await write_store(CHUNK_STORE, write, ids=ids, embeddings=embeddings, documents=documents, metadatas=metadatas)
@@ -0,0 +1,233 @@
+"""
+Durable journal of tab memory ingestion jobs.
+save_tab_memory appends a job with the page content before scheduling background work;
+every stage (Mem0 record of fast-ack saves, summary, synopsis record, chunk embeddings,
+chunk writes) appends its result when it completes. After a restart, jobs without a final
+entry are resumed from their last completed stage: summaries and embeddings are read back
+from the journal instead of being recomputed, and chunk writes are upserts under
+deterministic ids, so repeating one never duplicates rows. Jobs that fail while the server
+runs are retried in-process; a job out of attempts is marked failed and abandoned.
+"""
+import os
+import json
+import time
+import array
+import base64
+import asyncio
+import logging
+from typing import List, Dict, Any, Optional, Callable, Awaitable
+
+from local_db import get_local_db, get_local_db_lock
+
+logger = logging.getLogger(__name__)
+
+# Journal ingestion jobs and resume unfinished ones after a restart
+INGESTION_JOURNAL = os.getenv("INGESTION_JOURNAL", "true").lower() == "true"
+
+# Attempts after which an unfinished job is given up
+INGESTION_MAX_ATTEMPTS = int(os.getenv("INGESTION_MAX_ATTEMPTS", "3"))
+
+# Seconds before a failed job is retried in-process (multiplied by its attempts so far)
+INGESTION_RETRY_DELAY = float(os.getenv("INGESTION_RETRY_DELAY", "30"))
+
+# Finished jobs stay in the journal this long (for diagnostics) before they are pruned
+INGESTION_JOURNAL_KEEP_HOURS = float(os.getenv("INGESTION_JOURNAL_KEEP_HOURS", "24"))
+
+# Stages, in pipeline order
+QUEUED = "queued"
+STARTED = "started"
+MEM0_SAVED = "mem0_saved"
+SUMMARIZED = "summarized"
+SYNOPSIS_SAVED = "synopsis_saved"
+EMBEDDED = "embedded"
+CHUNKS_WRITTEN = "chunks_written"
+ERROR = "error"
+DONE = "done"
+FAILED = "failed"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS ingestion_journal (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    job_id TEXT NOT NULL,
+    user_id TEXT NOT NULL,
+    stage TEXT NOT NULL,
+    recorded_at REAL NOT NULL,
+    codec TEXT,
+    payload BLOB
+);
+CREATE INDEX IF NOT EXISTS idx_ingestion_journal_job ON ingestion_journal (job_id, seq);
+CREATE INDEX IF NOT EXISTS idx_ingestion_journal_stage ON ingestion_journal (stage, recorded_at);
+"""
+
+# Global journal instance
+_ingestion_journal = None
+_recovery_task: Optional[asyncio.Task] = None
+
+def _encode_embeddings(embeddings: List[List[float]]) -> List[str]:
+    """float32 bytes as base64 (a quarter of the JSON size, same precision as the stores)."""
+    return [base64.b64encode(array.array("f", embedding).tobytes()).decode("ascii") for embedding in embeddings]
+
+def _decode_embeddings(encoded: List[str]) -> List[List[float]]:
+    return [array.array("f", base64.b64decode(value)).tolist() for value in encoded]
+
+class IngestionJournal:
+    """Append-only stage log of ingestion jobs in the local SQLite database."""
+
+    def __init__(self) -> None:
+        self._lock = get_local_db_lock()
+        with self._lock:
+            get_local_db().executescript(_SCHEMA)
+
+    def append(self, job_id: str, user_id: str, stage: str, data: Optional[Dict[str, Any]] = None) -> None:
+        """Record a completed stage; committed before returning, so it survives a crash."""
+        if not INGESTION_JOURNAL:
+            return
+        codec, blob = None, None
+        if data is not None:
+            from content_store import compress_text
+            if stage == EMBEDDED:
+                data = {**data, "embeddings": _encode_embeddings(data["embeddings"])}
+            codec, blob = compress_text(json.dumps(data, ensure_ascii=False))
+        with self._lock:
+            db = get_local_db()
+            db.execute(
+                "INSERT INTO ingestion_journal (job_id, user_id, stage, recorded_at, codec, payload) VALUES (?, ?, ?, ?, ?, ?)",
+                (job_id, user_id, stage, time.time(), codec, blob)
+            )
+            db.commit()
+
+    def stages(self, job_id: str) -> Dict[str, Dict[str, Any]]:
+        """Latest data of every stage recorded for a job (stages without data map to {})."""
+        from content_store import decompress_text
+        with self._lock:
+            rows = get_local_db().execute(
+                "SELECT stage, codec, payload FROM ingestion_journal WHERE job_id = ? ORDER BY seq", (job_id,)
+            ).fetchall()
+        stages = {}
+        for row in rows:
+            data = json.loads(decompress_text(row["codec"], row["payload"])) if row["payload"] is not None else {}
+            if row["stage"] == EMBEDDED:
+                data["embeddings"] = _decode_embeddings(data["embeddings"])
+            stages[row["stage"]] = data
+        return stages
+
+    def attempts(self, job_id: str) -> int:
+        """Times a job was started."""
+        with self._lock:
+            row = get_local_db().execute(
+                "SELECT COUNT(*) FROM ingestion_journal WHERE job_id = ? AND stage = ?", (job_id, STARTED)
+            ).fetchone()
+        return int(row[0])
+
+    def last_seq(self) -> int:
+        with self._lock:
+            row = get_local_db().execute("SELECT COALESCE(MAX(seq), 0) FROM ingestion_journal").fetchone()
+        return int(row[0])
+
+    def unfinished(self, max_seq: Optional[int] = None) -> List[Dict[str, Any]]:
+        """
+        Jobs without a done/failed entry, oldest first, with their attempt counts.
+        max_seq limits the result to jobs queued up to that journal position.
+        """
+        with self._lock:
+            rows = get_local_db().execute(
+                "SELECT job_id, user_id, MIN(seq) AS first_seq, "
+                "SUM(stage = ?) AS attempts, SUM(stage IN (?, ?)) AS finished "
+                "FROM ingestion_journal GROUP BY job_id HAVING finished = 0 AND first_seq <= ? ORDER BY first_seq",
+                (STARTED, DONE, FAILED, max_seq if max_seq is not None else 2 ** 62)
+            ).fetchall()
+        return [{"job_id": row["job_id"], "user_id": row["user_id"], "attempts": row["attempts"]} for row in rows]
+
+    def prune(self, older_than: float) -> int:
+        """Drop every entry of jobs that finished before older_than; returns the jobs removed."""
+        with self._lock:
+            db = get_local_db()
+            job_ids = [row["job_id"] for row in db.execute(
+                "SELECT DISTINCT job_id FROM ingestion_journal WHERE stage IN (?, ?) AND recorded_at < ?",
+                (DONE, FAILED, older_than)
+            ).fetchall()]
+            for start in range(0, len(job_ids), 500):
+                batch = job_ids[start:start + 500]
+                db.execute(
+                    f"DELETE FROM ingestion_journal WHERE job_id IN ({','.join('?' * len(batch))})", batch
+                )
+            db.commit()
+        return len(job_ids)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            row = get_local_db().execute(
+                "SELECT COUNT(DISTINCT job_id) AS jobs, COUNT(*) AS entries, "
+                "COALESCE(SUM(LENGTH(payload)), 0) AS payload_bytes, "
+                "SUM(stage = ?) AS done, SUM(stage = ?) AS failed FROM ingestion_journal",
+                (DONE, FAILED)
+            ).fetchone()
+        return {
+            "enabled": INGESTION_JOURNAL,
+            "jobs": row["jobs"],
+            "entries": row["entries"],
+            "payload_bytes": row["payload_bytes"],
+            "done": row["done"] or 0,
+            "failed": row["failed"] or 0,
+            "unfinished": len(self.unfinished())
+        }
+
+def get_ingestion_journal() -> IngestionJournal:
+    """Get the ingestion journal (singleton)."""
+    global _ingestion_journal
+    if _ingestion_journal is None:
+        _ingestion_journal = IngestionJournal()
+    return _ingestion_journal
+
+async def resume_ingestion_jobs(
+    resume: Callable[[str, str, Dict[str, Dict[str, Any]]], Awaitable[None]],
+    max_seq: Optional[int] = None,
+    abandon: Optional[Callable[[str, str], Awaitable[None]]] = None
+) -> Dict[str, int]:
+    """
+    Resume every unfinished job queued up to max_seq, one at a time, with
+    resume(job_id, user_id, stages). Jobs that already used INGESTION_MAX_ATTEMPTS
+    attempts are marked failed instead, and abandon(job_id, user_id) undoes what
+    their save left behind.
+    """
+    journal = get_ingestion_journal()
+    pruned = journal.prune(time.time() - INGESTION_JOURNAL_KEEP_HOURS * 3600)
+    report = {"resumed": 0, "given_up": 0, "pruned": pruned}
+    for job in journal.unfinished(max_seq):
+        if job["attempts"] >= INGESTION_MAX_ATTEMPTS:
+            logger.warning(f"Giving up ingestion of {job['job_id']} after {job['attempts']} attempts")
+            journal.append(job["job_id"], job["user_id"], FAILED, {"reason": "max attempts"})
+            if abandon is not None:
+                await abandon(job["job_id"], job["user_id"])
+            report["given_up"] += 1
+            continue
+        stages = journal.stages(job["job_id"])
+        if QUEUED not in stages:
+            journal.append(job["job_id"], job["user_id"], FAILED, {"reason": "no queued entry"})
+            if abandon is not None:
+                await abandon(job["job_id"], job["user_id"])
+            report["given_up"] += 1
+            continue
+        logger.info(f"Resuming ingestion of {job['job_id']} after {', '.join(stages)}")
+        await resume(job["job_id"], job["user_id"], stages)
+        report["resumed"] += 1
+    if report["resumed"] or report["given_up"]:
+        logger.info(f"Ingestion recovery finished: {report}")
+    return report
+
+def start_ingestion_recovery(
+    resume: Callable[[str, str, Dict[str, Dict[str, Any]]], Awaitable[None]],
+    abandon: Optional[Callable[[str, str], Awaitable[None]]] = None
+) -> bool:
+    """Resume unfinished jobs in the background once per process; True if recovery was started."""
+    global _recovery_task
+    if not INGESTION_JOURNAL or _recovery_task is not None:
+        return False
+    try:
+        loop = asyncio.get_running_loop()
+    except RuntimeError:
+        return False
+    # Jobs queued from now on are run by this process already
+    _recovery_task = loop.create_task(resume_ingestion_jobs(resume, get_ingestion_journal().last_seq(), abandon))
+    _recovery_task.add_done_callback(lambda task: task.cancelled() or task.exception())
+    return True
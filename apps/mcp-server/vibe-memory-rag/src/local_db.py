@@ -0,0 +1,58 @@
+"""
+SQLite side store for local indexes.
+Holds small, query-friendly tables next to Mem0 and ChromaDB (one shared connection).
+"""
+import os
+import sqlite3
+import threading
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Global connection cache to prevent multiple handles on the same file
+_connection = None
+_lock = threading.RLock()
+
+def get_local_db_path() -> str:
+    """Get the path of the local SQLite index database."""
+    return os.getenv("VIBE_INDEX_DB_PATH", "./data/vibe_index.db")
+
+def get_local_db() -> sqlite3.Connection:
+    """Get the shared SQLite connection (singleton)."""
+    global _connection
+
+    if _connection is not None:
+        return _connection
+
+    with _lock:
+        if _connection is None:
+            db_path = get_local_db_path()
+
+            # Ensure directory exists
+            db_dir = os.path.dirname(os.path.abspath(db_path))
+            os.makedirs(db_dir, exist_ok=True)
+
+            connection = sqlite3.connect(db_path, check_same_thread=False)
+            connection.row_factory = sqlite3.Row
+            # WAL keeps readers unblocked while background ingestion writes
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            _connection = connection
+            logger.info(f"Local index database opened at {db_path}")
+
+    return _connection
+
+def get_local_db_lock() -> threading.RLock:
+    """Lock guarding multi-statement operations on the shared connection."""
+    return _lock
+
+def reset_local_db() -> None:
+    """Close and reset the global SQLite connection cache."""
+    global _connection
+    with _lock:
+        if _connection is not None:
+            try:
+                _connection.close()
+            except Exception as e:
+                logger.warning(f"Error closing local index database: {e}")
+        _connection = None
@@ -7,10 +7,39 @@ import os
 import json
 import logging
 import asyncio
+import time
 from datetime import datetime
+from typing import TYPE_CHECKING, Any
 from dotenv import load_dotenv
 from fastmcp import FastMCP
 
+if TYPE_CHECKING:
+    # Bound at runtime by load_utils / load_mem0_utils
+    from utils import (
+        smart_chunk_content,
+        embed_content_chunks,
+        write_content_chunks,
+        search_content_chunks,
+        rerank_results,
+        generate_memory_summary
+    )
+    from mem0_utils import (
+        add_browser_memory,
+        stage_browser_memory,
+        commit_browser_memory,
+        merge_browser_memory_synopsis,
+        search_browser_memories,
+        get_recent_browser_memories,
+        delete_memory,
+        clear_all_memories,
+        get_mem0_client,
+        get_memories_by_recency,
+        track_memory,
+        track_added_memories,
+        get_user_snapshot
+    )
+    from memory_record import MemoryRecord
+
 # Load environment variables
 load_dotenv()
 
@@ -36,74 +65,171 @@ def load_utils():
     """Lazy load utilities to reduce startup time."""
     global _utils_loaded
     if not _utils_loaded:
-        global smart_chunk_content, add_content_chunks_to_chroma, search_content_chunks, rerank_results, generate_memory_summary, get_or_create_content_collection
+        global smart_chunk_content, embed_content_chunks, write_content_chunks, search_content_chunks, rerank_results, generate_memory_summary
         from utils import (
             smart_chunk_content,
-            add_content_chunks_to_chroma,
+            embed_content_chunks,
+            write_content_chunks,
             search_content_chunks,
             rerank_results,
             generate_memory_summary
         )
-        from chroma_setup import get_or_create_content_collection
         _utils_loaded = True
+        # Started at server startup already; this covers servers run without __main__
+        start_background_jobs()
+
+def start_background_jobs() -> None:
+    """
+    Start the GC and retention schedulers, move pre-partition chunks to their owners and
+    resume unfinished ingestion jobs (once, on the server's loop).
+    """
+    from chunk_gc import start_gc_scheduler
+    from retention import start_retention_scheduler
+    from ingestion_journal import start_ingestion_recovery
+    from partition_migration import start_partition_migration
+    start_gc_scheduler()
+    start_retention_scheduler()
+    start_partition_migration()
+    # Jobs cut off by a previous shutdown or crash continue from their last stage
+    start_ingestion_recovery(_resume_tab_memory_job, _abandon_tab_memory_job)
 
 def load_mem0_utils():
     """Lazy load Mem0 utilities to reduce startup time."""
     global _mem0_utils_loaded
     if not _mem0_utils_loaded:
-        global add_browser_memory, search_browser_memories, get_recent_browser_memories, delete_memory, clear_all_memories, get_mem0_client
+        global add_browser_memory, stage_browser_memory, commit_browser_memory, merge_browser_memory_synopsis, search_browser_memories, get_recent_browser_memories, delete_memory, clear_all_memories, get_mem0_client, get_memories_by_recency, track_memory, track_added_memories, get_user_snapshot, MemoryRecord
         from mem0_utils import (
             add_browser_memory,
+            stage_browser_memory,
+            commit_browser_memory,
+            merge_browser_memory_synopsis,
             search_browser_memories,
             get_recent_browser_memories,
             delete_memory,
             clear_all_memories,
-            get_mem0_client
+            get_mem0_client,
+            get_memories_by_recency,
+            track_memory,
+            track_added_memories,
+            get_user_snapshot
         )
+        from memory_record import MemoryRecord
         _mem0_utils_loaded = True
 
 # Initialize FastMCP server
 mcp = FastMCP("Vibe Memory RAG Server")
 
-async def _process_tab_memory_background(url: str, title: str, content: str, user_id: str, memory_id: str):
+# Max memories considered inside an explicit time range before ranking
+TIME_RANGE_CANDIDATE_LIMIT = int(os.getenv("TIME_RANGE_CANDIDATE_LIMIT", "500"))
+
+# Acknowledge saves once the job is journaled and move the Mem0 add to the background pipeline
+SAVE_FAST_ACK = os.getenv("SAVE_FAST_ACK", "false").lower() == "true"
+
+async def _process_tab_memory_background(
+    url: str, title: str, content: str, user_id: str, memory_id: str, pending_memory: dict | None = None
+):
     """
     Background processing for heavy operations: LLM synopsis + content chunking/embedding.
-    This runs asynchronously after save_tab_memory returns.
+    This runs asynchronously after save_tab_memory returns. Each stage is recorded in the
+    ingestion journal; stages a previous attempt already recorded are not repeated.
+    pending_memory is the staged record of a fast-ack save, written to Mem0 first.
     """
+    from ingestion_journal import (
+        get_ingestion_journal, STARTED, MEM0_SAVED, SUMMARIZED, SYNOPSIS_SAVED, EMBEDDED, CHUNKS_WRITTEN,
+        ERROR, DONE, FAILED, INGESTION_JOURNAL, INGESTION_MAX_ATTEMPTS, INGESTION_RETRY_DELAY
+    )
+    journal = get_ingestion_journal()
+    completed = journal.stages(memory_id)
+    journal.append(memory_id, user_id, STARTED)
     try:
         # Load utilities (they should already be loaded, but just in case)
         load_utils()
         load_mem0_utils()
         
-        # 1. Generate synopsis + tags using LLM (the slow part)
-        synopsis, tags = await generate_memory_summary(content, title)
+        # 0. Store the acknowledged memory in Mem0 (fast-ack saves only)
+        if pending_memory is not None and MEM0_SAVED not in completed:
+            mem0_id = await commit_browser_memory(pending_memory, user_id)
+            if mem0_id is None:
+                logger.info(f"Memory {memory_id} was deleted before processing finished")
+                journal.append(memory_id, user_id, FAILED, {"reason": "deleted"})
+                return
+            journal.append(memory_id, user_id, MEM0_SAVED, {"mem0_id": mem0_id})
         
-        # 2. Update the memory with the generated synopsis
-        memory_client = get_mem0_client()
-        # Update the memory with additional metadata
-        try:
-            # Note: Mem0 doesn't have a direct update method, so we'll add this as metadata
-            # The synopsis will be included in future search results
-            memory_client.add(
-                [{"role": "assistant", "content": f"Synopsis: {synopsis}"}],
-                user_id=user_id,
-                metadata={
-                    "type": "synopsis_update",
-                    "memory_id": memory_id,
-                    "tags": tags,
-                    "url": url,
-                    "title": title
-                }
-            )
-        except Exception as e:
-            logger.error(f"Failed to update synopsis: {e}")
+        # 1. Generate synopsis + tags using LLM (the slow part)
+        if SUMMARIZED in completed:
+            synopsis, tags = completed[SUMMARIZED]["synopsis"], completed[SUMMARIZED]["tags"]
+        else:
+            synopsis, tags = await generate_memory_summary(content, title)
+            journal.append(memory_id, user_id, SUMMARIZED, {"synopsis": synopsis, "tags": tags})
+        
+        # 2. Merge the generated synopsis and tags into the memory itself (errors are
+        # retried like any other stage; only a memory missing from Mem0 is skipped)
+        if SYNOPSIS_SAVED not in completed:
+            if await merge_browser_memory_synopsis(memory_id, synopsis, tags, user_id):
+                journal.append(memory_id, user_id, SYNOPSIS_SAVED)
+            else:
+                logger.warning(f"Memory {memory_id} is not in Mem0, synopsis not saved")
         
         # 3. Chunk content and embed for RAG search (the very slow part)
-        chunks = smart_chunk_content(content, title, url)
-        await add_content_chunks_to_chroma(chunks, memory_id)
+        if CHUNKS_WRITTEN not in completed:
+            if EMBEDDED in completed:
+                batch = completed[EMBEDDED]
+            else:
+                chunks = smart_chunk_content(content, title, url)
+                batch = await embed_content_chunks(chunks, memory_id)
+                journal.append(memory_id, user_id, EMBEDDED, batch)
+            await write_content_chunks(batch, memory_id, synopsis, user_id)
+            journal.append(memory_id, user_id, CHUNKS_WRITTEN)
+        
+        journal.append(memory_id, user_id, DONE)
         
     except Exception as e:
         logger.error(f"Error in background processing for {memory_id}: {str(e)}")
+        journal.append(memory_id, user_id, ERROR, {"error": str(e)})
+        if not INGESTION_JOURNAL:
+            return
+        attempts = journal.attempts(memory_id)
+        if attempts < INGESTION_MAX_ATTEMPTS:
+            # Retry from the last completed stage without waiting for a restart
+            await asyncio.sleep(INGESTION_RETRY_DELAY * attempts)
+            await _process_tab_memory_background(url, title, content, user_id, memory_id, pending_memory)
+            return
+        logger.warning(f"Giving up ingestion of {memory_id} after {attempts} attempts")
+        journal.append(memory_id, user_id, FAILED, {"reason": "max attempts", "error": str(e)})
+        await _abandon_tab_memory_job(memory_id, user_id)
+
+async def _abandon_tab_memory_job(memory_id: str, user_id: str) -> None:
+    """
+    Forget a failed job's fast-ack memory if it never reached Mem0: without this its local
+    id would stay in the recency index, the snapshot and the counters, and stay pending.
+    """
+    from memory_ids import get_memory_id_map
+    local_ids = get_memory_id_map()
+    if not local_ids.is_pending(memory_id):
+        return
+    await asyncio.to_thread(load_mem0_utils)
+    from mem0_utils import untrack_memory
+    untrack_memory(memory_id)
+    local_ids.remove(memory_id)
+    logger.warning(f"Dropped memory {memory_id} of {user_id}: it was never stored in Mem0")
+
+async def _resume_tab_memory_job(memory_id: str, user_id: str, stages: dict) -> None:
+    """Continue a journaled job from the page content recorded when it was queued."""
+    from ingestion_journal import QUEUED
+    # Recovery starts with the server, before any tool loaded the utilities
+    await asyncio.to_thread(load_utils)
+    queued = stages[QUEUED]
+    pending_memory = queued.get("pending_memory")
+    if pending_memory is not None:
+        await asyncio.to_thread(load_mem0_utils)
+        from memory_ids import get_memory_id_map
+        # The save may have stopped between journaling and indexing the memory
+        if get_memory_id_map().is_pending(memory_id):
+            metadata = pending_memory["metadata"]
+            track_memory(user_id, memory_id, pending_memory["memory_text"], metadata, metadata["creation_timestamp"])
+    await _process_tab_memory_background(
+        queued["url"], queued["title"], queued["content"], user_id, memory_id, queued.get("pending_memory")
+    )
 
 @mcp.tool()
 async def save_tab_memory(url: str, title: str, content: str, user_id: str = "browser_user") -> str:
@@ -111,24 +237,48 @@ async def save_tab_memory(url: str, title: str, content: str, user_id: str = "br
     Fast storage with background processing
     - Immediate: Basic memory storage (< 500ms)  
     - Background: LLM synopsis + content chunking/embedding
+    With SAVE_FAST_ACK the immediate part is only local (journal + recency index) and the
+    Mem0 add runs in the background too.
     """
     try:
         # Load utilities on first use
         load_utils()
         load_mem0_utils()
         
-        # IMMEDIATE: Save basic memory without LLM synopsis (fast)
-        memory_id = await add_browser_memory(
-            url=url,
-            title=title,
-            synopsis=f"Visited: {title}",  # Simple placeholder, will be updated in background
-            tags=["browser", "tab"],  # Basic tags, will be enhanced in background
-            content=content[:1000],  # Store truncated content for immediate access
-            user_id=user_id
-        )
+        from ingestion_journal import get_ingestion_journal, QUEUED, INGESTION_JOURNAL
+        job: dict[str, Any] = {"url": url, "title": title, "content": content}
+        pending_memory = None
+        
+        if SAVE_FAST_ACK and INGESTION_JOURNAL:
+            # IMMEDIATE: Local id only; the Mem0 add is the first background stage
+            pending_memory = stage_browser_memory(
+                url=url,
+                title=title,
+                synopsis=f"Visited: {title}",
+                tags=["browser", "tab"],
+                user_id=user_id
+            )
+            memory_id = pending_memory["memory_id"]
+            job["pending_memory"] = pending_memory
+        else:
+            # IMMEDIATE: Save basic memory without LLM synopsis (fast)
+            memory_id = await add_browser_memory(
+                url=url,
+                title=title,
+                synopsis=f"Visited: {title}",  # Simple placeholder, will be updated in background
+                tags=["browser", "tab"],  # Basic tags, will be enhanced in background
+                content=content[:1000],  # Store truncated content for immediate access
+                user_id=user_id
+            )
+        
+        # Journal the job first, so a restart before it finishes resumes it
+        get_ingestion_journal().append(memory_id, user_id, QUEUED, job)
+        if pending_memory is not None:
+            metadata = pending_memory["metadata"]
+            track_memory(user_id, memory_id, pending_memory["memory_text"], metadata, metadata["creation_timestamp"])
         
         # BACKGROUND: Schedule heavy processing (LLM + chunking + embedding)
-        asyncio.create_task(_process_tab_memory_background(url, title, content, user_id, memory_id))
+        asyncio.create_task(_process_tab_memory_background(url, title, content, user_id, memory_id, pending_memory))
         
         # Return immediately while background processing continues
         result_msg = f"Saved memory: {title} (processing content in background)"
@@ -158,61 +308,118 @@ async def _unified_search_core(query: str, user_id: str = "browser_user", limit:
         # Get initial memory collection for analysis
         memory_client = get_mem0_client()
         
-        # Get a larger initial set for temporal analysis
-        initial_search_limit = limit * 4
-        logger.info(f"[UNIFIED SEARCH DEBUG] Initial Mem0 search with limit: {initial_search_limit}")
-        
-        mem0_results = memory_client.search(query=query, user_id=user_id, limit=initial_search_limit)
-        
-        # Handle Mem0 response format
-        if isinstance(mem0_results, dict) and "results" in mem0_results:
-            memory_objects = mem0_results["results"]
-        else:
-            memory_objects = mem0_results if mem0_results else []
-        
-        logger.info(f"[UNIFIED SEARCH DEBUG] Mem0 returned {len(memory_objects)} memories")
-        
         # Initialize temporal intelligence system
         from temporal_intelligence import TemporalIntelligence, QueryIntent
+        from time_expressions import parse_time_range
         temporal_system = TemporalIntelligence()
         
-        # Analyze query intent using the new system
-        intent, confidence = await temporal_system.analyze_intent(query, memory_objects)
-        logger.info(f"[UNIFIED SEARCH DEBUG] Intent: {intent.value}, Confidence: {confidence:.3f}")
+        # Explicit date expressions ("yesterday afternoon", "last week about Rust") are
+        # answered from the time-ordered index instead of a semantic top-k
+        time_range = parse_time_range(query)
+        
+        if time_range:
+            memory_objects = []
+            intent, confidence = QueryIntent.TEMPORAL_PRIMARY, 1.0
+            strategy = "time_range"
+            strategy_params: dict[str, Any] = {
+                "start_ts": time_range.start_ts,
+                "end_ts": time_range.end_ts,
+                "expression": time_range.expression,
+                "topic": time_range.topic
+            }
+            logger.info(f"[UNIFIED SEARCH DEBUG] Time range '{time_range.expression}', topic: '{time_range.topic}'")
+        else:
+            # Get a larger initial set for temporal analysis
+            initial_search_limit = limit * 4
+            logger.info(f"[UNIFIED SEARCH DEBUG] Initial Mem0 search with limit: {initial_search_limit}")
+            
+            from store_access import read_store, MEM0_STORE
+            from mem0_utils import embedded_outside_lock
+            async with embedded_outside_lock(memory_client, [query], "search"):
+                mem0_results = await read_store(
+                    MEM0_STORE, memory_client.search, query=query, user_id=user_id, limit=initial_search_limit
+                )
+            
+            # Handle Mem0 response format
+            if isinstance(mem0_results, dict) and "results" in mem0_results:
+                memory_objects = mem0_results["results"]
+            else:
+                memory_objects = mem0_results if mem0_results else []
+            # Fast-ack memories keep the id their save returned
+            from memory_ids import normalize_memory_ids
+            normalize_memory_ids(memory_objects)
+            
+            logger.info(f"[UNIFIED SEARCH DEBUG] Mem0 returned {len(memory_objects)} memories")
+            
+            # Analyze query intent using the new system
+            intent, confidence = await temporal_system.analyze_intent(query, memory_objects)
+            logger.info(f"[UNIFIED SEARCH DEBUG] Intent: {intent.value}, Confidence: {confidence:.3f}")
+            
+            # Route query to appropriate strategy
+            strategy, strategy_params = temporal_system.route_query(query, memory_objects, intent, confidence)
         
-        # Route query to appropriate strategy
-        strategy, strategy_params = temporal_system.route_query(query, memory_objects, intent, confidence)
         logger.info(f"[UNIFIED SEARCH DEBUG] Using strategy: {strategy} with params: {strategy_params}")
         
         # Execute strategy
-        if strategy == "timestamp_direct":
+        if strategy == "time_range" and time_range is not None:
+            # Candidates are every memory inside the range (index lookup, no semantic cut-off);
+            # semantic ranking then runs only on chunks from the same range
+            memory_objects = await get_memories_by_recency(
+                user_id=user_id,
+                limit=TIME_RANGE_CANDIDATE_LIMIT,
+                start_ts=time_range.start_ts,
+                end_ts=time_range.end_ts
+            )
+            
+            topic_terms = temporal_system.extract_topic_terms(time_range.topic)
+            chunk_scores: dict[str, float] = {}
+            if topic_terms and memory_objects:
+                range_chunks = await search_content_chunks(
+                    query=time_range.topic,
+                    limit=limit * 4,
+                    time_range=(time_range.start_ts, time_range.end_ts),
+                    enable_time_weighting=False,
+                    user_id=user_id
+                )
+                for chunk in range_chunks:
+                    chunk_memory_id = chunk["metadata"].get("memory_id", "")
+                    chunk_scores[chunk_memory_id] = max(chunk_scores.get(chunk_memory_id, 0.0), chunk["similarity"])
+            
+            final_memories = temporal_system.rank_within_time_range(
+                memory_objects=memory_objects,
+                topic_terms=topic_terms,
+                chunk_scores=chunk_scores,
+                limit=limit
+            )
+            
+        elif strategy == "timestamp_direct":
             # Pure timestamp-based retrieval for highest temporal confidence
-            all_memories = memory_client.get_all(user_id=user_id)
-            if isinstance(all_memories, dict) and "results" in all_memories:
-                all_memory_objects = all_memories["results"]
-            else:
-                all_memory_objects = all_memories if all_memories else []
+            # Served by the recency index: only the newest `limit` memories are loaded
+            time_filter_hours = strategy_params.get("time_filter_hours")
+            start_ts = time.time() - time_filter_hours * 3600 if time_filter_hours is not None else None
+            recent_memory_objects = await get_memories_by_recency(
+                user_id=user_id,
+                limit=limit,
+                start_ts=start_ts
+            )
             
             final_memories = temporal_system.get_memories_by_timestamp(
-                memory_collection=all_memory_objects,
+                memory_collection=recent_memory_objects,
                 limit=limit,
-                time_filter_hours=strategy_params.get("time_filter_hours")
+                time_filter_hours=time_filter_hours
             )
             
         elif strategy == "semantic_temporal_hybrid":
             # Enhanced search with fresh memory boost if needed
             if strategy_params.get("use_fresh_memory_boost", False):
                 try:
-                    fresh_memories = memory_client.get_all(user_id=user_id)
-                    if isinstance(fresh_memories, dict) and "results" in fresh_memories:
-                        fresh_memory_objects = fresh_memories["results"]
-                    else:
-                        fresh_memory_objects = fresh_memories if fresh_memories else []
+                    # Newest memories from the snapshot instead of a full get_all
+                    fresh_memory_objects = await get_memories_by_recency(user_id=user_id, limit=10)
                     
                     # Add fresh memories not in search results
                     fresh_memory_ids = {mem.get("id") for mem in memory_objects}
                     added_fresh = 0
-                    for fresh_memory in fresh_memory_objects[:10]:
+                    for fresh_memory in fresh_memory_objects:
                         if fresh_memory.get("id") not in fresh_memory_ids:
                             memory_objects.append(fresh_memory)
                             added_fresh += 1
@@ -237,42 +444,30 @@ async def _unified_search_core(query: str, user_id: str = "browser_user", limit:
             final_memories = memory_objects[:limit]
         
         # Group memories by domain for ChromaDB enrichment
-        domain_groups = {}
+        domain_groups: dict[str, list[dict[str, Any]]] = {}
         memories_without_url = []
         
         for idx, memory_obj in enumerate(final_memories):
-            memory_content = memory_obj.get("memory", "")
-            memory_id = memory_obj.get("id", "")
+            record = MemoryRecord.from_mem0(memory_obj, user_id)
             score = memory_obj.get("temporal_score", memory_obj.get("score", 0.0))
-            created_at = memory_obj.get("created_at", "")
             
             # Create base result
             result = {
-                "id": memory_id,
-                "memory_summary": memory_content,
+                "id": record.id,
+                "memory_summary": record.memory,
                 "score": score,
-                "created_at": created_at,
+                "created_at": record.created_at,
                 "source": "mem0",
                 "detailed_content": [],
                 "ranking_method": strategy,
                 "intent_confidence": confidence
             }
             
-            # Extract URL and group by domain
-            url = None
-            if "http" in memory_content:
-                import re
-                url_match = re.search(r'https?://[^\s]+', memory_content)
-                if url_match:
-                    url = url_match.group(0)
-            
-            if url:
-                from urllib.parse import urlparse
-                domain = urlparse(url).netloc.lower()
-                if domain.startswith('www.'):
-                    domain = domain[4:]
+            # Group by domain (URL and domain resolved once by the record model)
+            if record.url and record.domain:
+                domain = record.domain
                 
-                result["source_url"] = url
+                result["source_url"] = record.url
                 result["source_domain"] = domain
                 
                 # Group by domain
@@ -285,17 +480,33 @@ async def _unified_search_core(query: str, user_id: str = "browser_user", limit:
         # ChromaDB enrichment (unchanged from original)
         domain_search_results = {}
         
+        # Near-duplicate suppression follows CHUNK_DIVERSITY_MODE
+        from diversity import resolve_diversity_mode
+        enrichment_diversity = resolve_diversity_mode(None)
+        diversity_stats: dict[str, Any] = {}
+        
+        # Time-range queries enrich with the topic only, restricted to the same range
+        enrichment_query = query
+        enrichment_range = None
+        if time_range:
+            enrichment_query = time_range.topic or query
+            enrichment_range = (time_range.start_ts, time_range.end_ts)
+        
         for domain, domain_memories in domain_groups.items():
             try:
                 detailed_chunks = await search_content_chunks(
-                    query=query,
+                    query=enrichment_query,
                     source_filter=domain,
                     limit=3 * len(domain_memories),
-                    use_contextual_embeddings=False
+                    use_contextual_embeddings=False,
+                    time_range=enrichment_range,
+                    diversity=enrichment_diversity,
+                    diversity_stats=diversity_stats,
+                    user_id=user_id
                 )
                 
                 if detailed_chunks:
-                    reranked_chunks = await rerank_results(query, detailed_chunks, top_k=3 * len(domain_memories))
+                    reranked_chunks = await rerank_results(enrichment_query, detailed_chunks, top_k=3 * len(domain_memories))
                     domain_search_results[domain] = reranked_chunks
                     
             except Exception as e:
@@ -326,7 +537,7 @@ async def _unified_search_core(query: str, user_id: str = "browser_user", limit:
         ranking_explanation = temporal_system.explain_ranking(final_memories, intent)
         logger.info(f"[UNIFIED SEARCH DEBUG] Ranking explanation:\n{ranking_explanation}")
         
-        final_result = {
+        final_result: dict[str, Any] = {
             "type": "unified_search",
             "query": query,
             "results": enriched_results,
@@ -341,6 +552,17 @@ async def _unified_search_core(query: str, user_id: str = "browser_user", limit:
             }
         }
         
+        if enrichment_diversity != "none":
+            final_result["diversity"] = {"mode": enrichment_diversity, **diversity_stats}
+        
+        if time_range:
+            final_result["temporal_intelligence"]["time_range"] = {
+                "expression": time_range.expression,
+                "start": datetime.fromtimestamp(time_range.start_ts).astimezone().isoformat(),
+                "end": datetime.fromtimestamp(time_range.end_ts).astimezone().isoformat(),
+                "topic": time_range.topic
+            }
+        
         return final_result
         
     except Exception as e:
@@ -349,15 +571,33 @@ async def _unified_search_core(query: str, user_id: str = "browser_user", limit:
         return {"error": error_msg}
 
 @mcp.tool()
-async def unified_search(query: str, user_id: str = "browser_user", limit: int = 5) -> str:
+async def unified_search(
+    query: str,
+    user_id: str = "browser_user",
+    limit: int = 5,
+    response_mode: str | None = None,
+    fields: list[str] | None = None
+) -> str:
     """
     Intelligent unified search with temporal awareness: Mem0-first with RAG fallback.
     BEST for temporal queries like "what did I visit last", "recent websites", "latest pages".
     Automatically detects temporal intent and applies chronological ranking when needed.
     Lets Mem0 decide what's relevant, then enriches with detailed content from ChromaDB.
+    response_mode: "ids", "summary", "snippet" or "full" (default); fields projects each
+    result to the listed keys (dotted names for nested keys, also inside lists, e.g.
+    "detailed_content.url").
     """
+    from response_format import resolve_response_mode, shape_unified_search, dumps
+    try:
+        mode = resolve_response_mode(response_mode)
+    except ValueError as e:
+        return json.dumps({"error": str(e)})
+    
+    start_time = time.perf_counter()
     result = await _unified_search_core(query, user_id, limit)
-    return json.dumps(result, ensure_ascii=False)
+    payload = dumps(shape_unified_search(result, mode, fields))
+    logger.info(f"unified_search ({mode}) returned {len(payload)} chars in {(time.perf_counter() - start_time) * 1000:.1f} ms")
+    return payload
 
 @mcp.tool()
 async def search_memories(query: str, user_id: str = "browser_user", limit: int = 5) -> str:
@@ -374,36 +614,60 @@ async def search_content(
     query: str, 
     source_filter: str | None = None, 
     user_id: str = "browser_user", 
-    limit: int = 5
+    limit: int = 5,
+    response_mode: str | None = None,
+    fields: list[str] | None = None,
+    diversity: str | None = None
 ) -> str:
     """
     RAG search within specific page content.
     Uses source_filter (domain) from previous memory discovery.
+    response_mode: "ids", "summary", "snippet" or "full" (default); fields projects each
+    chunk to the listed keys (dotted names for nested keys, e.g. "metadata.memory_id").
+    diversity: "simhash" or "mmr" drops near-duplicate chunks before reranking, "none" keeps them.
     """
+    from response_format import resolve_response_mode, shape_content_search, dumps
+    from diversity import resolve_diversity_mode
+    try:
+        mode = resolve_response_mode(response_mode)
+        diversity_mode = resolve_diversity_mode(diversity)
+    except ValueError as e:
+        return json.dumps({"error": str(e)})
+    
+    start_time = time.perf_counter()
     try:
         # Load utilities on first use
         load_utils()
         
         # Use advanced RAG search from mcp-crawl4ai-rag
+        diversity_stats: dict[str, Any] = {}
         results = await search_content_chunks(
             query=query,
             source_filter=source_filter,
             limit=limit * 2,  # Get more for reranking
-            use_contextual_embeddings=False
+            use_contextual_embeddings=False,
+            diversity=diversity_mode,
+            diversity_stats=diversity_stats,
+            user_id=user_id
         )
         
         # Rerank results using cross-encoder
         reranked_results = await rerank_results(query, results, top_k=limit)
         
         
-        result = {
+        result: dict[str, Any] = {
             "type": "content_search",
             "query": query,
             "source_filter": source_filter,
             "content_chunks": reranked_results
         }
         
-        return json.dumps(result, ensure_ascii=False)
+        if diversity_mode != "none":
+            result["diversity"] = {"mode": diversity_mode, **diversity_stats}
+        
+        payload = dumps(shape_content_search(result, mode, fields))
+        logger.info(f"search_content ({mode}) returned {len(payload)} chars in {(time.perf_counter() - start_time) * 1000:.1f} ms")
+        return payload
         
     except Exception as e:
         error_msg = f"Error searching content: {str(e)}"
@@ -420,21 +684,13 @@ async def delete_tab_memory(memory_id: str, user_id: str = "browser_user") -> st
         # Delete from Mem0
         mem0_success = await delete_memory(memory_id, user_id)
         
-        # Delete associated content chunks from ChromaDB
-        from chroma_setup import get_or_create_content_collection
-        collection = get_or_create_content_collection()
-        
-        # Get all chunks with this memory_id to count them
+        # Delete associated chunks, page vector and side-table rows (counted from the chunk counters)
         try:
-            # ChromaDB doesn't have a direct way to get count, so we query first
-            chunk_results = collection.get(where={"memory_id": memory_id})
-            chunk_count = len(chunk_results["ids"]) if chunk_results and "ids" in chunk_results else 0
-            
-            # Delete chunks with this memory_id
-            if chunk_count > 0:
-                collection.delete(where={"memory_id": memory_id})
+            from bulk_delete import delete_chunk_content
+            from store_access import write_store, CHUNK_STORE
+            chunk_count = await write_store(CHUNK_STORE, delete_chunk_content, user_id, [memory_id])
         except Exception as delete_error:
-            logger.error(f"Failed to delete chunks from ChromaDB: {delete_error}")
+            logger.error(f"Failed to delete content chunks for {memory_id}: {delete_error}")
             chunk_count = 0
         
         if mem0_success:
@@ -447,6 +703,51 @@ async def delete_tab_memory(memory_id: str, user_id: str = "browser_user") -> st
         logger.error(error_msg)
         return error_msg
 
+@mcp.tool()
+async def delete_tab_memories(
+    memory_ids: list[str] | None = None,
+    domain: str | None = None,
+    start_time: str | None = None,
+    end_time: str | None = None,
+    time_range: str | None = None,
+    user_id: str = "browser_user",
+    dry_run: bool = False
+) -> str:
+    """
+    Delete many memories and their content chunks in batches.
+    Select by memory_ids, by domain (subdomains included) and/or by time: start_time and
+    end_time take ISO 8601 datetimes or epoch seconds, time_range takes an expression such
+    as "yesterday" or "last week". Filters narrow an id list. dry_run reports the matching
+    memories and chunk counts without deleting. The result includes throughput.
+    """
+    try:
+        load_mem0_utils()
+        from bulk_delete import delete_memories_bulk, parse_time
+        
+        try:
+            start_ts = parse_time(start_time)
+            end_ts = parse_time(end_time)
+        except ValueError as e:
+            return json.dumps({"error": f"Invalid time filter: {str(e)}"})
+        if time_range:
+            from time_expressions import parse_time_range
+            parsed = parse_time_range(time_range)
+            if parsed is None:
+                return json.dumps({"error": f"Unrecognized time range '{time_range}'"})
+            start_ts = max(start_ts, parsed.start_ts) if start_ts is not None else parsed.start_ts
+            end_ts = min(end_ts, parsed.end_ts) if end_ts is not None else parsed.end_ts
+        
+        if not memory_ids and not domain and start_ts is None and end_ts is None:
+            return json.dumps({"error": "Provide memory_ids, domain or a time filter (use clear_all_tab_memories to delete everything)"})
+        
+        report = await delete_memories_bulk(user_id, memory_ids, domain, start_ts, end_ts, dry_run)
+        return json.dumps(report, ensure_ascii=False)
+        
+    except Exception as e:
+        error_msg = f"Error deleting memories: {str(e)}"
+        logger.error(error_msg)
+        return json.dumps({"error": error_msg})
+
 @mcp.tool()
 async def save_conversation_memory(information: str, user_id: str = "browser_user") -> str:
     """
@@ -477,21 +778,28 @@ async def save_conversation_memory(information: str, user_id: str = "browser_use
             current_timestamp = time.time()
             
             # Use minimal processing for speed
-            result = memory_client.add(
-                [{"role": "user", "content": information}],
-                user_id=user_id,
-                infer=False,  # Skip expensive inference to avoid 16-second delays
-                metadata={
-                    "type": "personal_info",
-                    "fast_store": True,
-                    "timestamp": datetime.utcnow().isoformat(),
-                    # Enhanced temporal metadata for consistency
-                    "creation_timestamp": current_timestamp,
-                    "temporal_id": f"conv_{int(current_timestamp)}_{user_id}",
-                    "age_category": "recent",
-                    "content_type": "conversation"
-                }
-            )
+            conversation_metadata = {
+                "type": "personal_info",
+                "fast_store": True,
+                "timestamp": datetime.utcnow().isoformat(),
+                # Enhanced temporal metadata for consistency
+                "creation_timestamp": current_timestamp,
+                "temporal_id": f"conv_{int(current_timestamp)}_{user_id}",
+                "age_category": "recent",
+                "content_type": "conversation"
+            }
+            from store_access import write_store, MEM0_STORE
+            from mem0_utils import embedded_outside_lock
+            async with embedded_outside_lock(memory_client, [information], "add"):
+                result = await write_store(
+                    MEM0_STORE,
+                    memory_client.add,
+                    [{"role": "user", "content": information}],
+                    user_id=user_id,
+                    infer=False,  # Skip expensive inference to avoid 16-second delays
+                    metadata=conversation_metadata
+                )
+            track_added_memories(user_id, result, conversation_metadata)
             
             return json.dumps({
                 "success": True,
@@ -533,16 +841,55 @@ async def clear_all_tab_memories(user_id: str = "browser_user") -> str:
         
         logger.warning(f"Clearing ALL memories for user: {user_id}")
         
+        # The legacy partition may still hold other users' pre-partition chunks: collect
+        # the caller's ids before Mem0 forgets them and delete only those
+        from vector_store import LEGACY_PARTITION_USER
+        from partition_migration import is_legacy_partition_migrated
+        legacy_ids = None
+        if user_id == LEGACY_PARTITION_USER and not is_legacy_partition_migrated():
+            snapshot = await get_user_snapshot(user_id)
+            legacy_ids = [record["id"] for record in snapshot.records(user_id)]
+        
         # Clear from Mem0
         mem0_success = await clear_all_memories(user_id)
         
-        # Note: ChromaDB content chunks are not user-specific in our current design
-        # They are linked to memories via memory_id, so when memories are cleared,
-        # the chunks become orphaned but can still be searched
-        logger.warning("Content chunks in ChromaDB are not cleared automatically - they are linked by memory_id")
+        # Drop the user's whole chunk/page partition instead of deleting vectors one by one
+        chunk_count = 0
+        try:
+            from vector_store import drop_partition
+            from partition_migration import delete_legacy_memories
+            from vector_codec import get_rescore_store
+            from memory_aggregates import get_memory_aggregates
+            from store_access import write_store, CHUNK_STORE
+            if legacy_ids is None:
+                dropped = await write_store(CHUNK_STORE, drop_partition, user_id)
+            else:
+                dropped = await write_store(CHUNK_STORE, delete_legacy_memories, legacy_ids)
+            chunk_count = dropped["vectors"]["chunks"]
+            aggregates = get_memory_aggregates()
+            for memory_id in dropped["memory_ids"]:
+                aggregates.chunks_removed(memory_id)
+            get_rescore_store().delete_memories(dropped["memory_ids"])
+            
+            # Warm-tier chunks live outside the partition
+            from retention import get_cold_store
+            cold = get_cold_store()
+            if legacy_ids is None:
+                for memory_id in cold.memory_ids(user_id):
+                    aggregates.chunks_removed(memory_id)
+                chunk_count += cold.delete_user(user_id)
+            else:
+                for memory_id in legacy_ids:
+                    aggregates.chunks_removed(memory_id)
+                chunk_count += cold.delete_memories(legacy_ids)
+            
+            from content_store import get_content_store
+            get_content_store().delete_user(user_id)
+        except Exception as e:
+            logger.error(f"Failed to drop content chunks for user {user_id}: {e}")
         
         if mem0_success:
-            return f"Successfully cleared all memories for user {user_id} (content chunks remain in ChromaDB)"
+            return f"Successfully cleared all memories for user {user_id} ({chunk_count} content chunks removed)"
         else:
             return f"Failed to clear memories for user {user_id}"
             
@@ -553,35 +900,51 @@ async def clear_all_tab_memories(user_id: str = "browser_user") -> str:
 
 
 @mcp.tool()
-async def get_memory_stats(user_id: str = "browser_user") -> str:
-    """Get statistics about stored memories and content chunks."""
+async def get_memory_stats(user_id: str = "browser_user", verify: bool = False) -> str:
+    """
+    Get statistics about stored memories and content chunks.
+    Answered from incremental counters; verify=True does a full recount and reports drift.
+    """
     try:
         # Load utilities on first use
         load_mem0_utils()
         load_utils()
         
-        # Get memory count from recent memories (limited way to check)
-        memories = await get_recent_browser_memories(user_id=user_id, limit=1000)
-        memory_count = len(memories)
-        
-        # Get content chunks count from ChromaDB
-        from chroma_setup import get_or_create_content_collection
-        collection = get_or_create_content_collection()
-        
-        chunks_count = collection.count()
+        from memory_aggregates import get_memory_aggregates
+        aggregates = get_memory_aggregates()
+        counters_before = aggregates.summary(user_id) if verify else None
+        
+        # One-time (or verification) recount of the user's memory counters from the snapshot
+        if verify or not aggregates.is_initialized(f"user:{user_id}"):
+            snapshot = await get_user_snapshot(user_id)
+            aggregates.rebuild_user(user_id, snapshot.records(user_id))
+        
+        # One-time (or verification) recount of the chunk counters of the user's partition
+        from vector_store import get_vector_store
+        from retention import get_cold_store, tier_sizes
+        from content_store import get_content_store
+        from group_writer import get_group_writer
+        from ingestion_journal import get_ingestion_journal
+        from memory_ids import get_memory_id_map
+        from partition_migration import get_partition_migration_status
+        from store_access import read_store, get_store_access_stats, CHUNK_STORE
+        store = get_vector_store(user_id=user_id)
+        if verify or not aggregates.is_initialized(f"chunks:{user_id}"):
+            try:
+                partition = await read_store(CHUNK_STORE, store.get, include=["metadatas", "documents"])
+                ids = list(partition.get("ids") or [])
+                documents = list(partition.get("documents") or [])
+                metadatas = list(partition.get("metadatas") or [])
+                # Warm-tier chunks still count as stored content
+                cold = get_cold_store().records(user_id)
+                ids.extend(cold["ids"])
+                documents.extend(cold["documents"])
+                metadatas.extend(cold["metadatas"])
+                aggregates.rebuild_chunks(user_id, ids, documents, metadatas)
+            except Exception as e:
+                logger.error(f"Failed to recount content chunks: {e}")
         
-        # Get unique domains from ChromaDB
-        try:
-            all_chunks = collection.get(include=["metadatas"])
-            unique_domains = set()
-            if all_chunks and "metadatas" in all_chunks:
-                for metadata in all_chunks["metadatas"]:
-                    if "source_id" in metadata:
-                        unique_domains.add(metadata["source_id"])
-            unique_domains_count = len(unique_domains)
-        except Exception as e:
-            logger.error(f"Failed to get unique domains: {e}")
-            unique_domains_count = 0
+        counters = aggregates.summary(user_id)
         
         # Get embedding cache stats
         from utils import get_embedding_cache_stats
@@ -589,13 +952,41 @@ async def get_memory_stats(user_id: str = "browser_user") -> str:
         
         result = {
             "user_id": user_id,
-            "memory_count": memory_count,
-            "content_chunks_count": chunks_count,
-            "unique_domains": unique_domains_count,
+            "memory_count": counters["memory_count"],
+            "content_chunks_count": counters["chunk_count"],
+            "unique_domains": counters["unique_chunk_domains"],
             "storage_type": "Mem0 + ChromaDB",
-            "embedding_cache": cache_stats
+            "aggregates": counters,
+            "embedding_cache": cache_stats,
+            "vector_store": store.stats(),
+            "partition_migration": get_partition_migration_status(),
+            "retention_tiers": tier_sizes(user_id),
+            "content_store": get_content_store().stats(),
+            "write_groups": get_group_writer().stats(),
+            "ingestion_journal": get_ingestion_journal().stats(),
+            "fast_ack": {"enabled": SAVE_FAST_ACK, **get_memory_id_map().stats()},
+            "store_access": get_store_access_stats()
         }
         
+        from vector_codec import VECTOR_STORAGE_MODE, REDUCED_DIMENSIONS, RESCORE_VECTOR_FORMAT, get_rescore_store
+        if VECTOR_STORAGE_MODE == "reduced":
+            result["vector_storage"] = {
+                "mode": VECTOR_STORAGE_MODE,
+                "index_dimensions": REDUCED_DIMENSIONS,
+                "rescore_format": RESCORE_VECTOR_FORMAT,
+                "rescore_vectors": get_rescore_store().stats()
+            }
+        
+        if counters_before is not None:
+            result["verification"] = {
+                key: {"incremental": counters_before[key], "recount": counters[key]}
+                for key in ("memory_count", "memory_bytes", "chunk_count", "chunk_bytes", "unique_chunk_domains")
+            }
+            result["verification"]["consistent"] = all(
+                counters_before[key] == counters[key]
+                for key in ("memory_count", "chunk_count", "unique_chunk_domains")
+            )
+        
         return json.dumps(result, ensure_ascii=False)
         
     except Exception as e:
@@ -603,6 +994,103 @@ async def get_memory_stats(user_id: str = "browser_user") -> str:
         logger.error(error_msg)
         return json.dumps({"error": error_msg})
 
+@mcp.tool()
+async def migrate_vector_collections(space: str | None = None, status_only: bool = False) -> str:
+    """
+    Migrate the chunk and page collections into new ones with the configured distance
+    space ("cosine", "ip" or "l2") and HNSW parameters. Runs in the background; searches
+    keep using the current collections until the swap. Call with status_only to poll.
+    With VECTOR_STORAGE_MODE=reduced the migration also shrinks existing full-size vectors.
+    Only the legacy (browser_user) partition is migrated.
+    """
+    try:
+        from collection_migration import start_migration, get_migration_status
+        from chroma_setup import (
+            CONTENT_ROLE, PAGE_ROLE, get_active_collection_name, get_or_create_collection, get_collection_space
+        )
+        from vector_store import VECTOR_STORE_BACKEND
+
+        if VECTOR_STORE_BACKEND != "chroma":
+            return json.dumps({"error": f"Collection migration applies to the chroma backend, not '{VECTOR_STORE_BACKEND}'"})
+
+        if space is not None and space.lower() not in ("cosine", "ip", "l2"):
+            return json.dumps({"error": f"Invalid space '{space}', expected cosine, ip or l2"})
+
+        started = False if status_only else start_migration(space)
+        collections = {}
+        for role in (CONTENT_ROLE, PAGE_ROLE):
+            name = get_active_collection_name(role)
+            collections[role] = {"name": name, "space": get_collection_space(get_or_create_collection(name))}
+
+        return json.dumps({
+            "started": started,
+            "active_collections": collections,
+            "migration": get_migration_status()
+        }, ensure_ascii=False)
+
+    except Exception as e:
+        error_msg = f"Error migrating vector collections: {str(e)}"
+        logger.error(error_msg)
+        return json.dumps({"error": error_msg})
+
+@mcp.tool()
+async def collect_orphan_chunks(dry_run: bool = False, compact: bool = False, status_only: bool = False) -> str:
+    """
+    Delete content chunks whose memory no longer exists in Mem0 (including chunks saved
+    under fallback ids), then compact vector stores with many deleted vectors. Runs in the
+    background in small batches that yield to searches; call with status_only to poll.
+    dry_run only reports what would be removed; compact compacts every store regardless
+    of its deleted share.
+    """
+    try:
+        from chunk_gc import start_gc, get_gc_status
+
+        started = False if status_only else start_gc(dry_run, compact)
+        return json.dumps({"started": started, "gc": get_gc_status()}, ensure_ascii=False)
+
+    except Exception as e:
+        error_msg = f"Error collecting orphan chunks: {str(e)}"
+        logger.error(error_msg)
+        return json.dumps({"error": error_msg})
+
+@mcp.tool()
+async def apply_retention_tiers(dry_run: bool = False, status_only: bool = False) -> str:
+    """
+    Apply the retention tiers now: drop content older than RETENTION_DROP_DAYS and move
+    chunks older than RETENTION_WARM_DAYS to compressed cold storage (their page vector
+    stays searchable). Runs in the background; the report has per-tier sizes for every
+    partition. dry_run only reports what would change; call with status_only to poll.
+    """
+    try:
+        from retention import start_retention, get_retention_status
+
+        started = False if status_only else start_retention(dry_run)
+        return json.dumps({"started": started, "retention": get_retention_status()}, ensure_ascii=False)
+
+    except Exception as e:
+        error_msg = f"Error applying retention tiers: {str(e)}"
+        logger.error(error_msg)
+        return json.dumps({"error": error_msg})
+
+@mcp.tool()
+async def merge_synopsis_records(user_id: str = "browser_user", dry_run: bool = False) -> str:
+    """
+    Collapse the separate synopsis memories written by earlier versions into the page
+    memories they describe (one Mem0 record per page, re-embedded once). dry_run only
+    reports how many records would be merged and removed.
+    """
+    try:
+        load_mem0_utils()
+        from synopsis_merge import merge_synopsis_records as run_synopsis_merge
+
+        report = await run_synopsis_merge(user_id, dry_run)
+        return json.dumps({"synopsis_merge": report}, ensure_ascii=False)
+
+    except Exception as e:
+        error_msg = f"Error merging synopsis records: {str(e)}"
+        logger.error(error_msg)
+        return json.dumps({"error": error_msg})
+
 # Server health check (FAST - no heavy dependency loading)
 @mcp.tool()
 async def health_check() -> str:
@@ -631,6 +1119,10 @@ async def health_check() -> str:
         
         health_status["dependencies"] = dependencies
         
+        # Per-component readiness (prewarmed or loaded by a tool call)
+        from prewarm import get_prewarm_status
+        health_status["readiness"] = get_prewarm_status()
+        
         return json.dumps(health_status, ensure_ascii=False)
         
     except Exception as e:
@@ -660,14 +1152,15 @@ async def deep_health_check() -> str:
         except Exception as e:
             health_status["dependencies"]["mem0"] = f"error: {str(e)}"
         
-        # Check ChromaDB
+        # Check the vector store
+        from vector_store import VECTOR_STORE_BACKEND, get_vector_store
+        from store_access import read_store, CHUNK_STORE
+        store_dependency = "chromadb" if VECTOR_STORE_BACKEND == "chroma" else "vector_store"
         try:
-            from chroma_setup import get_or_create_content_collection
-            collection = get_or_create_content_collection()
-            collection.count()  # Simple test to verify connection
-            health_status["dependencies"]["chromadb"] = "connected"
+            await read_store(CHUNK_STORE, get_vector_store().count)  # Simple test to verify connection
+            health_status["dependencies"][store_dependency] = "connected"
         except Exception as e:
-            health_status["dependencies"]["chromadb"] = f"error: {str(e)}"
+            health_status["dependencies"][store_dependency] = f"error: {str(e)}"
         
         # Check OpenAI
         try:
@@ -693,15 +1186,8 @@ async def get_last_visited_pages(user_id: str = "browser_user", limit: int = 5)
     try:
         load_mem0_utils()
         
-        # Get all memories directly
-        memory_client = get_mem0_client()
-        all_memories = memory_client.get_all(user_id=user_id)
-        
-        # Handle Mem0 response format
-        if isinstance(all_memories, dict) and "results" in all_memories:
-            memory_objects = all_memories["results"]
-        else:
-            memory_objects = all_memories if all_memories else []
+        # Newest memories straight from the recency index (no full Mem0 scan)
+        memory_objects = await get_memories_by_recency(user_id=user_id, limit=limit)
         
         # Use temporal intelligence for pure timestamp retrieval
         from temporal_intelligence import TemporalIntelligence
@@ -716,35 +1202,14 @@ async def get_last_visited_pages(user_id: str = "browser_user", limit: int = 5)
         # Format results
         results = []
         for i, memory in enumerate(recent_memories):
-            memory_content = memory.get("memory", "")
-            
-            # Extract structured information
-            url = "Unknown"
-            title = "Untitled"
-            
-            # Try to extract from structured format
-            if "URL:" in memory_content:
-                lines = memory_content.split('\n')
-                for line in lines:
-                    if line.startswith("Visited:"):
-                        title = line.replace("Visited:", "").strip()
-                    elif line.startswith("URL:"):
-                        url = line.replace("URL:", "").strip()
-            else:
-                # Fallback parsing
-                import re
-                url_match = re.search(r'https?://[^\s]+', memory_content)
-                if url_match:
-                    url = url_match.group(0)
-                if len(memory_content) > 10:
-                    title = memory_content[:100] + "..." if len(memory_content) > 100 else memory_content
+            record = MemoryRecord.from_mem0(memory, user_id)
             
             result = {
                 "rank": i + 1,
-                "title": title,
-                "url": url,
-                "memory_content": memory_content,
-                "created_at": memory.get("created_at", ""),
+                "title": record.title or "Untitled",
+                "url": record.url or "Unknown",
+                "memory_content": record.memory,
+                "created_at": record.created_at,
                 "age_hours": memory.get("age_hours", 0)
             }
             results.append(result)
@@ -771,11 +1236,15 @@ async def cleanup_on_shutdown():
         # Close any open database connections
         if _utils_loaded:
             try:
-                from chroma_setup import get_or_create_content_collection
-                # ChromaDB connections are managed automatically, but we can explicitly close
-                logger.debug("ChromaDB connections cleaned up")
+                from vector_store import flush_vector_stores
+                from group_writer import get_group_writer
+                from store_access import write_store, CHUNK_STORE
+                # Commit writes still queued for a group, then persist the flat backend's graph
+                await get_group_writer().drain()
+                await write_store(CHUNK_STORE, flush_vector_stores)
+                logger.debug("Vector store cleaned up")
             except Exception as e:
-                logger.warning(f"Error during ChromaDB cleanup: {e}")
+                logger.warning(f"Error during vector store cleanup: {e}")
         
         if _mem0_utils_loaded:
             try:
@@ -783,6 +1252,13 @@ async def cleanup_on_shutdown():
                 logger.debug("Mem0 client cleaned up")
             except Exception as e:
                 logger.warning(f"Error during Mem0 cleanup: {e}")
+        
+        # Let queued store writes finish, then stop the writer threads and read pool
+        try:
+            from store_access import shutdown_store_access
+            await asyncio.to_thread(shutdown_store_access)
+        except Exception as e:
+            logger.warning(f"Error stopping store access threads: {e}")
                 
         logger.info("Shutdown cleanup completed")
     except Exception as e:
@@ -811,9 +1287,19 @@ if __name__ == "__main__":
     signal.signal(signal.SIGINT, signal_handler)
     signal.signal(signal.SIGTERM, signal_handler)
     
+    async def serve() -> None:
+        # Schedulers and ingestion recovery run on the server's own loop from the start
+        start_background_jobs()
+        # Load models, clients and indexes in the background once the port accepts
+        # connections; async loads run on this loop, where the tools share them
+        from prewarm import start_prewarm
+        if start_prewarm(port, asyncio.get_running_loop()):
+            logger.info("Prewarm scheduled after the server starts listening")
+        await mcp.run_async("sse", port=port)
+    
     try:
         # Run the server with SSE transport for AI SDK compatibility
-        mcp.run("sse", port=port)
+        asyncio.run(serve())
     except KeyboardInterrupt:
         logger.info("Server interrupted by user")
         asyncio.run(cleanup_on_shutdown())
@@ -3,58 +3,264 @@ Mem0 utilities for memory management.
 Adapted from mcp-mem0 for browser tab memory storage.
 """
 import os
+import asyncio
 import logging
-from typing import List, Dict, Any
+import threading
+import functools
+import concurrent.futures
+from contextlib import asynccontextmanager
+from typing import List, Dict, Any, Optional, AsyncIterator, Tuple
 from mem0 import Memory
 
+from memory_index import get_recency_index, parse_memory_timestamp
+from memory_snapshot import get_memory_snapshot, MemorySnapshot
+from memory_aggregates import get_memory_aggregates
+from memory_record import MemoryRecord
+from store_access import read_store, write_store, MEM0_STORE
+from memory_ids import get_memory_id_map, new_local_id, normalize_memory_ids, resolve_mem0_id, LOCAL_ID_KEY
+
 logger = logging.getLogger(__name__)
 
-# Global memory client
+# Global memory client (created once, also when a tool and the prewarm ask at the same time)
 memory_client = None
+_memory_client_lock = threading.Lock()
+
+# Upper bound for the one-time import of existing memories into the recency index
+RECENCY_BACKFILL_LIMIT = int(os.getenv("RECENCY_BACKFILL_LIMIT", "100000"))
+
+# In-flight imports by user, so concurrent first calls share one get_all (also when
+# they run on different event loops, like the prewarm thread's and the server's)
+_snapshot_backfills: Dict[str, "concurrent.futures.Future[None]"] = {}
+_snapshot_backfills_lock = threading.Lock()
+
+# Keep Mem0's collection in the content store's Chroma client and share one OpenAI client
+SHARED_STORE_CLIENT = os.getenv("SHARED_STORE_CLIENT", "false").lower() == "true"
+
+if SHARED_STORE_CLIENT:
+    from store_access import share_store, CHUNK_STORE
+    # One database, so one writer for both; routed on import, before any Mem0 store call
+    share_store(MEM0_STORE, CHUNK_STORE)
+
+def _share_openai_client(memory: Memory) -> None:
+    """Point Mem0's OpenAI embedder and LLM at the RAG utilities' client (one connection pool)."""
+    from openai import OpenAI
+    from utils import get_openai_client
+    
+    client = get_openai_client()
+    for component in (memory.embedding_model, memory.llm):
+        if isinstance(getattr(component, "client", None), OpenAI):
+            component.client = client
+
+class PrecomputedEmbedder:
+    """
+    Wraps Mem0's embedder so a vector computed before a store call is reused inside it:
+    the OpenAI round-trip happens outside the store's lock and Mem0 only finds the vector.
+    Texts that were not precomputed are embedded as before.
+    """
+
+    def __init__(self, embedder: Any) -> None:
+        self._embedder = embedder
+        self._vectors: Dict[Tuple[str, Optional[str]], List[List[float]]] = {}
+        self._lock = threading.Lock()
+
+    def __getattr__(self, name: str) -> Any:
+        if name == "_embedder":
+            raise AttributeError(name)
+        return getattr(self._embedder, name)
+
+    def precompute(self, texts: List[str], memory_action: Optional[str]) -> List[Tuple[str, Optional[str]]]:
+        """Embed texts now (blocking, network); returns the keys to release after the store call."""
+        keys = []
+        for text in texts:
+            vector = self._embedder.embed(text, memory_action)
+            key = (text, memory_action)
+            with self._lock:
+                self._vectors.setdefault(key, []).append(vector)
+            keys.append(key)
+        return keys
+
+    def release(self, keys: List[Tuple[str, Optional[str]]]) -> None:
+        """Drop precomputed vectors the store call did not use."""
+        with self._lock:
+            for key in keys:
+                vectors = self._vectors.get(key)
+                if vectors:
+                    vectors.pop()
+                if not vectors:
+                    self._vectors.pop(key, None)
+
+    def embed(self, text: str, memory_action: Optional[str] = None) -> List[float]:
+        with self._lock:
+            vectors = self._vectors.get((text, memory_action))
+            vector = vectors.pop() if vectors else None
+            if vectors is not None and not vectors:
+                self._vectors.pop((text, memory_action), None)
+        if vector is None:
+            vector = self._embedder.embed(text, memory_action)
+        return vector
+
+@asynccontextmanager
+async def embedded_outside_lock(memory: Memory, texts: List[str], memory_action: str) -> AsyncIterator[None]:
+    """
+    Embed texts on a worker thread before a Mem0 store call, so the call holds the store's
+    lock only for the local vector store operation:
+        async with embedded_outside_lock(memory, [query], "search"):
+            results = await read_store(MEM0_STORE, memory.search, query=query, ...)
+    """
+    embedder = memory.embedding_model
+    if not isinstance(embedder, PrecomputedEmbedder):
+        yield
+        return
+    keys = await asyncio.to_thread(embedder.precompute, texts, memory_action)
+    try:
+        yield
+    finally:
+        embedder.release(keys)
+
+def _create_mem0_client() -> Memory:
+    """Build the Mem0 client from the environment (see get_mem0_client)."""
+    logger.info("Initializing Mem0 client...")
+    
+    # Mem0 configuration with ChromaDB (separate path to avoid conflicts)
+    import os.path
+    # Use absolute path to ensure consistency
+    current_dir = os.path.dirname(os.path.abspath(__file__))
+    default_mem0_path = os.path.join(current_dir, "..", "data", "chroma_db_mem0")
+    mem0_db_path = os.getenv("MEM0_DB_PATH", default_mem0_path)
+    
+    collection_name = os.getenv("MEM0_COLLECTION_NAME", "vibe_memories")
+    vector_store_config = {
+        "collection_name": collection_name,
+        "path": mem0_db_path
+    }
+    if SHARED_STORE_CLIENT:
+        from chroma_setup import get_chroma_client, get_chroma_db_path, copy_collection_from
+        # Memories saved before the switch move over once
+        copy_collection_from(mem0_db_path, collection_name)
+        # Mem0 uses the given client; its config still requires a path
+        vector_store_config = {
+            "collection_name": collection_name,
+            "client": get_chroma_client(),
+            "path": get_chroma_db_path()
+        }
+    
+    config = {
+        "vector_store": {
+            "provider": "chroma",
+            "config": vector_store_config
+        },
+        "llm": {
+            "provider": "openai",
+            "config": {
+                "model": os.getenv("LLM_CHOICE", "gpt-4o-mini"),
+                "api_key": os.getenv("OPENAI_API_KEY")
+            }
+        },
+        "embedder": {
+            "provider": "openai",
+            "config": {
+                "model": os.getenv("EMBEDDING_MODEL", "text-embedding-3-small"),
+                "api_key": os.getenv("OPENAI_API_KEY")
+            }
+        }
+    }
+    
+    client = Memory.from_config(config)
+    if SHARED_STORE_CLIENT:
+        _share_openai_client(client)
+    # Store calls find their embeddings precomputed instead of calling OpenAI under the store lock
+    client.embedding_model = PrecomputedEmbedder(client.embedding_model)
+    logger.info(f"Mem0 client initialized ({'shared' if SHARED_STORE_CLIENT else 'separate'} store client)")
+    return client
 
 def get_mem0_client() -> Memory:
     """Get configured Mem0 client."""
     global memory_client
     
     if memory_client is None:
-        logger.info("Initializing Mem0 client...")
-        
-        # Mem0 configuration with ChromaDB (separate path to avoid conflicts)
-        import os.path
-        # Use absolute path to ensure consistency
-        current_dir = os.path.dirname(os.path.abspath(__file__))
-        default_mem0_path = os.path.join(current_dir, "..", "data", "chroma_db_mem0")
-        mem0_db_path = os.getenv("MEM0_DB_PATH", default_mem0_path)
-        
-        config = {
-            "vector_store": {
-                "provider": "chroma",
-                "config": {
-                    "collection_name": os.getenv("MEM0_COLLECTION_NAME", "vibe_memories"),
-                    "path": mem0_db_path
-                }
-            },
-            "llm": {
-                "provider": "openai",
-                "config": {
-                    "model": os.getenv("LLM_CHOICE", "gpt-4o-mini"),
-                    "api_key": os.getenv("OPENAI_API_KEY")
-                }
-            },
-            "embedder": {
-                "provider": "openai",
-                "config": {
-                    "model": os.getenv("EMBEDDING_MODEL", "text-embedding-3-small"),
-                    "api_key": os.getenv("OPENAI_API_KEY")
-                }
-            }
-        }
-        
-        memory_client = Memory.from_config(config)
-        logger.info("Mem0 client initialized")
+        with _memory_client_lock:
+            if memory_client is None:
+                memory_client = _create_mem0_client()
     
     return memory_client
 
+def extract_memory_id(result: Any) -> Optional[str]:
+    """Extract the first memory ID from a Mem0 add() result (handles different response formats)."""
+    memory_id: Any = None
+    if isinstance(result, dict):
+        if "memory_id" in result:
+            memory_id = result["memory_id"]
+        elif "id" in result:
+            memory_id = result["id"]
+        else:
+            items = result.get("results")
+            if isinstance(items, list) and items and isinstance(items[0], dict):
+                memory_id = items[0].get("id")
+    elif isinstance(result, list) and result and isinstance(result[0], dict):
+        memory_id = result[0].get("id")
+    elif hasattr(result, 'id'):
+        memory_id = result.id
+    return str(memory_id) if memory_id is not None else None
+
+def track_memory(
+    user_id: str,
+    memory_id: str,
+    memory_text: str,
+    metadata: Optional[Dict[str, Any]] = None,
+    created_ts: Optional[float] = None
+) -> None:
+    """Record a newly added memory in the local indexes (never fails the add)."""
+    from datetime import datetime, timezone
+    import time
+    
+    if created_ts is None:
+        created_ts = time.time()
+    
+    try:
+        if get_recency_index().add(user_id, memory_id, memory_text, metadata, created_ts):
+            get_memory_aggregates().memory_added(user_id, memory_text, metadata)
+        get_memory_snapshot().add(user_id, created_ts, {
+            "id": memory_id,
+            "memory": memory_text,
+            "user_id": user_id,
+            "created_at": datetime.fromtimestamp(created_ts, timezone.utc).isoformat(),
+            "metadata": metadata or {}
+        })
+    except Exception as e:
+        logger.error(f"Failed to index memory {memory_id}: {e}")
+
+def untrack_memory(memory_id: str) -> None:
+    """Remove a deleted memory from the local indexes."""
+    try:
+        removed = get_recency_index().remove(memory_id)
+        if removed is not None:
+            get_memory_aggregates().memory_removed(removed["user_id"], removed["memory"], removed["metadata"])
+        get_memory_snapshot().remove(memory_id)
+    except Exception as e:
+        logger.error(f"Failed to unindex memory {memory_id}: {e}")
+
+def track_added_memories(user_id: str, result: Any, metadata: Optional[Dict[str, Any]] = None) -> None:
+    """Record every memory created, updated or deleted by a Mem0 add() call in the local indexes."""
+    if isinstance(result, dict) and "results" in result:
+        items = result["results"]
+    else:
+        items = result if isinstance(result, list) else []
+
+    created_ts = (metadata or {}).get("creation_timestamp")
+    for item in items:
+        if not isinstance(item, dict) or not item.get("id"):
+            continue
+        # Inferred adds may also update or delete existing memories
+        event = item.get("event", "ADD")
+        if event == "ADD":
+            track_memory(user_id, str(item["id"]), item.get("memory", ""), metadata, created_ts)
+        elif event == "UPDATE":
+            # Mem0 merged the new information into an existing memory: replace its local copy
+            untrack_memory(str(item["id"]))
+            track_memory(user_id, str(item["id"]), item.get("memory", ""), metadata, created_ts)
+        elif event == "DELETE":
+            untrack_memory(str(item["id"]))
+
 async def add_memory(user_id: str, memory_data: Dict[str, Any]) -> Dict[str, Any]:
     """Add a generic memory to Mem0."""
     try:
@@ -84,19 +290,77 @@ async def add_memory(user_id: str, memory_data: Dict[str, Any]) -> Dict[str, Any
             "content_type": "generic"
         }
         
-        # Add memory to Mem0 with temporal metadata
-        result = client.add(
+        # Add memory to Mem0 with temporal metadata (inferred adds extract facts with the
+        # LLM first, so their embeddings cannot be computed ahead of the store call)
+        result = await write_store(
+            MEM0_STORE,
+            client.add,
             messages=[{"role": "user", "content": text}],
             user_id=user_id,
             metadata=enhanced_metadata
         )
         
+        track_added_memories(user_id, result, enhanced_metadata)
+        
         return result
         
     except Exception as e:
         logger.error(f"Failed to add memory: {e}")
         raise
 
+def browser_memory_text(url: str, title: str, synopsis: str, tags: List[str]) -> str:
+    """Structured memory text with clear URL preservation."""
+    return f"Visited: {title}\nURL: {url}\nSummary: {synopsis}\nTags: {', '.join(tags[:5])}"
+
+def _browser_memory_record(
+    url: str,
+    title: str,
+    synopsis: str,
+    tags: List[str],
+    user_id: str
+) -> Tuple[str, Dict[str, Any], float]:
+    """Memory text, metadata and creation timestamp of a browser tab memory."""
+    from datetime import datetime, timezone
+    import time
+    
+    memory_text = browser_memory_text(url, title, synopsis, tags)
+    
+    # Create temporal metadata for better tracking
+    current_timestamp = time.time()
+    current_datetime = datetime.now(timezone.utc).isoformat()
+    
+    metadata = {
+        "url": url,
+        "title": title,
+        "synopsis": synopsis,
+        "tags": ", ".join(tags),  # Convert list to string
+        "domain": extract_domain_from_url(url),
+        "content_type": "browser_tab",
+        # Enhanced temporal metadata
+        "creation_timestamp": current_timestamp,
+        "creation_datetime": current_datetime,
+        "temporal_id": f"mem_{int(current_timestamp)}_{user_id}",
+        "age_category": "recent"  # Will be updated over time
+    }
+    return memory_text, metadata, current_timestamp
+
+async def _write_browser_memory(memory_text: str, metadata: Dict[str, Any], user_id: str) -> Optional[str]:
+    """Add a browser tab memory to Mem0; returns the id Mem0 assigned."""
+    memory = get_mem0_client()
+    # Store with infer=False to preserve exact structure AND with metadata including temporal info
+    messages = [{"role": "user", "content": memory_text}]
+    async with embedded_outside_lock(memory, [memory_text], "add"):
+        result = await write_store(
+            MEM0_STORE,
+            memory.add,
+            messages,
+            user_id=user_id,
+            infer=False,  # Preserve original text structure
+            metadata=metadata
+        )
+    # Extract memory ID from result (handle different response formats)
+    return extract_memory_id(result)
+
 async def add_browser_memory(
     url: str,
     title: str,
@@ -110,52 +374,16 @@ async def add_browser_memory(
     Returns the memory ID.
     """
     try:
-        from datetime import datetime, timezone
-        import time
-        
-        memory = get_mem0_client()
-        
-        # Create structured memory text with clear URL preservation
-        memory_text = f"Visited: {title}\nURL: {url}\nSummary: {synopsis}\nTags: {', '.join(tags[:5])}"
-        
-        # Create temporal metadata for better tracking
-        current_timestamp = time.time()
-        current_datetime = datetime.now(timezone.utc).isoformat()
+        memory_text, metadata, current_timestamp = _browser_memory_record(url, title, synopsis, tags, user_id)
+        memory_id = await _write_browser_memory(memory_text, metadata, user_id)
         
-        # Store with infer=False to preserve exact structure AND with metadata including temporal info
-        messages = [{"role": "user", "content": memory_text}]
-        result = memory.add(
-            messages, 
-            user_id=user_id,
-            infer=False,  # Preserve original text structure
-            metadata={
-                "url": url,
-                "title": title,
-                "synopsis": synopsis,
-                "tags": ", ".join(tags),  # Convert list to string
-                "domain": extract_domain_from_url(url),
-                "content_type": "browser_tab",
-                # Enhanced temporal metadata
-                "creation_timestamp": current_timestamp,
-                "creation_datetime": current_datetime,
-                "temporal_id": f"mem_{int(current_timestamp)}_{user_id}",
-                "age_category": "recent"  # Will be updated over time
-            }
-        )
-        
-        # Extract memory ID from result (handle different response formats)
-        memory_id = None
-        if isinstance(result, dict):
-            if "memory_id" in result:
-                memory_id = result["memory_id"]
-            elif "id" in result:
-                memory_id = result["id"]
-        elif hasattr(result, 'id'):
-            memory_id = result.id
-        
-        # Fallback: generate ID from URL and timestamp
+        # Fallback: generate ID from URL and timestamp. It is not a Mem0 memory, so it is
+        # not tracked as one; the chunk collector removes chunks saved under it
         if not memory_id:
             memory_id = f"memory_{abs(hash(url))}_{int(current_timestamp)}"
+            logger.warning(f"Mem0 returned no id for {url}, chunks are saved under fallback id {memory_id}")
+        else:
+            track_memory(user_id, str(memory_id), memory_text, metadata, current_timestamp)
         
         return str(memory_id)
         
@@ -163,6 +391,144 @@ async def add_browser_memory(
         logger.error(f"Failed to add browser memory: {e}")
         raise
 
+def stage_browser_memory(
+    url: str,
+    title: str,
+    synopsis: str,
+    tags: List[str],
+    user_id: str = "browser_user"
+) -> Dict[str, Any]:
+    """
+    Fast-ack variant of add_browser_memory: reserve a local id for the memory without
+    writing it to Mem0. Returns the pending record ({memory_id, memory_text, metadata});
+    journal it, then track_memory makes it visible to timestamp-based tools and
+    commit_browser_memory writes it to Mem0 later.
+    """
+    memory_text, metadata, _ = _browser_memory_record(url, title, synopsis, tags, user_id)
+    memory_id = new_local_id()
+    metadata[LOCAL_ID_KEY] = memory_id
+    get_memory_id_map().reserve(memory_id, user_id)
+    return {"memory_id": memory_id, "memory_text": memory_text, "metadata": metadata}
+
+async def commit_browser_memory(pending: Dict[str, Any], user_id: str = "browser_user") -> Optional[str]:
+    """
+    Write a staged memory to Mem0 and bind the id it received; returns the Mem0 id.
+    Repeating it after a successful commit does nothing. None when the memory was
+    deleted before Mem0 stored it (its Mem0 record is removed again).
+    """
+    local_ids = get_memory_id_map()
+    memory_id = pending["memory_id"]
+    mem0_id = local_ids.mem0_id(memory_id)
+    if mem0_id is not None:
+        return mem0_id
+    if not local_ids.is_reserved(memory_id):
+        return None
+    
+    mem0_id = await _write_browser_memory(pending["memory_text"], pending["metadata"], user_id)
+    if not mem0_id:
+        raise RuntimeError(f"Mem0 returned no id for {memory_id}")
+    if not local_ids.bind(memory_id, str(mem0_id)):
+        logger.info(f"Memory {memory_id} was deleted while it was being saved, removing it from Mem0")
+        await write_store(MEM0_STORE, get_mem0_client().delete, memory_id=str(mem0_id))
+        return None
+    return str(mem0_id)
+
+# Mem0 payload keys that are not page metadata
+_MEM0_PAYLOAD_KEYS = {"data", "hash", "created_at", "updated_at", "user_id", "agent_id", "run_id", "actor_id", "role"}
+
+def _mem0_version() -> Tuple[int, ...]:
+    from importlib.metadata import version
+    import re
+    return tuple(int(part) for part in re.findall(r"\d+", version("mem0ai"))[:3])
+
+# Memory.update() stores the metadata it is given from mem0ai 1.0.8 on; older versions
+# replace the payload with Mem0's own keys, dropping the page fields. uv.lock and
+# requirements.txt pin 0.1.106, so locked installs take the _write_payload_directly path
+MEM0_UPDATE_TAKES_METADATA = _mem0_version() >= (1, 0, 8)
+
+def _get_mem0_payload(memory: Memory, mem0_id: str) -> Optional[Dict[str, Any]]:
+    """Stored payload of a Mem0 record, None if Mem0 does not know the id."""
+    try:
+        existing = memory.vector_store.get(vector_id=mem0_id)
+    except IndexError:
+        # Mem0's Chroma store indexes into an empty result for unknown ids
+        return None
+    return dict(existing.payload or {}) if existing is not None else None
+
+def _write_merged_synopsis(
+    memory: Memory, mem0_id: str, memory_text: str, synopsis: str, tags: List[str]
+) -> Optional[Dict[str, Any]]:
+    """
+    Rewrite a browser memory's text, synopsis and tags in place, keeping its page metadata
+    (blocking; a MEM0_STORE write). Returns the stored payload, None for unknown ids.
+    tests/test_mem0_contract.py checks both write paths against the installed Mem0.
+    """
+    payload = _get_mem0_payload(memory, mem0_id)
+    if payload is None:
+        return None
+    metadata = {key: value for key, value in payload.items() if key not in _MEM0_PAYLOAD_KEYS}
+    metadata.update({"synopsis": synopsis, "tags": ", ".join(tags)})
+    if MEM0_UPDATE_TAKES_METADATA:
+        memory.update(mem0_id, memory_text, metadata=metadata)
+    else:
+        _write_payload_directly(memory, mem0_id, payload, memory_text, metadata)
+    return _get_mem0_payload(memory, mem0_id)
+
+def _write_payload_directly(
+    memory: Memory, mem0_id: str, payload: Dict[str, Any], memory_text: str, metadata: Dict[str, Any]
+) -> None:
+    """Memory.update() for Mem0 versions before 1.0.8, through its vector store and history."""
+    import hashlib
+    from datetime import datetime, timezone
+    
+    previous_text = payload.get("data", "")
+    updated_at = datetime.now(timezone.utc).isoformat()
+    payload.update(metadata)
+    payload.update({
+        "data": memory_text,
+        "hash": hashlib.md5(memory_text.encode()).hexdigest(),
+        "updated_at": updated_at
+    })
+    vector = memory.embedding_model.embed(memory_text, "update")
+    memory.vector_store.update(vector_id=mem0_id, vector=vector, payload=payload)
+    try:
+        memory.db.add_history(
+            mem0_id, previous_text, memory_text, "UPDATE", created_at=payload.get("created_at"), updated_at=updated_at
+        )
+    except Exception as e:
+        logger.warning(f"Could not record Mem0 history for {mem0_id}: {e}")
+
+async def merge_browser_memory_synopsis(
+    memory_id: str,
+    synopsis: str,
+    tags: List[str],
+    user_id: str = "browser_user"
+) -> bool:
+    """
+    Merge the LLM synopsis and tags into a browser memory's own Mem0 record, re-embedding
+    its text once, instead of adding a second memory for them. Returns False if the
+    memory is not in Mem0 (deleted, or saved under a fallback id).
+    """
+    memory = get_mem0_client()
+    mem0_id = resolve_mem0_id(memory_id)
+    payload = await read_store(MEM0_STORE, _get_mem0_payload, memory, mem0_id)
+    if payload is None:
+        return False
+    
+    memory_text = browser_memory_text(payload.get("url", ""), payload.get("title", ""), synopsis, tags)
+    # The update's only embedding call, made outside the store's write lock
+    async with embedded_outside_lock(memory, [memory_text], "update"):
+        payload = await write_store(MEM0_STORE, _write_merged_synopsis, memory, mem0_id, memory_text, synopsis, tags)
+    if payload is None:
+        return False
+    
+    # Replace the local copy (recency index, snapshot and counters follow the new text)
+    metadata = {key: value for key, value in payload.items() if key not in _MEM0_PAYLOAD_KEYS}
+    untrack_memory(memory_id)
+    created_ts = parse_memory_timestamp({"metadata": metadata, "created_at": payload.get("created_at")})
+    track_memory(user_id, memory_id, memory_text, metadata, created_ts)
+    return True
+
 async def search_browser_memories(
     query: str,
     user_id: str = "browser_user",
@@ -176,13 +542,15 @@ async def search_browser_memories(
         memory = get_mem0_client()
         
         # Search memories
-        results = memory.search(query=query, user_id=user_id, limit=limit)
+        async with embedded_outside_lock(memory, [query], "search"):
+            results = await read_store(MEM0_STORE, memory.search, query=query, user_id=user_id, limit=limit)
         
         # Handle Mem0 response format
         if isinstance(results, dict) and "results" in results:
             memory_objects = results["results"]
         else:
             memory_objects = results if results else []
+        normalize_memory_ids(memory_objects)
         
         # Convert to structured format expected by TypeScript frontend
         memories = []
@@ -191,73 +559,12 @@ async def search_browser_memories(
         for memory_obj in memory_objects:
             try:
                 if isinstance(memory_obj, dict):
-                    memory_content = memory_obj.get("memory", "")
-                    
-                    # Try to get info from metadata first (preferred)
-                    metadata = memory_obj.get("metadata", {})
+                    record = MemoryRecord.from_mem0(memory_obj, user_id)
+                    if record.domain:
+                        discovered_domains.add(record.domain)
                     
-                    if metadata and metadata.get("content_type") == "browser_tab":
-                        # Use metadata directly (most reliable)
-                        url = metadata.get("url", "Unknown")
-                        title = metadata.get("title", "Untitled")
-                        synopsis = metadata.get("synopsis", memory_content)
-                        domain = metadata.get("domain", "Unknown")
-                        
-                        if domain != "Unknown":
-                            discovered_domains.add(domain)
-                    else:
-                        # FALLBACK: Parse content for existing memories
-                        # Try new structured format first: "Visited: {title}\nURL: {url}\n..."
-                        if "Visited:" in memory_content and "URL:" in memory_content:
-                            lines = memory_content.split('\n')
-                            title = "Untitled"
-                            url = "Unknown"
-                            synopsis = memory_content
-                            
-                            for line in lines:
-                                if line.startswith("Visited:"):
-                                    title = line.replace("Visited:", "").strip()
-                                elif line.startswith("URL:"):
-                                    url = line.replace("URL:", "").strip()
-                                elif line.startswith("Summary:"):
-                                    synopsis = line.replace("Summary:", "").strip()
-                        else:
-                            # Fallback to old parsing logic for existing memories
-                            url = "Unknown"
-                            title = "Untitled"
-                            synopsis = memory_content
-                            
-                            # Try to extract URL using regex
-                            import re
-                            url_match = re.search(r'https?://[^\s]+', memory_content)
-                            if url_match:
-                                url = url_match.group(0)
-                            
-                            # Extract title for old format
-                            title_match = re.search(r'I visited\s+(.+?)\s+at\s+https?://', memory_content)
-                            if title_match:
-                                title = title_match.group(1).strip()
-                            elif len(memory_content) > 10:
-                                # Use first part of content as title
-                                title = memory_content[:50] + "..."
-                        
-                        # Extract domain from URL
-                        domain = "Unknown"
-                        if url != "Unknown":
-                            domain = extract_domain_from_url(url)
-                            if domain != "Unknown":
-                                discovered_domains.add(domain)
-                    
-                    memory_item = {
-                        "id": memory_obj.get("id", ""),
-                        "url": url,
-                        "title": title,
-                        "synopsis": synopsis,
-                        "domain": domain,
-                        "content": memory_content,  # Keep original content for reference
-                        "created_at": memory_obj.get("created_at", ""),
-                        "score": memory_obj.get("score", 0.0)
-                    }
+                    memory_item = record.to_browser_memory()
+                    memory_item["score"] = memory_obj.get("score", 0.0)
                     memories.append(memory_item)
                         
             except Exception as e:
@@ -275,145 +582,173 @@ async def get_recent_browser_memories(
     limit: int = 10
 ) -> List[Dict[str, Any]]:
     """
-    Get recent memories for general context.
-    Enhanced to handle both structured format and metadata.
-    FIXED: Now properly sorts by timestamp to return truly recent memories.
+    Get recent memories for general context, newest first.
+    Page fields come from the shared MemoryRecord model (metadata or cached legacy parse).
     """
     try:
-        memory = get_mem0_client()
+        # Newest memories from the in-memory snapshot (no get_all per call)
+        memory_objects = await get_memories_by_recency(user_id=user_id, limit=limit)
         
-        # Get all memories for user
-        results = memory.get_all(user_id=user_id)
-        
-        # Handle Mem0 response format
-        if isinstance(results, dict) and "results" in results:
-            memory_objects = results["results"]
-        else:
-            memory_objects = results if results else []
-        
-        # Convert to structured format AND extract timestamps for sorting
-        memories_with_timestamps = []
+        # Convert to structured format (already sorted newest first)
+        sorted_memories = []
         for memory_obj in memory_objects:
             try:
-                if isinstance(memory_obj, dict):
-                    memory_content = memory_obj.get("memory", "")
-                    created_at = memory_obj.get("created_at", "")
-                    
-                    # Try to get info from metadata first (preferred)
-                    metadata = memory_obj.get("metadata", {})
-                    
-                    if metadata and metadata.get("content_type") == "browser_tab":
-                        # Use metadata directly (most reliable)
-                        url = metadata.get("url", "Unknown")
-                        title = metadata.get("title", "Untitled")
-                        synopsis = metadata.get("synopsis", memory_content)
-                        domain = metadata.get("domain", "Unknown")
-                    else:
-                        # FALLBACK: Parse content for existing memories
-                        # Try new structured format first: "Visited: {title}\nURL: {url}\n..."
-                        if "Visited:" in memory_content and "URL:" in memory_content:
-                            lines = memory_content.split('\n')
-                            title = "Untitled"
-                            url = "Unknown"
-                            synopsis = memory_content
-                            
-                            for line in lines:
-                                if line.startswith("Visited:"):
-                                    title = line.replace("Visited:", "").strip()
-                                elif line.startswith("URL:"):
-                                    url = line.replace("URL:", "").strip()
-                                elif line.startswith("Summary:"):
-                                    synopsis = line.replace("Summary:", "").strip()
-                        else:
-                            # Fallback to old parsing logic for existing memories
-                            url = "Unknown"
-                            title = "Untitled"
-                            synopsis = memory_content
-                            
-                            # Try to extract URL using regex
-                            import re
-                            url_match = re.search(r'https?://[^\s]+', memory_content)
-                            if url_match:
-                                url = url_match.group(0)
-                            
-                            # Extract title for old format
-                            title_match = re.search(r'I visited\s+(.+?)\s+at\s+https?://', memory_content)
-                            if title_match:
-                                title = title_match.group(1).strip()
-                            elif len(memory_content) > 10:
-                                # Use first part of content as title
-                                title = memory_content[:50] + "..."
-                        
-                        # Extract domain from URL
-                        domain = "Unknown"
-                        if url != "Unknown":
-                            domain = extract_domain_from_url(url)
-                    
-                    memory_item = {
-                        "id": memory_obj.get("id", ""),
-                        "url": url,
-                        "title": title,
-                        "synopsis": synopsis,
-                        "domain": domain,
-                        "content": memory_content,  # Keep original content for reference
-                        "created_at": created_at,
-                        "updated_at": memory_obj.get("updated_at", ""),
-                        "user_id": memory_obj.get("user_id", user_id)
-                    }
-                    
-                    # Extract timestamp for sorting
-                    sort_timestamp = 0
-                    if created_at:
-                        try:
-                            from datetime import datetime
-                            if isinstance(created_at, str):
-                                # Try ISO format first
-                                try:
-                                    sort_timestamp = datetime.fromisoformat(created_at.replace('Z', '+00:00')).timestamp()
-                                except:
-                                    # Fallback: assume it's already a timestamp string
-                                    sort_timestamp = float(created_at)
-                            else:
-                                sort_timestamp = float(created_at)
-                        except (ValueError, TypeError):
-                            # If timestamp parsing fails, use metadata timestamp
-                            if metadata and "creation_timestamp" in metadata:
-                                try:
-                                    sort_timestamp = float(metadata["creation_timestamp"])
-                                except:
-                                    sort_timestamp = 0
-                    
-                    memories_with_timestamps.append((memory_item, sort_timestamp))
+                record = MemoryRecord.from_mem0(memory_obj, user_id)
+                memory_item = record.to_browser_memory()
+                memory_item["updated_at"] = record.updated_at
+                memory_item["user_id"] = record.user_id
+                sorted_memories.append(memory_item)
                         
             except Exception as e:
                 logger.error(f"Error processing memory object: {e}")
                 continue
         
-        # Sort by timestamp (newest first) and take only the requested limit
-        memories_with_timestamps.sort(key=lambda x: x[1], reverse=True)
-        sorted_memories = [memory for memory, _ in memories_with_timestamps[:limit]]
-        
         return sorted_memories
         
     except Exception as e:
         logger.error(f"Failed to get recent memories: {e}")
         return []
 
+async def _backfill_recency_index(user_id: str) -> None:
+    """Import the user's existing Mem0 memories into the recency index."""
+    index = get_recency_index()
+    if index.is_backfilled(user_id):
+        return
+
+    # Deletes landing while get_all runs must not be re-inserted from its results
+    index.begin_backfill(user_id)
+    try:
+        memory = get_mem0_client()
+        try:
+            results = await read_store(MEM0_STORE, memory.get_all, user_id=user_id, limit=RECENCY_BACKFILL_LIMIT)
+        except TypeError:
+            # Older Mem0 versions don't accept a limit
+            results = await read_store(MEM0_STORE, memory.get_all, user_id=user_id)
+    except BaseException:
+        index.cancel_backfill(user_id)
+        raise
+
+    if isinstance(results, dict) and "results" in results:
+        memory_objects = results["results"]
+    else:
+        memory_objects = results if results else []
+
+    index.backfill(user_id, normalize_memory_ids(memory_objects))
+
+def _finish_snapshot_backfill(
+    user_id: str, backfill: "concurrent.futures.Future[None]", task: "asyncio.Task[None]"
+) -> None:
+    """Hand an import's outcome to every caller waiting for it, on whichever loop."""
+    with _snapshot_backfills_lock:
+        _snapshot_backfills.pop(user_id, None)
+    if task.cancelled():
+        backfill.cancel()
+    elif task.exception() is not None:
+        backfill.set_exception(task.exception())
+    else:
+        backfill.set_result(None)
+
+async def get_user_snapshot(user_id: str = "browser_user") -> MemorySnapshot:
+    """
+    Get the memory snapshot with the user's records loaded.
+    Existing Mem0 memories are imported into the recency index once per user (concurrent
+    first calls share one import); after that the snapshot is kept current by
+    add/delete/clear, never by get_all.
+    """
+    snapshot = get_memory_snapshot()
+    if snapshot.is_loaded(user_id):
+        return snapshot
+
+    with _snapshot_backfills_lock:
+        backfill = _snapshot_backfills.get(user_id)
+        if backfill is None:
+            backfill = concurrent.futures.Future()
+            _snapshot_backfills[user_id] = backfill
+            task = asyncio.ensure_future(_backfill_recency_index(user_id))
+            task.add_done_callback(functools.partial(_finish_snapshot_backfill, user_id, backfill))
+    # Shielded so a cancelled caller does not cancel the import for the others
+    await asyncio.shield(asyncio.wrap_future(backfill))
+
+    snapshot.load(user_id)
+    return snapshot
+
+async def get_memories_by_recency(
+    user_id: str = "browser_user",
+    limit: int = 5,
+    start_ts: Optional[float] = None,
+    end_ts: Optional[float] = None
+) -> List[Dict[str, Any]]:
+    """Get memories newest first, optionally restricted to [start_ts, end_ts]."""
+    snapshot = await get_user_snapshot(user_id)
+    return snapshot.latest(user_id, limit, start_ts, end_ts)
+
 async def delete_memory(memory_id: str, user_id: str = "browser_user") -> bool:
     """Delete a specific memory."""
     try:
-        memory = get_mem0_client()
-        memory.delete(memory_id=memory_id, user_id=user_id)
+        local_ids = get_memory_id_map()
+        if not local_ids.is_pending(memory_id):
+            memory = get_mem0_client()
+            await write_store(MEM0_STORE, memory.delete, memory_id=resolve_mem0_id(memory_id))
+        # A fast-ack memory not in Mem0 yet is dropped before its commit
+        local_ids.remove(memory_id)
+        untrack_memory(memory_id)
         return True
     except Exception as e:
         logger.error(f"Failed to delete memory {memory_id}: {e}")
         return False
 
+def delete_memories_batch(memory_ids: List[str]) -> Dict[str, List[str]]:
+    """
+    Delete several memories with one client (blocking; run it as a write of MEM0_STORE).
+    Returns the deleted and failed ids; ids Mem0 does not know count as failed.
+    """
+    memory = get_mem0_client()
+    local_ids = get_memory_id_map()
+    deleted = []
+    failed = []
+    for memory_id in memory_ids:
+        try:
+            if not local_ids.is_pending(memory_id):
+                memory.delete(memory_id=resolve_mem0_id(memory_id))
+            local_ids.remove(memory_id)
+            untrack_memory(memory_id)
+            deleted.append(memory_id)
+        except Exception as e:
+            logger.debug(f"Failed to delete memory {memory_id}: {e}")
+            failed.append(memory_id)
+    return {"deleted": deleted, "failed": failed}
+
+def find_unknown_memories(memory_ids: List[str]) -> List[str]:
+    """
+    Memory ids Mem0 confirms it does not know (blocking; run it as a read of MEM0_STORE).
+    Pending fast-ack ids and ids whose lookup fails are left out.
+    """
+    memory = get_mem0_client()
+    local_ids = get_memory_id_map()
+    unknown = []
+    for memory_id in memory_ids:
+        # Fast-ack memories are written to Mem0 by their ingestion job
+        if local_ids.is_pending(memory_id):
+            continue
+        try:
+            if not memory.get(resolve_mem0_id(memory_id)):
+                unknown.append(memory_id)
+        except IndexError:
+            # Mem0's Chroma store indexes into an empty result for unknown ids
+            unknown.append(memory_id)
+        except Exception as e:
+            logger.debug(f"Mem0 lookup failed for {memory_id}: {e}")
+    return unknown
+
 async def clear_all_memories(user_id: str = "browser_user") -> bool:
     """Clear all memories for a user (use with caution)."""
     try:
         memory = get_mem0_client()
-        memory.delete_all(user_id=user_id)
+        await write_store(MEM0_STORE, memory.delete_all, user_id=user_id)
+        get_recency_index().clear_user(user_id)
+        get_memory_id_map().clear_user(user_id)
+        get_memory_snapshot().clear(user_id)
+        get_memory_aggregates().user_cleared(user_id)
         logger.info(f"Cleared all memories for user: {user_id}")
         return True
     except Exception as e:
@@ -0,0 +1,336 @@
+"""
+Persistent incremental aggregates for memory and content chunk statistics.
+Counters are updated on ingest and delete so get_memory_stats never scans Mem0 or ChromaDB.
+"""
+import json
+import time
+import logging
+from typing import List, Dict, Any, Optional
+
+from local_db import get_local_db, get_local_db_lock
+
+logger = logging.getLogger(__name__)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS stats_counters (
+    scope TEXT NOT NULL,
+    user_id TEXT NOT NULL,
+    key TEXT NOT NULL,
+    count INTEGER NOT NULL DEFAULT 0,
+    bytes INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (scope, user_id, key)
+);
+CREATE TABLE IF NOT EXISTS stats_memory_chunks (
+    memory_id TEXT PRIMARY KEY,
+    user_id TEXT NOT NULL DEFAULT '',
+    source_id TEXT,
+    chunk_count INTEGER NOT NULL DEFAULT 0,
+    bytes INTEGER NOT NULL DEFAULT 0,
+    content_types TEXT
+);
+CREATE TABLE IF NOT EXISTS stats_initialized (
+    name TEXT PRIMARY KEY,
+    initialized_at REAL NOT NULL
+);
+"""
+
+# Counter scopes
+MEMORY_TOTAL = "memory_total"
+MEMORY_DOMAIN = "memory_domain"
+MEMORY_CONTENT_TYPE = "memory_content_type"
+CHUNK_TOTAL = "chunk_total"
+CHUNK_DOMAIN = "chunk_domain"
+CHUNK_CONTENT_TYPE = "chunk_content_type"
+
+# Chunk counters written before they were kept per user
+_LEGACY_CHUNK_USER = ""
+
+# Global aggregates instance
+_memory_aggregates = None
+
+def _text_bytes(text: Any) -> int:
+    return len(str(text).encode("utf-8")) if text else 0
+
+def memory_dimensions(metadata: Optional[Dict[str, Any]]) -> Dict[str, str]:
+    """Get the domain and content type a memory is counted under."""
+    metadata = metadata or {}
+    domain = metadata.get("domain")
+    if not domain and metadata.get("url"):
+        from urllib.parse import urlparse
+        domain = urlparse(str(metadata["url"])).netloc.lower()
+        if domain.startswith('www.'):
+            domain = domain[4:]
+    content_type = metadata.get("content_type") or metadata.get("type") or "unknown"
+    return {"domain": domain or "", "content_type": content_type}
+
+def chunk_bytes(document: str, metadata: Dict[str, Any]) -> int:
+    """Bytes stored for a chunk (document plus original content, inline or in the content store)."""
+    return _text_bytes(document) + _text_bytes(metadata.get("original_content", "")) + int(metadata.get("content_bytes", 0) or 0)
+
+class MemoryAggregates:
+    """
+    Counters per user, per domain and per content type, plus bytes stored and
+    chunks per memory. Reads are single-row lookups; a full recount is only done
+    once per scope (or on explicit verification).
+    """
+
+    def __init__(self) -> None:
+        self._lock = get_local_db_lock()
+        with self._lock:
+            db = get_local_db()
+            db.executescript(_SCHEMA)
+            self._migrate_chunk_owner(db)
+
+    def _migrate_chunk_owner(self, db: Any) -> None:
+        """Chunk counters used to be global; drop them so each user's partition is recounted."""
+        columns = {row["name"] for row in db.execute("PRAGMA table_info(stats_memory_chunks)").fetchall()}
+        if "user_id" in columns:
+            return
+        db.execute("ALTER TABLE stats_memory_chunks ADD COLUMN user_id TEXT NOT NULL DEFAULT ''")
+        db.execute("DELETE FROM stats_memory_chunks")
+        db.execute(
+            "DELETE FROM stats_counters WHERE user_id = ? AND scope IN (?, ?, ?)",
+            (_LEGACY_CHUNK_USER, CHUNK_TOTAL, CHUNK_DOMAIN, CHUNK_CONTENT_TYPE)
+        )
+        db.execute("DELETE FROM stats_initialized WHERE name = 'chunks'")
+        db.commit()
+
+    # ---- memory counters ----
+
+    def memory_added(self, user_id: str, memory_text: str, metadata: Optional[Dict[str, Any]] = None) -> None:
+        self._apply_memory(user_id, memory_text, metadata, 1)
+
+    def memory_removed(self, user_id: str, memory_text: str, metadata: Optional[Dict[str, Any]] = None) -> None:
+        self._apply_memory(user_id, memory_text, metadata, -1)
+
+    def user_cleared(self, user_id: str) -> None:
+        with self._lock:
+            self._delete_user_counters(user_id)
+            get_local_db().commit()
+
+    def rebuild_user(self, user_id: str, memory_records: List[Dict[str, Any]]) -> None:
+        """Recount a user's memory counters from their records."""
+        with self._lock:
+            self._delete_user_counters(user_id)
+            for record in memory_records:
+                self._apply_memory(user_id, record.get("memory", ""), record.get("metadata"), 1, commit=False)
+            self._mark_initialized(f"user:{user_id}")
+            get_local_db().commit()
+
+    def _apply_memory(
+        self,
+        user_id: str,
+        memory_text: str,
+        metadata: Optional[Dict[str, Any]],
+        sign: int,
+        commit: bool = True
+    ) -> None:
+        dimensions = memory_dimensions(metadata)
+        size = _text_bytes(memory_text)
+        with self._lock:
+            self._bump(MEMORY_TOTAL, user_id, "all", sign, sign * size)
+            if dimensions["domain"]:
+                self._bump(MEMORY_DOMAIN, user_id, dimensions["domain"], sign, sign * size)
+            self._bump(MEMORY_CONTENT_TYPE, user_id, dimensions["content_type"], sign, sign * size)
+            if commit:
+                get_local_db().commit()
+
+    # ---- chunk counters ----
+
+    def chunks_added(
+        self,
+        user_id: str,
+        memory_id: str,
+        documents: List[str],
+        metadatas: List[Dict[str, Any]]
+    ) -> None:
+        """Count a batch of chunks inserted for one of a user's memories."""
+        self._apply_chunks(user_id, memory_id, documents, metadatas)
+        with self._lock:
+            get_local_db().commit()
+
+    def chunks_removed(self, memory_id: str) -> int:
+        """Uncount every chunk of a memory; returns the number of chunks it had."""
+        with self._lock:
+            db = get_local_db()
+            row = db.execute(
+                "SELECT * FROM stats_memory_chunks WHERE memory_id = ?", (memory_id,)
+            ).fetchone()
+            if row is None:
+                return 0
+
+            chunk_count, user_id = row["chunk_count"], row["user_id"]
+            self._bump(CHUNK_TOTAL, user_id, "all", -chunk_count, -row["bytes"])
+            if row["source_id"]:
+                self._bump(CHUNK_DOMAIN, user_id, row["source_id"], -chunk_count, -row["bytes"])
+            for content_type, count in json.loads(row["content_types"] or "{}").items():
+                self._bump(CHUNK_CONTENT_TYPE, user_id, content_type, -count, 0)
+            self._bump(CHUNK_TOTAL, user_id, "memories", -1, 0)
+            db.execute("DELETE FROM stats_memory_chunks WHERE memory_id = ?", (memory_id,))
+            db.commit()
+            return int(chunk_count)
+
+    def rebuild_chunks(
+        self,
+        user_id: str,
+        ids: List[str],
+        documents: List[str],
+        metadatas: List[Dict[str, Any]]
+    ) -> None:
+        """Recount a user's chunk counters from a full listing of their partition."""
+        by_memory: Dict[str, List[int]] = {}
+        for index, metadata in enumerate(metadatas):
+            by_memory.setdefault((metadata or {}).get("memory_id", ""), []).append(index)
+
+        with self._lock:
+            db = get_local_db()
+            db.execute(
+                "DELETE FROM stats_counters WHERE user_id = ? AND scope IN (?, ?, ?)",
+                (user_id, CHUNK_TOTAL, CHUNK_DOMAIN, CHUNK_CONTENT_TYPE)
+            )
+            db.execute("DELETE FROM stats_memory_chunks WHERE user_id = ?", (user_id,))
+            for memory_id, positions in by_memory.items():
+                self._apply_chunks(
+                    user_id,
+                    memory_id,
+                    [documents[i] if documents else "" for i in positions],
+                    [metadatas[i] or {} for i in positions]
+                )
+            self._mark_initialized(f"chunks:{user_id}")
+            db.commit()
+
+    def _apply_chunks(
+        self,
+        user_id: str,
+        memory_id: str,
+        documents: List[str],
+        metadatas: List[Dict[str, Any]]
+    ) -> None:
+        total_bytes = 0
+        content_types: Dict[str, int] = {}
+        source_id = ""
+        for document, metadata in zip(documents, metadatas):
+            total_bytes += chunk_bytes(document, metadata)
+            content_type = metadata.get("content_type", "general")
+            content_types[content_type] = content_types.get(content_type, 0) + 1
+            source_id = source_id or metadata.get("source_id", "")
+
+        chunk_count = len(metadatas)
+        if chunk_count == 0:
+            return
+
+        with self._lock:
+            db = get_local_db()
+            self._bump(CHUNK_TOTAL, user_id, "all", chunk_count, total_bytes)
+            if source_id:
+                self._bump(CHUNK_DOMAIN, user_id, source_id, chunk_count, total_bytes)
+            for content_type, count in content_types.items():
+                self._bump(CHUNK_CONTENT_TYPE, user_id, content_type, count, 0)
+
+            row = db.execute(
+                "SELECT content_types FROM stats_memory_chunks WHERE memory_id = ?", (memory_id,)
+            ).fetchone()
+            if row is None:
+                self._bump(CHUNK_TOTAL, user_id, "memories", 1, 0)
+            else:
+                for content_type, count in json.loads(row["content_types"] or "{}").items():
+                    content_types[content_type] = content_types.get(content_type, 0) + count
+            db.execute(
+                "INSERT INTO stats_memory_chunks (memory_id, user_id, source_id, chunk_count, bytes, content_types) "
+                "VALUES (?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT(memory_id) DO UPDATE SET "
+                "chunk_count = chunk_count + excluded.chunk_count, "
+                "bytes = bytes + excluded.bytes, "
+                "content_types = excluded.content_types",
+                (memory_id, user_id, source_id, chunk_count, total_bytes, json.dumps(content_types))
+            )
+
+    # ---- reads ----
+
+    def is_initialized(self, name: str) -> bool:
+        with self._lock:
+            row = get_local_db().execute(
+                "SELECT 1 FROM stats_initialized WHERE name = ?", (name,)
+            ).fetchone()
+        return row is not None
+
+    def chunk_counts(self, memory_ids: List[str]) -> Dict[str, int]:
+        """Get the counted chunks of each memory (memories without chunks are omitted)."""
+        counts = {}
+        with self._lock:
+            db = get_local_db()
+            for start in range(0, len(memory_ids), 500):
+                batch = memory_ids[start:start + 500]
+                rows = db.execute(
+                    f"SELECT memory_id, chunk_count FROM stats_memory_chunks WHERE memory_id IN ({','.join('?' * len(batch))})",
+                    batch
+                ).fetchall()
+                counts.update({row["memory_id"]: row["chunk_count"] for row in rows})
+        return counts
+
+    def summary(self, user_id: str) -> Dict[str, Any]:
+        """Get every counter of a user as a plain dict."""
+        with self._lock:
+            db = get_local_db()
+            rows = db.execute(
+                "SELECT scope, key, count, bytes FROM stats_counters WHERE user_id = ? AND count > 0",
+                (user_id,)
+            ).fetchall()
+
+        grouped: Dict[str, Dict[str, Dict[str, int]]] = {}
+        for row in rows:
+            grouped.setdefault(row["scope"], {})[row["key"]] = {"count": row["count"], "bytes": row["bytes"]}
+
+        memory_total = grouped.get(MEMORY_TOTAL, {}).get("all", {"count": 0, "bytes": 0})
+        chunk_total = grouped.get(CHUNK_TOTAL, {}).get("all", {"count": 0, "bytes": 0})
+        memories_with_chunks = grouped.get(CHUNK_TOTAL, {}).get("memories", {"count": 0})["count"]
+
+        return {
+            "memory_count": memory_total["count"],
+            "memory_bytes": memory_total["bytes"],
+            "memories_by_domain": {k: v["count"] for k, v in grouped.get(MEMORY_DOMAIN, {}).items()},
+            "memories_by_content_type": {k: v["count"] for k, v in grouped.get(MEMORY_CONTENT_TYPE, {}).items()},
+            "chunk_count": chunk_total["count"],
+            "chunk_bytes": chunk_total["bytes"],
+            "chunks_by_domain": {k: v["count"] for k, v in grouped.get(CHUNK_DOMAIN, {}).items()},
+            "chunks_by_content_type": {k: v["count"] for k, v in grouped.get(CHUNK_CONTENT_TYPE, {}).items()},
+            "unique_chunk_domains": len(grouped.get(CHUNK_DOMAIN, {})),
+            "memories_with_chunks": memories_with_chunks,
+            "avg_chunks_per_memory": round(chunk_total["count"] / memories_with_chunks, 2) if memories_with_chunks else 0.0
+        }
+
+    def _delete_user_counters(self, user_id: str) -> None:
+        get_local_db().execute(
+            "DELETE FROM stats_counters WHERE user_id = ? AND scope IN (?, ?, ?)",
+            (user_id, MEMORY_TOTAL, MEMORY_DOMAIN, MEMORY_CONTENT_TYPE)
+        )
+
+    def _bump(self, scope: str, user_id: str, key: str, count: int, size: int) -> None:
+        db = get_local_db()
+        if count < 0 or size < 0:
+            # Decrements never create rows and never go below zero
+            db.execute(
+                "UPDATE stats_counters SET count = MAX(count + ?, 0), bytes = MAX(bytes + ?, 0) "
+                "WHERE scope = ? AND user_id = ? AND key = ?",
+                (count, size, scope, user_id, key)
+            )
+            return
+        db.execute(
+            "INSERT INTO stats_counters (scope, user_id, key, count, bytes) VALUES (?, ?, ?, ?, ?) "
+            "ON CONFLICT(scope, user_id, key) DO UPDATE SET "
+            "count = count + excluded.count, bytes = bytes + excluded.bytes",
+            (scope, user_id, key, count, size)
+        )
+
+    def _mark_initialized(self, name: str) -> None:
+        get_local_db().execute(
+            "INSERT OR REPLACE INTO stats_initialized (name, initialized_at) VALUES (?, ?)",
+            (name, time.time())
+        )
+
+def get_memory_aggregates() -> MemoryAggregates:
+    """Get the aggregate counters (singleton)."""
+    global _memory_aggregates
+    if _memory_aggregates is None:
+        _memory_aggregates = MemoryAggregates()
+    return _memory_aggregates
@@ -0,0 +1,135 @@
+"""
+Stable memory ids for fast-acknowledged saves.
+A fast-ack save returns a local id before Mem0 has stored the memory; the background
+pipeline adds it to Mem0 later and binds the id Mem0 assigned. The Mem0 record carries
+the local id in its metadata ("local_id"), so search results, the recency index and the
+chunk stores all keep using the id the caller was given, and deletes resolve it back.
+"""
+import time
+import uuid
+import logging
+from typing import List, Dict, Any, Optional
+
+from local_db import get_local_db, get_local_db_lock
+
+logger = logging.getLogger(__name__)
+
+# Metadata key holding the local id on Mem0 records saved through the fast-ack path
+LOCAL_ID_KEY = "local_id"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS memory_id_map (
+    local_id TEXT PRIMARY KEY,
+    user_id TEXT NOT NULL,
+    mem0_id TEXT,
+    created_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_memory_id_map_user ON memory_id_map (user_id);
+"""
+
+# Global map instance
+_memory_id_map = None
+
+def new_local_id() -> str:
+    """Id returned by a fast-ack save (never collides with Mem0's uuids or fallback ids)."""
+    return f"local_{uuid.uuid4().hex}"
+
+def public_memory_id(memory_obj: Dict[str, Any]) -> str:
+    """The id callers see for a Mem0 memory object: its local id if it has one."""
+    metadata = memory_obj.get("metadata") or {}
+    return str(metadata.get(LOCAL_ID_KEY) or memory_obj.get("id", ""))
+
+def normalize_memory_ids(memory_objects: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Replace Mem0 ids with local ids in place (Mem0 search/get_all results)."""
+    for memory_obj in memory_objects:
+        if isinstance(memory_obj, dict) and (memory_obj.get("metadata") or {}).get(LOCAL_ID_KEY):
+            memory_obj["id"] = public_memory_id(memory_obj)
+    return memory_objects
+
+class MemoryIdMap:
+    """Local id -> Mem0 id of fast-ack saves, in the local SQLite database."""
+
+    def __init__(self) -> None:
+        self._lock = get_local_db_lock()
+        with self._lock:
+            get_local_db().executescript(_SCHEMA)
+
+    def reserve(self, local_id: str, user_id: str) -> None:
+        """Register a local id whose Mem0 record is not written yet."""
+        with self._lock:
+            db = get_local_db()
+            db.execute(
+                "INSERT OR IGNORE INTO memory_id_map (local_id, user_id, mem0_id, created_at) VALUES (?, ?, NULL, ?)",
+                (local_id, user_id, time.time())
+            )
+            db.commit()
+
+    def bind(self, local_id: str, mem0_id: str) -> bool:
+        """Record the Mem0 id of a reserved local id; False if the memory was deleted meanwhile."""
+        with self._lock:
+            db = get_local_db()
+            updated = db.execute(
+                "UPDATE memory_id_map SET mem0_id = ? WHERE local_id = ?", (mem0_id, local_id)
+            ).rowcount
+            db.commit()
+        return bool(updated)
+
+    def is_reserved(self, local_id: str) -> bool:
+        with self._lock:
+            return get_local_db().execute(
+                "SELECT 1 FROM memory_id_map WHERE local_id = ?", (local_id,)
+            ).fetchone() is not None
+
+    def mem0_id(self, local_id: str) -> Optional[str]:
+        """Mem0 id bound to a local id (None while pending or for ids that are not local)."""
+        with self._lock:
+            row = get_local_db().execute(
+                "SELECT mem0_id FROM memory_id_map WHERE local_id = ?", (local_id,)
+            ).fetchone()
+        return row["mem0_id"] if row is not None else None
+
+    def is_pending(self, local_id: str) -> bool:
+        """True while a reserved local id has no Mem0 record yet."""
+        with self._lock:
+            row = get_local_db().execute(
+                "SELECT mem0_id FROM memory_id_map WHERE local_id = ?", (local_id,)
+            ).fetchone()
+        return row is not None and row["mem0_id"] is None
+
+    def pending_owner(self, local_id: str) -> Optional[str]:
+        """User of a reserved local id that has no Mem0 record yet (None otherwise)."""
+        with self._lock:
+            row = get_local_db().execute(
+                "SELECT user_id FROM memory_id_map WHERE local_id = ? AND mem0_id IS NULL", (local_id,)
+            ).fetchone()
+        return row["user_id"] if row is not None else None
+
+    def remove(self, local_id: str) -> None:
+        with self._lock:
+            db = get_local_db()
+            db.execute("DELETE FROM memory_id_map WHERE local_id = ?", (local_id,))
+            db.commit()
+
+    def clear_user(self, user_id: str) -> None:
+        with self._lock:
+            db = get_local_db()
+            db.execute("DELETE FROM memory_id_map WHERE user_id = ?", (user_id,))
+            db.commit()
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            row = get_local_db().execute(
+                "SELECT COUNT(*) AS ids, SUM(mem0_id IS NULL) AS pending FROM memory_id_map"
+            ).fetchone()
+        return {"local_ids": row["ids"], "pending": row["pending"] or 0}
+
+def get_memory_id_map() -> MemoryIdMap:
+    """Get the local id map (singleton)."""
+    global _memory_id_map
+    if _memory_id_map is None:
+        _memory_id_map = MemoryIdMap()
+    return _memory_id_map
+
+def resolve_mem0_id(memory_id: str) -> str:
+    """Mem0 id to use for a caller-visible id (ids without a binding are Mem0 ids already)."""
+    return get_memory_id_map().mem0_id(memory_id) or memory_id
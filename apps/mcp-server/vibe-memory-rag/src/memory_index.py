@@ -0,0 +1,258 @@
+"""
+Time-ordered recency index for Mem0 memories.
+Answers last-N and time-range queries without loading the whole Mem0 collection.
+"""
+import json
+import time
+import sqlite3
+import logging
+from datetime import datetime, timezone
+from typing import List, Dict, Any, Optional, Set, Tuple
+
+from local_db import get_local_db, get_local_db_lock
+
+logger = logging.getLogger(__name__)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS memory_timeline (
+    memory_id TEXT PRIMARY KEY,
+    user_id TEXT NOT NULL,
+    created_ts REAL NOT NULL,
+    created_at TEXT,
+    memory TEXT,
+    metadata TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_memory_timeline_user_ts
+    ON memory_timeline (user_id, created_ts);
+CREATE TABLE IF NOT EXISTS indexed_users (
+    user_id TEXT PRIMARY KEY,
+    backfilled_at REAL NOT NULL
+);
+"""
+
+# Global index instance
+_recency_index = None
+
+def parse_memory_timestamp(memory_obj: Dict[str, Any]) -> Optional[float]:
+    """Get a Unix timestamp for a Mem0 memory object (metadata first, then created_at)."""
+    metadata = memory_obj.get("metadata") or {}
+    if "creation_timestamp" in metadata:
+        try:
+            return float(metadata["creation_timestamp"])
+        except (ValueError, TypeError):
+            pass
+
+    created_at = memory_obj.get("created_at", "")
+    if not created_at:
+        return None
+
+    try:
+        if isinstance(created_at, str):
+            try:
+                return datetime.fromisoformat(created_at.replace('Z', '+00:00')).timestamp()
+            except ValueError:
+                return float(created_at)
+        return float(created_at)
+    except (ValueError, TypeError):
+        return None
+
+class RecencyIndex:
+    """
+    Per-user index of memories ordered by creation time.
+    Backed by a SQLite B-tree on (user_id, created_ts), so last-N and range
+    lookups cost O(log n + k).
+    """
+
+    def __init__(self) -> None:
+        self._lock = get_local_db_lock()
+        # Memory ids removed while a user's backfill is in flight, by user; None once the
+        # user was cleared. Backfill must not bring them back from its older get_all
+        self._removed_during_backfill: Dict[str, Optional[Set[str]]] = {}
+        with self._lock:
+            get_local_db().executescript(_SCHEMA)
+
+    def add(
+        self,
+        user_id: str,
+        memory_id: str,
+        memory: str,
+        metadata: Optional[Dict[str, Any]] = None,
+        created_ts: Optional[float] = None,
+        created_at: Optional[str] = None
+    ) -> bool:
+        """Insert or replace a memory entry; returns True if the memory was not indexed yet."""
+        if created_ts is None:
+            created_ts = time.time()
+        if not created_at:
+            created_at = datetime.fromtimestamp(created_ts, timezone.utc).isoformat()
+
+        with self._lock:
+            db = get_local_db()
+            existing = db.execute(
+                "SELECT 1 FROM memory_timeline WHERE memory_id = ?", (memory_id,)
+            ).fetchone()
+            db.execute(
+                "INSERT OR REPLACE INTO memory_timeline "
+                "(memory_id, user_id, created_ts, created_at, memory, metadata) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (memory_id, user_id, created_ts, created_at, memory,
+                 json.dumps(metadata or {}, ensure_ascii=False))
+            )
+            db.commit()
+        return existing is None
+
+    def remove(self, memory_id: str) -> Optional[Dict[str, Any]]:
+        """Remove a single memory entry; returns the removed memory, if it was indexed."""
+        with self._lock:
+            for removed in self._removed_during_backfill.values():
+                if removed is not None:
+                    removed.add(memory_id)
+            db = get_local_db()
+            row = db.execute(
+                "SELECT * FROM memory_timeline WHERE memory_id = ?", (memory_id,)
+            ).fetchone()
+            if row is None:
+                return None
+            db.execute("DELETE FROM memory_timeline WHERE memory_id = ?", (memory_id,))
+            db.commit()
+        return self._row_to_memory(row)
+
+    def clear_user(self, user_id: str) -> None:
+        """Remove every entry of a user (the user stays marked as backfilled)."""
+        with self._lock:
+            if user_id in self._removed_during_backfill:
+                self._removed_during_backfill[user_id] = None
+            db = get_local_db()
+            db.execute("DELETE FROM memory_timeline WHERE user_id = ?", (user_id,))
+            db.commit()
+
+    def latest(self, user_id: str, limit: int = 5) -> List[Dict[str, Any]]:
+        """Get the newest memories of a user, newest first."""
+        with self._lock:
+            rows = get_local_db().execute(
+                "SELECT * FROM memory_timeline WHERE user_id = ? "
+                "ORDER BY created_ts DESC LIMIT ?",
+                (user_id, limit)
+            ).fetchall()
+        return [self._row_to_memory(row) for row in rows]
+
+    def between(
+        self,
+        user_id: str,
+        start_ts: Optional[float] = None,
+        end_ts: Optional[float] = None,
+        limit: int = 5
+    ) -> List[Dict[str, Any]]:
+        """Get memories created within [start_ts, end_ts], newest first."""
+        if start_ts is None:
+            start_ts = float("-inf")
+        if end_ts is None:
+            end_ts = float("inf")
+
+        with self._lock:
+            rows = get_local_db().execute(
+                "SELECT * FROM memory_timeline WHERE user_id = ? "
+                "AND created_ts >= ? AND created_ts <= ? "
+                "ORDER BY created_ts DESC LIMIT ?",
+                (user_id, start_ts, end_ts, limit)
+            ).fetchall()
+        return [self._row_to_memory(row) for row in rows]
+
+    def entries(self, user_id: str) -> List[Tuple[float, Dict[str, Any]]]:
+        """Get every (created_ts, memory) entry of a user, oldest first."""
+        with self._lock:
+            rows = get_local_db().execute(
+                "SELECT * FROM memory_timeline WHERE user_id = ? ORDER BY created_ts",
+                (user_id,)
+            ).fetchall()
+        return [(row["created_ts"], self._row_to_memory(row)) for row in rows]
+
+    def is_backfilled(self, user_id: str) -> bool:
+        """Check whether the user's existing Mem0 memories were imported."""
+        with self._lock:
+            row = get_local_db().execute(
+                "SELECT 1 FROM indexed_users WHERE user_id = ?", (user_id,)
+            ).fetchone()
+        return row is not None
+
+    def begin_backfill(self, user_id: str) -> None:
+        """Start recording removals for a user, before its Mem0 memories are fetched."""
+        with self._lock:
+            self._removed_during_backfill.setdefault(user_id, set())
+
+    def cancel_backfill(self, user_id: str) -> None:
+        """Stop recording removals for a user whose fetch failed."""
+        with self._lock:
+            self._removed_during_backfill.pop(user_id, None)
+
+    def backfill(self, user_id: str, memory_objects: List[Dict[str, Any]]) -> int:
+        """
+        Import existing Mem0 memories once; returns the number of indexed entries.
+        Memories removed since begin_backfill (or all of them, if the user was cleared
+        since) are skipped.
+        """
+        entries = []
+        for memory_obj in memory_objects:
+            if not isinstance(memory_obj, dict) or not memory_obj.get("id"):
+                continue
+            created_ts = parse_memory_timestamp(memory_obj)
+            if created_ts is None:
+                continue
+            entries.append((
+                str(memory_obj["id"]),
+                user_id,
+                created_ts,
+                memory_obj.get("created_at") or datetime.fromtimestamp(created_ts, timezone.utc).isoformat(),
+                memory_obj.get("memory", ""),
+                json.dumps(memory_obj.get("metadata") or {}, ensure_ascii=False)
+            ))
+
+        with self._lock:
+            removed = self._removed_during_backfill.pop(user_id, set())
+            entries = [] if removed is None else [entry for entry in entries if entry[0] not in removed]
+            db = get_local_db()
+            # Keep entries recorded since startup, they are at least as fresh as Mem0's copy
+            db.executemany(
+                "INSERT OR IGNORE INTO memory_timeline "
+                "(memory_id, user_id, created_ts, created_at, memory, metadata) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                entries
+            )
+            db.execute(
+                "INSERT OR REPLACE INTO indexed_users (user_id, backfilled_at) VALUES (?, ?)",
+                (user_id, time.time())
+            )
+            db.commit()
+
+        logger.info(f"Recency index backfilled {len(entries)} memories for user {user_id}")
+        return len(entries)
+
+    def count(self, user_id: str) -> int:
+        """Count indexed memories of a user."""
+        with self._lock:
+            row = get_local_db().execute(
+                "SELECT COUNT(*) FROM memory_timeline WHERE user_id = ?", (user_id,)
+            ).fetchone()
+        return int(row[0]) if row else 0
+
+    @staticmethod
+    def _row_to_memory(row: sqlite3.Row) -> Dict[str, Any]:
+        """Convert a row into the Mem0 memory object shape used by the tools."""
+        try:
+            metadata = json.loads(row["metadata"]) if row["metadata"] else {}
+        except (ValueError, TypeError):
+            metadata = {}
+        return {
+            "id": row["memory_id"],
+            "memory": row["memory"] or "",
+            "user_id": row["user_id"],
+            "created_at": row["created_at"],
+            "metadata": metadata
+        }
+
+def get_recency_index() -> RecencyIndex:
+    """Get the recency index (singleton)."""
+    global _recency_index
+    if _recency_index is None:
+        _recency_index = RecencyIndex()
+    return _recency_index
@@ -0,0 +1,125 @@
+"""
+Typed, compact memory record model shared by all tools.
+URL, title, synopsis and domain come from metadata; legacy free-text memories are
+parsed once and the result is cached.
+"""
+import re
+import logging
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Dict, Any, Tuple
+
+from utils import extract_domain
+
+logger = logging.getLogger(__name__)
+
+# Max legacy parse results kept in memory
+LEGACY_PARSE_CACHE_SIZE = 5000
+
+_URL_PATTERN = re.compile(r'https?://[^\s]+')
+_LEGACY_TITLE_PATTERN = re.compile(r'I visited\s+(.+?)\s+at\s+https?://')
+
+# (memory_id, memory text) -> (url, title, synopsis)
+_legacy_parse_cache: "OrderedDict[Tuple[str, str], Tuple[str, str, str]]" = OrderedDict()
+
+@dataclass(slots=True)
+class MemoryRecord:
+    """One Mem0 memory with its page fields resolved. Empty strings mean unknown."""
+    id: str
+    memory: str
+    url: str
+    title: str
+    synopsis: str
+    domain: str
+    content_type: str
+    created_at: str
+    updated_at: str
+    user_id: str
+    metadata: Dict[str, Any] = field(repr=False)
+
+    @classmethod
+    def from_mem0(cls, memory_obj: Dict[str, Any], user_id: str = "") -> "MemoryRecord":
+        """Build a record from a Mem0 memory object (or a recency index entry)."""
+        memory_id = str(memory_obj.get("id", ""))
+        memory_content = memory_obj.get("memory", "") or ""
+        metadata = memory_obj.get("metadata") or {}
+
+        url = metadata.get("url") or ""
+        title = metadata.get("title") or ""
+        synopsis = metadata.get("synopsis") or ""
+
+        # Only memories without page metadata need the text parsed
+        if not url or not title:
+            parsed_url, parsed_title, parsed_synopsis = _parse_legacy_memory(memory_id, memory_content)
+            url = url or parsed_url
+            title = title or parsed_title
+            synopsis = synopsis or parsed_synopsis
+
+        domain = metadata.get("domain") or (extract_domain(url) if url else "")
+
+        return cls(
+            id=memory_id,
+            memory=memory_content,
+            url=url,
+            title=title,
+            synopsis=synopsis or memory_content,
+            domain=domain,
+            content_type=metadata.get("content_type") or metadata.get("type") or "",
+            created_at=memory_obj.get("created_at", "") or "",
+            updated_at=memory_obj.get("updated_at", "") or "",
+            user_id=memory_obj.get("user_id", user_id) or user_id,
+            metadata=metadata
+        )
+
+    def to_browser_memory(self) -> Dict[str, Any]:
+        """Structured format expected by the TypeScript frontend."""
+        return {
+            "id": self.id,
+            "url": self.url or "Unknown",
+            "title": self.title or "Untitled",
+            "synopsis": self.synopsis,
+            "domain": self.domain or "Unknown",
+            "content": self.memory,  # Keep original content for reference
+            "created_at": self.created_at
+        }
+
+def _parse_legacy_memory(memory_id: str, memory_content: str) -> Tuple[str, str, str]:
+    """Parse URL, title and synopsis out of memory text (cached per memory)."""
+    cache_key = (memory_id, memory_content)
+    cached = _legacy_parse_cache.get(cache_key)
+    if cached is not None:
+        _legacy_parse_cache.move_to_end(cache_key)
+        return cached
+
+    url = ""
+    title = ""
+    synopsis = ""
+
+    if "Visited:" in memory_content and "URL:" in memory_content:
+        # Structured format: "Visited: {title}\nURL: {url}\nSummary: {synopsis}\n..."
+        for line in memory_content.split('\n'):
+            if line.startswith("Visited:"):
+                title = line[len("Visited:"):].strip()
+            elif line.startswith("URL:"):
+                url = line[len("URL:"):].strip()
+            elif line.startswith("Summary:"):
+                synopsis = line[len("Summary:"):].strip()
+    else:
+        # Old free-text format
+        if "http" in memory_content:
+            url_match = _URL_PATTERN.search(memory_content)
+            if url_match:
+                url = url_match.group(0)
+
+        title_match = _LEGACY_TITLE_PATTERN.search(memory_content)
+        if title_match:
+            title = title_match.group(1).strip()
+        elif len(memory_content) > 10:
+            # Use first part of content as title
+            title = memory_content[:50] + "..."
+
+    result = (url, title, synopsis)
+    _legacy_parse_cache[cache_key] = result
+    if len(_legacy_parse_cache) > LEGACY_PARSE_CACHE_SIZE:
+        _legacy_parse_cache.popitem(last=False)
+    return result
@@ -0,0 +1,138 @@
+"""
+Per-user in-memory snapshot of memory records.
+Loaded once from the recency index and updated incrementally on add, delete and clear,
+so search and stats tools never re-materialize the full Mem0 collection.
+"""
+import bisect
+import threading
+import logging
+from typing import List, Dict, Any, Optional, Tuple
+
+from memory_index import get_recency_index
+
+logger = logging.getLogger(__name__)
+
+# Global snapshot instance
+_memory_snapshot = None
+
+class _UserSnapshot:
+    """Records of one user plus a (created_ts, memory_id) list kept in sorted order."""
+
+    def __init__(self, entries: List[Tuple[float, Dict[str, Any]]]) -> None:
+        self.records: Dict[str, Dict[str, Any]] = {}
+        self.timestamps: Dict[str, float] = {}
+        self.order: List[Tuple[float, str]] = []
+        for created_ts, record in entries:
+            self.put(created_ts, record)
+
+    def put(self, created_ts: float, record: Dict[str, Any]) -> None:
+        memory_id = record["id"]
+        if memory_id in self.records:
+            self.drop(memory_id)
+        self.records[memory_id] = record
+        self.timestamps[memory_id] = created_ts
+        bisect.insort(self.order, (created_ts, memory_id))
+
+    def drop(self, memory_id: str) -> bool:
+        if memory_id not in self.records:
+            return False
+        created_ts = self.timestamps.pop(memory_id)
+        del self.records[memory_id]
+        position = bisect.bisect_left(self.order, (created_ts, memory_id))
+        if position < len(self.order) and self.order[position] == (created_ts, memory_id):
+            del self.order[position]
+        return True
+
+class MemorySnapshot:
+    """
+    In-memory view of every user's memories, newest-first lookups in O(log n + k).
+    A user is loaded from the recency index on first access; writes go through
+    add/remove/clear so the snapshot never needs a full reload.
+    """
+
+    def __init__(self) -> None:
+        self._users: Dict[str, _UserSnapshot] = {}
+        self._lock = threading.RLock()
+
+    def is_loaded(self, user_id: str) -> bool:
+        return user_id in self._users
+
+    def load(self, user_id: str) -> None:
+        """Load a user's records from the recency index (no-op if already loaded)."""
+        with self._lock:
+            if user_id in self._users:
+                return
+            entries = get_recency_index().entries(user_id)
+            self._users[user_id] = _UserSnapshot(entries)
+            logger.info(f"Memory snapshot loaded {len(entries)} records for user {user_id}")
+
+    def add(self, user_id: str, created_ts: float, record: Dict[str, Any]) -> None:
+        """Add or replace a record; users not loaded yet pick it up from the index on load."""
+        with self._lock:
+            user_snapshot = self._users.get(user_id)
+            if user_snapshot is not None:
+                user_snapshot.put(created_ts, record)
+
+    def remove(self, memory_id: str) -> bool:
+        """Remove a record from whichever user holds it."""
+        with self._lock:
+            for user_snapshot in self._users.values():
+                if user_snapshot.drop(memory_id):
+                    return True
+        return False
+
+    def clear(self, user_id: str) -> None:
+        """Drop every record of a user (the user stays loaded, now empty)."""
+        with self._lock:
+            self._users[user_id] = _UserSnapshot([])
+
+    def get(self, user_id: str, memory_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            user_snapshot = self._users.get(user_id)
+            return user_snapshot.records.get(memory_id) if user_snapshot else None
+
+    def count(self, user_id: str) -> int:
+        with self._lock:
+            user_snapshot = self._users.get(user_id)
+            return len(user_snapshot.records) if user_snapshot else 0
+
+    def latest(
+        self,
+        user_id: str,
+        limit: int = 5,
+        start_ts: Optional[float] = None,
+        end_ts: Optional[float] = None
+    ) -> List[Dict[str, Any]]:
+        """Get up to `limit` records within [start_ts, end_ts], newest first."""
+        with self._lock:
+            user_snapshot = self._users.get(user_id)
+            if user_snapshot is None or limit <= 0:
+                return []
+
+            order = user_snapshot.order
+            # Bisect to the end of the range, then walk backwards
+            if end_ts is None:
+                stop = len(order)
+            else:
+                stop = bisect.bisect_right(order, (end_ts, "\uffff"))
+
+            results = []
+            for position in range(stop - 1, -1, -1):
+                created_ts, memory_id = order[position]
+                if start_ts is not None and created_ts < start_ts:
+                    break
+                results.append(user_snapshot.records[memory_id])
+                if len(results) >= limit:
+                    break
+            return results
+
+    def records(self, user_id: str) -> List[Dict[str, Any]]:
+        """Get every record of a user, newest first."""
+        return self.latest(user_id, limit=self.count(user_id))
+
+def get_memory_snapshot() -> MemorySnapshot:
+    """Get the memory snapshot (singleton)."""
+    global _memory_snapshot
+    if _memory_snapshot is None:
+        _memory_snapshot = MemorySnapshot()
+    return _memory_snapshot
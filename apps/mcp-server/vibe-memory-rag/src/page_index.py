@@ -0,0 +1,240 @@
+"""
+Page-level vector index for two-stage retrieval.
+Each memory gets one vector blended from its title/synopsis embedding and the centroid
+of its chunk embeddings. Queries pick the top pages first, then search chunks only
+within those pages.
+"""
+import os
+import math
+import time
+import asyncio
+import logging
+from typing import List, Dict, Any, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Search chunks within the top pages instead of the whole collection
+TWO_STAGE_RETRIEVAL = os.getenv("TWO_STAGE_RETRIEVAL", "false").lower() == "true"
+
+# Pages selected in the first stage
+PAGE_CANDIDATES = int(os.getenv("PAGE_CANDIDATES", "20"))
+
+# Weight of the chunk centroid vs. the title/synopsis embedding in a page vector
+PAGE_CENTROID_WEIGHT = float(os.getenv("PAGE_CENTROID_WEIGHT", "0.5"))
+
+# Chunk metadata rows read per batch while backfilling
+PAGE_BACKFILL_BATCH = 500
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS page_index_state (
+    name TEXT PRIMARY KEY,
+    completed_at REAL NOT NULL
+);
+"""
+
+_backfill_task: Optional[asyncio.Task] = None
+_backfilled = False
+
+def is_page_index_backfilled() -> bool:
+    """True once every memory that existed before the page index has a page vector."""
+    global _backfilled
+    if _backfilled:
+        return True
+    from local_db import get_local_db, get_local_db_lock
+    with get_local_db_lock():
+        db = get_local_db()
+        db.executescript(_SCHEMA)
+        row = db.execute("SELECT 1 FROM page_index_state WHERE name = 'backfill'").fetchone()
+    _backfilled = row is not None
+    return _backfilled
+
+def _mark_backfilled() -> None:
+    global _backfilled
+    from local_db import get_local_db, get_local_db_lock
+    with get_local_db_lock():
+        db = get_local_db()
+        db.executescript(_SCHEMA)
+        db.execute(
+            "INSERT OR REPLACE INTO page_index_state (name, completed_at) VALUES ('backfill', ?)",
+            (time.time(),)
+        )
+        db.commit()
+    _backfilled = True
+
+def _normalize(vector: List[float]) -> List[float]:
+    norm = math.sqrt(sum(value * value for value in vector))
+    return [value / norm for value in vector] if norm else vector
+
+def build_page_vector(
+    chunk_embeddings: Sequence[Sequence[float]],
+    summary_embedding: Optional[Sequence[float]] = None
+) -> List[float]:
+    """Blend the normalized chunk centroid with the title/synopsis embedding."""
+    dimensions = len(chunk_embeddings[0]) if len(chunk_embeddings) else len(summary_embedding or [])
+    centroid = [0.0] * dimensions
+    for embedding in chunk_embeddings:
+        for index, value in enumerate(embedding):
+            centroid[index] += value
+    centroid = _normalize(centroid)
+
+    if summary_embedding is None:
+        return centroid
+    if not len(chunk_embeddings):
+        return _normalize(list(summary_embedding))
+
+    summary = _normalize(list(summary_embedding))
+    return _normalize([
+        PAGE_CENTROID_WEIGHT * c + (1.0 - PAGE_CENTROID_WEIGHT) * s for c, s in zip(centroid, summary)
+    ])
+
+async def index_page(
+    memory_id: str,
+    chunk_embeddings: Sequence[Sequence[float]],
+    chunk_metadatas: Sequence[Dict[str, Any]],
+    synopsis: str = "",
+    user_id: str = "browser_user"
+) -> None:
+    """Build (or replace) the page vector of a memory from its freshly added chunks."""
+    if not chunk_metadatas:
+        return
+
+    from utils import create_embedding
+    from group_writer import write_vectors
+    from chroma_setup import PAGE_ROLE
+
+    first = chunk_metadatas[0]
+    title = first.get("title", "")
+    summary_text = f"{title}\n{synopsis}".strip()
+    summary_embedding = await create_embedding(summary_text) if summary_text else None
+    if summary_embedding is not None:
+        # Page vectors live in the same space as the (possibly reduced) chunk index
+        from vector_codec import to_index_vector
+        summary_embedding = to_index_vector(summary_embedding)
+
+    await write_vectors(
+        PAGE_ROLE,
+        user_id,
+        ids=[memory_id],
+        embeddings=[build_page_vector(chunk_embeddings, summary_embedding)],
+        documents=[summary_text],
+        operation="upsert",
+        metadatas=[{
+            "memory_id": memory_id,
+            "url": first.get("url", ""),
+            "title": title,
+            "source_id": first.get("source_id", ""),
+            "created_timestamp": first.get("created_timestamp", 0.0),
+            "chunk_count": len(chunk_metadatas),
+            "has_summary": summary_embedding is not None
+        }]
+    )
+
+def remove_page(memory_id: str, user_id: str = "browser_user") -> None:
+    """Remove a memory's page vector."""
+    from vector_store import get_vector_store
+    from chroma_setup import PAGE_ROLE
+    get_vector_store(PAGE_ROLE, user_id).delete(ids=[memory_id])
+
+def select_candidate_pages(
+    query_embedding: Sequence[float],
+    where: Optional[Dict[str, Any]] = None,
+    limit: int = PAGE_CANDIDATES,
+    user_id: str = "browser_user"
+) -> List[str]:
+    """
+    First stage: memory ids of the pages closest to the query.
+    An empty list means the page index cannot answer yet (older memories still backfilling,
+    see ensure_page_index). Only the legacy partition predates the page index; other
+    partitions are always complete.
+    """
+    from vector_store import get_vector_store, LEGACY_PARTITION_USER
+    from chroma_setup import PAGE_ROLE
+    if user_id == LEGACY_PARTITION_USER and not is_page_index_backfilled():
+        return []
+
+    pages = get_vector_store(PAGE_ROLE, user_id)
+    if pages.count() == 0:
+        return []
+
+    results = pages.query(
+        query_embeddings=[query_embedding],
+        n_results=limit,
+        where=where if where else None,
+        include=["distances"]
+    )
+    return results["ids"][0] if results and results["ids"] else []
+
+def backfill_page_index() -> Dict[str, int]:
+    """
+    Build page vectors for every memory that has chunks but no page vector yet (legacy
+    partition). Backfilled pages use the chunk centroid only, so no embedding calls are made.
+    """
+    from vector_store import get_vector_store
+    from chroma_setup import CONTENT_ROLE, PAGE_ROLE
+    from store_access import read_store_sync, write_store_sync, CHUNK_STORE
+    chunks = get_vector_store(CONTENT_ROLE)
+    pages = get_vector_store(PAGE_ROLE)
+
+    def missing_pages(batch_ids: List[str]) -> List[Tuple[str, Dict[str, Any]]]:
+        """Chunk rows of the batch's memories that have chunks but no page vector."""
+        existing = set(pages.get(ids=batch_ids, include=["metadatas"])["ids"])
+        found = []
+        for memory_id in batch_ids:
+            if memory_id in existing:
+                continue
+            rows = chunks.get(where={"memory_id": memory_id}, include=["embeddings", "metadatas"])
+            if rows["ids"]:
+                found.append((memory_id, rows))
+        return found
+
+    # Ids are collected in one read, so ingestion writes cannot shift the batches
+    memory_ids = read_store_sync(CHUNK_STORE, chunks.memory_ids)
+
+    indexed = 0
+    skipped = 0
+    for start in range(0, len(memory_ids), PAGE_BACKFILL_BATCH):
+        batch_ids = memory_ids[start:start + PAGE_BACKFILL_BATCH]
+        missing = read_store_sync(CHUNK_STORE, missing_pages, batch_ids)
+        skipped += len(batch_ids) - len(missing)
+        for memory_id, rows in missing:
+            first = rows["metadatas"][0]
+            write_store_sync(
+                CHUNK_STORE,
+                pages.upsert,
+                ids=[memory_id],
+                embeddings=[build_page_vector(rows["embeddings"])],
+                documents=[first.get("title", "")],
+                metadatas=[{
+                    "memory_id": memory_id,
+                    "url": first.get("url", ""),
+                    "title": first.get("title", ""),
+                    "source_id": first.get("source_id", ""),
+                    "created_timestamp": first.get("created_timestamp", 0.0),
+                    "chunk_count": len(rows["ids"]),
+                    "has_summary": False
+                }]
+            )
+            indexed += 1
+
+    _mark_backfilled()
+    logger.info(f"Page index backfill: {indexed} pages indexed, {skipped} already present")
+    return {"memories": len(memory_ids), "indexed": indexed, "skipped": skipped}
+
+def ensure_page_index(user_id: str = "browser_user") -> None:
+    """Start the legacy partition backfill if a two-stage search finds it missing."""
+    from vector_store import LEGACY_PARTITION_USER
+    if user_id == LEGACY_PARTITION_USER and not is_page_index_backfilled():
+        start_page_backfill()
+
+def start_page_backfill() -> bool:
+    """Run backfill_page_index in the background once; True if a run was started."""
+    global _backfill_task
+    if _backfill_task is not None and not _backfill_task.done():
+        return False
+    try:
+        loop = asyncio.get_running_loop()
+    except RuntimeError:
+        return False
+    _backfill_task = loop.create_task(asyncio.to_thread(backfill_page_index))
+    logger.info("Started background page index backfill")
+    return True
@@ -0,0 +1,245 @@
+"""
+One-time move of pre-partition chunks out of the legacy partition.
+Before per-user partitions every user's chunks and page vectors were written to the
+original stores, which now serve browser_user. This job looks up the owner of each memory
+id found there in Mem0 (or in the local id map while a fast-ack memory is still pending)
+and moves the chunks, page vectors and side-table rows of other users' memories into
+their own partitions, in small batches that yield to searches. Completion is recorded in
+the local database; until then the legacy partition is only ever cleared by memory id.
+"""
+import os
+import time
+import asyncio
+import logging
+from typing import Dict, Any, List, Optional, Sequence, Set
+
+logger = logging.getLogger(__name__)
+
+# Memory ids resolved and moved per batch
+PARTITION_MIGRATION_BATCH_SIZE = int(os.getenv("PARTITION_MIGRATION_BATCH_SIZE", "100"))
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS partition_migration_state (
+    name TEXT PRIMARY KEY,
+    completed_at REAL NOT NULL
+);
+"""
+
+_migration_task: Optional[asyncio.Task] = None
+_migration_status: Dict[str, Any] = {"state": "idle"}
+_completed = False
+
+def is_legacy_partition_migrated() -> bool:
+    """True once the legacy partition only holds browser_user's chunks."""
+    global _completed
+    if _completed:
+        return True
+    from local_db import get_local_db, get_local_db_lock
+    with get_local_db_lock():
+        db = get_local_db()
+        db.executescript(_SCHEMA)
+        row = db.execute("SELECT 1 FROM partition_migration_state WHERE name = 'legacy'").fetchone()
+    _completed = row is not None
+    return _completed
+
+def _mark_migrated() -> None:
+    global _completed
+    from local_db import get_local_db, get_local_db_lock
+    with get_local_db_lock():
+        db = get_local_db()
+        db.executescript(_SCHEMA)
+        db.execute(
+            "INSERT OR REPLACE INTO partition_migration_state (name, completed_at) VALUES ('legacy', ?)",
+            (time.time(),)
+        )
+        db.commit()
+    _completed = True
+
+def _legacy_memory_ids() -> List[str]:
+    """Memory ids with chunks or a page vector in the legacy partition (a chunk store read)."""
+    from chroma_setup import CONTENT_ROLE, PAGE_ROLE
+    from vector_store import get_vector_store
+    memory_ids = set(get_vector_store(CONTENT_ROLE).memory_ids())
+    pages = get_vector_store(PAGE_ROLE)
+    offset = 0
+    while True:
+        batch = pages.get(include=[], limit=1000, offset=offset)
+        if not batch["ids"]:
+            return sorted(memory_ids)
+        memory_ids.update(batch["ids"])
+        offset += len(batch["ids"])
+
+def _resolve_owners(memory_ids: List[str]) -> Dict[str, Any]:
+    """
+    Owner of each memory id (a Mem0 store read). Ids Mem0 does not know are left to the
+    chunk collector; ids whose lookup failed are reported so the run is retried later.
+    """
+    from mem0_utils import get_mem0_client
+    from memory_ids import get_memory_id_map
+    client = get_mem0_client()
+    local_ids = get_memory_id_map()
+    owners: Dict[str, str] = {}
+    unknown: List[str] = []
+    failed: List[str] = []
+    for memory_id in memory_ids:
+        pending_owner = local_ids.pending_owner(memory_id)
+        if pending_owner is not None:
+            owners[memory_id] = pending_owner
+            continue
+        try:
+            record = client.get(local_ids.mem0_id(memory_id) or memory_id)
+        except IndexError:
+            # Mem0's Chroma store indexes into an empty result for unknown ids
+            record = None
+        except Exception as e:
+            logger.debug(f"Mem0 lookup failed for {memory_id}, will retry: {e}")
+            failed.append(memory_id)
+            continue
+        if record and record.get("user_id"):
+            owners[memory_id] = str(record["user_id"])
+        else:
+            unknown.append(memory_id)
+    return {"owners": owners, "unknown": unknown, "failed": failed}
+
+def _move_memories(user_id: str, memory_ids: List[str]) -> int:
+    """Move the chunks, page vectors and cold rows of memories into a user's partition; returns chunks moved."""
+    from chroma_setup import CONTENT_ROLE, PAGE_ROLE
+    from vector_store import get_vector_store
+    from memory_aggregates import get_memory_aggregates
+    from retention import get_cold_store
+
+    include = ["embeddings", "documents", "metadatas"]
+    moved = 0
+    aggregates = get_memory_aggregates()
+    source_chunks = get_vector_store(CONTENT_ROLE)
+    target_chunks = get_vector_store(CONTENT_ROLE, user_id)
+    rows = source_chunks.get(where={"memory_id": {"$in": memory_ids}}, include=include)
+    if rows["ids"]:
+        target_chunks.upsert(
+            ids=rows["ids"], embeddings=rows["embeddings"], documents=rows["documents"], metadatas=rows["metadatas"]
+        )
+        source_chunks.delete(ids=rows["ids"])
+        moved = len(rows["ids"])
+
+        # Chunk counters of the legacy partition were kept under browser_user
+        by_memory: Dict[str, List[int]] = {}
+        for index, metadata in enumerate(rows["metadatas"]):
+            by_memory.setdefault((metadata or {}).get("memory_id", ""), []).append(index)
+        for memory_id, positions in by_memory.items():
+            aggregates.chunks_removed(memory_id)
+            aggregates.chunks_added(
+                user_id,
+                memory_id,
+                [rows["documents"][i] or "" for i in positions],
+                [rows["metadatas"][i] or {} for i in positions]
+            )
+
+    source_pages = get_vector_store(PAGE_ROLE)
+    pages = source_pages.get(ids=memory_ids, include=include)
+    if pages["ids"]:
+        get_vector_store(PAGE_ROLE, user_id).upsert(
+            ids=pages["ids"], embeddings=pages["embeddings"], documents=pages["documents"], metadatas=pages["metadatas"]
+        )
+        source_pages.delete(ids=pages["ids"])
+
+    # Warm-tier chunks demoted from the legacy partition were filed under browser_user too
+    get_cold_store().reassign(memory_ids, user_id)
+    return moved
+
+async def migrate_legacy_partition() -> Dict[str, Any]:
+    """Move other users' chunks out of the legacy partition, then mark the migration done."""
+    from vector_store import LEGACY_PARTITION_USER
+    from page_index import is_page_index_backfilled, backfill_page_index
+    from chunk_gc import wait_for_idle
+    from store_access import read_store, write_store, CHUNK_STORE, MEM0_STORE
+
+    started = time.time()
+    # Moved memories must take their page vector along; partitions other than the
+    # legacy one are never backfilled
+    if not is_page_index_backfilled():
+        await asyncio.to_thread(backfill_page_index)
+
+    memory_ids = await read_store(CHUNK_STORE, _legacy_memory_ids)
+    totals = {"memories": len(memory_ids), "moved_memories": 0, "moved_chunks": 0, "unknown": 0, "failed": 0}
+    users: Dict[str, int] = {}
+    for start in range(0, len(memory_ids), PARTITION_MIGRATION_BATCH_SIZE):
+        await wait_for_idle()
+        batch = memory_ids[start:start + PARTITION_MIGRATION_BATCH_SIZE]
+        resolved = await read_store(MEM0_STORE, _resolve_owners, batch)
+        totals["unknown"] += len(resolved["unknown"])
+        totals["failed"] += len(resolved["failed"])
+
+        by_owner: Dict[str, List[str]] = {}
+        for memory_id, owner in resolved["owners"].items():
+            if owner != LEGACY_PARTITION_USER:
+                by_owner.setdefault(owner, []).append(memory_id)
+        for owner, owned in by_owner.items():
+            totals["moved_chunks"] += await write_store(CHUNK_STORE, _move_memories, owner, owned)
+            totals["moved_memories"] += len(owned)
+            users[owner] = users.get(owner, 0) + len(owned)
+        _migration_status["progress"] = {"checked": start + len(batch), **totals}
+
+    report = {**totals, "users": users, "seconds": round(time.time() - started, 2)}
+    # Ids whose owner could not be looked up stay put; the next start retries them
+    if not totals["failed"]:
+        _mark_migrated()
+    report["completed"] = not totals["failed"]
+    logger.info(f"Legacy partition migration finished: {report}")
+    return report
+
+async def _run_migration() -> None:
+    try:
+        report = await migrate_legacy_partition()
+        _migration_status.update({"state": "completed" if report["completed"] else "incomplete",
+                                  "report": report, "finished_at": time.time()})
+    except Exception as e:
+        logger.error(f"Legacy partition migration failed: {e}")
+        _migration_status.update({"state": "failed", "error": str(e)})
+
+def start_partition_migration() -> bool:
+    """Run migrate_legacy_partition in the background unless it has completed; True if a run was started."""
+    global _migration_task
+    if _migration_task is not None and not _migration_task.done():
+        return False
+    if is_legacy_partition_migrated():
+        return False
+    try:
+        loop = asyncio.get_running_loop()
+    except RuntimeError:
+        return False
+    _migration_status.clear()
+    _migration_status.update({"state": "running", "started_at": time.time()})
+    _migration_task = loop.create_task(_run_migration())
+    logger.info("Started background legacy partition migration")
+    return True
+
+def get_partition_migration_status() -> Dict[str, Any]:
+    """Progress of the current or last legacy partition migration."""
+    return {**_migration_status, "migrated": is_legacy_partition_migrated()}
+
+def delete_legacy_memories(memory_ids: Sequence[str]) -> Dict[str, Any]:
+    """
+    Delete the chunks and page vectors of the given memories from the legacy partition
+    (a chunk store write). Used instead of dropping it while other users' chunks may remain.
+    Returns the deleted vector counts and the memory ids that had chunks.
+    """
+    from chroma_setup import CONTENT_ROLE, PAGE_ROLE
+    from vector_store import get_vector_store
+
+    chunks = get_vector_store(CONTENT_ROLE)
+    pages = get_vector_store(PAGE_ROLE)
+    vectors = {CONTENT_ROLE: 0, PAGE_ROLE: 0}
+    with_chunks: Set[str] = set()
+    for start in range(0, len(memory_ids), PARTITION_MIGRATION_BATCH_SIZE):
+        batch = list(memory_ids[start:start + PARTITION_MIGRATION_BATCH_SIZE])
+        rows = chunks.get(where={"memory_id": {"$in": batch}}, include=["metadatas"])
+        if rows["ids"]:
+            chunks.delete(ids=rows["ids"])
+            vectors[CONTENT_ROLE] += len(rows["ids"])
+            with_chunks.update((metadata or {}).get("memory_id", "") for metadata in rows["metadatas"])
+        page_ids = pages.get(ids=batch, include=[])["ids"]
+        if page_ids:
+            pages.delete(ids=page_ids)
+            vectors[PAGE_ROLE] += len(page_ids)
+    with_chunks.discard("")
+    return {"vectors": vectors, "memory_ids": sorted(with_chunks)}
@@ -0,0 +1,198 @@
+"""
+Background prewarm of clients, models and indexes once the server is listening.
+Startup stays lazy; right after the SSE port accepts connections a worker thread loads
+each component in priority order (what the first unified_search needs first), so the
+user's first question finds them ready. Loads go through the same once-initialized
+getters the tools use, so a tool racing the prewarm waits for the load in progress
+instead of starting a second one; async loads run on the server's loop, where the tools
+await them. health_check reports readiness per component.
+"""
+import os
+import sys
+import time
+import socket
+import asyncio
+import inspect
+import logging
+import threading
+from typing import Any, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+# Load components in the background after the server starts listening
+PREWARM_ON_STARTUP = os.getenv("PREWARM_ON_STARTUP", "false").lower() == "true"
+
+# Components to prewarm, in priority order
+PREWARM_COMPONENTS = [
+    name.strip() for name in
+    os.getenv("PREWARM_COMPONENTS", "mem0,pattern_embeddings,chunk_store,snapshot,reranker,text_splitter").split(",")
+    if name.strip()
+]
+
+# How long to wait for the server port before prewarming anyway
+PREWARM_LISTEN_TIMEOUT_SECONDS = float(os.getenv("PREWARM_LISTEN_TIMEOUT_SECONDS", "30"))
+
+# User whose snapshot is loaded ahead of the first search
+PREWARM_USER_ID = "browser_user"
+
+# Prewarm run state and per-component results
+_state: Dict[str, Any] = {"status": "off", "started_at": None, "finished_at": None}
+_results: Dict[str, Dict[str, Any]] = {}
+_thread: Optional[threading.Thread] = None
+_start_lock = threading.Lock()
+
+def _module_attribute(module: str, attribute: str) -> Any:
+    """A module global if the module is imported already (never imports it)."""
+    loaded = sys.modules.get(module)
+    return getattr(loaded, attribute, None) if loaded is not None else None
+
+# ---- loaders (run on the prewarm thread) ----
+
+def _load_mem0() -> None:
+    from mem0_utils import get_mem0_client
+    get_mem0_client()
+
+async def _load_pattern_embeddings() -> None:
+    from temporal_intelligence import prewarm_pattern_embeddings
+    await prewarm_pattern_embeddings()
+
+def _load_chunk_store() -> None:
+    from vector_store import get_vector_store
+    from chroma_setup import CONTENT_ROLE, PAGE_ROLE
+    for role in (CONTENT_ROLE, PAGE_ROLE):
+        get_vector_store(role).count()
+
+async def _load_snapshot() -> None:
+    from mem0_utils import get_user_snapshot
+    await get_user_snapshot(PREWARM_USER_ID)
+
+def _load_reranker() -> None:
+    from utils import get_reranker
+    get_reranker()
+
+def _load_text_splitter() -> None:
+    from utils import get_text_splitter
+    get_text_splitter()
+
+# ---- readiness checks (cheap, safe to call from health_check) ----
+
+def _pattern_embeddings_ready() -> bool:
+    cache = _module_attribute("utils", "_embedding_cache")
+    patterns = _module_attribute("temporal_intelligence", "TEMPORAL_PATTERNS")
+    if not cache or not patterns:
+        return False
+    cache_key = _module_attribute("utils", "_get_cache_key")
+    return all(cache_key(pattern) in cache for pattern in patterns)
+
+def _chunk_store_ready() -> bool:
+    return bool(_module_attribute("vector_store", "_stores"))
+
+def _snapshot_ready() -> bool:
+    snapshot = _module_attribute("memory_snapshot", "_memory_snapshot")
+    return snapshot is not None and snapshot.is_loaded(PREWARM_USER_ID)
+
+def _skip_reason(name: str) -> Optional[str]:
+    """Why a component is not prewarmed in this configuration (None if it is)."""
+    if name in ("mem0", "pattern_embeddings", "snapshot") and not os.getenv("OPENAI_API_KEY"):
+        return "OPENAI_API_KEY not set"
+    if name == "reranker" and os.getenv("USE_RERANKING", "true").lower() != "true":
+        return "reranking disabled"
+    return None
+
+# name -> (loader, readiness check)
+_COMPONENTS: Dict[str, tuple] = {
+    "mem0": (_load_mem0, lambda: _module_attribute("mem0_utils", "memory_client") is not None),
+    "pattern_embeddings": (_load_pattern_embeddings, _pattern_embeddings_ready),
+    "chunk_store": (_load_chunk_store, _chunk_store_ready),
+    "snapshot": (_load_snapshot, _snapshot_ready),
+    "reranker": (_load_reranker, lambda: _module_attribute("utils", "reranker") is not None),
+    "text_splitter": (_load_text_splitter, lambda: _module_attribute("utils", "text_splitter") is not None),
+}
+
+async def run_prewarm(loop: Optional[asyncio.AbstractEventLoop] = None) -> Dict[str, Dict[str, Any]]:
+    """
+    Load every configured component, one at a time; failures are recorded, not raised.
+    Async loaders run on loop when given (the server's), so tasks they start belong to it.
+    """
+    _state.update(status="running", started_at=time.time())
+    for name in PREWARM_COMPONENTS:
+        if name not in _COMPONENTS:
+            logger.warning(f"Unknown prewarm component '{name}'")
+            continue
+        loader, ready = _COMPONENTS[name]
+        reason = _skip_reason(name)
+        if reason:
+            _results[name] = {"state": "skipped", "reason": reason}
+            continue
+        if ready():
+            _results[name] = {"state": "ready", "load_ms": 0.0}
+            continue
+        _results[name] = {"state": "loading"}
+        start = time.perf_counter()
+        try:
+            result = loader()
+            if inspect.iscoroutine(result) and loop is not None and loop is not asyncio.get_running_loop():
+                await asyncio.wrap_future(asyncio.run_coroutine_threadsafe(result, loop))
+            elif inspect.isawaitable(result):
+                await result
+            _results[name] = {"state": "ready", "load_ms": round((time.perf_counter() - start) * 1000, 1)}
+        except Exception as e:
+            logger.warning(f"Prewarm of {name} failed: {e}")
+            _results[name] = {"state": "failed", "error": str(e)}
+    _state.update(status="done", finished_at=time.time())
+    summary = ", ".join(f"{name} {result['state']}" for name, result in _results.items())
+    logger.info(f"Prewarm finished in {_state['finished_at'] - _state['started_at']:.1f}s: {summary}")
+    return _results
+
+def _wait_for_port(port: int) -> bool:
+    """Block until the server accepts connections on port (False on timeout)."""
+    deadline = time.monotonic() + PREWARM_LISTEN_TIMEOUT_SECONDS
+    while time.monotonic() < deadline:
+        try:
+            with socket.create_connection(("127.0.0.1", port), timeout=0.5):
+                return True
+        except OSError:
+            time.sleep(0.1)
+    return False
+
+def _prewarm_thread(port: Optional[int], loop: Optional[asyncio.AbstractEventLoop]) -> None:
+    _state["status"] = "waiting"
+    if port is not None and not _wait_for_port(port):
+        logger.warning(f"Server not listening on port {port} after {PREWARM_LISTEN_TIMEOUT_SECONDS:.0f}s, prewarming anyway")
+    asyncio.run(run_prewarm(loop))
+
+def start_prewarm(port: Optional[int] = None, loop: Optional[asyncio.AbstractEventLoop] = None) -> bool:
+    """
+    Start the prewarm thread once (after the server listens on port, if given); True if
+    started. Async loaders run on loop, the server's event loop.
+    """
+    global _thread
+    if not PREWARM_ON_STARTUP:
+        return False
+    with _start_lock:
+        if _thread is not None:
+            return False
+        _thread = threading.Thread(target=_prewarm_thread, args=(port, loop), name="prewarm", daemon=True)
+        _thread.start()
+    return True
+
+def get_prewarm_status() -> Dict[str, Any]:
+    """Readiness of every component, whether the prewarm or a tool loaded it."""
+    components = {}
+    for name, (_, ready) in _COMPONENTS.items():
+        result = dict(_results.get(name) or {})
+        try:
+            is_ready = ready()
+        except Exception:
+            is_ready = False
+        if is_ready:
+            result["state"] = "ready"
+        elif not result:
+            result["state"] = "cold"
+        components[name] = result
+    return {
+        "enabled": PREWARM_ON_STARTUP,
+        "status": _state["status"],
+        "ready": all(components[name]["state"] in ("ready", "skipped") for name in PREWARM_COMPONENTS if name in components),
+        "components": components
+    }
@@ -0,0 +1,167 @@
+"""
+Response shaping for search tools.
+Response modes (ids, summary, snippet, full), field projection and JSON serialization
+(orjson when available, json otherwise).
+"""
+import os
+import json
+import logging
+from typing import List, Dict, Any, Optional, Iterable
+
+from snippets import extract_snippets
+
+logger = logging.getLogger(__name__)
+
+RESPONSE_MODES = ("ids", "summary", "snippet", "full")
+
+# Mode used when a tool call does not pass one; "full" keeps the original payloads
+DEFAULT_RESPONSE_MODE = os.getenv("SEARCH_RESPONSE_MODE", "full").lower()
+
+# Use orjson for tool responses when it is installed
+USE_FAST_JSON = os.getenv("USE_FAST_JSON", "true").lower() == "true"
+
+try:
+    import orjson
+    HAS_ORJSON = True
+except ImportError:  # pragma: no cover - optional dependency
+    HAS_ORJSON = False
+
+_CHUNK_SUMMARY_KEYS = ("id", "url", "title", "source_id", "similarity", "rerank_score", "created_datetime")
+_MEMORY_SUMMARY_KEYS = (
+    "id", "memory_summary", "score", "created_at", "source", "source_url", "source_domain"
+)
+
+def resolve_response_mode(mode: Optional[str]) -> str:
+    """Normalize a requested response mode, falling back to the default."""
+    resolved = (mode or DEFAULT_RESPONSE_MODE).lower()
+    if resolved not in RESPONSE_MODES:
+        raise ValueError(f"Invalid response_mode '{mode}', expected one of: {', '.join(RESPONSE_MODES)}")
+    return resolved
+
+_MISSING = object()
+
+def _select(value: Any, parts: List[str]) -> Any:
+    """The part of value on a dotted path, as nested dicts; lists apply the rest of the path to each item."""
+    if not parts:
+        return value
+    if isinstance(value, list):
+        selected = (_select(element, parts) for element in value)
+        # Items without the path stay as {} so lists from different fields line up
+        return [{} if element is _MISSING else element for element in selected]
+    if isinstance(value, dict) and parts[0] in value:
+        selected = _select(value[parts[0]], parts[1:])
+        return _MISSING if selected is _MISSING else {parts[0]: selected}
+    return _MISSING
+
+def _merge(left: Any, right: Any) -> Any:
+    """Combine two projections of the same item without modifying either."""
+    if isinstance(left, dict) and isinstance(right, dict):
+        merged = dict(left)
+        for key, value in right.items():
+            merged[key] = _merge(merged[key], value) if key in merged else value
+        return merged
+    if isinstance(left, list) and isinstance(right, list) and len(left) == len(right):
+        return [_merge(a, b) for a, b in zip(left, right)]
+    return right
+
+def project_fields(item: Dict[str, Any], fields: Iterable[str]) -> Dict[str, Any]:
+    """
+    Keep only the requested fields; dotted names select nested keys (e.g. metadata.memory_id)
+    and reach into lists item by item (e.g. detailed_content.id).
+    """
+    projected: Dict[str, Any] = {}
+    for field_name in fields:
+        selected = _select(item, field_name.split("."))
+        if selected is not _MISSING:
+            projected = _merge(projected, selected)
+    return projected
+
+def shape_chunk(
+    chunk: Dict[str, Any],
+    mode: str,
+    fields: Optional[List[str]] = None,
+    query: str = ""
+) -> Dict[str, Any]:
+    """Shape one content chunk for the given response mode."""
+    if fields:
+        return project_fields(chunk, fields)
+    if mode == "full":
+        return chunk
+
+    metadata = chunk.get("metadata", {})
+    if mode == "ids":
+        return {
+            "id": chunk.get("id", ""),
+            "memory_id": metadata.get("memory_id", ""),
+            "score": chunk.get("rerank_score", chunk.get("similarity", 0.0))
+        }
+
+    shaped = {key: chunk[key] for key in _CHUNK_SUMMARY_KEYS if key in chunk}
+    shaped["memory_id"] = metadata.get("memory_id", "")
+    if mode == "snippet":
+        # Query-focused sentence windows with offsets into the chunk's original_content
+        shaped["snippets"] = extract_snippets(query, chunk.get("content", ""))
+    return shaped
+
+def shape_memory_result(
+    result: Dict[str, Any],
+    mode: str,
+    fields: Optional[List[str]] = None,
+    query: str = ""
+) -> Dict[str, Any]:
+    """Shape one unified search result (memory plus its detailed chunks)."""
+    if fields:
+        return project_fields(result, fields)
+    if mode == "full":
+        return result
+
+    if mode == "ids":
+        return {
+            "id": result.get("id", ""),
+            "score": result.get("score", 0.0),
+            "chunk_ids": [chunk.get("id", "") for chunk in result.get("detailed_content", [])]
+        }
+
+    shaped = {key: result[key] for key in _MEMORY_SUMMARY_KEYS if key in result}
+    shaped["detailed_content"] = [
+        shape_chunk(chunk, mode, query=query) for chunk in result.get("detailed_content", [])
+    ]
+    return shaped
+
+def shape_unified_search(result: Dict[str, Any], mode: str, fields: Optional[List[str]] = None) -> Dict[str, Any]:
+    """Apply a response mode / field projection to a unified search response."""
+    if "error" in result or (mode == "full" and not fields):
+        return result
+
+    shaped = dict(result)
+    # Time-range queries match chunks on the topic, so snippets use it too
+    time_range = result.get("temporal_intelligence", {}).get("time_range") or {}
+    query = time_range.get("topic") or result.get("query", "")
+    shaped["results"] = [shape_memory_result(item, mode, fields, query) for item in result.get("results", [])]
+    shaped["response_mode"] = mode
+    if mode != "full":
+        # The ranking explanation is debug output, only kept in full mode
+        temporal = dict(shaped.get("temporal_intelligence", {}))
+        temporal.pop("explanation", None)
+        shaped["temporal_intelligence"] = temporal
+    return shaped
+
+def shape_content_search(result: Dict[str, Any], mode: str, fields: Optional[List[str]] = None) -> Dict[str, Any]:
+    """Apply a response mode / field projection to a content search response."""
+    if "error" in result or (mode == "full" and not fields):
+        return result
+
+    shaped = dict(result)
+    query = result.get("query", "")
+    shaped["content_chunks"] = [shape_chunk(chunk, mode, fields, query) for chunk in result.get("content_chunks", [])]
+    shaped["response_mode"] = mode
+    return shaped
+
+def dumps(obj: Any) -> str:
+    """Serialize a tool response (orjson when available, json otherwise)."""
+    if HAS_ORJSON and USE_FAST_JSON:
+        try:
+            return orjson.dumps(obj, option=orjson.OPT_SERIALIZE_NUMPY).decode("utf-8")
+        except TypeError as e:
+            logger.debug(f"orjson could not serialize response, falling back to json: {e}")
+    return json.dumps(obj, ensure_ascii=False)
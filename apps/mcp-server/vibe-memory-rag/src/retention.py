@@ -0,0 +1,480 @@
+"""
+Retention tiers for aging content chunks.
+Hot: chunks younger than RETENTION_WARM_DAYS stay fully indexed.
+Warm: older memories keep only their page vector; chunk metadata (and text written before
+the content store) move to a zlib-compressed cold table and are fetched lazily when a warm
+page reaches the results.
+Dropped: chunks older than RETENTION_DROP_DAYS are deleted (the Mem0 memory note stays).
+"""
+import os
+import json
+import time
+import zlib
+import asyncio
+import logging
+from typing import List, Dict, Any, Optional, Sequence
+
+from local_db import get_local_db, get_local_db_lock
+
+logger = logging.getLogger(__name__)
+
+# Apply retention tiers periodically in the background
+RETENTION_ENABLED = os.getenv("RETENTION_ENABLED", "false").lower() == "true"
+
+# Seconds between scheduled runs
+RETENTION_INTERVAL = float(os.getenv("RETENTION_INTERVAL", "86400"))
+
+# Chunks older than this many days move to the warm tier (0 keeps everything hot)
+RETENTION_WARM_DAYS = float(os.getenv("RETENTION_WARM_DAYS", "30"))
+
+# Chunks older than this many days are dropped (0 keeps them forever)
+RETENTION_DROP_DAYS = float(os.getenv("RETENTION_DROP_DAYS", "0"))
+
+# Memories moved or dropped per batch
+RETENTION_BATCH_SIZE = int(os.getenv("RETENTION_BATCH_SIZE", "50"))
+
+# zlib level of cold chunk payloads
+RETENTION_COMPRESSION_LEVEL = int(os.getenv("RETENTION_COMPRESSION_LEVEL", "6"))
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS cold_chunks (
+    chunk_id TEXT PRIMARY KEY,
+    memory_id TEXT NOT NULL,
+    user_id TEXT NOT NULL,
+    created_timestamp REAL NOT NULL,
+    raw_bytes INTEGER NOT NULL,
+    payload BLOB NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_cold_chunks_memory ON cold_chunks (memory_id);
+CREATE INDEX IF NOT EXISTS idx_cold_chunks_user ON cold_chunks (user_id, created_timestamp);
+"""
+
+# Global cold store instance
+_cold_store = None
+
+_retention_task: Optional[asyncio.Task] = None
+_scheduler_task: Optional[asyncio.Task] = None
+_retention_status: Dict[str, Any] = {"state": "idle"}
+
+class ColdChunkStore:
+    """Compressed text and metadata of warm-tier chunks, keyed by chunk id."""
+
+    def __init__(self) -> None:
+        self._lock = get_local_db_lock()
+        with self._lock:
+            get_local_db().executescript(_SCHEMA)
+
+    def put_many(self, user_id: str, ids: Sequence[str], documents: Sequence[str], metadatas: Sequence[Dict[str, Any]]) -> int:
+        """Store chunks; returns their uncompressed size in bytes."""
+        rows = []
+        for chunk_id, document, metadata in zip(ids, documents, metadatas):
+            raw = json.dumps({"document": document, "metadata": metadata}, ensure_ascii=False).encode("utf-8")
+            rows.append((
+                chunk_id, metadata.get("memory_id", ""), user_id,
+                float(metadata.get("created_timestamp", 0.0) or 0.0), len(raw),
+                zlib.compress(raw, RETENTION_COMPRESSION_LEVEL)
+            ))
+        with self._lock:
+            db = get_local_db()
+            db.executemany(
+                "INSERT OR REPLACE INTO cold_chunks (chunk_id, memory_id, user_id, created_timestamp, raw_bytes, payload) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                rows
+            )
+            db.commit()
+        return sum(row[4] for row in rows)
+
+    def get_memories(self, memory_ids: Sequence[str]) -> Dict[str, List[Dict[str, Any]]]:
+        """Decompressed chunks ({"id", "document", "metadata"}) per memory id."""
+        if not memory_ids:
+            return {}
+        with self._lock:
+            rows = get_local_db().execute(
+                f"SELECT chunk_id, memory_id, payload FROM cold_chunks WHERE memory_id IN ({','.join('?' * len(memory_ids))}) "
+                "ORDER BY chunk_id",
+                list(memory_ids)
+            ).fetchall()
+        chunks: Dict[str, List[Dict[str, Any]]] = {}
+        for row in rows:
+            payload = json.loads(zlib.decompress(row["payload"]))
+            chunks.setdefault(row["memory_id"], []).append({"id": row["chunk_id"], **payload})
+        return chunks
+
+    def memory_ids(self, user_id: str, before: Optional[float] = None) -> List[str]:
+        """Memory ids with cold chunks, optionally only those created before a timestamp."""
+        sql = "SELECT DISTINCT memory_id FROM cold_chunks WHERE user_id = ?"
+        params: List[Any] = [user_id]
+        if before is not None:
+            sql += " AND created_timestamp < ?"
+            params.append(before)
+        with self._lock:
+            return [row["memory_id"] for row in get_local_db().execute(sql, params).fetchall()]
+
+    def has_memories(self, user_id: str) -> bool:
+        with self._lock:
+            row = get_local_db().execute("SELECT 1 FROM cold_chunks WHERE user_id = ? LIMIT 1", (user_id,)).fetchone()
+        return row is not None
+
+    def records(self, user_id: str) -> Dict[str, List[Any]]:
+        """Every cold chunk of a user in vector store get() layout (for recounts)."""
+        with self._lock:
+            rows = get_local_db().execute(
+                "SELECT chunk_id, payload FROM cold_chunks WHERE user_id = ?", (user_id,)
+            ).fetchall()
+        payloads = [json.loads(zlib.decompress(row["payload"])) for row in rows]
+        return {
+            "ids": [row["chunk_id"] for row in rows],
+            "documents": [payload["document"] for payload in payloads],
+            "metadatas": [payload["metadata"] for payload in payloads]
+        }
+
+    def delete_memories(self, memory_ids: Sequence[str]) -> int:
+        deleted = 0
+        with self._lock:
+            db = get_local_db()
+            for start in range(0, len(memory_ids), 500):
+                batch = list(memory_ids[start:start + 500])
+                cursor = db.execute(
+                    f"DELETE FROM cold_chunks WHERE memory_id IN ({','.join('?' * len(batch))})", batch
+                )
+                deleted += cursor.rowcount
+            db.commit()
+        return deleted
+
+    def reassign(self, memory_ids: Sequence[str], user_id: str) -> int:
+        """File the cold chunks of memories under another user; returns the chunks updated."""
+        updated = 0
+        with self._lock:
+            db = get_local_db()
+            for start in range(0, len(memory_ids), 500):
+                batch = list(memory_ids[start:start + 500])
+                cursor = db.execute(
+                    f"UPDATE cold_chunks SET user_id = ? WHERE memory_id IN ({','.join('?' * len(batch))})",
+                    [user_id] + batch
+                )
+                updated += cursor.rowcount
+            db.commit()
+        return updated
+
+    def delete_user(self, user_id: str) -> int:
+        with self._lock:
+            db = get_local_db()
+            cursor = db.execute("DELETE FROM cold_chunks WHERE user_id = ?", (user_id,))
+            db.commit()
+            return cursor.rowcount
+
+    def stats(self, user_id: str) -> Dict[str, Any]:
+        with self._lock:
+            row = get_local_db().execute(
+                "SELECT COUNT(*) AS chunks, COUNT(DISTINCT memory_id) AS memories, "
+                "COALESCE(SUM(raw_bytes), 0) AS raw_bytes, COALESCE(SUM(LENGTH(payload)), 0) AS compressed_bytes "
+                "FROM cold_chunks WHERE user_id = ?",
+                (user_id,)
+            ).fetchone()
+        return dict(row)
+
+def get_cold_store() -> ColdChunkStore:
+    """Get the cold chunk store (singleton)."""
+    global _cold_store
+    if _cold_store is None:
+        _cold_store = ColdChunkStore()
+    return _cold_store
+
+def search_warm_pages(
+    index_query: Sequence[float],
+    where: Optional[Dict[str, Any]],
+    limit: int,
+    user_id: str = "browser_user",
+    include_embeddings: bool = False
+) -> List[Dict[str, Any]]:
+    """
+    Warm-tier candidates for a chunk search: the closest warm page vectors, as result
+    placeholders without content (see hydrate_warm_results).
+    """
+    if limit <= 0 or not get_cold_store().has_memories(user_id):
+        return []
+
+    from chroma_setup import PAGE_ROLE, distance_to_similarity
+    from vector_store import get_vector_store
+    pages = get_vector_store(PAGE_ROLE, user_id)
+    conditions = [where, {"tier": "warm"}] if where else [{"tier": "warm"}]
+    include = ["metadatas", "distances"] + (["embeddings"] if include_embeddings else [])
+    results = pages.query(
+        query_embeddings=[index_query],
+        n_results=limit,
+        where={"$and": conditions} if len(conditions) > 1 else conditions[0],
+        include=include
+    )
+    if not results or not results["ids"] or not results["ids"][0]:
+        return []
+
+    candidates = []
+    for position, (memory_id, metadata, distance) in enumerate(
+        zip(results["ids"][0], results["metadatas"][0], results["distances"][0])
+    ):
+        candidate = {
+            "id": memory_id,
+            "url": metadata.get("url", ""),
+            "title": metadata.get("title", ""),
+            "content": "",
+            "source_id": metadata.get("source_id", ""),
+            "similarity": distance_to_similarity(distance, pages.space),
+            "created_timestamp": metadata.get("created_timestamp"),
+            "created_datetime": None,
+            "metadata": {"memory_id": memory_id, "tier": "warm"}
+        }
+        if include_embeddings:
+            candidate["page_embedding"] = list(results["embeddings"][0][position])
+        candidates.append(candidate)
+    return candidates
+
+def hydrate_warm_results(query: str, results: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Fill warm placeholders with their best matching cold chunk (by query term overlap).
+    Only the given results are decompressed; placeholders whose chunks are gone are dropped.
+    """
+    warm_ids = [result["id"] for result in results if result.get("metadata", {}).get("tier") == "warm"]
+    if not warm_ids:
+        return results
+
+    from snippets import query_terms
+    from utils import format_chunk_result
+    from content_store import get_content_store
+    terms = query_terms(query)
+    cold = get_cold_store().get_memories(warm_ids)
+
+    # Chunks in the normalized layout keep their text in the content store
+    texts = get_content_store().get_texts([
+        chunk["id"] for chunks in cold.values() for chunk in chunks if "original_content" not in chunk["metadata"]
+    ])
+    for chunks in cold.values():
+        for chunk in chunks:
+            chunk["text"] = chunk["metadata"].get("original_content") or texts.get(chunk["id"], chunk["document"])
+
+    hydrated = []
+    for result in results:
+        if result.get("metadata", {}).get("tier") != "warm":
+            hydrated.append(result)
+            continue
+        chunks = cold.get(result["id"], [])
+        if not chunks:
+            continue
+        best = max(chunks, key=lambda chunk: sum(1 for term in terms if term in chunk["text"].lower()))
+        chunk = format_chunk_result(best["id"], best["document"], best["metadata"], result["similarity"])
+        chunk["content"] = best["text"]
+        chunk["url"] = chunk["url"] or result["url"]
+        chunk["title"] = chunk["title"] or result["title"]
+        chunk["metadata"]["tier"] = "warm"
+        if "page_embedding" in result:
+            chunk["page_embedding"] = result["page_embedding"]
+        hydrated.append(chunk)
+    return hydrated
+
+def _demote_batch(user_id: str, memory_ids: List[str], dry_run: bool) -> Dict[str, int]:
+    """Move memories' chunks to the cold table, keeping (or building) a warm page vector."""
+    from chroma_setup import CONTENT_ROLE, PAGE_ROLE
+    from vector_store import get_vector_store
+    from page_index import build_page_vector
+
+    chunks = get_vector_store(CONTENT_ROLE, user_id)
+    pages = get_vector_store(PAGE_ROLE, user_id)
+    rows = chunks.get(where={"memory_id": {"$in": memory_ids}}, include=["documents", "metadatas", "embeddings"])
+    result = {"memories": 0, "chunks": len(rows["ids"]), "raw_bytes": 0}
+    if not rows["ids"]:
+        return result
+
+    grouped: Dict[str, List[int]] = {}
+    for position, metadata in enumerate(rows["metadatas"]):
+        grouped.setdefault(metadata.get("memory_id", ""), []).append(position)
+    result["memories"] = len(grouped)
+    if dry_run:
+        result["raw_bytes"] = sum(
+            len(json.dumps({"document": document, "metadata": metadata}, ensure_ascii=False).encode("utf-8"))
+            for document, metadata in zip(rows["documents"], rows["metadatas"])
+        )
+        return result
+
+    # Cold copy first: an interrupted run leaves chunks in both tiers, never in neither
+    result["raw_bytes"] = get_cold_store().put_many(user_id, rows["ids"], rows["documents"], rows["metadatas"])
+
+    existing = pages.get(ids=list(grouped), include=["metadatas", "embeddings"])
+    page_vectors = dict(zip(existing["ids"], existing["embeddings"]))
+    page_metadatas = dict(zip(existing["ids"], existing["metadatas"]))
+    page_ids, embeddings, documents, metadatas = [], [], [], []
+    for memory_id, positions in grouped.items():
+        first = rows["metadatas"][positions[0]]
+        metadata = page_metadatas.get(memory_id) or {
+            "memory_id": memory_id,
+            "url": first.get("url", ""),
+            "title": first.get("title", ""),
+            "source_id": first.get("source_id", ""),
+            "created_timestamp": first.get("created_timestamp", 0.0),
+            "chunk_count": len(positions),
+            "has_summary": False
+        }
+        if memory_id in page_vectors:
+            vector = list(page_vectors[memory_id])
+        else:
+            vector = build_page_vector([rows["embeddings"][position] for position in positions])
+        page_ids.append(memory_id)
+        embeddings.append(vector)
+        documents.append(metadata.get("title", ""))
+        metadatas.append({**metadata, "tier": "warm"})
+    pages.upsert(ids=page_ids, embeddings=embeddings, documents=documents, metadatas=metadatas)
+
+    from vector_codec import get_rescore_store
+    chunks.delete(where={"memory_id": {"$in": list(grouped)}})
+    get_rescore_store().delete_memories(list(grouped))
+    return result
+
+def _drop_batch(user_id: str, memory_ids: List[str], dry_run: bool) -> Dict[str, int]:
+    """Delete every chunk (hot or cold) and the page vector of expired memories."""
+    from chroma_setup import CONTENT_ROLE, PAGE_ROLE
+    from vector_store import get_vector_store
+    from memory_aggregates import chunk_bytes
+
+    chunks = get_vector_store(CONTENT_ROLE, user_id)
+    rows = chunks.get(where={"memory_id": {"$in": memory_ids}}, include=["documents", "metadatas"])
+    cold = get_cold_store().get_memories(memory_ids)
+    cold_chunks = [chunk for memory_chunks in cold.values() for chunk in memory_chunks]
+    result = {
+        "memories": len(memory_ids),
+        "chunks": len(rows["ids"]) + len(cold_chunks),
+        "content_bytes": sum(chunk_bytes(document, metadata) for document, metadata in zip(rows["documents"], rows["metadatas"]))
+        + sum(chunk_bytes(chunk["document"], chunk["metadata"]) for chunk in cold_chunks)
+    }
+    if dry_run:
+        return result
+
+    from vector_codec import get_rescore_store
+    from memory_aggregates import get_memory_aggregates
+    from content_store import get_content_store
+    chunks.delete(where={"memory_id": {"$in": memory_ids}})
+    get_vector_store(PAGE_ROLE, user_id).delete(ids=memory_ids)
+    get_cold_store().delete_memories(memory_ids)
+    get_rescore_store().delete_memories(memory_ids)
+    get_content_store().delete_memories(memory_ids)
+    aggregates = get_memory_aggregates()
+    for memory_id in memory_ids:
+        aggregates.chunks_removed(memory_id)
+    return result
+
+def tier_sizes(user_id: str) -> Dict[str, Any]:
+    """Chunk counts and sizes of each tier for one user partition."""
+    from chroma_setup import CONTENT_ROLE, PAGE_ROLE
+    from vector_store import get_vector_store
+    chunks = get_vector_store(CONTENT_ROLE, user_id)
+    pages = get_vector_store(PAGE_ROLE, user_id)
+    return {
+        "hot": {"chunks": chunks.count(), "disk_bytes": chunks.disk_bytes()},
+        "warm": get_cold_store().stats(user_id),
+        "page_vectors": {"vectors": pages.count(), "disk_bytes": pages.disk_bytes()}
+    }
+
+async def apply_retention(dry_run: bool = False) -> Dict[str, Any]:
+    """Drop expired content, then move aged hot memories to the warm tier, in every partition."""
+    from chroma_setup import CONTENT_ROLE
+    from vector_store import get_vector_store, list_partition_users
+    from chunk_gc import wait_for_idle
+    from store_access import read_store, write_store, CHUNK_STORE
+
+    now = time.time()
+    warm_cutoff = now - RETENTION_WARM_DAYS * 86400 if RETENTION_WARM_DAYS > 0 else None
+    drop_cutoff = now - RETENTION_DROP_DAYS * 86400 if RETENTION_DROP_DAYS > 0 else None
+
+    report = {}
+    for user_id in await read_store(CHUNK_STORE, list_partition_users):
+        store = get_vector_store(CONTENT_ROLE, user_id)
+        dropped = {"memories": 0, "chunks": 0, "content_bytes": 0}
+        demoted = {"memories": 0, "chunks": 0, "raw_bytes": 0}
+
+        expired = set()
+        if drop_cutoff is not None:
+            _retention_status["state"] = f"dropping expired content of {user_id}"
+            expired_ids = await read_store(CHUNK_STORE, store.memory_ids, {"created_timestamp": {"$lt": drop_cutoff}})
+            expired.update(expired_ids)
+            cold_expired = await read_store(CHUNK_STORE, get_cold_store().memory_ids, user_id, drop_cutoff)
+            expired_ids += [memory_id for memory_id in cold_expired if memory_id not in expired]
+            expired.update(expired_ids)
+            for start in range(0, len(expired_ids), RETENTION_BATCH_SIZE):
+                await wait_for_idle()
+                result = await (read_store if dry_run else write_store)(
+                    CHUNK_STORE, _drop_batch, user_id, expired_ids[start:start + RETENTION_BATCH_SIZE], dry_run
+                )
+                for key, value in result.items():
+                    dropped[key] += value
+
+        if warm_cutoff is not None:
+            _retention_status["state"] = f"moving aged content of {user_id} to the warm tier"
+            aged = [
+                memory_id for memory_id in await read_store(CHUNK_STORE, store.memory_ids, {"created_timestamp": {"$lt": warm_cutoff}})
+                if memory_id not in expired
+            ]
+            for start in range(0, len(aged), RETENTION_BATCH_SIZE):
+                await wait_for_idle()
+                result = await (read_store if dry_run else write_store)(
+                    CHUNK_STORE, _demote_batch, user_id, aged[start:start + RETENTION_BATCH_SIZE], dry_run
+                )
+                for key, value in result.items():
+                    demoted[key] += value
+
+        report[user_id] = {
+            "dropped": dropped,
+            "moved_to_warm": demoted,
+            "tiers": await read_store(CHUNK_STORE, tier_sizes, user_id)
+        }
+    return report
+
+async def run_retention(dry_run: bool = False) -> Dict[str, Any]:
+    """One retention pass with status tracking."""
+    started = time.time()
+    _retention_status.clear()
+    _retention_status.update({"state": "starting", "dry_run": dry_run, "started_at": started})
+    try:
+        partitions = await apply_retention(dry_run)
+        report = {
+            "dry_run": dry_run,
+            "warm_days": RETENTION_WARM_DAYS,
+            "drop_days": RETENTION_DROP_DAYS,
+            "partitions": partitions,
+            "seconds": round(time.time() - started, 2)
+        }
+        _retention_status.update({"state": "completed", "report": report, "finished_at": time.time()})
+        logger.info(f"Retention finished: {report}")
+        return report
+    except Exception as e:
+        logger.error(f"Retention failed: {e}")
+        _retention_status.update({"state": "failed", "error": str(e)})
+        raise
+
+def start_retention(dry_run: bool = False) -> bool:
+    """Start a retention pass in the background; False if one is already running."""
+    global _retention_task
+    if _retention_task is not None and not _retention_task.done():
+        return False
+    _retention_task = asyncio.get_running_loop().create_task(run_retention(dry_run))
+    _retention_task.add_done_callback(lambda task: task.cancelled() or task.exception())
+    return True
+
+async def _retention_scheduler() -> None:
+    while True:
+        await asyncio.sleep(RETENTION_INTERVAL)
+        if not start_retention():
+            logger.info("Retention still running, skipping scheduled run")
+
+def start_retention_scheduler() -> bool:
+    """Schedule periodic retention (when RETENTION_ENABLED); True if the scheduler was started."""
+    global _scheduler_task
+    if not RETENTION_ENABLED or (_scheduler_task is not None and not _scheduler_task.done()):
+        return False
+    try:
+        loop = asyncio.get_running_loop()
+    except RuntimeError:
+        return False
+    _scheduler_task = loop.create_task(_retention_scheduler())
+    logger.info(f"Retention scheduled every {RETENTION_INTERVAL:.0f} s")
+    return True
+
+def get_retention_status() -> Dict[str, Any]:
+    """Progress of the current or last retention pass."""
+    return dict(_retention_status)
@@ -0,0 +1,192 @@
+"""
+Query-focused snippet extraction for returned chunks.
+Splits chunk content into sentence windows, scores them against the query and returns
+the best windows with character offsets into the chunk's original_content.
+"""
+import os
+import re
+import bisect
+import math
+import logging
+from typing import List, Dict, Any, Optional, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Sentences per candidate window
+SNIPPET_WINDOW_SENTENCES = int(os.getenv("SNIPPET_WINDOW_SENTENCES", "2"))
+
+# Max windows returned per chunk
+SNIPPET_MAX_WINDOWS = int(os.getenv("SNIPPET_MAX_WINDOWS", "2"))
+
+# Max characters per window (long windows are trimmed around the first query match)
+SNIPPET_MAX_CHARS = int(os.getenv("SNIPPET_MAX_CHARS", "300"))
+
+# "lexical" (term overlap) or "cross_encoder" (reuse the reranker on candidate windows)
+SNIPPET_SCORER = os.getenv("SNIPPET_SCORER", "lexical").lower()
+
+# Candidate windows passed to the cross-encoder, picked by lexical score first
+CROSS_ENCODER_CANDIDATES = 8
+
+_SENTENCE_PATTERN = re.compile(r"[^\n.!?]+(?:[.!?]+|$)")
+_TERM_PATTERN = re.compile(r"[a-z0-9][a-z0-9+#-]*")
+
+_STOPWORDS = {
+    "a", "an", "and", "are", "as", "at", "be", "by", "can", "did", "do", "does", "for",
+    "from", "how", "i", "in", "is", "it", "me", "my", "of", "on", "or", "so", "that",
+    "the", "this", "to", "was", "were", "what", "when", "where", "which", "who", "why",
+    "with", "you", "your", "about", "tell", "show", "find",
+}
+
+def query_terms(query: str) -> List[str]:
+    """Get the distinct content words of a query, in order."""
+    terms = []
+    for term in _TERM_PATTERN.findall((query or "").lower()):
+        if term not in _STOPWORDS and len(term) > 1 and term not in terms:
+            terms.append(term)
+    return terms
+
+def split_sentences(text: str) -> List[Tuple[int, int]]:
+    """Get (start, end) offsets of each sentence, whitespace trimmed."""
+    spans = []
+    for match in _SENTENCE_PATTERN.finditer(text):
+        start, end = match.span()
+        while start < end and text[start].isspace():
+            start += 1
+        while end > start and text[end - 1].isspace():
+            end -= 1
+        if end > start:
+            spans.append((start, end))
+    return spans
+
+def _windows(spans: List[Tuple[int, int]], size: int) -> List[Tuple[int, int]]:
+    """Group consecutive sentences into overlapping windows of `size` sentence indexes."""
+    if len(spans) <= size:
+        return [(0, len(spans) - 1)] if spans else []
+    return [(i, i + size - 1) for i in range(len(spans) - size + 1)]
+
+def _lexical_scores(
+    text: str,
+    spans: List[Tuple[int, int]],
+    windows: List[Tuple[int, int]],
+    terms: List[str]
+) -> List[float]:
+    """Score windows by matched query terms, weighted by how rare each term is in the chunk."""
+    # Tokenize the chunk once, bucketing query-term hits by sentence;
+    # a window's terms are the union of its sentences
+    term_pattern = re.compile(
+        r"(?<![a-z0-9+#-])(?:" + "|".join(re.escape(term) for term in terms) + r")(?![a-z0-9+#-])"
+    )
+    sentence_starts = [start for start, _ in spans]
+    sentence_terms: List[Set[str]] = [set() for _ in spans]
+    for match in term_pattern.finditer(text.lower()):
+        sentence_index = bisect.bisect_right(sentence_starts, match.start()) - 1
+        if sentence_index >= 0:
+            sentence_terms[sentence_index].add(match.group())
+    window_terms = [set().union(*sentence_terms[first:last + 1]) for first, last in windows]
+
+    term_weights = {}
+    for term in terms:
+        frequency = sum(1 for words in window_terms if term in words)
+        term_weights[term] = 1.0 + math.log((len(windows) + 1) / (frequency + 1)) if frequency else 0.0
+
+    scores = []
+    for words in window_terms:
+        score = sum(term_weights[term] for term in words)
+        # Windows covering more distinct query terms win over repeated single terms
+        score *= 1.0 + 0.5 * (len(words) / len(terms))
+        scores.append(score)
+    return scores
+
+def _cross_encoder_scores(query: str, text: str, windows: List[Tuple[int, int]]) -> Optional[List[float]]:
+    """Score windows with the already-loaded reranker; None when it is unavailable."""
+    from utils import reranker
+    if reranker is None:
+        return None
+    try:
+        pairs = [(query, text[start:end]) for start, end in windows]
+        return [float(score) for score in reranker.predict(pairs)]
+    except Exception as e:
+        logger.error(f"Cross-encoder snippet scoring failed: {e}")
+        return None
+
+def _trim_window(text: str, start: int, end: int, terms: List[str], max_chars: int) -> Tuple[int, int]:
+    """Shrink a window to max_chars, keeping the first query match inside it."""
+    if end - start <= max_chars:
+        return start, end
+    window_text = text[start:end].lower()
+    anchor = min((window_text.find(term) for term in terms if term in window_text), default=0)
+    new_start = start + max(0, anchor - max_chars // 4)
+    new_end = min(end, new_start + max_chars)
+
+    # Snap to word boundaries so snippets never start or end mid-word
+    if new_start > start:
+        space = text.find(" ", new_start, new_end)
+        if space != -1:
+            new_start = space + 1
+    if new_end < end:
+        space = text.rfind(" ", new_start, new_end)
+        if space > new_start:
+            new_end = space
+    return new_start, new_end
+
+def extract_snippets(
+    query: str,
+    content: str,
+    max_windows: int = SNIPPET_MAX_WINDOWS,
+    max_chars: int = SNIPPET_MAX_CHARS,
+    scorer: str = SNIPPET_SCORER
+) -> List[Dict[str, Any]]:
+    """
+    Get the sentence windows of `content` that best answer `query`.
+    Each snippet is {"text", "start", "end", "score"} with offsets into `content`,
+    returned in document order. Falls back to the opening window when nothing matches.
+    """
+    if not content:
+        return []
+
+    spans = split_sentences(content)
+    sentence_windows = _windows(spans, max(1, SNIPPET_WINDOW_SENTENCES))
+    if not sentence_windows:
+        return []
+    windows = [(spans[first][0], spans[last][1]) for first, last in sentence_windows]
+
+    terms = query_terms(query)
+    scores = _lexical_scores(content, spans, sentence_windows, terms) if terms else [0.0] * len(windows)
+
+    used_encoder = False
+    if scorer == "cross_encoder" and len(windows) > 1:
+        candidates = sorted(range(len(windows)), key=lambda i: (-scores[i], i))[:CROSS_ENCODER_CANDIDATES]
+        encoder_scores = _cross_encoder_scores(query, content, [windows[i] for i in candidates])
+        if encoder_scores is not None:
+            used_encoder = True
+            scores = [float("-inf")] * len(windows)
+            for index, score in zip(candidates, encoder_scores):
+                scores[index] = score
+
+    ranked = sorted(range(len(windows)), key=lambda i: (-scores[i], i))
+    if not used_encoder and (not terms or scores[ranked[0]] <= 0.0):
+        # No query term in this chunk: the opening window is the best summary
+        ranked = [0]
+
+    # Pick the best non-overlapping windows
+    selected: List[Tuple[int, int, float]] = []
+    for index in ranked:
+        if selected and (scores[index] <= 0.0 if not used_encoder else not math.isfinite(scores[index])):
+            break
+        start, end = windows[index]
+        if any(start < chosen_end and end > chosen_start for chosen_start, chosen_end, _ in selected):
+            continue
+        selected.append((start, end, scores[index]))
+        if len(selected) >= max_windows:
+            break
+
+    snippets = []
+    for start, end, score in sorted(selected):
+        start, end = _trim_window(content, start, end, terms, max_chars)
+        snippets.append({
+            "text": content[start:end],
+            "start": start,
+            "end": end,
+            "score": round(score, 4) if math.isfinite(score) else 0.0
+        })
+    return snippets
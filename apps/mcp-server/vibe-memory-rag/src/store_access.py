@@ -0,0 +1,238 @@
+"""
+Single-writer / multi-reader access to the local stores.
+Each store ("chunks": the chunk/page vector stores and their side tables, "mem0": Mem0's
+Chroma collection) gets one writer thread, so its database never sees two writers at
+once, while reads from every store share one bounded thread pool. A readers-writer lock
+per store makes every write atomic to readers: a read callable runs entirely between two
+writes and sees one consistent state of the store. Calls never block the event loop.
+"""
+import os
+import time
+import asyncio
+import threading
+import logging
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Iterator, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Serialize each store's writes on one thread and run reads on the shared pool
+STORE_SINGLE_WRITER = os.getenv("STORE_SINGLE_WRITER", "true").lower() == "true"
+
+# Threads in the shared read pool (concurrent store reads)
+STORE_READ_WORKERS = int(os.getenv("STORE_READ_WORKERS", "4"))
+
+# Store names
+CHUNK_STORE = "chunks"
+MEM0_STORE = "mem0"
+
+class ReadWriteLock:
+    """Writer-preferring readers-writer lock: a waiting writer holds back new readers."""
+
+    def __init__(self) -> None:
+        self._condition = threading.Condition()
+        self._readers = 0
+        self._writing = False
+        self._writers_waiting = 0
+
+    @contextmanager
+    def read_locked(self) -> Iterator[None]:
+        with self._condition:
+            while self._writing or self._writers_waiting:
+                self._condition.wait()
+            self._readers += 1
+        try:
+            yield
+        finally:
+            with self._condition:
+                self._readers -= 1
+                if not self._readers:
+                    self._condition.notify_all()
+
+    @contextmanager
+    def write_locked(self) -> Iterator[None]:
+        with self._condition:
+            self._writers_waiting += 1
+            while self._writing or self._readers:
+                self._condition.wait()
+            self._writers_waiting -= 1
+            self._writing = True
+        try:
+            yield
+        finally:
+            with self._condition:
+                self._writing = False
+                self._condition.notify_all()
+
+class StoreAccess:
+    """One store's writer thread and readers-writer lock; reads go to the shared pool."""
+
+    def __init__(self, name: str, read_pool: ThreadPoolExecutor) -> None:
+        self.name = name
+        self._lock = ReadWriteLock()
+        self._read_pool = read_pool
+        self._writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix=f"{name}-writer")
+        self._writer_thread: Optional[int] = None
+        self._active = {"reads": 0, "writes": 0}
+        self._stats = {"reads": 0, "writes": 0, "read_wait_ms": 0.0, "write_wait_ms": 0.0,
+                       "max_read_wait_ms": 0.0, "max_write_wait_ms": 0.0, "max_queued_writes": 0}
+
+    def _locked_read(
+        self, func: Callable, args: Tuple[Any, ...], kwargs: Dict[str, Any], queued_at: float
+    ) -> Tuple[float, Any]:
+        with self._lock.read_locked():
+            waited = time.perf_counter() - queued_at
+            return waited, func(*args, **kwargs)
+
+    def _locked_write(
+        self, func: Callable, args: Tuple[Any, ...], kwargs: Dict[str, Any], queued_at: float
+    ) -> Tuple[float, Any]:
+        self._writer_thread = threading.get_ident()
+        with self._lock.write_locked():
+            waited = time.perf_counter() - queued_at
+            return waited, func(*args, **kwargs)
+
+    def _record(self, kind: str, waited: float) -> None:
+        waited_ms = waited * 1000
+        self._stats[f"{kind}s"] += 1
+        self._stats[f"{kind}_wait_ms"] += waited_ms
+        self._stats[f"max_{kind}_wait_ms"] = max(self._stats[f"max_{kind}_wait_ms"], waited_ms)
+
+    async def read(self, func: Callable, *args: Any, **kwargs: Any) -> Any:
+        """Run a read callable on the read pool, between writes."""
+        if not STORE_SINGLE_WRITER:
+            return await asyncio.to_thread(func, *args, **kwargs)
+        self._active["reads"] += 1
+        try:
+            waited, result = await asyncio.get_running_loop().run_in_executor(
+                self._read_pool, self._locked_read, func, args, kwargs, time.perf_counter()
+            )
+        finally:
+            self._active["reads"] -= 1
+        self._record("read", waited)
+        return result
+
+    async def write(self, func: Callable, *args: Any, **kwargs: Any) -> Any:
+        """Run a write callable on the store's writer thread, with readers held off."""
+        if not STORE_SINGLE_WRITER:
+            return await asyncio.to_thread(func, *args, **kwargs)
+        self._active["writes"] += 1
+        self._stats["max_queued_writes"] = max(self._stats["max_queued_writes"], self._active["writes"])
+        try:
+            waited, result = await asyncio.get_running_loop().run_in_executor(
+                self._writer, self._locked_write, func, args, kwargs, time.perf_counter()
+            )
+        finally:
+            self._active["writes"] -= 1
+        self._record("write", waited)
+        return result
+
+    def read_sync(self, func: Callable, *args: Any, **kwargs: Any) -> Any:
+        """
+        Blocking variant of read for background threads (never call it on the event loop).
+        Runs on the calling thread; calls made from the writer thread itself run inline.
+        """
+        if not STORE_SINGLE_WRITER or threading.get_ident() == self._writer_thread:
+            return func(*args, **kwargs)
+        waited, result = self._locked_read(func, args, kwargs, time.perf_counter())
+        self._record("read", waited)
+        return result
+
+    def write_sync(self, func: Callable, *args: Any, **kwargs: Any) -> Any:
+        """
+        Blocking variant of write for background threads (never call it on the event loop).
+        Calls made from the writer thread itself run inline.
+        """
+        if not STORE_SINGLE_WRITER or threading.get_ident() == self._writer_thread:
+            return func(*args, **kwargs)
+        _, result = self._writer.submit(self._locked_write, func, args, kwargs, time.perf_counter()).result()
+        return result
+
+    def stats(self) -> Dict[str, Any]:
+        reads, writes = self._stats["reads"], self._stats["writes"]
+        return {
+            "reads": reads,
+            "writes": writes,
+            "active_reads": self._active["reads"],
+            "queued_writes": self._active["writes"],
+            "max_queued_writes": self._stats["max_queued_writes"],
+            "avg_read_wait_ms": round(self._stats["read_wait_ms"] / reads, 2) if reads else 0.0,
+            "avg_write_wait_ms": round(self._stats["write_wait_ms"] / writes, 2) if writes else 0.0,
+            "max_read_wait_ms": round(self._stats["max_read_wait_ms"], 2),
+            "max_write_wait_ms": round(self._stats["max_write_wait_ms"], 2)
+        }
+
+    def shutdown(self) -> None:
+        self._writer.shutdown(wait=True)
+
+# Global read pool and per-store access objects
+_read_pool: Optional[ThreadPoolExecutor] = None
+_stores: Dict[str, StoreAccess] = {}
+_stores_lock = threading.Lock()
+
+# Stores kept in another store's database, by name -> that store's name
+_shared: Dict[str, str] = {}
+
+def share_store(name: str, target: str) -> None:
+    """
+    Route a store's reads and writes through another store's access object (one database,
+    one writer). Must run before the store is first used: an access object created for it
+    already has its own writer thread, so that raises RuntimeError.
+    """
+    with _stores_lock:
+        if _shared.get(name) == target:
+            return
+        if name in _stores:
+            raise RuntimeError(f"Store '{name}' already has its own writer, share it before first use")
+        _shared[name] = target
+
+def get_store_access(name: str) -> StoreAccess:
+    """Get the access object of a store (one per store name)."""
+    global _read_pool
+    store = _stores.get(_shared.get(name, name))
+    if store is not None:
+        return store
+    with _stores_lock:
+        name = _shared.get(name, name)
+        if _read_pool is None:
+            _read_pool = ThreadPoolExecutor(max_workers=STORE_READ_WORKERS, thread_name_prefix="store-reader")
+        if name not in _stores:
+            _stores[name] = StoreAccess(name, _read_pool)
+        return _stores[name]
+
+async def read_store(name: str, func: Callable, *args: Any, **kwargs: Any) -> Any:
+    """Run func(*args, **kwargs) as a read of the named store."""
+    return await get_store_access(name).read(func, *args, **kwargs)
+
+async def write_store(name: str, func: Callable, *args: Any, **kwargs: Any) -> Any:
+    """Run func(*args, **kwargs) as a write of the named store."""
+    return await get_store_access(name).write(func, *args, **kwargs)
+
+def read_store_sync(name: str, func: Callable, *args: Any, **kwargs: Any) -> Any:
+    """Blocking read of the named store, for code already running on a worker thread."""
+    return get_store_access(name).read_sync(func, *args, **kwargs)
+
+def write_store_sync(name: str, func: Callable, *args: Any, **kwargs: Any) -> Any:
+    """Blocking write of the named store, for code already running on a worker thread."""
+    return get_store_access(name).write_sync(func, *args, **kwargs)
+
+def get_store_access_stats() -> Dict[str, Any]:
+    """Per-store read/write counts and lock wait times."""
+    return {
+        "single_writer": STORE_SINGLE_WRITER,
+        "read_workers": STORE_READ_WORKERS,
+        "shared": dict(_shared),
+        "stores": {name: store.stats() for name, store in list(_stores.items())}
+    }
+
+def shutdown_store_access() -> None:
+    """Finish queued writes and stop the writer threads and the read pool."""
+    global _read_pool
+    with _stores_lock:
+        for store in _stores.values():
+            store.shutdown()
+        _stores.clear()
+        if _read_pool is not None:
+            _read_pool.shutdown(wait=True)
+            _read_pool = None
@@ -0,0 +1,126 @@
+"""
+Migration of synopsis_update records into the memories they describe.
+Earlier versions saved each page's LLM synopsis as a second Mem0 memory (metadata type
+"synopsis_update", pointing at the page memory through "memory_id"). The migration merges
+their text and tags into the page memory, re-embedding it once, and deletes them, leaving
+one Mem0 record per page.
+"""
+import logging
+from typing import List, Dict, Any
+
+logger = logging.getLogger(__name__)
+
+# Metadata type of the per-page synopsis records written by earlier versions
+SYNOPSIS_RECORD_TYPE = "synopsis_update"
+
+def _synopsis_text(records: List[Dict[str, Any]]) -> str:
+    """Synopsis from the records' texts, oldest first (Mem0 may have split one synopsis into facts)."""
+    parts = []
+    for record in sorted(records, key=lambda record: str(record.get("created_at") or "")):
+        text = (record.get("memory") or "").strip()
+        if text.lower().startswith("synopsis:"):
+            text = text[len("synopsis:"):].strip()
+        if text and text not in parts:
+            parts.append(text)
+    return " ".join(parts)
+
+def _split_tags(value: Any) -> List[str]:
+    if isinstance(value, list):
+        return [str(tag).strip() for tag in value if str(tag).strip()]
+    return [tag.strip() for tag in str(value or "").split(",") if tag.strip()]
+
+def _synopsis_tags(records: List[Dict[str, Any]], original: Dict[str, Any]) -> List[str]:
+    """Tags of the synopsis records, or the memory's own tags if they carry none."""
+    tags = []
+    for record in records:
+        for tag in _split_tags((record.get("metadata") or {}).get("tags")):
+            if tag not in tags:
+                tags.append(tag)
+    return tags or _split_tags((original.get("metadata") or {}).get("tags"))
+
+async def merge_synopsis_records(user_id: str = "browser_user", dry_run: bool = False) -> Dict[str, Any]:
+    """
+    Collapse a user's synopsis_update records into their page memories.
+    Records whose page memory Mem0 confirms is gone are deleted without a merge. A page
+    whose merge fails, or that cannot be confirmed gone, keeps its records, so running the
+    migration again retries it.
+    """
+    from mem0_utils import (
+        get_mem0_client, merge_browser_memory_synopsis, delete_memories_batch, find_unknown_memories,
+        RECENCY_BACKFILL_LIMIT
+    )
+    from memory_ids import normalize_memory_ids
+    from store_access import read_store, write_store, MEM0_STORE
+
+    memory = get_mem0_client()
+    try:
+        results = await read_store(MEM0_STORE, memory.get_all, user_id=user_id, limit=RECENCY_BACKFILL_LIMIT)
+    except TypeError:
+        # Older Mem0 versions don't accept a limit
+        results = await read_store(MEM0_STORE, memory.get_all, user_id=user_id)
+    if isinstance(results, dict) and "results" in results:
+        memory_objects = results["results"]
+    else:
+        memory_objects = results if results else []
+    normalize_memory_ids(memory_objects)
+
+    originals = {}
+    synopsis_records: Dict[str, List[Dict[str, Any]]] = {}
+    for memory_obj in memory_objects:
+        if not isinstance(memory_obj, dict) or not memory_obj.get("id"):
+            continue
+        metadata = memory_obj.get("metadata") or {}
+        if metadata.get("type") == SYNOPSIS_RECORD_TYPE:
+            synopsis_records.setdefault(str(metadata.get("memory_id", "")), []).append(memory_obj)
+        else:
+            originals[str(memory_obj["id"])] = memory_obj
+
+    # Page memories past the get_all limit are missing from originals too: only ids Mem0
+    # confirms it lacks are orphans
+    missing = [memory_id for memory_id in synopsis_records if memory_id not in originals]
+    orphans = set(await read_store(MEM0_STORE, find_unknown_memories, missing)) if missing else set()
+
+    record_count = sum(len(records) for records in synopsis_records.values())
+    report: Dict[str, Any] = {
+        "user_id": user_id,
+        "dry_run": dry_run,
+        "memories_before": len(originals) + record_count,
+        "synopsis_records": record_count,
+        "pages": len(synopsis_records),
+        "merged": 0,
+        "orphaned": 0,
+        "skipped": 0,
+        "deleted": 0,
+        "failed": 0
+    }
+    if dry_run:
+        report["orphaned"] = len(orphans)
+        report["memories_after"] = len(originals)
+        return report
+
+    for memory_id, records in synopsis_records.items():
+        synopsis = _synopsis_text(records)
+        if memory_id in orphans or not synopsis:
+            report["orphaned"] += 1
+        else:
+            try:
+                merged = await merge_browser_memory_synopsis(
+                    memory_id, synopsis, _synopsis_tags(records, originals.get(memory_id, {})), user_id
+                )
+            except Exception as e:
+                logger.error(f"Failed to merge synopsis into {memory_id}: {e}")
+                report["failed"] += len(records)
+                continue
+            if not merged:
+                # Not in Mem0 yet (fast-ack) or deleted since the lookup: a rerun decides
+                report["skipped"] += 1
+                continue
+            report["merged"] += 1
+
+        outcome = await write_store(MEM0_STORE, delete_memories_batch, [str(record["id"]) for record in records])
+        report["deleted"] += len(outcome["deleted"])
+        report["failed"] += len(outcome["failed"])
+
+    report["memories_after"] = report["memories_before"] - report["deleted"]
+    logger.info(f"Synopsis merge for {user_id}: {report}")
+    return report
@@ -3,6 +3,7 @@ Advanced temporal intelligence system for memory retrieval.
 Replaces hardcoded keyword detection with semantic and statistical approaches.
 """
 import logging
+import re
 import time
 import numpy as np
 from typing import List, Dict, Any, Tuple, Optional
@@ -10,8 +11,40 @@ from datetime import datetime, timezone
 from dataclasses import dataclass
 from enum import Enum
 
+from memory_index import parse_memory_timestamp
+
 logger = logging.getLogger(__name__)
 
+# Chunks below this similarity don't count as a topic match inside a time range
+TIME_RANGE_MIN_SIMILARITY = 0.2
+
+# Words that describe the browsing itself rather than the topic of a time-range query
+TOPIC_STOPWORDS = {
+    "what", "which", "did", "do", "i", "me", "my", "the", "a", "an", "and", "or", "of",
+    "to", "in", "on", "at", "for", "from", "with", "about", "was", "were", "is", "are",
+    "read", "see", "saw", "seen", "look", "looked", "visit", "visited", "open", "opened",
+    "browse", "browsed", "page", "pages", "site", "sites", "website", "websites", "tab",
+    "tabs", "article", "articles", "show", "find", "list", "any", "all", "that", "there",
+    "stuff", "things", "thing", "something", "anything", "around", "regarding", "related",
+}
+
+# Temporal pattern templates (more flexible than keywords)
+TEMPORAL_PATTERNS = [
+    "show me the most recent information",
+    "what was the latest thing I accessed",
+    "find my recent activity",
+    "chronological order of my browsing",
+    "time-based search results",
+    "newest entries in my history"
+]
+
+async def prewarm_pattern_embeddings() -> int:
+    """Embed the temporal patterns into the shared embedding cache ahead of the first search."""
+    from utils import create_embedding
+    for pattern in TEMPORAL_PATTERNS:
+        await create_embedding(pattern)
+    return len(TEMPORAL_PATTERNS)
+
 class QueryIntent(Enum):
     TEMPORAL_PRIMARY = "temporal_primary"     # Time is the main concern
     TEMPORAL_SECONDARY = "temporal_secondary" # Time matters but semantic also important
@@ -78,18 +111,8 @@ class TemporalIntelligence:
                 self._query_embeddings_cache[query] = await create_embedding(query)
             query_embedding = self._query_embeddings_cache[query]
             
-            # Temporal pattern templates (more flexible than keywords)
-            temporal_patterns = [
-                "show me the most recent information",
-                "what was the latest thing I accessed",
-                "find my recent activity",
-                "chronological order of my browsing",
-                "time-based search results",
-                "newest entries in my history"
-            ]
-            
             max_similarity = 0.0
-            for pattern in temporal_patterns:
+            for pattern in TEMPORAL_PATTERNS:
                 if pattern not in self._query_embeddings_cache:
                     self._query_embeddings_cache[pattern] = await create_embedding(pattern)
                 pattern_embedding = self._query_embeddings_cache[pattern]
@@ -422,6 +445,70 @@ class TemporalIntelligence:
             logger.error(f"Timestamp-based retrieval failed: {e}")
             return []
     
+    def extract_topic_terms(self, topic: str) -> List[str]:
+        """
+        Get the content words of a time-range query topic ("pages about rust" -> ["rust"]).
+        An empty list means the query is purely temporal.
+        """
+        terms = re.findall(r"[a-z0-9][a-z0-9+#.-]*", topic.lower())
+        return [term for term in terms if term not in TOPIC_STOPWORDS and len(term) > 1]
+
+    def rank_within_time_range(
+        self,
+        memory_objects: List[Dict],
+        topic_terms: List[str],
+        chunk_scores: Dict[str, float],
+        limit: int = 5
+    ) -> List[Dict]:
+        """
+        Rank memories that already fall inside an explicit time range.
+        Without topic terms the order stays chronological; otherwise memories are scored
+        by their best in-range chunk similarity plus lexical overlap with title/URL/summary.
+        """
+        try:
+            current_time = time.time()
+            scored_memories = []
+
+            for memory_obj in memory_objects:
+                scored_memory = memory_obj.copy()
+                timestamp = parse_memory_timestamp(memory_obj)
+                if timestamp is not None:
+                    scored_memory["age_hours"] = (current_time - timestamp) / 3600
+
+                if not topic_terms:
+                    scored_memory["temporal_score"] = 1.0
+                    scored_memory["original_semantic_score"] = 0.0
+                    scored_memories.append(scored_memory)
+                    continue
+
+                metadata = memory_obj.get("metadata") or {}
+                searchable_text = " ".join([
+                    memory_obj.get("memory", ""),
+                    str(metadata.get("title", "")),
+                    str(metadata.get("url", "")),
+                    str(metadata.get("tags", ""))
+                ]).lower()
+                lexical_score = sum(1 for term in topic_terms if term in searchable_text) / len(topic_terms)
+                semantic_score = chunk_scores.get(memory_obj.get("id", ""), 0.0)
+                if semantic_score < TIME_RANGE_MIN_SIMILARITY:
+                    semantic_score = 0.0
+
+                final_score = semantic_score + lexical_score * 0.5
+                if final_score <= 0.0:
+                    continue
+
+                scored_memory["temporal_score"] = final_score
+                scored_memory["original_semantic_score"] = semantic_score
+                scored_memories.append(scored_memory)
+
+            # Memories arrive newest first; a stable sort keeps that order for equal scores
+            scored_memories.sort(key=lambda x: x["temporal_score"], reverse=True)
+            return scored_memories[:limit]
+
+        except Exception as e:
+            logger.error(f"Time range ranking failed: {e}")
+            return memory_objects[:limit]
+
     def route_query(
         self, 
         query: str, 
@@ -0,0 +1,208 @@
+"""
+Local date-expression parser for natural-language time ranges.
+Turns "yesterday afternoon" or "pages from last week about Rust" into explicit
+[start, end] timestamps plus the remaining topic query.
+"""
+import re
+import logging
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+@dataclass
+class TimeRange:
+    """Explicit time range extracted from a query."""
+    start_ts: float
+    end_ts: float
+    expression: str   # Matched text, e.g. "yesterday afternoon"
+    topic: str        # Query with the time expression removed
+
+# Parts of day as (start hour, end hour) in local time
+DAY_PARTS = {
+    "morning": (5, 12),
+    "afternoon": (12, 17),
+    "evening": (17, 22),
+    "night": (18, 24),
+}
+
+WEEKDAYS = ["monday", "tuesday", "wednesday", "thursday", "friday", "saturday", "sunday"]
+
+NUMBER_WORDS = {
+    "a": 1, "an": 1, "one": 1, "two": 2, "three": 3, "four": 4, "five": 5,
+    "six": 6, "seven": 7, "eight": 8, "nine": 9, "ten": 10,
+    "couple": 2, "few": 3,
+}
+
+UNIT_SECONDS = {
+    "minute": 60,
+    "hour": 3600,
+    "day": 86400,
+    "week": 7 * 86400,
+    "month": 30 * 86400,
+}
+
+_NUMBER = r"(?P<n>\d+|(?:a\s+)?couple(?:\s+of)?|(?:a\s+)?few|a|an|one|two|three|four|five|six|seven|eight|nine|ten)"
+_UNIT = r"(?P<unit>minute|hour|day|week|month)s?"
+_PART = r"(?P<part>morning|afternoon|evening|night)"
+_WEEKDAY = r"(?P<weekday>monday|tuesday|wednesday|thursday|friday|saturday|sunday)"
+
+# Filler words that only connect the time expression to the rest of the query
+_LEADING_FILLER = r"(?:(?:from|during|in|on|over|within|for|since)\s+)?(?:the\s+)?"
+
+def _start_of_day(moment: datetime) -> datetime:
+    return moment.replace(hour=0, minute=0, second=0, microsecond=0)
+
+def _day_span(day: datetime, part: Optional[str] = None) -> Tuple[datetime, datetime]:
+    start = _start_of_day(day)
+    if part:
+        start_hour, end_hour = DAY_PARTS[part]
+        return start + timedelta(hours=start_hour), start + timedelta(hours=end_hour)
+    return start, start + timedelta(days=1)
+
+def _parse_number(value: str) -> int:
+    if value.isdigit():
+        return int(value)
+    # "a couple of" / "a few" -> "couple" / "few"
+    words = [word for word in value.split() if word not in ("a", "of")] or [value]
+    return NUMBER_WORDS[words[0]]
+
+def _match_relative_window(match: re.Match, now: datetime) -> Tuple[datetime, datetime]:
+    """"last 3 days", "past hour", "last few weeks" -> [now - N units, now]."""
+    number = match.groupdict().get("n")
+    n = _parse_number(number) if number else 1
+    seconds = UNIT_SECONDS[match.group("unit")]
+    return now - timedelta(seconds=n * seconds), now
+
+def _match_ago(match: re.Match, now: datetime) -> Tuple[datetime, datetime]:
+    """"3 days ago" -> that calendar day, "2 hours ago" -> that hour, "2 weeks ago" -> that week."""
+    n = _parse_number(match.group("n"))
+    unit = match.group("unit")
+    moment = now - timedelta(seconds=n * UNIT_SECONDS[unit])
+    if unit == "minute":
+        return moment - timedelta(minutes=5), moment + timedelta(minutes=5)
+    if unit == "hour":
+        start = moment.replace(minute=0, second=0, microsecond=0)
+        return start, start + timedelta(hours=1)
+    if unit == "day":
+        return _day_span(moment)
+    if unit == "week":
+        start = _start_of_day(moment) - timedelta(days=moment.weekday())
+        return start, start + timedelta(days=7)
+    start = _start_of_day(moment).replace(day=1)
+    return start, (start + timedelta(days=32)).replace(day=1)
+
+def _match_day_part(match: re.Match, now: datetime) -> Tuple[datetime, datetime]:
+    """"yesterday afternoon", "this morning", "tonight", "last night"."""
+    day_word = match.group("day")
+    part = match.group("part")
+    day = now - timedelta(days=1) if day_word in ("yesterday", "last") else now
+    return _day_span(day, part)
+
+def _match_tonight(match: re.Match, now: datetime) -> Tuple[datetime, datetime]:
+    return _day_span(now, "night")
+
+def _match_day(match: re.Match, now: datetime) -> Tuple[datetime, datetime]:
+    """"today", "earlier today", "yesterday", "day before yesterday"."""
+    word = match.group(0)
+    if "before yesterday" in word:
+        return _day_span(now - timedelta(days=2))
+    if "yesterday" in word:
+        return _day_span(now - timedelta(days=1))
+    return _start_of_day(now), now
+
+def _match_weekday(match: re.Match, now: datetime) -> Tuple[datetime, datetime]:
+    """"on monday", "last friday" -> most recent past occurrence of that weekday; "since monday" -> until now."""
+    context = match.group("context")
+    target = WEEKDAYS.index(match.group("weekday"))
+    days_back = (now.weekday() - target) % 7
+    if days_back == 0 and context in ("last", "previous"):
+        days_back = 7
+    day = now - timedelta(days=days_back)
+    if context == "since":
+        return _start_of_day(day), now
+    return _day_span(day)
+
+def _match_calendar(match: re.Match, now: datetime) -> Tuple[datetime, datetime]:
+    """"this week", "last week", "this month", "last month", "this year", "last year"."""
+    which = match.group("which")
+    period = match.group("period")
+    today = _start_of_day(now)
+
+    if period == "week":
+        start = today - timedelta(days=now.weekday())
+        if which == "last":
+            return start - timedelta(days=7), start
+        return start, now
+
+    if period == "month":
+        start = today.replace(day=1)
+        if which == "last":
+            previous = (start - timedelta(days=1)).replace(day=1)
+            return previous, start
+        return start, now
+
+    start = today.replace(month=1, day=1)
+    if which == "last":
+        return start.replace(year=start.year - 1), start
+    return start, now
+
+# Ordered most specific first; the first match wins
+_PATTERNS = [
+    (re.compile(rf"\b(?P<day>yesterday|this|last)\s+{_PART}\b"), _match_day_part),
+    (re.compile(r"\btonight\b"), _match_tonight),
+    (re.compile(rf"\b{_NUMBER}\s+{_UNIT}\s+ago\b"), _match_ago),
+    (re.compile(rf"\b(?P<which>this|last|previous)\s+(?P<period>week|month|year)\b"), _match_calendar),
+    (re.compile(rf"\b(?:last|past|previous)\s+{_NUMBER}\s+{_UNIT}\b"), _match_relative_window),
+    # Without a number "last" only opens a window before "hour" ("last minute deals", "last day of school")
+    (re.compile(rf"\b(?:past|previous)\s+{_UNIT}\b"), _match_relative_window),
+    (re.compile(r"\blast\s+(?P<unit>hour)\b"), _match_relative_window),
+    # A bare weekday is only a date with a temporal word before it ("sunday school" is not)
+    (re.compile(rf"\b(?P<context>on|last|this|previous|since)\s+{_WEEKDAY}\b"), _match_weekday),
+    (re.compile(r"\b(?:the\s+)?day\s+before\s+yesterday\b|\byesterday\b|\b(?:earlier\s+)?today\b"), _match_day),
+]
+
+def parse_time_range(query: str, now: Optional[datetime] = None) -> Optional[TimeRange]:
+    """
+    Extract an explicit time range from a natural-language query.
+    Times are interpreted in the machine's local timezone. Returns None when the
+    query has no recognizable date expression (e.g. "last page I visited").
+    """
+    if not query:
+        return None
+
+    if now is None:
+        now = datetime.now().astimezone()
+
+    text = query.lower()
+
+    for pattern, resolver in _PATTERNS:
+        match = pattern.search(text)
+        if not match:
+            continue
+
+        try:
+            start, end = resolver(match, now)
+        except (KeyError, ValueError) as e:
+            logger.debug(f"Ignoring time expression '{match.group(0)}': {e}")
+            continue
+
+        # Never look into the future
+        end = min(end, now)
+        if end <= start:
+            continue
+
+        # Remove the expression (and connecting filler words) to get the topic
+        span_pattern = re.compile(_LEADING_FILLER + re.escape(match.group(0)))
+        topic = span_pattern.sub(" ", text, count=1)
+        topic = re.sub(r"\s+", " ", topic).strip(" ?.!,")
+
+        return TimeRange(
+            start_ts=start.timestamp(),
+            end_ts=end.timestamp(),
+            expression=match.group(0),
+            topic=topic
+        )
+
+    return None
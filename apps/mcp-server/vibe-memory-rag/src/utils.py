@@ -10,6 +10,7 @@ from typing import List, Dict, Any, Optional, Tuple
 from urllib.parse import urlparse
 import hashlib
 import time
+import threading
 from datetime import datetime, timezone
 
 logger = logging.getLogger(__name__)
@@ -19,6 +20,11 @@ openai_client = None
 reranker = None
 text_splitter = None
 
+# One lock per lazy global, so concurrent first uses (a tool and the prewarm) load it once
+_openai_client_lock = threading.Lock()
+_reranker_lock = threading.Lock()
+_text_splitter_lock = threading.Lock()
+
 # Embedding cache for performance optimization
 _embedding_cache: Dict[str, List[float]] = {}
 _cache_stats = {"hits": 0, "misses": 0}
@@ -51,29 +57,35 @@ def get_openai_client():
     """Lazy load OpenAI client."""
     global openai_client
     if openai_client is None:
-        from openai import OpenAI
-        openai_client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+        with _openai_client_lock:
+            if openai_client is None:
+                from openai import OpenAI
+                openai_client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
     return openai_client
 
 def get_reranker():
     """Lazy load sentence transformer reranker."""
     global reranker
     if reranker is None:
-        from sentence_transformers import CrossEncoder
-        reranker = CrossEncoder('cross-encoder/ms-marco-MiniLM-L-6-v2')
+        with _reranker_lock:
+            if reranker is None:
+                from sentence_transformers import CrossEncoder
+                reranker = CrossEncoder('cross-encoder/ms-marco-MiniLM-L-6-v2')
     return reranker
 
 def get_text_splitter():
     """Lazy load LangChain text splitter."""
     global text_splitter
     if text_splitter is None:
-        from langchain.text_splitter import RecursiveCharacterTextSplitter
-        text_splitter = RecursiveCharacterTextSplitter(
-            chunk_size=1000,
-            chunk_overlap=200,
-            length_function=len,
-            separators=["\n\n", "\n", ". ", " ", ""]
-        )
+        with _text_splitter_lock:
+            if text_splitter is None:
+                from langchain.text_splitter import RecursiveCharacterTextSplitter
+                text_splitter = RecursiveCharacterTextSplitter(
+                    chunk_size=1000,
+                    chunk_overlap=200,
+                    length_function=len,
+                    separators=["\n\n", "\n", ". ", " ", ""]
+                )
     return text_splitter
 
 def extract_domain(url: str) -> str:
@@ -365,17 +377,18 @@ def enhance_text_for_embedding(text: str, metadata: Dict[str, Any]) -> str:
     
     return text
 
-async def add_content_chunks_to_chroma(chunks: List[Dict[str, Any]], memory_id: str) -> None:
-    """Add content chunks to ChromaDB with embeddings and temporal metadata."""
-    from chroma_setup import get_or_create_content_collection
-    collection = get_or_create_content_collection()
-    
+async def embed_content_chunks(chunks: List[Dict[str, Any]], memory_id: str) -> Dict[str, Any]:
+    """
+    Embed content chunks and build their vector store rows without writing anything.
+    Chunk ids are derived from the memory id and chunk number, so writing the same batch
+    again replaces the rows instead of duplicating them.
+    """
     current_timestamp = time.time()
     current_datetime = datetime.now(timezone.utc).isoformat()
     
-    # Prepare data for ChromaDB batch insert
+    # Prepare data for the batch insert
     ids = []
-    documents = []
+    texts = []
     embeddings = []
     metadatas = []
     
@@ -390,8 +403,6 @@ async def add_content_chunks_to_chroma(chunks: List[Dict[str, Any]], memory_id:
             # Prepare metadata with temporal information
             metadata = {
                 "memory_id": memory_id,
-                "url": chunk["url"],
-                "title": chunk["title"],
                 "chunk_number": chunk["chunk_number"],
                 "chunk_size": chunk["chunk_size"],
                 "word_count": chunk["word_count"],
@@ -404,12 +415,13 @@ async def add_content_chunks_to_chroma(chunks: List[Dict[str, Any]], memory_id:
                 "total_chunks": chunk["metadata"]["total_chunks"],
                 "content_type": chunk["metadata"]["content_type"],
                 "quality_score": chunk["metadata"]["quality_score"],
-                # Store original content in metadata for retrieval
-                "original_content": chunk["original_content"]
+                # Size of the text kept in the content store (for stats counters)
+                "content_bytes": len(chunk["original_content"].encode("utf-8"))
             }
             
             ids.append(chunk_id)
-            documents.append(chunk["content"])  # Enhanced content for embedding/search
+            # The enhanced content was only needed for the embedding
+            texts.append(chunk["original_content"])
             embeddings.append(embedding)
             metadatas.append(metadata)
             
@@ -417,18 +429,133 @@ async def add_content_chunks_to_chroma(chunks: List[Dict[str, Any]], memory_id:
             logger.error(f"Failed to process chunk {chunk.get('chunk_number', '?')}: {e}")
             continue
     
-    if ids:
-        try:
-            # Batch insert into ChromaDB
-            collection.add(
-                ids=ids,
-                documents=documents,
-                embeddings=embeddings,
-                metadatas=metadatas
-            )
-        except Exception as e:
-            logger.error(f"Failed to add chunks to ChromaDB: {e}")
-            raise
+    return {
+        "ids": ids,
+        "texts": texts,
+        "embeddings": embeddings,
+        "metadatas": metadatas,
+        "url": chunks[0]["url"] if chunks else "",
+        "title": chunks[0]["title"] if chunks else "",
+        "source_id": chunks[0]["source_id"] if chunks else "",
+        "created_timestamp": current_timestamp,
+        "created_datetime": current_datetime
+    }
+
+def _store_chunk_content(batch: Dict[str, Any], memory_id: str, user_id: str) -> None:
+    """Write a batch's page fields and chunk text (and full vectors in reduced mode)."""
+    from vector_codec import is_reduced_mode, get_rescore_store
+    from content_store import get_content_store
+    
+    ids = batch["ids"]
+    if is_reduced_mode():
+        get_rescore_store().put_many(ids, [memory_id] * len(ids), batch["embeddings"])
+    content_store = get_content_store()
+    content_store.put_page(
+        memory_id, user_id, batch["url"], batch["title"], batch["source_id"],
+        batch["created_timestamp"], batch["created_datetime"]
+    )
+    content_store.put_chunks(memory_id, ids, batch["texts"])
+
+def _replace_chunk_counters(
+    memory_id: str, user_id: str, documents: List[str], metadatas: List[Dict[str, Any]]
+) -> None:
+    """Count a memory's chunks; a repeated write replaces its earlier count instead of adding to it."""
+    from memory_aggregates import get_memory_aggregates
+    aggregates = get_memory_aggregates()
+    aggregates.chunks_removed(memory_id)
+    aggregates.chunks_added(user_id, memory_id, documents, metadatas)
+
+async def write_content_chunks(
+    batch: Dict[str, Any],
+    memory_id: str,
+    synopsis: str = "",
+    user_id: str = "browser_user"
+) -> None:
+    """
+    Write a batch from embed_content_chunks: text to the content store, rows to the user's
+    vector store partition, then the page vector. Safe to repeat for the same batch.
+    """
+    from chroma_setup import CONTENT_ROLE
+    
+    ids, embeddings, metadatas = batch["ids"], batch["embeddings"], batch["metadatas"]
+    if not ids:
+        return
+    documents = [""] * len(ids)
+    
+    from vector_codec import to_index_vector
+    index_embeddings = [to_index_vector(embedding) for embedding in embeddings]
+    
+    # Text (and full vectors in reduced mode) first, so every indexed chunk can be
+    # returned and rescored; compression and SQLite commits run on the chunk writer
+    from store_access import write_store, CHUNK_STORE
+    await write_store(CHUNK_STORE, _store_chunk_content, batch, memory_id, user_id)
+    
+    try:
+        # Batch upsert into the vector store, group-committed with concurrent ingestions
+        from group_writer import write_vectors
+        await write_vectors(CONTENT_ROLE, user_id, ids, index_embeddings, documents, metadatas, operation="upsert")
+    except Exception as e:
+        logger.error(f"Failed to add chunks to the vector store: {e}")
+        from content_store import get_content_store
+        await write_store(CHUNK_STORE, get_content_store().delete_memories, [memory_id])
+        raise
+    
+    # Keep stats counters current (never fails the ingest)
+    try:
+        await write_store(CHUNK_STORE, _replace_chunk_counters, memory_id, user_id, documents, metadatas)
+    except Exception as e:
+        logger.error(f"Failed to update chunk counters for {memory_id}: {e}")
+    
+    # Page vector for two-stage retrieval (the flat chunk search still works without it)
+    try:
+        from page_index import index_page
+        page_metadatas = [{**metadata, "url": batch["url"], "title": batch["title"]} for metadata in metadatas]
+        await index_page(memory_id, index_embeddings, page_metadatas, synopsis, user_id)
+    except Exception as e:
+        logger.error(f"Failed to index page vector for {memory_id}: {e}")
+
+async def add_content_chunks_to_chroma(
+    chunks: List[Dict[str, Any]],
+    memory_id: str,
+    synopsis: str = "",
+    user_id: str = "browser_user"
+) -> None:
+    """
+    Add content chunks to the user's vector store partition with embeddings and temporal
+    metadata (plus the page vector). Chunk text, url and title go to the content store
+    once; vector store rows only keep the metadata used for filtering.
+    """
+    batch = await embed_content_chunks(chunks, memory_id)
+    await write_content_chunks(batch, memory_id, synopsis, user_id)
+
+def format_chunk_result(
+    chunk_id: str,
+    document: str,
+    metadata: Dict[str, Any],
+    similarity: float,
+    position: int = 0
+) -> Dict[str, Any]:
+    """Shape a stored chunk as a search result (original content, not the enhanced document)."""
+    return {
+        "id": chunk_id,
+        "url": metadata.get("url", ""),
+        "title": metadata.get("title", ""),
+        "content": metadata.get("original_content", document),
+        "source_id": metadata.get("source_id", ""),
+        "similarity": similarity,
+        "created_timestamp": metadata.get("created_timestamp"),
+        "created_datetime": metadata.get("created_datetime"),
+        "metadata": {
+            "memory_id": metadata.get("memory_id", ""),
+            "chunk_number": metadata.get("chunk_number", position),
+            "chunk_size": metadata.get("chunk_size", len(document)),
+            "word_count": metadata.get("word_count", len(document.split())),
+            "chunk_index": metadata.get("chunk_index", position),
+            "total_chunks": metadata.get("total_chunks", 1),
+            "content_type": metadata.get("content_type", "general"),
+            "quality_score": metadata.get("quality_score", 0.5)
+        }
+    }
 
 def calculate_time_weighted_similarity(similarity: float, created_timestamp: float, decay_factor: float = 0.001) -> float:
     """
@@ -451,18 +578,189 @@ def calculate_time_weighted_similarity(similarity: float, created_timestamp: flo
     
     return similarity * time_weight
 
+def _search_chunks_snapshot(
+    query: str,
+    query_embedding: List[float],
+    source_filter: Optional[str],
+    limit: int,
+    time_filter_days: Optional[int],
+    enable_time_weighting: bool,
+    time_range: Optional[Tuple[float, float]],
+    diversity: str,
+    diversity_stats: Optional[Dict[str, int]],
+    two_stage: Optional[bool],
+    user_id: str
+) -> List[Dict[str, Any]]:
+    """Blocking part of search_content_chunks; runs as one read of the chunk store."""
+    # Get the chunk vector store
+    from chroma_setup import distance_to_similarity
+    from vector_store import get_vector_store
+    from vector_codec import is_reduced_mode, to_index_vector, rescore_chunks, RESCORE_OVERSAMPLE
+    store = get_vector_store(user_id=user_id)
+    space = store.space
+    
+    # Reduced mode searches truncated vectors, then rescores the shortlist exactly
+    rescoring = is_reduced_mode()
+    index_query = to_index_vector(query_embedding)
+    
+    # Prepare where clause for filtering
+    conditions: List[Dict[str, Any]] = []
+    if source_filter:
+        conditions.append({"source_id": source_filter})
+    
+    # Add time-based filtering if specified
+    if time_filter_days:
+        cutoff_timestamp = time.time() - (time_filter_days * 24 * 60 * 60)
+        conditions.append({"created_timestamp": {"$gte": cutoff_timestamp}})
+    
+    if time_range:
+        start_ts, end_ts = time_range
+        conditions.append({"created_timestamp": {"$gte": start_ts}})
+        conditions.append({"created_timestamp": {"$lte": end_ts}})
+    
+    # ChromaDB needs an explicit $and when combining several conditions
+    where_clause: Dict[str, Any]
+    if len(conditions) > 1:
+        where_clause = {"$and": conditions}
+    else:
+        where_clause = conditions[0] if conditions else {}
+    
+    warm_where = where_clause
+    
+    from page_index import TWO_STAGE_RETRIEVAL, select_candidate_pages
+    if TWO_STAGE_RETRIEVAL if two_stage is None else two_stage:
+        # Stage 1: pages matching the same filters; stage 2 below only sees their chunks
+        page_ids = select_candidate_pages(index_query, where_clause, user_id=user_id)
+        if page_ids:
+            conditions.append({"memory_id": {"$in": page_ids}})
+            where_clause = {"$and": conditions} if len(conditions) > 1 else conditions[0]
+        else:
+            logger.info("Page index unavailable, using flat chunk search")
+    
+    # Search the vector store with enhanced embedding
+    search_limit = limit * 2 if enable_time_weighting else limit  # Get more for reranking
+    include = ["documents", "metadatas", "distances"]
+    if diversity != "none":
+        # Oversample so enough distinct chunks remain after duplicates are dropped
+        from diversity import DIVERSITY_OVERSAMPLE
+        search_limit *= DIVERSITY_OVERSAMPLE
+        if diversity == "mmr":
+            include.append("embeddings")
+    
+    shortlist_limit = search_limit
+    if rescoring:
+        search_limit *= RESCORE_OVERSAMPLE
+    
+    results = store.query(
+        query_embeddings=[index_query],
+        n_results=search_limit,
+        where=where_clause if where_clause else None,
+        include=include
+    )
+    
+    # Exact similarities from the full vectors (chunks without one keep the index score)
+    exact_scores = {}
+    if rescoring and results and results["ids"]:
+        exact_scores = rescore_chunks(query_embedding, results["ids"][0])
+    
+    # Transform vector store results to our expected format
+    chunks = []
+    if results and results["documents"] and len(results["documents"]) > 0:
+        documents = results["documents"][0]
+        metadatas = results["metadatas"][0]
+        distances = results["distances"][0]
+        
+        for i, (doc, metadata, distance) in enumerate(zip(documents, metadatas, distances)):
+            chunk_id = results["ids"][0][i] if "ids" in results else f"chunk_{i}"
+            
+            # Convert distance to similarity (the store returns distances, lower is better)
+            if chunk_id in exact_scores:
+                similarity = exact_scores[chunk_id]
+            else:
+                similarity = distance_to_similarity(distance, space)
+            
+            # Apply time weighting if enabled
+            if enable_time_weighting and "created_timestamp" in metadata:
+                try:
+                    created_timestamp = float(metadata["created_timestamp"])
+                    similarity = calculate_time_weighted_similarity(similarity, created_timestamp)
+                except (ValueError, TypeError):
+                    # Fallback if timestamp is invalid
+                    pass
+            
+            chunks.append(format_chunk_result(chunk_id, doc, metadata, similarity, i))
+    
+    # Warm-tier memories only have a page vector; they compete as page placeholders
+    from retention import search_warm_pages, hydrate_warm_results
+    try:
+        warm = search_warm_pages(index_query, warm_where, limit, user_id, include_embeddings=diversity == "mmr")
+    except Exception as e:
+        logger.error(f"Warm tier search failed: {e}")
+        warm = []
+    for candidate in warm:
+        if enable_time_weighting and candidate.get("created_timestamp") is not None:
+            candidate["similarity"] = calculate_time_weighted_similarity(
+                candidate["similarity"], float(candidate["created_timestamp"])
+            )
+    chunks.extend(warm)
+    
+    # Sort by time-weighted similarity and return top results
+    if enable_time_weighting or rescoring or warm:
+        chunks.sort(key=lambda x: x["similarity"], reverse=True)
+    if rescoring:
+        chunks = chunks[:shortlist_limit]
+    
+    # Cold chunk text is only decompressed for warm pages that made the shortlist
+    if warm:
+        chunks = hydrate_warm_results(query, chunks[:search_limit])
+    
+    from content_store import attach_content
+    if diversity != "none":
+        # Duplicate detection compares text, so candidates are read before selection
+        attach_content(chunks)
+        from diversity import diversify_chunks
+        candidate_count = len(chunks)
+        embeddings = None
+        if diversity == "mmr" and results.get("embeddings") is not None:
+            embedding_by_id = dict(zip(results["ids"][0], results["embeddings"][0]))
+            embeddings = [
+                embedding_by_id[chunk["id"]] if chunk["id"] in embedding_by_id else chunk.pop("page_embedding")
+                for chunk in chunks
+            ]
+        chunks, removed = diversify_chunks(chunks, diversity, limit, embeddings)
+        logger.info(f"Diversity ({diversity}) removed {removed} of {candidate_count} candidate chunks")
+        if diversity_stats is not None:
+            diversity_stats["candidates"] = diversity_stats.get("candidates", 0) + candidate_count
+            diversity_stats["removed"] = diversity_stats.get("removed", 0) + removed
+    elif enable_time_weighting:
+        chunks = chunks[:limit]
+    
+    # Text and page fields are only read for the chunks being returned
+    return attach_content(chunks)
+
 async def search_content_chunks(
     query: str,
     source_filter: Optional[str] = None,
     limit: int = 5,
     use_contextual_embeddings: bool = False,
     time_filter_days: Optional[int] = None,
-    enable_time_weighting: bool = True
+    enable_time_weighting: bool = True,
+    time_range: Optional[Tuple[float, float]] = None,
+    diversity: Optional[str] = None,
+    diversity_stats: Optional[Dict[str, int]] = None,
+    two_stage: Optional[bool] = None,
+    user_id: str = "browser_user"
 ) -> List[Dict[str, Any]]:
     """
-    Search content chunks using vector similarity in ChromaDB with temporal awareness.
+    Search the user's content chunks using vector similarity with temporal awareness.
     Enhanced with contextual query embeddings and time-based filtering/weighting.
+    time_range restricts the vector search to chunks created within (start_ts, end_ts).
+    diversity ("simhash" or "mmr") drops near-duplicate candidates; when diversity_stats
+    is given it receives the candidate and removed counts.
+    two_stage (default TWO_STAGE_RETRIEVAL) first selects the top pages from the page
+    index, then searches chunks only within them.
     """
+    diversity = diversity or "none"
     try:
         # Create enhanced query embedding
         query_metadata = {}
@@ -472,82 +770,17 @@ async def search_content_chunks(
         # Always use contextual embeddings for search (helps with domain context)
         query_embedding = await create_embedding(query, query_metadata if source_filter else None)
         
-        # Get ChromaDB collection
-        from chroma_setup import get_or_create_content_collection
-        collection = get_or_create_content_collection()
-        
-        # Prepare where clause for filtering
-        where_clause = {}
-        if source_filter:
-            where_clause["source_id"] = source_filter
-        
-        # Add time-based filtering if specified
-        if time_filter_days:
-            cutoff_timestamp = time.time() - (time_filter_days * 24 * 60 * 60)
-            where_clause["created_timestamp"] = {"$gte": cutoff_timestamp}
+        from page_index import TWO_STAGE_RETRIEVAL, ensure_page_index
+        if TWO_STAGE_RETRIEVAL if two_stage is None else two_stage:
+            ensure_page_index(user_id)
         
-        # Search in ChromaDB with enhanced embedding
-        search_limit = limit * 2 if enable_time_weighting else limit  # Get more for reranking
-        results = collection.query(
-            query_embeddings=[query_embedding],
-            n_results=search_limit,
-            where=where_clause if where_clause else None,
-            include=["documents", "metadatas", "distances"]
+        # Index searches, warm-tier hydration and content reads see one consistent store state
+        from store_access import read_store, CHUNK_STORE
+        results: List[Dict[str, Any]] = await read_store(
+            CHUNK_STORE, _search_chunks_snapshot, query, query_embedding, source_filter, limit,
+            time_filter_days, enable_time_weighting, time_range, diversity, diversity_stats, two_stage, user_id
         )
-        
-        # Transform ChromaDB results to our expected format
-        chunks = []
-        if results and results["documents"] and len(results["documents"]) > 0:
-            documents = results["documents"][0]
-            metadatas = results["metadatas"][0]
-            distances = results["distances"][0]
-            
-            for i, (doc, metadata, distance) in enumerate(zip(documents, metadatas, distances)):
-                # Convert distance to similarity (ChromaDB returns distances, lower is better)
-                similarity = 1.0 - distance
-                
-                # Apply time weighting if enabled
-                if enable_time_weighting and "created_timestamp" in metadata:
-                    try:
-                        created_timestamp = float(metadata["created_timestamp"])
-                        similarity = calculate_time_weighted_similarity(similarity, created_timestamp)
-                    except (ValueError, TypeError):
-                        # Fallback if timestamp is invalid
-                        pass
-                
-                # Extract original content if available
-                original_content = doc
-                if "original_content" in metadata:
-                    original_content = metadata["original_content"]
-                
-                chunk = {
-                    "id": results["ids"][0][i] if "ids" in results else f"chunk_{i}",
-                    "url": metadata.get("url", ""),
-                    "title": metadata.get("title", ""),
-                    "content": original_content,  # Return original content, not enhanced version
-                    "source_id": metadata.get("source_id", ""),
-                    "similarity": similarity,
-                    "created_timestamp": metadata.get("created_timestamp"),
-                    "created_datetime": metadata.get("created_datetime"),
-                    "metadata": {
-                        "memory_id": metadata.get("memory_id", ""),
-                        "chunk_number": metadata.get("chunk_number", i),
-                        "chunk_size": metadata.get("chunk_size", len(doc)),
-                        "word_count": metadata.get("word_count", len(doc.split())),
-                        "chunk_index": metadata.get("chunk_index", i),
-                        "total_chunks": metadata.get("total_chunks", 1),
-                        "content_type": metadata.get("content_type", "general"),
-                        "quality_score": metadata.get("quality_score", 0.5)
-                    }
-                }
-                chunks.append(chunk)
-        
-        # Sort by time-weighted similarity and return top results
-        if enable_time_weighting:
-            chunks.sort(key=lambda x: x["similarity"], reverse=True)
-            chunks = chunks[:limit]
-        
-        return chunks
+        return results
         
     except Exception as e:
         logger.error(f"Content search failed: {e}")
@@ -0,0 +1,155 @@
+"""
+Compact chunk vector storage.
+In "reduced" mode Chroma indexes truncated, renormalized embeddings (text-embedding-3
+vectors keep most of their quality when shortened) and the full vectors live in a SQLite
+side table, as float32 or int8, for exact rescoring of the ANN shortlist.
+"""
+import os
+import math
+import struct
+import logging
+from array import array
+from typing import List, Dict, Any, Optional, Sequence
+
+from local_db import get_local_db, get_local_db_lock
+
+logger = logging.getLogger(__name__)
+
+# "full" stores complete embeddings in Chroma; "reduced" indexes truncated ones
+VECTOR_STORAGE_MODE = os.getenv("VECTOR_STORAGE_MODE", "full").lower()
+
+# Dimensions kept in the Chroma index in reduced mode
+REDUCED_DIMENSIONS = int(os.getenv("REDUCED_DIMENSIONS", "512"))
+
+# Full vectors for rescoring: "float32" (exact) or "int8" (per-vector scale, 4x smaller)
+RESCORE_VECTOR_FORMAT = os.getenv("RESCORE_VECTOR_FORMAT", "float32").lower()
+
+# Shortlist size per requested result that gets rescored with full vectors
+RESCORE_OVERSAMPLE = int(os.getenv("RESCORE_OVERSAMPLE", "3"))
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS chunk_vectors (
+    chunk_id TEXT PRIMARY KEY,
+    memory_id TEXT NOT NULL,
+    format TEXT NOT NULL,
+    dimensions INTEGER NOT NULL,
+    vector BLOB NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_chunk_vectors_memory ON chunk_vectors (memory_id);
+"""
+
+# Global side store instance
+_rescore_store = None
+
+def is_reduced_mode() -> bool:
+    return VECTOR_STORAGE_MODE == "reduced"
+
+def reduce_vector(vector: Sequence[float], dimensions: int = REDUCED_DIMENSIONS) -> List[float]:
+    """Truncate to the leading dimensions and renormalize to unit length."""
+    head = [float(value) for value in vector[:dimensions]]
+    norm = math.sqrt(sum(value * value for value in head))
+    return [value / norm for value in head] if norm else head
+
+def to_index_vector(vector: Sequence[float]) -> List[float]:
+    """Vector as stored in (and queried against) the Chroma index for the current mode."""
+    if is_reduced_mode() and len(vector) > REDUCED_DIMENSIONS:
+        return reduce_vector(vector, REDUCED_DIMENSIONS)
+    return list(vector)
+
+def encode_vector(vector: Sequence[float], vector_format: str = RESCORE_VECTOR_FORMAT) -> bytes:
+    """Serialize a vector as float32, or int8 prefixed with its float32 scale."""
+    if vector_format == "int8":
+        scale = max((abs(value) for value in vector), default=0.0) / 127.0 or 1.0
+        quantized = array("b", (max(-127, min(127, round(value / scale))) for value in vector))
+        return struct.pack("<f", scale) + quantized.tobytes()
+    return array("f", vector).tobytes()
+
+def decode_vector(blob: bytes, vector_format: str) -> List[float]:
+    """Inverse of encode_vector."""
+    if vector_format == "int8":
+        scale = struct.unpack("<f", blob[:4])[0]
+        quantized = array("b")
+        quantized.frombytes(blob[4:])
+        return [value * scale for value in quantized]
+    values = array("f")
+    values.frombytes(blob)
+    return values.tolist()
+
+def dot(left: Sequence[float], right: Sequence[float]) -> float:
+    return sum(a * b for a, b in zip(left, right))
+
+class RescoreVectorStore:
+    """Full-precision chunk vectors keyed by chunk id, for rescoring reduced-index results."""
+
+    def __init__(self) -> None:
+        self._lock = get_local_db_lock()
+        with self._lock:
+            get_local_db().executescript(_SCHEMA)
+
+    def put_many(self, chunk_ids: Sequence[str], memory_ids: Sequence[str], vectors: Sequence[Sequence[float]]) -> None:
+        rows = [
+            (chunk_id, memory_id, RESCORE_VECTOR_FORMAT, len(vector), encode_vector(vector, RESCORE_VECTOR_FORMAT))
+            for chunk_id, memory_id, vector in zip(chunk_ids, memory_ids, vectors)
+        ]
+        with self._lock:
+            db = get_local_db()
+            db.executemany(
+                "INSERT OR REPLACE INTO chunk_vectors (chunk_id, memory_id, format, dimensions, vector) "
+                "VALUES (?, ?, ?, ?, ?)",
+                rows
+            )
+            db.commit()
+
+    def get_many(self, chunk_ids: Sequence[str]) -> Dict[str, List[float]]:
+        if not chunk_ids:
+            return {}
+        placeholders = ",".join("?" * len(chunk_ids))
+        with self._lock:
+            rows = get_local_db().execute(
+                f"SELECT chunk_id, format, vector FROM chunk_vectors WHERE chunk_id IN ({placeholders})",
+                list(chunk_ids)
+            ).fetchall()
+        return {row["chunk_id"]: decode_vector(row["vector"], row["format"]) for row in rows}
+
+    def delete_memory(self, memory_id: str) -> int:
+        with self._lock:
+            db = get_local_db()
+            cursor = db.execute("DELETE FROM chunk_vectors WHERE memory_id = ?", (memory_id,))
+            db.commit()
+            return cursor.rowcount
+
+    def delete_memories(self, memory_ids: Sequence[str]) -> int:
+        deleted = 0
+        with self._lock:
+            db = get_local_db()
+            for start in range(0, len(memory_ids), 500):
+                batch = list(memory_ids[start:start + 500])
+                cursor = db.execute(
+                    f"DELETE FROM chunk_vectors WHERE memory_id IN ({','.join('?' * len(batch))})", batch
+                )
+                deleted += cursor.rowcount
+            db.commit()
+        return deleted
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            row = get_local_db().execute(
+                "SELECT COUNT(*) AS vectors, COALESCE(SUM(LENGTH(vector)), 0) AS bytes FROM chunk_vectors"
+            ).fetchone()
+        return {"vectors": row["vectors"], "bytes": row["bytes"]}
+
+def get_rescore_store() -> RescoreVectorStore:
+    """Get the rescoring vector store (singleton)."""
+    global _rescore_store
+    if _rescore_store is None:
+        _rescore_store = RescoreVectorStore()
+    return _rescore_store
+
+def rescore_chunks(query_vector: Sequence[float], chunk_ids: Sequence[str]) -> Dict[str, float]:
+    """Exact cosine similarity of the query against stored full vectors (ids without one are skipped)."""
+    query_norm = math.sqrt(dot(query_vector, query_vector)) or 1.0
+    scores = {}
+    for chunk_id, vector in get_rescore_store().get_many(chunk_ids).items():
+        vector_norm = math.sqrt(dot(vector, vector)) or 1.0
+        scores[chunk_id] = dot(query_vector, vector) / (query_norm * vector_norm)
+    return scores
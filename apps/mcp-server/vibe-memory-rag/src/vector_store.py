@@ -0,0 +1,885 @@
+"""
+Pluggable vector store backends for chunk and page vectors.
+"chroma" keeps the ChromaDB collections. "flat" keeps unit-length float32 vectors in a
+memory-mapped file searched with one matrix-vector product, with ids, documents and
+metadata in a SQLite side table used for filtering; "hnsw" adds an hnswlib graph over the
+same file for unfiltered searches. Every backend exposes the subset of the Chroma
+collection API the server uses (add/upsert/get/query/delete/count).
+
+Stores are partitioned per user: each user gets their own chunk and page store (the
+"browser_user" partition is the original, pre-partitioning collection; other users'
+chunks saved there earlier are moved out by partition_migration), so searches only
+touch the caller's vectors and clearing a user drops whole stores.
+"""
+import os
+import re
+import json
+import time
+import hashlib
+import threading
+import logging
+from abc import ABC, abstractmethod
+from typing import List, Dict, Any, Optional, Sequence, Set, Tuple
+
+from chroma_setup import (
+    CONTENT_ROLE,
+    PAGE_ROLE,
+    HNSW_M,
+    HNSW_CONSTRUCTION_EF,
+    HNSW_SEARCH_EF,
+    get_or_create_role_collection,
+    get_or_create_partition_collection,
+    get_collection_space,
+    drop_collection,
+)
+from local_db import get_local_db, get_local_db_lock
+
+logger = logging.getLogger(__name__)
+
+# "chroma", "flat" (exact mmap scan) or "hnsw" (flat + hnswlib graph, needs hnswlib)
+VECTOR_STORE_BACKEND = os.getenv("VECTOR_STORE_BACKEND", "chroma").lower()
+
+# Directory of the flat backend's vector files
+VECTOR_STORE_PATH = os.getenv("VECTOR_STORE_PATH", "./data/vector_store")
+
+# Vectors added between saves of the hnswlib graph (unsaved ones are re-added at load)
+HNSW_SAVE_EVERY = int(os.getenv("VECTOR_STORE_HNSW_SAVE_EVERY", "1000"))
+
+# User whose partition is the original collection (chunks saved before partitioning)
+LEGACY_PARTITION_USER = "browser_user"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS vector_stores (
+    store TEXT PRIMARY KEY,
+    dimensions INTEGER NOT NULL,
+    slots INTEGER NOT NULL,
+    graph_slots INTEGER NOT NULL DEFAULT 0,
+    generation INTEGER NOT NULL DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS vector_rows (
+    store TEXT NOT NULL,
+    id TEXT NOT NULL,
+    slot INTEGER NOT NULL,
+    memory_id TEXT,
+    document TEXT,
+    metadata TEXT NOT NULL,
+    PRIMARY KEY (store, id)
+);
+CREATE UNIQUE INDEX IF NOT EXISTS idx_vector_rows_slot ON vector_rows (store, slot);
+CREATE INDEX IF NOT EXISTS idx_vector_rows_memory ON vector_rows (store, memory_id);
+"""
+
+_PARTITION_SCHEMA = """
+CREATE TABLE IF NOT EXISTS vector_partitions (
+    user_id TEXT NOT NULL,
+    role TEXT NOT NULL,
+    backend TEXT NOT NULL,
+    partition TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    PRIMARY KEY (user_id, role, backend)
+);
+"""
+
+_COMPARISONS = {"$eq": "=", "$ne": "!=", "$gt": ">", "$gte": ">=", "$lt": "<", "$lte": "<="}
+_FIELD_NAME = re.compile(r"^[A-Za-z0-9_.-]+$")
+
+# Store instances by (role, user_id)
+_stores: Dict[Tuple[str, str], "VectorStore"] = {}
+_stores_lock = threading.Lock()
+
+# Monotonic time of the last search, so background jobs can yield to interactive queries
+_last_query_at = 0.0
+
+def _mark_query() -> None:
+    global _last_query_at
+    _last_query_at = time.monotonic()
+
+def seconds_since_last_query() -> float:
+    """Seconds since any store last served a query."""
+    return time.monotonic() - _last_query_at
+
+def where_to_sql(where: Dict[str, Any]) -> Tuple[str, List[Any]]:
+    """Translate a Chroma-style metadata filter into a SQL condition on vector_rows."""
+    clauses = []
+    params = []
+    for key, condition in where.items():
+        if key in ("$and", "$or"):
+            parts = [where_to_sql(part) for part in condition]
+            joiner = " AND " if key == "$and" else " OR "
+            clauses.append("(" + joiner.join(sql for sql, _ in parts) + ")")
+            for _, part_params in parts:
+                params.extend(part_params)
+            continue
+
+        if not _FIELD_NAME.match(key):
+            raise ValueError(f"Unsupported metadata field '{key}'")
+        field = "memory_id" if key == "memory_id" else f"json_extract(metadata, '$.\"{key}\"')"
+        if not isinstance(condition, dict):
+            condition = {"$eq": condition}
+        for operator, value in condition.items():
+            if operator in ("$in", "$nin"):
+                values = list(value)
+                if not values:
+                    clauses.append("0" if operator == "$in" else "1")
+                    continue
+                negation = "NOT " if operator == "$nin" else ""
+                clauses.append(f"{field} {negation}IN ({','.join('?' * len(values))})")
+                params.extend(values)
+            elif operator in _COMPARISONS:
+                clauses.append(f"{field} {_COMPARISONS[operator]} ?")
+                params.append(value)
+            else:
+                raise ValueError(f"Unsupported where operator '{operator}'")
+    return " AND ".join(clauses) or "1", params
+
+class VectorStore(ABC):
+    """Interface shared by the vector store backends (Chroma collection semantics)."""
+
+    # compact() takes its own short write per batch and must not run as one store write
+    compacts_in_batches = False
+
+    @property
+    @abstractmethod
+    def name(self) -> str:
+        """Name the store's vectors are kept under."""
+
+    @property
+    def space(self) -> str:
+        """Distance space of the stored vectors."""
+        return "cosine"
+
+    @abstractmethod
+    def add(
+        self,
+        ids: Sequence[str],
+        embeddings: Sequence[Sequence[float]],
+        documents: Optional[Sequence[str]] = None,
+        metadatas: Optional[Sequence[Dict[str, Any]]] = None
+    ) -> None:
+        ...
+
+    @abstractmethod
+    def upsert(
+        self,
+        ids: Sequence[str],
+        embeddings: Sequence[Sequence[float]],
+        documents: Optional[Sequence[str]] = None,
+        metadatas: Optional[Sequence[Dict[str, Any]]] = None
+    ) -> None:
+        ...
+
+    @abstractmethod
+    def get(
+        self,
+        ids: Optional[Sequence[str]] = None,
+        where: Optional[Dict[str, Any]] = None,
+        limit: Optional[int] = None,
+        offset: Optional[int] = None,
+        include: Sequence[str] = ("documents", "metadatas")
+    ) -> Dict[str, Any]:
+        ...
+
+    @abstractmethod
+    def query(
+        self,
+        query_embeddings: Sequence[Sequence[float]],
+        n_results: int = 10,
+        where: Optional[Dict[str, Any]] = None,
+        include: Sequence[str] = ("documents", "metadatas", "distances")
+    ) -> Dict[str, Any]:
+        ...
+
+    @abstractmethod
+    def delete(self, ids: Optional[Sequence[str]] = None, where: Optional[Dict[str, Any]] = None) -> None:
+        ...
+
+    @abstractmethod
+    def count(self) -> int:
+        ...
+
+    @abstractmethod
+    def drop(self) -> None:
+        """Delete every vector of the store at once."""
+
+    def disk_bytes(self) -> int:
+        """Bytes the store occupies on disk (0 when it cannot be attributed)."""
+        return 0
+
+    def retired_count(self) -> Optional[int]:
+        """Deleted or replaced vectors still occupying space (None when the backend can't tell)."""
+        return None
+
+    def compact(self) -> Dict[str, int]:
+        """Reclaim space held by deleted vectors; returns bytes before and after."""
+        size = self.disk_bytes()
+        return {"bytes_before": size, "bytes_after": size}
+
+    def memory_ids(self, where: Optional[Dict[str, Any]] = None) -> List[str]:
+        """Distinct memory ids referenced by the store's records (optionally only matching where)."""
+        memory_ids: Set[str] = set()
+        offset = 0
+        while True:
+            batch = self.get(where=where, include=["metadatas"], limit=1000, offset=offset)
+            if not batch["ids"]:
+                return sorted(memory_ids)
+            memory_ids.update((metadata or {}).get("memory_id", "") for metadata in batch["metadatas"])
+            memory_ids.discard("")
+            offset += len(batch["ids"])
+
+    def stats(self) -> Dict[str, Any]:
+        return {"backend": VECTOR_STORE_BACKEND, "name": self.name, "vectors": self.count()}
+
+    def flush(self) -> None:
+        """Persist in-memory state (no-op for backends that write through)."""
+
+class ChromaVectorStore(VectorStore):
+    """
+    The ChromaDB collection serving a role for one partition. The legacy partition follows
+    collection migrations; other partitions are collections named after the role's default.
+    """
+
+    compacts_in_batches = True
+
+    def __init__(self, role: str, partition: str = "") -> None:
+        self.role = role
+        self.partition = partition
+
+    @property
+    def collection(self) -> Any:
+        if self.partition:
+            return get_or_create_partition_collection(self.role, self.partition)
+        return get_or_create_role_collection(self.role)
+
+    @property
+    def name(self) -> str:
+        return str(self.collection.name)
+
+    @property
+    def space(self) -> str:
+        return get_collection_space(self.collection)
+
+    def add(
+        self,
+        ids: Sequence[str],
+        embeddings: Sequence[Sequence[float]],
+        documents: Optional[Sequence[str]] = None,
+        metadatas: Optional[Sequence[Dict[str, Any]]] = None
+    ) -> None:
+        self.collection.add(ids=ids, embeddings=embeddings, documents=documents, metadatas=metadatas)
+
+    def upsert(
+        self,
+        ids: Sequence[str],
+        embeddings: Sequence[Sequence[float]],
+        documents: Optional[Sequence[str]] = None,
+        metadatas: Optional[Sequence[Dict[str, Any]]] = None
+    ) -> None:
+        self.collection.upsert(ids=ids, embeddings=embeddings, documents=documents, metadatas=metadatas)
+
+    def get(
+        self,
+        ids: Optional[Sequence[str]] = None,
+        where: Optional[Dict[str, Any]] = None,
+        limit: Optional[int] = None,
+        offset: Optional[int] = None,
+        include: Sequence[str] = ("documents", "metadatas")
+    ) -> Dict[str, Any]:
+        result: Dict[str, Any] = self.collection.get(
+            ids=ids, where=where, limit=limit, offset=offset, include=list(include)
+        )
+        return result
+
+    def query(
+        self,
+        query_embeddings: Sequence[Sequence[float]],
+        n_results: int = 10,
+        where: Optional[Dict[str, Any]] = None,
+        include: Sequence[str] = ("documents", "metadatas", "distances")
+    ) -> Dict[str, Any]:
+        _mark_query()
+        result: Dict[str, Any] = self.collection.query(
+            query_embeddings=query_embeddings,
+            n_results=n_results,
+            where=where,
+            include=list(include)
+        )
+        return result
+
+    def delete(self, ids: Optional[Sequence[str]] = None, where: Optional[Dict[str, Any]] = None) -> None:
+        self.collection.delete(ids=ids, where=where)
+
+    def count(self) -> int:
+        return int(self.collection.count())
+
+    def drop(self) -> None:
+        drop_collection(self.collection.name)
+
+    def disk_bytes(self) -> int:
+        # Chroma shares one directory between collections; report the whole store
+        db_path = os.getenv("CHROMA_DB_PATH", "./data/chroma_db")
+        size = 0
+        for root, _, files in os.walk(db_path):
+            size += sum(os.path.getsize(os.path.join(root, name)) for name in files)
+        return size
+
+    def compact(self) -> Dict[str, int]:
+        """
+        Chroma keeps deleted elements in its HNSW files, so the legacy collection is rebuilt
+        by migrating it into a fresh collection. Other partitions are left as they are.
+        Call it from a worker thread, not as a store write: the migration writes per batch.
+        """
+        bytes_before = self.disk_bytes()
+        if not self.partition:
+            from collection_migration import migrate_collection
+            migrate_collection(self.role, self.space)
+        return {"bytes_before": bytes_before, "bytes_after": self.disk_bytes()}
+
+class FlatVectorStore(VectorStore):
+    """
+    Unit-length float32 vectors in an append-only memory-mapped file, one slot per write.
+    Upserts append a new slot and retire the old one; retired slots are skipped by search.
+    """
+
+    name: str = ""
+    space = "cosine"
+
+    def __init__(self, name: str, path: str = VECTOR_STORE_PATH, use_hnsw: bool = False) -> None:
+        self.name = name
+        self.metadata = {"hnsw:space": self.space}
+        self._use_hnsw = use_hnsw
+        self._path = path
+        self._graph_path = os.path.join(path, f"{name}.hnsw")
+        self._lock = threading.RLock()
+        self._matrix: Optional[Any] = None
+        self._live: Optional[Any] = None
+        self._graph: Optional[Any] = None
+        self._unsaved = 0
+        os.makedirs(path, exist_ok=True)
+
+        with get_local_db_lock():
+            db = get_local_db()
+            db.executescript(_SCHEMA)
+            columns = {column["name"] for column in db.execute("PRAGMA table_info(vector_stores)")}
+            if "generation" not in columns:
+                db.execute("ALTER TABLE vector_stores ADD COLUMN generation INTEGER NOT NULL DEFAULT 0")
+                db.commit()
+            row = db.execute(
+                "SELECT dimensions, slots, graph_slots, generation FROM vector_stores WHERE store = ?", (name,)
+            ).fetchone()
+        self._dimensions = row["dimensions"] if row else 0
+        self._slots = row["slots"] if row else 0
+        self._graph_slots = row["graph_slots"] if row else 0
+        self._generation = row["generation"] if row else 0
+
+    def _file_path(self, generation: int) -> str:
+        """Vector file of a compaction generation."""
+        suffix = f".{generation}" if generation else ""
+        return os.path.join(self._path, f"{self.name}{suffix}.f32")
+
+    @property
+    def _vector_path(self) -> str:
+        return self._file_path(self._generation)
+
+    def _prepare(self, embeddings: Sequence[Sequence[float]]) -> Any:
+        """Validate dimensions and normalize rows to unit length."""
+        import numpy as np
+        vectors = np.asarray(embeddings, dtype=np.float32)
+        if vectors.ndim != 2:
+            raise ValueError("Expected a list of embeddings")
+        if self._dimensions and vectors.shape[1] != self._dimensions:
+            raise ValueError(f"Store {self.name} holds {self._dimensions}-d vectors, got {vectors.shape[1]}-d")
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        return vectors / np.where(norms == 0, 1.0, norms)
+
+    def _get_matrix(self) -> Any:
+        if self._matrix is None and self._slots:
+            import numpy as np
+            self._matrix = np.memmap(self._vector_path, dtype=np.float32, mode="r", shape=(self._slots, self._dimensions))
+        return self._matrix
+
+    def _live_mask(self) -> Any:
+        """Boolean mask of slots still referenced by a row."""
+        if self._live is None:
+            import numpy as np
+            with get_local_db_lock():
+                rows = get_local_db().execute("SELECT slot FROM vector_rows WHERE store = ?", (self.name,)).fetchall()
+            live = np.zeros(self._slots, dtype=bool)
+            live[[row["slot"] for row in rows]] = True
+            self._live = live
+        return self._live
+
+    def _append(self, vectors: Any) -> List[int]:
+        """Write vectors after the last slot; the slot counter is committed with the rows."""
+        if not self._dimensions:
+            self._dimensions = vectors.shape[1]
+        start = self._slots
+        mode = "r+b" if os.path.exists(self._vector_path) else "w+b"
+        with open(self._vector_path, mode) as handle:
+            handle.seek(start * self._dimensions * 4)
+            handle.write(vectors.tobytes())
+        return list(range(start, start + len(vectors)))
+
+    def _slots_where(self, ids: Optional[Sequence[str]] = None, where: Optional[Dict[str, Any]] = None) -> List[int]:
+        sql = "SELECT slot FROM vector_rows WHERE store = ?"
+        params = [self.name]
+        if ids is not None:
+            sql += f" AND id IN ({','.join('?' * len(ids))})" if ids else " AND 0"
+            params.extend(ids)
+        if where:
+            condition, condition_params = where_to_sql(where)
+            sql += f" AND {condition}"
+            params.extend(condition_params)
+        with get_local_db_lock():
+            return [row["slot"] for row in get_local_db().execute(sql, params).fetchall()]
+
+    def _rows(self, slots: Sequence[int]) -> Dict[int, Any]:
+        if not slots:
+            return {}
+        with get_local_db_lock():
+            rows = get_local_db().execute(
+                f"SELECT id, slot, document, metadata FROM vector_rows WHERE store = ? "
+                f"AND slot IN ({','.join('?' * len(slots))})",
+                [self.name, *slots]
+            ).fetchall()
+        return {row["slot"]: row for row in rows}
+
+    def add(
+        self,
+        ids: Sequence[str],
+        embeddings: Sequence[Sequence[float]],
+        documents: Optional[Sequence[str]] = None,
+        metadatas: Optional[Sequence[Dict[str, Any]]] = None
+    ) -> None:
+        self.upsert(ids, embeddings, documents, metadatas)
+
+    def upsert(
+        self,
+        ids: Sequence[str],
+        embeddings: Sequence[Sequence[float]],
+        documents: Optional[Sequence[str]] = None,
+        metadatas: Optional[Sequence[Dict[str, Any]]] = None
+    ) -> None:
+        if not ids:
+            return
+        metadatas = metadatas if metadatas is not None else [{}] * len(ids)
+
+        # Last occurrence wins for ids repeated within one call
+        positions = list({chunk_id: position for position, chunk_id in enumerate(ids)}.values())
+        with self._lock:
+            import numpy as np
+            vectors = self._prepare([embeddings[position] for position in positions])
+            live = self._live_mask()
+            retired = self._slots_where(ids=[ids[position] for position in positions])
+            slots = self._append(vectors)
+            rows = [
+                (self.name, ids[position], slot, (metadatas[position] or {}).get("memory_id"),
+                 documents[position] if documents is not None else None,
+                 json.dumps(metadatas[position] or {}, ensure_ascii=False))
+                for position, slot in zip(positions, slots)
+            ]
+            with get_local_db_lock():
+                db = get_local_db()
+                db.executemany(
+                    "INSERT OR REPLACE INTO vector_rows (store, id, slot, memory_id, document, metadata) "
+                    "VALUES (?, ?, ?, ?, ?, ?)",
+                    rows
+                )
+                db.execute(
+                    "INSERT INTO vector_stores (store, dimensions, slots) VALUES (?, ?, ?) "
+                    "ON CONFLICT(store) DO UPDATE SET dimensions = excluded.dimensions, slots = excluded.slots",
+                    (self.name, self._dimensions, self._slots + len(slots))
+                )
+                db.commit()
+
+            self._slots += len(slots)
+            self._matrix = None
+            self._live = np.concatenate([live, np.ones(len(slots), dtype=bool)])
+            self._live[retired] = False
+
+            if self._graph is not None:
+                self._graph_add(self._graph, vectors, slots)
+                self._graph_retire(self._graph, retired)
+            elif self._use_hnsw:
+                # Loading catches the graph up with every live slot, these included
+                self._get_graph()
+
+    def get(
+        self,
+        ids: Optional[Sequence[str]] = None,
+        where: Optional[Dict[str, Any]] = None,
+        limit: Optional[int] = None,
+        offset: Optional[int] = None,
+        include: Sequence[str] = ("documents", "metadatas")
+    ) -> Dict[str, Any]:
+        sql = "SELECT id, slot, document, metadata FROM vector_rows WHERE store = ?"
+        params: List[Any] = [self.name]
+        if ids is not None:
+            sql += f" AND id IN ({','.join('?' * len(ids))})" if ids else " AND 0"
+            params.extend(ids)
+        if where:
+            condition, condition_params = where_to_sql(where)
+            sql += f" AND {condition}"
+            params.extend(condition_params)
+        sql += " ORDER BY slot"
+        if limit is not None:
+            sql += " LIMIT ? OFFSET ?"
+            params.extend([limit, offset or 0])
+
+        with self._lock:
+            with get_local_db_lock():
+                rows = get_local_db().execute(sql, params).fetchall()
+            result = {"ids": [row["id"] for row in rows]}
+            if "documents" in include:
+                result["documents"] = [row["document"] for row in rows]
+            if "metadatas" in include:
+                result["metadatas"] = [json.loads(row["metadata"]) for row in rows]
+            if "embeddings" in include:
+                matrix = self._get_matrix()
+                result["embeddings"] = matrix[[row["slot"] for row in rows]] if rows else []
+        return result
+
+    def _search(self, query: Any, k: int, where: Optional[Dict[str, Any]] = None) -> Tuple[List[int], List[float]]:
+        """Top-k (slots, scores) for one unit-length query vector."""
+        import numpy as np
+        matrix = self._get_matrix()
+        if matrix is None or k <= 0:
+            return [], []
+
+        if where:
+            candidates = np.asarray(self._slots_where(where=where), dtype=np.int64)
+            if not len(candidates):
+                return [], []
+            scores = matrix[candidates] @ query
+        else:
+            live = self._live_mask()
+            live_count = int(live.sum())
+            k = min(k, live_count)
+            graph = self._get_graph()
+            if graph is not None and k:
+                try:
+                    labels, distances = graph.knn_query(query, k=k)
+                    return labels[0].tolist(), (1.0 - distances[0]).tolist()
+                except RuntimeError as e:
+                    logger.warning(f"HNSW query failed on {self.name}, using exact scan: {e}")
+            candidates = None
+            scores = matrix @ query
+            scores[~live] = -np.inf
+
+        k = min(k, len(scores))
+        if not k:
+            return [], []
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        slots = candidates[top] if candidates is not None else top
+        return slots.tolist(), scores[top].tolist()
+
+    def query(
+        self,
+        query_embeddings: Sequence[Sequence[float]],
+        n_results: int = 10,
+        where: Optional[Dict[str, Any]] = None,
+        include: Sequence[str] = ("documents", "metadatas", "distances")
+    ) -> Dict[str, Any]:
+        _mark_query()
+        result: Dict[str, List[Any]] = {"ids": [], "documents": [], "metadatas": [], "distances": [], "embeddings": []}
+        with self._lock:
+            if not self._slots:
+                return result
+            queries = self._prepare(query_embeddings)
+            for query in queries:
+                slots, scores = self._search(query, n_results, where)
+                rows = self._rows(slots)
+                hits = [(slot, score) for slot, score in zip(slots, scores) if slot in rows]
+                result["ids"].append([rows[slot]["id"] for slot, _ in hits])
+                result["distances"].append([1.0 - score for _, score in hits])
+                if "documents" in include:
+                    result["documents"].append([rows[slot]["document"] for slot, _ in hits])
+                if "metadatas" in include:
+                    result["metadatas"].append([json.loads(rows[slot]["metadata"]) for slot, _ in hits])
+                if "embeddings" in include:
+                    result["embeddings"].append(self._get_matrix()[[slot for slot, _ in hits]])
+        return result
+
+    def delete(self, ids: Optional[Sequence[str]] = None, where: Optional[Dict[str, Any]] = None) -> None:
+        if ids is None and where is None:
+            raise ValueError("delete needs ids or a where filter")
+        with self._lock:
+            slots = self._slots_where(ids=ids, where=where)
+            if not slots:
+                return
+            with get_local_db_lock():
+                db = get_local_db()
+                for start in range(0, len(slots), 500):
+                    batch = slots[start:start + 500]
+                    db.execute(
+                        f"DELETE FROM vector_rows WHERE store = ? AND slot IN ({','.join('?' * len(batch))})",
+                        [self.name, *batch]
+                    )
+                db.commit()
+            self._live_mask()[slots] = False
+            if self._graph is not None:
+                self._graph_retire(self._graph, slots)
+
+    def count(self) -> int:
+        with get_local_db_lock():
+            row = get_local_db().execute(
+                "SELECT COUNT(*) AS count FROM vector_rows WHERE store = ?", (self.name,)
+            ).fetchone()
+        return int(row["count"])
+
+    def memory_ids(self, where: Optional[Dict[str, Any]] = None) -> List[str]:
+        sql = "SELECT DISTINCT memory_id FROM vector_rows WHERE store = ? AND memory_id IS NOT NULL"
+        params = [self.name]
+        if where:
+            condition, condition_params = where_to_sql(where)
+            sql += f" AND {condition}"
+            params.extend(condition_params)
+        with get_local_db_lock():
+            rows = get_local_db().execute(sql, params).fetchall()
+        return [row["memory_id"] for row in rows]
+
+    def disk_bytes(self) -> int:
+        size = 0
+        for path in (self._vector_path, self._graph_path):
+            if os.path.exists(path):
+                size += os.path.getsize(path)
+        return size
+
+    def retired_count(self) -> Optional[int]:
+        return self._slots - self.count()
+
+    def compact(self) -> Dict[str, int]:
+        """
+        Rewrite the vectors of live slots into a new generation file (renumbering slots) and
+        rebuild the graph. The switch is one SQLite commit, so a crash leaves the old file in use.
+        """
+        import numpy as np
+        with self._lock:
+            bytes_before = self.disk_bytes()
+            live = self._live_mask()
+            keep = np.flatnonzero(live)
+            if len(keep) == self._slots:
+                return {"bytes_before": bytes_before, "bytes_after": bytes_before}
+
+            matrix = self._get_matrix()
+            old_path = self._vector_path
+            generation = self._generation + 1
+            new_path = self._file_path(generation)
+            with open(new_path, "wb") as handle:
+                for start in range(0, len(keep), 10000):
+                    handle.write(np.ascontiguousarray(matrix[keep[start:start + 10000]]).tobytes())
+
+            # Renumber through negative slots so the unique (store, slot) index never collides
+            renumber = [(-(new_slot + 1), self.name, int(old_slot)) for new_slot, old_slot in enumerate(keep)]
+            with get_local_db_lock():
+                db = get_local_db()
+                db.executemany("UPDATE vector_rows SET slot = ? WHERE store = ? AND slot = ?", renumber)
+                db.execute("UPDATE vector_rows SET slot = -slot - 1 WHERE store = ? AND slot < 0", (self.name,))
+                db.execute(
+                    "UPDATE vector_stores SET slots = ?, graph_slots = 0, generation = ? WHERE store = ?",
+                    (len(keep), generation, self.name)
+                )
+                db.commit()
+
+            self._matrix = None
+            self._live = None
+            self._graph = None
+            self._unsaved = 0
+            self._slots = len(keep)
+            self._graph_slots = 0
+            self._generation = generation
+            for path in (old_path, self._graph_path):
+                if os.path.exists(path):
+                    os.remove(path)
+            if self._use_hnsw and self._slots:
+                self._save_graph(self._get_graph())
+            return {"bytes_before": bytes_before, "bytes_after": self.disk_bytes()}
+
+    def drop(self) -> None:
+        with self._lock:
+            with get_local_db_lock():
+                db = get_local_db()
+                db.execute("DELETE FROM vector_rows WHERE store = ?", (self.name,))
+                db.execute("DELETE FROM vector_stores WHERE store = ?", (self.name,))
+                db.commit()
+            self._matrix = None
+            self._live = None
+            self._graph = None
+            self._unsaved = 0
+            for path in (self._vector_path, self._graph_path):
+                if os.path.exists(path):
+                    os.remove(path)
+            self._dimensions = self._slots = self._graph_slots = self._generation = 0
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "backend": "hnsw" if self._use_hnsw else "flat",
+            "name": self.name,
+            "vectors": self.count(),
+            "slots": self._slots,
+            "dimensions": self._dimensions,
+            "live_ratio": round(self.count() / self._slots, 3) if self._slots else 1.0,
+            "file_bytes": self.disk_bytes(),
+            "graph_loaded": self._graph is not None
+        }
+
+    def _get_graph(self) -> Any:
+        """hnswlib graph over live slots, loaded (and caught up) on first use."""
+        if not self._use_hnsw or not self._slots:
+            return None
+        if self._graph is None:
+            self._graph = self._load_graph()
+        return self._graph
+
+    def _load_graph(self) -> Any:
+        import hnswlib
+        import numpy as np
+        graph = hnswlib.Index(space="ip", dim=self._dimensions)
+        saved_slots = 0
+        if self._graph_slots and os.path.exists(self._graph_path):
+            try:
+                graph.load_index(self._graph_path, max_elements=max(1024, self._slots * 2))
+                saved_slots = self._graph_slots
+            except Exception as e:
+                logger.warning(f"Could not load HNSW graph for {self.name}, rebuilding: {e}")
+                graph = hnswlib.Index(space="ip", dim=self._dimensions)
+        if not saved_slots:
+            graph.init_index(max_elements=max(1024, self._slots * 2), ef_construction=HNSW_CONSTRUCTION_EF, M=HNSW_M)
+        graph.set_ef(HNSW_SEARCH_EF)
+
+        # Catch up with slots written after the last save and with retired slots
+        live = self._live_mask()
+        pending = np.flatnonzero(live[saved_slots:]) + saved_slots
+        if len(pending):
+            self._graph_add(graph, self._get_matrix()[pending], pending.tolist())
+        self._graph_retire(graph, np.flatnonzero(~live[:saved_slots]).tolist())
+        logger.info(f"HNSW graph for {self.name} ready ({graph.get_current_count()} elements, {len(pending)} added)")
+        return graph
+
+    def _graph_add(self, graph: Any, vectors: Any, slots: List[int]) -> None:
+        needed = graph.get_current_count() + len(slots)
+        if needed > graph.get_max_elements():
+            graph.resize_index(max(needed, graph.get_max_elements() * 2))
+        graph.add_items(vectors, slots)
+        self._unsaved += len(slots)
+        if self._unsaved >= HNSW_SAVE_EVERY:
+            self._save_graph(graph)
+
+    def _graph_retire(self, graph: Any, slots: List[int]) -> None:
+        for slot in slots:
+            try:
+                graph.mark_deleted(int(slot))
+            except RuntimeError:
+                pass  # Never added, or already deleted
+
+    def _save_graph(self, graph: Any) -> None:
+        graph.save_index(self._graph_path)
+        with get_local_db_lock():
+            db = get_local_db()
+            db.execute("UPDATE vector_stores SET graph_slots = ? WHERE store = ?", (self._slots, self.name))
+            db.commit()
+        self._graph_slots = self._slots
+        self._unsaved = 0
+
+    def flush(self) -> None:
+        with self._lock:
+            if self._graph is not None and self._unsaved:
+                self._save_graph(self._graph)
+
+def partition_suffix(user_id: str) -> str:
+    """Store name suffix of a user's partition ("" for the legacy partition)."""
+    if user_id == LEGACY_PARTITION_USER:
+        return ""
+    slug = re.sub(r"[^A-Za-z0-9_-]+", "-", user_id).strip("-_")[:40]
+    digest = hashlib.sha1(user_id.encode("utf-8")).hexdigest()[:8]
+    return f"__u_{slug}_{digest}" if slug else f"__u_{digest}"
+
+def _register_partition(user_id: str, role: str, partition: str) -> None:
+    with get_local_db_lock():
+        db = get_local_db()
+        db.executescript(_PARTITION_SCHEMA)
+        db.execute(
+            "INSERT OR IGNORE INTO vector_partitions (user_id, role, backend, partition, created_at) "
+            "VALUES (?, ?, ?, ?, ?)",
+            (user_id, role, VECTOR_STORE_BACKEND, partition, time.time())
+        )
+        db.commit()
+
+def list_partition_users(role: str = CONTENT_ROLE) -> List[str]:
+    """Users with a partition of a role for the configured backend (legacy partition first)."""
+    with get_local_db_lock():
+        db = get_local_db()
+        db.executescript(_PARTITION_SCHEMA)
+        rows = db.execute(
+            "SELECT user_id FROM vector_partitions WHERE role = ? AND backend = ? ORDER BY created_at",
+            (role, VECTOR_STORE_BACKEND)
+        ).fetchall()
+    return [LEGACY_PARTITION_USER] + [row["user_id"] for row in rows if row["user_id"] != LEGACY_PARTITION_USER]
+
+def _create_store(role: str, user_id: str) -> VectorStore:
+    partition = partition_suffix(user_id)
+    if partition:
+        _register_partition(user_id, role, partition)
+    if VECTOR_STORE_BACKEND in ("flat", "hnsw"):
+        use_hnsw = VECTOR_STORE_BACKEND == "hnsw"
+        if use_hnsw:
+            try:
+                import hnswlib  # noqa: F401
+            except ImportError:
+                logger.warning("hnswlib not installed, using the exact flat index")
+                use_hnsw = False
+        return FlatVectorStore(f"{role}{partition}", path=VECTOR_STORE_PATH, use_hnsw=use_hnsw)
+    if VECTOR_STORE_BACKEND != "chroma":
+        logger.warning(f"Unknown VECTOR_STORE_BACKEND '{VECTOR_STORE_BACKEND}', using chroma")
+    return ChromaVectorStore(role, partition)
+
+def get_vector_store(role: str = CONTENT_ROLE, user_id: str = LEGACY_PARTITION_USER) -> VectorStore:
+    """Get a user's vector store partition for a role ("chunks" or "pages")."""
+    key = (role, user_id)
+    store = _stores.get(key)
+    if store is None:
+        with _stores_lock:
+            store = _stores.get(key)
+            if store is None:
+                store = _create_store(role, user_id)
+                _stores[key] = store
+    return store
+
+def drop_partition(user_id: str) -> Dict[str, Any]:
+    """
+    Drop a user's chunk and page stores in one operation each (no per-vector deletes).
+    Returns the dropped vector counts and the memory ids that had chunks.
+    """
+    vectors = {}
+    memory_ids = []
+    for role in (CONTENT_ROLE, PAGE_ROLE):
+        store = get_vector_store(role, user_id)
+        vectors[role] = store.count()
+        if role == CONTENT_ROLE:
+            memory_ids = store.memory_ids()
+        store.drop()
+        with _stores_lock:
+            _stores.pop((role, user_id), None)
+
+    with get_local_db_lock():
+        db = get_local_db()
+        db.executescript(_PARTITION_SCHEMA)
+        db.execute(
+            "DELETE FROM vector_partitions WHERE user_id = ? AND backend = ?", (user_id, VECTOR_STORE_BACKEND)
+        )
+        db.commit()
+    logger.info(f"Dropped vector partition of {user_id}: {vectors}")
+    return {"vectors": vectors, "memory_ids": memory_ids}
+
+def flush_vector_stores() -> None:
+    """Persist in-memory index state (called on shutdown)."""
+    for store in list(_stores.values()):
+        try:
+            store.flush()
+        except Exception as e:
+            logger.warning(f"Failed to flush vector store {store.name}: {e}")
+
+def reset_vector_stores() -> None:
+    """Drop cached store instances."""
+    flush_vector_stores()
+    _stores.clear()
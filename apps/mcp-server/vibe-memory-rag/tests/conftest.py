@@ -0,0 +1,31 @@
+"""
+Shared fixtures. Modules under src/ are imported flat, the way main.py imports them.
+"""
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+@pytest.fixture
+def local_db(tmp_path, monkeypatch):
+    """A fresh local SQLite database per test, with the singletons built on it reset."""
+    import local_db as local_db_module
+
+    monkeypatch.setenv("VIBE_INDEX_DB_PATH", str(tmp_path / "vibe_index.db"))
+    local_db_module.reset_local_db()
+    for module, attribute in (
+        ("memory_aggregates", "_memory_aggregates"),
+        ("memory_index", "_recency_index"),
+        ("memory_snapshot", "_memory_snapshot"),
+        ("memory_ids", "_memory_id_map"),
+        ("ingestion_journal", "_ingestion_journal"),
+        ("content_store", "_content_store"),
+        ("vector_codec", "_rescore_store"),
+        ("retention", "_cold_store"),
+    ):
+        if module in sys.modules and hasattr(sys.modules[module], attribute):
+            monkeypatch.setattr(sys.modules[module], attribute, None)
+    yield local_db_module.get_local_db()
+    local_db_module.reset_local_db()
@@ -0,0 +1,146 @@
+import asyncio
+
+import pytest
+
+import vector_store
+from bulk_delete import delete_chunk_content, parse_time
+from chroma_setup import CONTENT_ROLE, PAGE_ROLE
+from memory_aggregates import get_memory_aggregates
+
+USER = "alice"
+CREATED = 1_760_000_000.0
+
+@pytest.fixture
+def stores(local_db, tmp_path, monkeypatch):
+    """Flat chunk and page stores for USER under tmp_path."""
+    created = {}
+    for role in (CONTENT_ROLE, PAGE_ROLE):
+        created[role] = vector_store.FlatVectorStore(f"{role}_test", path=str(tmp_path / "vectors"))
+        monkeypatch.setitem(vector_store._stores, (role, USER), created[role])
+    return created
+
+def _save_chunks(stores, memory_id, chunk_count, source_id="docs.rust-lang.org"):
+    ids = [f"{memory_id}_chunk_{index}" for index in range(chunk_count)]
+    documents = [f"chunk {index} of {memory_id}" for index in range(chunk_count)]
+    metadatas = [
+        {"memory_id": memory_id, "source_id": source_id, "chunk_index": index, "created_timestamp": CREATED}
+        for index in range(chunk_count)
+    ]
+    embeddings = [[1.0, float(index), 0.5] for index in range(chunk_count)]
+    stores[CONTENT_ROLE].add(ids, embeddings, documents, metadatas)
+    stores[PAGE_ROLE].add([memory_id], [[1.0, 0.0, 0.0]], [memory_id], [{"memory_id": memory_id}])
+    get_memory_aggregates().chunks_added(USER, memory_id, documents, metadatas)
+
+def test_parse_time():
+    assert parse_time("1760000000") == 1760000000.0
+    assert parse_time("2025-10-09T08:53:20Z") == 1760000000.0
+    assert parse_time(" ") is None
+    with pytest.raises(ValueError):
+        parse_time("last tuesday")
+
+def test_delete_chunk_content_removes_only_the_given_memories(stores):
+    _save_chunks(stores, "m1", 3)
+    _save_chunks(stores, "m2", 2)
+    _save_chunks(stores, "m3", 1)
+
+    assert delete_chunk_content(USER, ["m1", "m3", "unknown"]) == 4
+
+    assert stores[CONTENT_ROLE].memory_ids() == ["m2"]
+    assert stores[PAGE_ROLE].get()["ids"] == ["m2"]
+    assert get_memory_aggregates().chunk_counts(["m1", "m2", "m3"]) == {"m2": 2}
+    assert delete_chunk_content(USER, []) == 0
+
+class FakeMem0:
+    """The parts of a Mem0 client bulk deletion touches."""
+
+    def __init__(self, records):
+        self.records = {record["id"]: record for record in records}
+
+    def get_all(self, user_id, limit=None):
+        return {"results": [dict(record) for record in self.records.values()]}
+
+    def get(self, memory_id):
+        return self.records.get(memory_id)
+
+    def delete(self, memory_id):
+        del self.records[memory_id]
+
+def _record(memory_id, url, domain):
+    return {
+        "id": memory_id,
+        "memory": f"Visited {url}",
+        "created_at": "2025-10-09T08:53:20+00:00",
+        "metadata": {"url": url, "domain": domain, "creation_timestamp": CREATED},
+    }
+
+@pytest.fixture
+def mem0_client(stores, monkeypatch):
+    pytest.importorskip("mem0")
+    import mem0_utils
+
+    client = FakeMem0([
+        _record("m1", "https://docs.rust-lang.org/book", "docs.rust-lang.org"),
+        _record("m2", "https://blog.rust-lang.org/news", "blog.rust-lang.org"),
+        _record("m3", "https://example.com/", "example.com"),
+    ])
+    monkeypatch.setattr(mem0_utils, "get_mem0_client", lambda: client)
+    _save_chunks(stores, "m1", 3)
+    _save_chunks(stores, "m2", 2, source_id="blog.rust-lang.org")
+    _save_chunks(stores, "m3", 1, source_id="example.com")
+    # Chunks of a memory Mem0 never stored, matched by their own metadata
+    _save_chunks(stores, "memory_orphan", 2, source_id="rust-lang.org")
+    return client
+
+def test_dry_run_reports_without_deleting(stores, mem0_client):
+    from bulk_delete import delete_memories_bulk
+
+    report = asyncio.run(delete_memories_bulk(USER, domain="www.rust-lang.org", dry_run=True))
+
+    assert report["matched_memories"] == 2
+    assert report["chunk_only_memories"] == 1
+    assert report["matched_chunks"] == 7
+    assert sorted(sample["id"] for sample in report["sample"]) == ["m1", "m2"]
+    assert sorted(mem0_client.records) == ["m1", "m2", "m3"]
+    assert stores[CONTENT_ROLE].count() == 8
+
+def test_delete_removes_memories_and_chunks(stores, mem0_client):
+    from bulk_delete import delete_memories_bulk
+
+    report = asyncio.run(delete_memories_bulk(USER, domain="rust-lang.org"))
+
+    assert report["deleted_memories"] == 2
+    assert report["failed_memory_ids"] == []
+    assert report["deleted_chunks"] == 7
+    assert sorted(mem0_client.records) == ["m3"]
+    assert stores[CONTENT_ROLE].memory_ids() == ["m3"]
+    assert stores[PAGE_ROLE].get()["ids"] == ["m3"]
+
+def test_domain_matches_chunk_only_memories_of_subdomains(stores, mem0_client):
+    from bulk_delete import delete_memories_bulk
+
+    _save_chunks(stores, "memory_docs_orphan", 2, source_id="docs.example.com")
+    _save_chunks(stores, "memory_other_orphan", 1, source_id="notexample.com")
+
+    report = asyncio.run(delete_memories_bulk(USER, domain="example.com"))
+
+    assert report["deleted_memories"] == 1
+    assert report["chunk_only_memories"] == 1
+    assert report["deleted_chunks"] == 3
+    assert "memory_docs_orphan" not in stores[CONTENT_ROLE].memory_ids()
+    assert "memory_other_orphan" in stores[CONTENT_ROLE].memory_ids()
+
+def test_ids_missing_from_the_snapshot_are_deleted_from_mem0(stores, mem0_client):
+    from bulk_delete import delete_memories_bulk
+
+    # Loads the snapshot, then Mem0 gains a memory the snapshot does not know
+    asyncio.run(delete_memories_bulk(USER, memory_ids=["m3"], dry_run=True))
+    mem0_client.records["m4"] = _record("m4", "https://example.com/new", "example.com")
+    _save_chunks(stores, "m4", 2, source_id="example.com")
+
+    report = asyncio.run(delete_memories_bulk(USER, memory_ids=["m4", "memory_orphan"]))
+
+    assert report["deleted_memories"] == 1
+    assert report["chunk_only_memories"] == 1
+    assert report["deleted_chunks"] == 4
+    assert "m4" not in mem0_client.records
+    assert stores[CONTENT_ROLE].memory_ids() == ["m1", "m2", "m3"]
@@ -0,0 +1,113 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+import chunk_gc
+import mem0_utils
+import vector_store
+from chroma_setup import CONTENT_ROLE, PAGE_ROLE
+from memory_ids import get_memory_id_map
+from retention import get_cold_store
+from vector_store import LEGACY_PARTITION_USER, get_vector_store
+
+class _FakeMem0:
+    """Mem0 client knowing some memory ids; fallback ids fail the way Mem0's Chroma store does."""
+
+    def __init__(self, known):
+        self.known = set(known)
+        self.looked_up = []
+
+    def get(self, memory_id):
+        self.looked_up.append(memory_id)
+        if memory_id == "m_flaky":
+            raise RuntimeError("Mem0 timed out")
+        if memory_id.startswith("memory_"):
+            raise IndexError("list index out of range")
+        return {"id": memory_id, "user_id": LEGACY_PARTITION_USER} if memory_id in self.known else None
+
+@pytest.fixture
+def stores(local_db, tmp_path, monkeypatch):
+    """Flat stores with chunks of live, deleted, fresh, pending and unreachable memories."""
+    monkeypatch.setattr(vector_store, "VECTOR_STORE_BACKEND", "flat")
+    monkeypatch.setattr(vector_store, "VECTOR_STORE_PATH", str(tmp_path / "vectors"))
+    monkeypatch.setattr(vector_store, "_stores", {})
+    monkeypatch.setattr(chunk_gc, "CHUNK_GC_BATCH_PAUSE", 0.0)
+    monkeypatch.setattr(chunk_gc, "CHUNK_GC_IDLE_SECONDS", 0.0)
+    monkeypatch.setattr(chunk_gc, "CHUNK_GC_GRACE_SECONDS", 3600.0)
+    client = _FakeMem0(["m_live"])
+    monkeypatch.setattr(mem0_utils, "get_mem0_client", lambda: client)
+
+    settled = time.time() - 86400
+    created = {"m_live": settled, "m_deleted": settled, "memory_fallback": settled,
+               "m_fresh": time.time(), "m_pending": settled, "m_flaky": settled}
+    chunks = get_vector_store(CONTENT_ROLE)
+    pages = get_vector_store(PAGE_ROLE)
+    for position, (memory_id, timestamp) in enumerate(created.items()):
+        metadata = {"memory_id": memory_id, "chunk_index": 0, "created_timestamp": timestamp}
+        chunks.add([f"{memory_id}_0"], [[1.0, float(position), 0.0]], [f"{memory_id} chunk"], [metadata])
+        pages.add([memory_id], [[1.0, float(position), 0.0]], [memory_id], [{"memory_id": memory_id}])
+    # Warm-tier memories only have cold chunks
+    get_cold_store().put_many(
+        LEGACY_PARTITION_USER, ["m_warm_0"], ["m_warm chunk"], [{"memory_id": "m_warm", "created_timestamp": settled}]
+    )
+    # A fast-ack save whose Mem0 write has not run yet
+    get_memory_id_map().reserve("m_pending", LEGACY_PARTITION_USER)
+    return client, chunks, pages
+
+class _CompactionProbe:
+    """A store with retired vectors that records which thread compacted it."""
+
+    def __init__(self, compacts_in_batches):
+        self.compacts_in_batches = compacts_in_batches
+        self.thread = None
+
+    def retired_count(self):
+        return 10
+
+    def count(self):
+        return 10
+
+    def compact(self):
+        self.thread = threading.current_thread().name
+        return {"bytes_before": 100, "bytes_after": 50}
+
+@pytest.mark.parametrize("compacts_in_batches", [True, False])
+def test_batched_compaction_runs_outside_the_writer_thread(compacts_in_batches, monkeypatch):
+    probe = _CompactionProbe(compacts_in_batches)
+    monkeypatch.setattr(vector_store, "list_partition_users", lambda role=None: ["browser_user"])
+    monkeypatch.setattr(vector_store, "get_vector_store", lambda role=None, user_id=None: probe)
+    monkeypatch.setattr(chunk_gc, "CHUNK_GC_BATCH_PAUSE", 0.0)
+
+    report = asyncio.run(chunk_gc.compact_stores())
+
+    assert report["browser_user/chunks"]["reclaimed_bytes"] == 50
+    # Chroma rebuilds take one short write per batch; a single write would block every save
+    assert probe.thread.startswith("chunks-writer") is not compacts_in_batches
+
+def test_orphans_confirmed_by_mem0_are_collected(stores):
+    client, chunks, pages = stores
+
+    report = asyncio.run(chunk_gc.collect_orphans())
+
+    totals = report[LEGACY_PARTITION_USER]
+    assert totals["memories"] == 7
+    assert totals["orphans"] == 3 and totals["fallback_ids"] == 1
+    # The deleted memory, the fallback id and the warm memory go, with their page vectors
+    assert sorted(chunks.get()["ids"]) == ["m_flaky_0", "m_fresh_0", "m_live_0", "m_pending_0"]
+    assert sorted(pages.get()["ids"]) == ["m_flaky", "m_fresh", "m_live", "m_pending"]
+    assert get_cold_store().memory_ids(LEGACY_PARTITION_USER) == []
+    # Memories inside the grace period and pending fast-ack saves are never looked up
+    assert "m_fresh" not in client.looked_up and "m_pending" not in client.looked_up
+    assert totals["candidates"] == 6
+
+def test_dry_run_reports_orphans_without_deleting(stores):
+    _, chunks, pages = stores
+
+    report = asyncio.run(chunk_gc.collect_orphans(dry_run=True))
+
+    assert report[LEGACY_PARTITION_USER]["orphans"] == 3
+    assert len(chunks.get()["ids"]) == 6
+    assert len(pages.get()["ids"]) == 6
+    assert get_cold_store().memory_ids(LEGACY_PARTITION_USER) == ["m_warm"]
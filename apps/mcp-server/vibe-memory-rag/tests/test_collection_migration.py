@@ -0,0 +1,70 @@
+import pytest
+
+pytest.importorskip("chromadb")
+
+import chroma_setup
+import collection_migration
+from chroma_setup import (
+    CONTENT_ROLE, get_active_collection_name, get_chroma_client, get_collection_space, get_or_create_collection
+)
+from collection_migration import migrate_collection
+
+IDS = [f"m{index // 2}_{index % 2}" for index in range(5)]
+# Exactly representable in float32, so copies compare equal
+EMBEDDINGS = [[1.0, float(index), 0.5, -0.25] for index in range(5)]
+DOCUMENTS = [f"chunk {index}" for index in range(5)]
+METADATAS = [
+    {"memory_id": f"m{index // 2}", "chunk_index": index % 2, "source_id": "example.com", "quality_score": 0.5 + index}
+    for index in range(5)
+]
+
+@pytest.fixture
+def chroma(local_db, tmp_path, monkeypatch):
+    """A Chroma database under tmp_path whose chunk collection uses the l2 space."""
+    monkeypatch.setenv("CHROMA_DB_PATH", str(tmp_path / "chroma"))
+    monkeypatch.setattr(collection_migration, "MIGRATION_BATCH_SIZE", 2)
+    monkeypatch.setattr(collection_migration, "MIGRATION_BATCH_PAUSE", 0.0)
+    monkeypatch.setattr(collection_migration, "MIGRATION_KEEP_OLD", False)
+    chroma_setup.reset_chroma_client()
+    source = get_or_create_collection(get_active_collection_name(CONTENT_ROLE), "chunks", space="l2")
+    source.add(ids=IDS, embeddings=EMBEDDINGS, documents=DOCUMENTS, metadatas=METADATAS)
+    yield source
+    chroma_setup.reset_chroma_client()
+
+def _records(collection):
+    rows = collection.get(include=["embeddings", "documents", "metadatas"])
+    return {
+        chunk_id: ([float(value) for value in embedding], document, metadata)
+        for chunk_id, embedding, document, metadata in zip(rows["ids"], rows["embeddings"], rows["documents"], rows["metadatas"])
+    }
+
+def test_migration_changes_the_space_and_keeps_every_record(chroma):
+    source_name = chroma.name
+    assert get_collection_space(chroma) == "l2"
+    expected = _records(chroma)
+
+    result = migrate_collection(CONTENT_ROLE, "cosine")
+
+    target = get_or_create_collection(get_active_collection_name(CONTENT_ROLE))
+    assert result["source_space"] == "l2" and result["target_space"] == "cosine"
+    assert result["records"] == 5
+    assert target.name == result["target"] != source_name
+    assert get_collection_space(target) == "cosine"
+    assert target.metadata["hnsw:M"] == chroma_setup.HNSW_M
+    assert _records(target) == expected
+    assert source_name not in [collection.name for collection in get_chroma_client().list_collections()]
+
+def test_the_swap_survives_a_restart(chroma):
+    result = migrate_collection(CONTENT_ROLE, "ip")
+
+    chroma_setup.reset_chroma_client()
+
+    assert get_active_collection_name(CONTENT_ROLE) == result["target"]
+    assert get_collection_space(get_or_create_collection(result["target"])) == "ip"
+
+def test_reconcile_copies_late_writes_and_drops_deleted_records(chroma):
+    target = get_or_create_collection("vibe_content_chunks__cosine_test", space="cosine")
+    target.add(ids=["gone_0"], embeddings=[[0.0, 1.0, 0.0, 0.0]], documents=["gone"], metadatas=[{"memory_id": "gone"}])
+
+    assert collection_migration._reconcile(CONTENT_ROLE, chroma, target) == {"copied": 5, "deleted": 1}
+    assert _records(target) == _records(chroma)
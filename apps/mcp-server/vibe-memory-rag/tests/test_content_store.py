@@ -0,0 +1,90 @@
+import pytest
+
+import content_store
+from content_store import attach_content, get_content_store
+
+CREATED = 1_760_000_000.0
+TEXTS = ["Ownership rules in Rust " * 20, "Borrowing and lifetimes", "Emoji and accents: café ☕"]
+
+@pytest.fixture(params=["zstd", "zlib"])
+def codec(request, monkeypatch):
+    """Run with each codec; zstd needs the compression extra."""
+    if request.param == "zstd":
+        pytest.importorskip("zstandard")
+    monkeypatch.setattr(content_store, "CONTENT_COMPRESSION", request.param)
+    monkeypatch.setattr(content_store, "_zstd", None)
+    monkeypatch.setattr(content_store, "_zstd_checked", False)
+    return request.param
+
+def _save(memory_id, user_id="alice", url="https://www.example.com/rust"):
+    store = get_content_store()
+    store.put_page(memory_id, user_id, url, f"Title of {memory_id}", "example.com", CREATED, "2025-10-09T08:53:20+00:00")
+    ids = [f"{memory_id}_{index}" for index in range(len(TEXTS))]
+    return ids, store.put_chunks(memory_id, ids, TEXTS)
+
+def test_chunk_text_round_trips(local_db, codec):
+    ids, raw_bytes = _save("m1")
+    store = get_content_store()
+
+    assert raw_bytes == sum(len(text.encode("utf-8")) for text in TEXTS)
+    assert store.get_texts(ids + ["unknown"]) == dict(zip(ids, TEXTS))
+    assert store.get_texts([]) == {}
+    stats = store.stats()
+    assert stats["codecs"] == {codec: 3}
+    assert stats["stored_bytes"] < stats["raw_bytes"]
+
+def test_zstd_falls_back_to_zlib_without_zstandard(local_db, monkeypatch):
+    monkeypatch.setattr(content_store, "CONTENT_COMPRESSION", "zstd")
+    monkeypatch.setattr(content_store, "_zstd", None)
+    monkeypatch.setattr(content_store, "_zstd_checked", True)
+
+    ids, _ = _save("m1")
+
+    assert get_content_store().get_texts(ids) == dict(zip(ids, TEXTS))
+    assert get_content_store().stats()["codecs"] == {"zlib": 3}
+
+def test_pages_are_stored_once_per_memory(local_db, codec):
+    _save("m1")
+    page = get_content_store().get_pages(["m1", "unknown"])
+
+    assert list(page) == ["m1"]
+    assert page["m1"]["domain"] == "example.com"
+    assert page["m1"]["title"] == "Title of m1"
+
+def test_attach_content_fills_text_and_page_fields(local_db, codec):
+    ids, _ = _save("m1")
+    results = [
+        {"id": ids[1], "content": "", "metadata": {"memory_id": "m1"}},
+        # Chunks written before the content store carry their fields inline
+        {"id": "old_0", "content": "inline text", "url": "https://old.example.com/", "title": "Old",
+         "metadata": {"memory_id": "old"}},
+    ]
+
+    attached = attach_content(results)
+
+    assert attached[0]["content"] == TEXTS[1]
+    assert attached[0]["url"] == "https://www.example.com/rust"
+    assert attached[0]["title"] == "Title of m1"
+    assert attached[0]["created_datetime"] == "2025-10-09T08:53:20+00:00"
+    assert (attached[1]["content"], attached[1]["url"]) == ("inline text", "https://old.example.com/")
+
+def test_delete_memories_removes_pages_and_chunks(local_db, codec):
+    ids, _ = _save("m1")
+    other_ids, _ = _save("m2")
+    store = get_content_store()
+
+    assert store.delete_memories(["m1", "unknown"]) == 3
+
+    assert store.get_texts(ids) == {}
+    assert store.get_pages(["m1"]) == {}
+    assert store.get_texts(other_ids) == dict(zip(other_ids, TEXTS))
+    assert store.stats()["pages"] == 1
+
+def test_delete_user_only_removes_that_user(local_db, codec):
+    _save("m1")
+    _save("b1", user_id="bob")
+    store = get_content_store()
+
+    assert store.delete_user("alice") == 3
+
+    assert list(store.get_pages(["m1", "b1"])) == ["b1"]
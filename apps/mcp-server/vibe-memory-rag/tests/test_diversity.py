@@ -0,0 +1,79 @@
+import numpy as np
+import pytest
+
+import diversity
+from diversity import diversify_chunks, resolve_diversity_mode, select_mmr, select_simhash, simhash
+
+ARTICLE = (
+    "The borrow checker in Rust enforces ownership rules at compile time, so references "
+    "can never outlive the data they point to and data races are rejected before the "
+    "program runs. Lifetimes annotate how long each reference is valid."
+)
+
+@pytest.fixture(autouse=True)
+def empty_fingerprint_cache():
+    diversity._fingerprint_cache.clear()
+    yield
+    diversity._fingerprint_cache.clear()
+
+def _chunk(chunk_id, content, similarity=0.5):
+    return {"id": chunk_id, "content": content, "similarity": similarity}
+
+def test_simhash_is_close_for_near_duplicates_and_far_for_unrelated_text():
+    # Fingerprints use salted string hashing, so compare distances rather than exact bits
+    page = " ".join(f"word{index}" for index in range(2000))
+    near = page.replace("word1000 ", "changed ")
+    unrelated = " ".join(f"other{index}" for index in range(2000))
+
+    assert bin(simhash(page) ^ simhash(near)).count("1") <= diversity.SIMHASH_MAX_DISTANCE
+    assert bin(simhash(page) ^ simhash(unrelated)).count("1") > diversity.SIMHASH_MAX_DISTANCE
+    assert simhash(page) == simhash(page.upper())
+    assert simhash("") == 0
+
+def test_select_simhash_drops_later_near_duplicates():
+    chunks = [
+        _chunk("a", ARTICLE, 0.9),
+        _chunk("b", ARTICLE + " ", 0.8),
+        _chunk("c", "Cargo builds crates, resolves their versions and runs the test suite.", 0.7),
+    ]
+
+    kept, removed = select_simhash(chunks, limit=3)
+
+    assert [chunk["id"] for chunk in kept] == ["a", "c"]
+    assert removed == 1
+
+def test_select_simhash_stops_at_the_limit():
+    chunks = [_chunk(str(index), f"topic number {index} " * 5 + word)
+              for index, word in enumerate(["alpha", "bravo", "charlie", "delta"])]
+    kept, _ = select_simhash(chunks, limit=2)
+    assert len(kept) == 2
+
+def test_select_mmr_drops_duplicate_embeddings_and_prefers_novel_chunks():
+    chunks = [_chunk("a", "", 0.9), _chunk("a-copy", "", 0.89), _chunk("related", "", 0.85), _chunk("other", "", 0.8)]
+    embeddings = [
+        [1.0, 0.0, 0.0],
+        [0.999, 0.01, 0.0],
+        [0.8, 0.6, 0.0],
+        [0.0, 0.0, 1.0],
+    ]
+
+    selected, removed = select_mmr(chunks, embeddings, limit=2)
+
+    assert removed == 1
+    # "other" is less relevant than "related" but novel, so MMR picks it second
+    assert [chunk["id"] for chunk in selected] == ["a", "other"]
+
+def test_select_mmr_handles_zero_vectors_and_empty_input():
+    assert select_mmr([], [], limit=3) == ([], 0)
+    selected, removed = select_mmr([_chunk("a", ""), _chunk("b", "")], np.zeros((2, 4)), limit=2)
+    assert len(selected) == 2 and removed == 0
+
+def test_diversify_falls_back_to_simhash_without_embeddings():
+    chunks = [_chunk("a", ARTICLE), _chunk("b", ARTICLE)]
+    assert diversify_chunks(chunks, "mmr", limit=2) == ([chunks[0]], 1)
+    assert diversify_chunks(chunks, "none", limit=1) == ([chunks[0]], 0)
+
+def test_resolve_diversity_mode():
+    assert resolve_diversity_mode("MMR") == "mmr"
+    with pytest.raises(ValueError):
+        resolve_diversity_mode("random")
@@ -0,0 +1,90 @@
+import asyncio
+
+import pytest
+
+import vector_store
+from group_writer import GroupCommitWriter
+
+USER = "alice"
+ROLE = "content"
+
+class _RecordingStore:
+    """Vector store stand-in recording each write; writes containing a "bad" id fail."""
+
+    def __init__(self):
+        self.writes = []
+        self.rows = {}
+
+    def _write(self, operation, ids, embeddings, documents, metadatas):
+        if any(chunk_id.startswith("bad") for chunk_id in ids):
+            raise ValueError("rejected by the store")
+        self.writes.append((operation, list(ids)))
+        for chunk_id, document in zip(ids, documents):
+            self.rows[chunk_id] = document
+
+    def add(self, **kwargs):
+        self._write("add", **kwargs)
+
+    def upsert(self, **kwargs):
+        self._write("upsert", **kwargs)
+
+@pytest.fixture
+def store(monkeypatch):
+    store = _RecordingStore()
+    monkeypatch.setitem(vector_store._stores, (ROLE, USER), store)
+    return store
+
+def _write(writer, ids, documents=None, operation="add"):
+    documents = documents or [f"doc {chunk_id}" for chunk_id in ids]
+    return writer.write(ROLE, USER, ids, [[1.0, 0.0]] * len(ids), documents, [{}] * len(ids), operation)
+
+def test_concurrent_requests_share_one_store_write(store):
+    writer = GroupCommitWriter()
+
+    async def run():
+        await asyncio.gather(*(_write(writer, [f"m{index}_0", f"m{index}_1"]) for index in range(3)))
+
+    asyncio.run(run())
+
+    assert store.writes == [("add", ["m0_0", "m0_1", "m1_0", "m1_1", "m2_0", "m2_1"])]
+    stats = writer.stats()
+    assert (stats["groups"], stats["requests"], stats["records"], stats["largest_group"]) == (1, 3, 6, 6)
+
+def test_duplicate_upsert_ids_keep_the_last_request(store):
+    writer = GroupCommitWriter()
+
+    async def run():
+        await asyncio.gather(
+            _write(writer, ["m1_0", "m1_1"], ["first 0", "first 1"], operation="upsert"),
+            _write(writer, ["m1_1", "m2_0"], ["second 1", "second 0"], operation="upsert"),
+        )
+
+    asyncio.run(run())
+
+    assert store.writes == [("upsert", ["m1_0", "m1_1", "m2_0"])]
+    assert store.rows == {"m1_0": "first 0", "m1_1": "second 1", "m2_0": "second 0"}
+
+def test_a_failing_request_does_not_fail_the_rest_of_its_group(store):
+    writer = GroupCommitWriter()
+
+    async def run():
+        return await asyncio.gather(
+            _write(writer, ["m1_0"]),
+            _write(writer, ["bad_0"]),
+            _write(writer, ["m2_0"]),
+            return_exceptions=True,
+        )
+
+    results = asyncio.run(run())
+
+    assert results[0] is None and results[2] is None
+    assert isinstance(results[1], ValueError)
+    assert store.writes == [("add", ["m1_0"]), ("add", ["m2_0"])]
+    assert writer.stats()["fallbacks"] == 1
+
+def test_a_failing_request_alone_gets_its_error(store):
+    writer = GroupCommitWriter()
+
+    with pytest.raises(ValueError):
+        asyncio.run(_write(writer, ["bad_0"]))
+    assert writer.stats()["fallbacks"] == 0
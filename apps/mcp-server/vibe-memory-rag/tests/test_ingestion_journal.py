@@ -0,0 +1,106 @@
+import asyncio
+import time
+
+import pytest
+
+import ingestion_journal
+from ingestion_journal import (
+    CHUNKS_WRITTEN, DONE, EMBEDDED, FAILED, QUEUED, STARTED, SUMMARIZED,
+    get_ingestion_journal, resume_ingestion_jobs,
+)
+
+@pytest.fixture
+def journal(local_db):
+    return get_ingestion_journal()
+
+def _queue(journal, job_id, user_id="alice"):
+    journal.append(job_id, user_id, QUEUED, {"url": f"https://example.com/{job_id}", "content": "page text " * 50})
+
+def test_stages_round_trip_payloads_and_embeddings(journal):
+    _queue(journal, "job1")
+    journal.append("job1", "alice", STARTED)
+    journal.append("job1", "alice", SUMMARIZED, {"summary": "first"})
+    journal.append("job1", "alice", SUMMARIZED, {"summary": "retried"})
+    journal.append("job1", "alice", EMBEDDED, {"chunk_ids": ["c0", "c1"], "embeddings": [[0.5, -1.0], [0.25, 2.0]]})
+
+    stages = journal.stages("job1")
+
+    assert list(stages) == [QUEUED, STARTED, SUMMARIZED, EMBEDDED]
+    assert stages[STARTED] == {}
+    assert stages[SUMMARIZED] == {"summary": "retried"}
+    assert stages[EMBEDDED]["embeddings"] == [[0.5, -1.0], [0.25, 2.0]]
+    assert stages[QUEUED]["content"].startswith("page text")
+
+def test_unfinished_counts_attempts_and_respects_max_seq(journal):
+    _queue(journal, "done")
+    journal.append("done", "alice", DONE)
+    _queue(journal, "twice", "bob")
+    journal.append("twice", "bob", STARTED)
+    journal.append("twice", "bob", STARTED)
+    cutoff = journal.last_seq()
+    _queue(journal, "later")
+
+    assert journal.unfinished() == [
+        {"job_id": "twice", "user_id": "bob", "attempts": 2},
+        {"job_id": "later", "user_id": "alice", "attempts": 0},
+    ]
+    assert [job["job_id"] for job in journal.unfinished(cutoff)] == ["twice"]
+
+def test_resume_runs_unfinished_jobs_from_their_last_stage(journal):
+    _queue(journal, "job1")
+    journal.append("job1", "alice", STARTED)
+    journal.append("job1", "alice", SUMMARIZED, {"summary": "kept"})
+    _queue(journal, "job2", "bob")
+    journal.append("job2", "bob", CHUNKS_WRITTEN)
+    journal.append("job2", "bob", DONE)
+    resumed = []
+
+    async def resume(job_id, user_id, stages):
+        resumed.append((job_id, user_id, sorted(stages)))
+        journal.append(job_id, user_id, DONE)
+
+    report = asyncio.run(resume_ingestion_jobs(resume))
+
+    assert resumed == [("job1", "alice", sorted([QUEUED, STARTED, SUMMARIZED]))]
+    assert report == {"resumed": 1, "given_up": 0, "pruned": 0}
+    assert journal.unfinished() == []
+
+def test_resume_gives_up_after_max_attempts_and_without_a_queued_entry(journal, monkeypatch):
+    monkeypatch.setattr(ingestion_journal, "INGESTION_MAX_ATTEMPTS", 2)
+    _queue(journal, "crashing")
+    journal.append("crashing", "alice", STARTED)
+    journal.append("crashing", "alice", STARTED)
+    journal.append("headless", "alice", STARTED)
+
+    abandoned = []
+
+    async def resume(job_id, user_id, stages):
+        raise AssertionError(f"{job_id} should not be resumed")
+
+    async def abandon(job_id, user_id):
+        abandoned.append((job_id, user_id))
+
+    report = asyncio.run(resume_ingestion_jobs(resume, abandon=abandon))
+
+    assert report == {"resumed": 0, "given_up": 2, "pruned": 0}
+    assert abandoned == [("crashing", "alice"), ("headless", "alice")]
+    assert journal.attempts("crashing") == 2
+    assert FAILED in journal.stages("crashing")
+    assert journal.stages("headless")[FAILED] == {"reason": "no queued entry"}
+    assert journal.unfinished() == []
+
+def test_prune_drops_only_old_finished_jobs(journal):
+    _queue(journal, "old")
+    journal.append("old", "alice", DONE)
+    _queue(journal, "open")
+
+    assert journal.prune(time.time() - 3600) == 0
+    assert journal.prune(time.time() + 1) == 1
+    assert journal.stages("old") == {}
+    assert QUEUED in journal.stages("open")
+    assert journal.stats()["jobs"] == 1
+
+def test_disabled_journal_records_nothing(journal, monkeypatch):
+    monkeypatch.setattr(ingestion_journal, "INGESTION_JOURNAL", False)
+    _queue(journal, "job1")
+    assert journal.last_seq() == 0
@@ -0,0 +1,80 @@
+"""
+Contract of the Mem0 calls the synopsis merge writes through: Memory.update with metadata
+(mem0ai >= 1.0.8) and, for older versions, vector_store.get/update and db.add_history.
+Runs against the installed mem0ai (a dev dependency); no OpenAI calls are made.
+"""
+import os
+
+import pytest
+
+os.environ.setdefault("MEM0_TELEMETRY", "False")
+
+import mem0  # noqa: E402
+import mem0_utils  # noqa: E402
+
+DIMENSIONS = 8
+
+# The path the installed version selects, plus the direct write it falls back to
+WRITE_PATHS = sorted({mem0_utils.MEM0_UPDATE_TAKES_METADATA, False})
+
+@pytest.fixture(params=WRITE_PATHS, ids=lambda takes_metadata: "update" if takes_metadata else "direct")
+def memory(request, tmp_path, monkeypatch):
+    monkeypatch.setattr(mem0_utils, "MEM0_UPDATE_TAKES_METADATA", request.param)
+    memory = mem0.Memory.from_config({
+        "vector_store": {"provider": "chroma", "config": {"collection_name": "contract", "path": str(tmp_path / "chroma")}},
+        "llm": {"provider": "openai", "config": {"api_key": "sk-contract"}},
+        "embedder": {"provider": "openai", "config": {"api_key": "sk-contract"}},
+        "history_db_path": str(tmp_path / "history.db"),
+    })
+    # Every re-embedded text gets the same vector, without an OpenAI call
+    monkeypatch.setattr(memory.embedding_model, "embed", lambda text, memory_action=None: [0.2] * DIMENSIONS)
+    return memory
+
+def _insert_page(memory, memory_id):
+    memory.vector_store.insert(
+        vectors=[[0.1] * DIMENSIONS],
+        payloads=[{
+            "data": "Visited: Rust ownership\nURL: https://doc.rust-lang.org/book\nSummary: Visited: Rust ownership\nTags: ",
+            "hash": "0",
+            "created_at": "2026-10-01T09:00:00+00:00",
+            "user_id": "alice",
+            "url": "https://doc.rust-lang.org/book",
+            "title": "Rust ownership",
+            "content_type": "browser_tab",
+            "synopsis": "Visited: Rust ownership",
+        }],
+        ids=[memory_id]
+    )
+
+def test_merge_rewrites_the_record_and_keeps_page_metadata(memory):
+    _insert_page(memory, "m1")
+    text = mem0_utils.browser_memory_text(
+        "https://doc.rust-lang.org/book", "Rust ownership", "How Rust tracks ownership.", ["rust", "memory"]
+    )
+
+    payload = mem0_utils._write_merged_synopsis(
+        memory, "m1", text, "How Rust tracks ownership.", ["rust", "memory"]
+    )
+
+    stored = memory.get("m1")
+    assert payload["data"] == text
+    assert stored["memory"] == text
+    assert stored["user_id"] == "alice"
+    assert stored["created_at"] == "2026-10-01T09:00:00+00:00"
+    assert stored["metadata"]["url"] == "https://doc.rust-lang.org/book"
+    assert stored["metadata"]["title"] == "Rust ownership"
+    assert stored["metadata"]["synopsis"] == "How Rust tracks ownership."
+    assert stored["metadata"]["tags"] == "rust, memory"
+    assert memory.history("m1")[-1]["event"] == "UPDATE"
+
+def test_merge_replaces_the_vector(memory):
+    _insert_page(memory, "m1")
+
+    mem0_utils._write_merged_synopsis(memory, "m1", "text", "synopsis", [])
+
+    hits = memory.vector_store.search(query="", vectors=[0.2] * DIMENSIONS, limit=1, filters={"user_id": "alice"})
+    assert hits[0].id == "m1"
+    assert hits[0].score == pytest.approx(0.0, abs=1e-5)
+
+def test_unknown_memory_is_not_merged(memory):
+    assert mem0_utils._write_merged_synopsis(memory, "missing", "text", "synopsis", []) is None
@@ -0,0 +1,76 @@
+from memory_aggregates import get_memory_aggregates
+
+def _chunks(count, source_id, content_type="article"):
+    documents = [""] * count
+    metadatas = [
+        {"source_id": source_id, "content_type": content_type, "content_bytes": 100}
+        for _ in range(count)
+    ]
+    return documents, metadatas
+
+def test_chunk_counters_are_kept_per_user(local_db):
+    aggregates = get_memory_aggregates()
+    aggregates.chunks_added("alice", "alice-1", *_chunks(5, "en.wikipedia.org"))
+    aggregates.chunks_added("bob", "bob-1", *_chunks(5, "docs.python.org"))
+
+    alice = aggregates.summary("alice")
+    assert alice["chunk_count"] == 5
+    assert alice["chunk_bytes"] == 500
+    assert alice["chunks_by_domain"] == {"en.wikipedia.org": 5}
+    assert alice["memories_with_chunks"] == 1
+    assert aggregates.summary("bob")["chunks_by_domain"] == {"docs.python.org": 5}
+
+def test_removing_a_users_chunks_leaves_other_users_alone(local_db):
+    aggregates = get_memory_aggregates()
+    aggregates.memory_added("alice", "Visited: A", {"url": "https://en.wikipedia.org/a"})
+    aggregates.chunks_added("alice", "alice-1", *_chunks(5, "en.wikipedia.org"))
+    aggregates.chunks_added("bob", "bob-1", *_chunks(5, "docs.python.org"))
+
+    assert aggregates.chunks_removed("alice-1") == 5
+    aggregates.memory_removed("alice", "Visited: A", {"url": "https://en.wikipedia.org/a"})
+
+    alice = aggregates.summary("alice")
+    assert alice["memory_count"] == 0
+    assert alice["chunk_count"] == 0
+    assert alice["chunk_bytes"] == 0
+    assert alice["chunks_by_domain"] == {}
+    assert aggregates.summary("bob")["chunk_count"] == 5
+
+def test_rebuild_recounts_only_that_user(local_db):
+    aggregates = get_memory_aggregates()
+    aggregates.chunks_added("alice", "alice-1", *_chunks(5, "en.wikipedia.org"))
+    aggregates.chunks_added("bob", "bob-1", *_chunks(5, "docs.python.org"))
+
+    documents, metadatas = _chunks(3, "en.wikipedia.org")
+    for metadata in metadatas:
+        metadata["memory_id"] = "alice-2"
+    aggregates.rebuild_chunks("alice", ["c1", "c2", "c3"], documents, metadatas)
+
+    assert aggregates.summary("alice")["chunk_count"] == 3
+    assert aggregates.summary("bob")["chunk_count"] == 5
+    assert aggregates.is_initialized("chunks:alice")
+    assert not aggregates.is_initialized("chunks:bob")
+    assert aggregates.chunk_counts(["alice-1", "alice-2", "bob-1"]) == {"alice-2": 3, "bob-1": 5}
+
+def test_global_chunk_counters_are_dropped_on_upgrade(local_db):
+    local_db.executescript("""
+        CREATE TABLE stats_counters (
+            scope TEXT NOT NULL, user_id TEXT NOT NULL, key TEXT NOT NULL,
+            count INTEGER NOT NULL DEFAULT 0, bytes INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (scope, user_id, key)
+        );
+        CREATE TABLE stats_memory_chunks (
+            memory_id TEXT PRIMARY KEY, source_id TEXT, chunk_count INTEGER NOT NULL DEFAULT 0,
+            bytes INTEGER NOT NULL DEFAULT 0, content_types TEXT
+        );
+        CREATE TABLE stats_initialized (name TEXT PRIMARY KEY, initialized_at REAL NOT NULL);
+        INSERT INTO stats_counters VALUES ('chunk_total', '', 'all', 10, 1000);
+        INSERT INTO stats_memory_chunks VALUES ('bob-1', 'docs.python.org', 10, 1000, '{}');
+        INSERT INTO stats_initialized VALUES ('chunks', 0);
+    """)
+
+    aggregates = get_memory_aggregates()
+
+    assert aggregates.summary("")["chunk_count"] == 0
+    assert aggregates.chunk_counts(["bob-1"]) == {}
+    assert not aggregates.is_initialized("chunks")
@@ -0,0 +1,127 @@
+import asyncio
+import threading
+
+import pytest
+
+from memory_index import get_recency_index
+
+USER = "alice"
+CREATED = 1_760_000_000.0
+
+def _memory(memory_id, created_ts, user_id=USER):
+    return {
+        "id": memory_id,
+        "memory": f"Visited page {memory_id}",
+        "user_id": user_id,
+        "created_at": "",
+        "metadata": {"creation_timestamp": created_ts, "url": f"https://example.com/{memory_id}"},
+    }
+
+def test_removals_during_a_backfill_are_not_reinserted(local_db):
+    index = get_recency_index()
+    index.begin_backfill(USER)
+    index.remove("m1")
+
+    assert index.backfill(USER, [_memory("m1", CREATED), _memory("m2", CREATED + 1)]) == 1
+    assert [memory["id"] for memory in index.latest(USER, 10)] == ["m2"]
+
+    # Removals are only recorded while a backfill is in flight
+    index.remove("m2")
+    index.add(USER, "m3", "Visited page m3", created_ts=CREATED)
+    assert index.backfill(USER, [_memory("m3", CREATED)]) == 1
+
+def test_clearing_during_a_backfill_imports_nothing(local_db):
+    index = get_recency_index()
+    index.begin_backfill(USER)
+    index.clear_user(USER)
+
+    assert index.backfill(USER, [_memory("m1", CREATED)]) == 0
+    assert index.is_backfilled(USER)
+    assert index.count(USER) == 0
+
+class _BlockingMem0:
+    """Mem0 client whose get_all waits until released."""
+
+    def __init__(self, memories):
+        self.memories = memories
+        self.fetching = threading.Event()
+        self.release = threading.Event()
+        self.get_all_calls = 0
+
+    def get_all(self, user_id, limit=None):
+        self.get_all_calls += 1
+        self.fetching.set()
+        self.release.wait(5)
+        return {"results": [dict(memory) for memory in self.memories]}
+
+def test_first_snapshot_load_shares_one_backfill_and_keeps_deletes(local_db, monkeypatch):
+    pytest.importorskip("mem0")
+    import mem0_utils
+
+    client = _BlockingMem0([_memory("m1", CREATED), _memory("m2", CREATED + 1)])
+    monkeypatch.setattr(mem0_utils, "get_mem0_client", lambda: client)
+
+    async def run():
+        loads = [asyncio.ensure_future(mem0_utils.get_user_snapshot(USER)) for _ in range(2)]
+        await asyncio.to_thread(client.fetching.wait, 5)
+        # Deleted after Mem0 answered get_all, before the backfill wrote its results
+        mem0_utils.untrack_memory("m1")
+        client.release.set()
+        return await asyncio.gather(*loads)
+
+    first, second = asyncio.run(run())
+
+    assert first is second
+    assert client.get_all_calls == 1
+    assert [record["id"] for record in first.records(USER)] == ["m2"]
+    assert [memory["id"] for memory in get_recency_index().latest(USER, 10)] == ["m2"]
+
+def test_backfill_is_idempotent(local_db):
+    index = get_recency_index()
+    memories = [_memory("m1", CREATED), _memory("m2", CREATED + 1), {"id": "no_timestamp"}, {"memory": "no id"}]
+
+    assert index.backfill(USER, memories) == 2
+    assert index.backfill(USER, memories) == 2
+    assert index.count(USER) == 2
+    assert index.is_backfilled(USER)
+    assert not index.is_backfilled("bob")
+
+def test_backfill_keeps_entries_recorded_since_startup(local_db):
+    index = get_recency_index()
+    index.add(USER, "m1", "Updated text", created_ts=CREATED + 5)
+
+    index.backfill(USER, [_memory("m1", CREATED)])
+
+    assert index.latest(USER, 1)[0]["memory"] == "Updated text"
+
+def test_latest_is_newest_first_per_user(local_db):
+    index = get_recency_index()
+    for memory_id in ["m1", "m3", "m2"]:
+        index.add(USER, memory_id, f"memory {memory_id}", created_ts=CREATED + int(memory_id[1:]))
+    index.add("bob", "b1", "memory b1", created_ts=CREATED + 10)
+
+    assert [memory["id"] for memory in index.latest(USER, 10)] == ["m3", "m2", "m1"]
+    assert [memory["id"] for memory in index.latest(USER, 2)] == ["m3", "m2"]
+    assert [memory["id"] for memory in index.latest("bob", 10)] == ["b1"]
+
+def test_between_includes_both_bounds(local_db):
+    index = get_recency_index()
+    for offset in range(5):
+        index.add(USER, f"m{offset}", f"memory {offset}", created_ts=CREATED + offset)
+
+    assert [memory["id"] for memory in index.between(USER, CREATED + 1, CREATED + 3, limit=10)] == ["m3", "m2", "m1"]
+    assert [memory["id"] for memory in index.between(USER, CREATED + 1, CREATED + 3, limit=2)] == ["m3", "m2"]
+    assert [memory["id"] for memory in index.between(USER, end_ts=CREATED, limit=10)] == ["m0"]
+    assert len(index.between(USER, limit=10)) == 5
+
+def test_add_reports_new_entries_and_remove_returns_the_memory(local_db):
+    index = get_recency_index()
+
+    assert index.add(USER, "m1", "first", {"url": "https://example.com/"}, created_ts=CREATED)
+    assert not index.add(USER, "m1", "second", created_ts=CREATED)
+
+    removed = index.remove("m1")
+    assert removed["memory"] == "second"
+    assert removed["user_id"] == USER
+    assert index.remove("m1") is None
+    assert index.count(USER) == 0
@@ -0,0 +1,59 @@
+import memory_record
+from memory_record import MemoryRecord
+
+def test_metadata_fields_win_over_the_text():
+    record = MemoryRecord.from_mem0({
+        "id": "m1",
+        "memory": "Visited: Wrong title\nURL: https://wrong.example.com/",
+        "created_at": "2025-10-09T08:53:20+00:00",
+        "metadata": {"url": "https://www.example.com/a", "title": "Example", "synopsis": "About examples",
+                     "type": "article"},
+    }, "alice")
+
+    assert (record.url, record.title, record.synopsis) == ("https://www.example.com/a", "Example", "About examples")
+    assert record.domain == "example.com"
+    assert record.content_type == "article"
+    assert record.user_id == "alice"
+
+def test_structured_text_is_parsed():
+    record = MemoryRecord.from_mem0({
+        "id": "m2",
+        "memory": "Visited: The Rust Book\nURL: https://doc.rust-lang.org/book/\nSummary: Learning Rust\nTags: rust",
+    })
+
+    assert (record.url, record.title, record.synopsis) == (
+        "https://doc.rust-lang.org/book/", "The Rust Book", "Learning Rust"
+    )
+    assert record.domain == "doc.rust-lang.org"
+
+def test_legacy_free_text_is_parsed():
+    record = MemoryRecord.from_mem0({
+        "id": "m3",
+        "memory": "I visited Cargo Guide at https://doc.rust-lang.org/cargo/ and read about workspaces",
+    })
+
+    assert record.url == "https://doc.rust-lang.org/cargo/"
+    assert record.title == "Cargo Guide"
+    # Free text has no summary line, so the memory text stands in for it
+    assert record.synopsis == record.memory
+    assert record.domain == "doc.rust-lang.org"
+
+def test_legacy_text_without_a_title_uses_its_start():
+    text = "Reading about ownership and borrowing in the Rust programming language today"
+    record = MemoryRecord.from_mem0({"id": "m4", "memory": text})
+
+    assert record.url == ""
+    assert record.title == text[:50] + "..."
+    assert record.to_browser_memory()["url"] == "Unknown"
+    assert record.to_browser_memory()["domain"] == "Unknown"
+
+def test_legacy_parses_are_cached_per_memory_text(monkeypatch):
+    monkeypatch.setattr(memory_record, "_legacy_parse_cache", memory_record.OrderedDict())
+    monkeypatch.setattr(memory_record, "LEGACY_PARSE_CACHE_SIZE", 2)
+    for index in range(3):
+        MemoryRecord.from_mem0({"id": f"m{index}", "memory": f"I visited Page {index} at https://example.com/{index}"})
+
+    assert list(memory_record._legacy_parse_cache) == [
+        ("m1", "I visited Page 1 at https://example.com/1"),
+        ("m2", "I visited Page 2 at https://example.com/2"),
+    ]
@@ -0,0 +1,85 @@
+import pytest
+
+from memory_index import get_recency_index
+from memory_snapshot import get_memory_snapshot
+
+USER = "alice"
+CREATED = 1_760_000_000.0
+
+def _record(memory_id, user_id=USER):
+    return {"id": memory_id, "memory": f"Visited page {memory_id}", "user_id": user_id, "created_at": "", "metadata": {}}
+
+def _ids(records):
+    return [record["id"] for record in records]
+
+@pytest.fixture
+def snapshot(local_db):
+    """The snapshot, with USER's memories loaded from the recency index."""
+    index = get_recency_index()
+    for offset in range(5):
+        index.add(USER, f"m{offset}", f"Visited page m{offset}", created_ts=CREATED + offset)
+    index.add("bob", "b0", "Visited page b0", created_ts=CREATED)
+    snapshot = get_memory_snapshot()
+    snapshot.load(USER)
+    return snapshot
+
+def test_load_reads_the_index_once(snapshot):
+    get_recency_index().add(USER, "late", "not in the snapshot", created_ts=CREATED + 10)
+    snapshot.load(USER)
+
+    assert snapshot.is_loaded(USER)
+    assert not snapshot.is_loaded("bob")
+    assert snapshot.count(USER) == 5
+    assert snapshot.get(USER, "late") is None
+
+def test_latest_is_newest_first_within_inclusive_bounds(snapshot):
+    assert _ids(snapshot.latest(USER, 10)) == ["m4", "m3", "m2", "m1", "m0"]
+    assert _ids(snapshot.latest(USER, 2)) == ["m4", "m3"]
+    assert _ids(snapshot.latest(USER, 10, CREATED + 1, CREATED + 3)) == ["m3", "m2", "m1"]
+    assert _ids(snapshot.latest(USER, 10, start_ts=CREATED + 4)) == ["m4"]
+    assert _ids(snapshot.latest(USER, 10, end_ts=CREATED)) == ["m0"]
+    assert snapshot.latest(USER, 0) == []
+    assert snapshot.latest("bob", 10) == []
+
+def test_add_replaces_a_record_and_moves_it(snapshot):
+    snapshot.add(USER, CREATED + 10, {**_record("m0"), "memory": "updated"})
+
+    assert snapshot.count(USER) == 5
+    assert _ids(snapshot.latest(USER, 1)) == ["m0"]
+    assert snapshot.get(USER, "m0")["memory"] == "updated"
+
+def test_adds_for_unloaded_users_wait_for_their_load(snapshot):
+    snapshot.add("bob", CREATED + 1, _record("b1", "bob"))
+
+    assert not snapshot.is_loaded("bob")
+    assert snapshot.get("bob", "b1") is None
+
+def test_remove_and_clear(snapshot):
+    assert snapshot.remove("m2")
+    assert not snapshot.remove("m2")
+    assert _ids(snapshot.records(USER)) == ["m4", "m3", "m1", "m0"]
+
+    snapshot.clear(USER)
+    assert snapshot.is_loaded(USER)
+    assert snapshot.count(USER) == 0
+    snapshot.add(USER, CREATED, _record("m5"))
+    assert _ids(snapshot.records(USER)) == ["m5"]
+
+def test_tracking_keeps_the_snapshot_and_the_index_consistent(snapshot):
+    pytest.importorskip("mem0")
+    from mem0_utils import track_memory, untrack_memory
+
+    index = get_recency_index()
+    track_memory(USER, "m5", "Visited page m5", {"url": "https://example.com/m5"}, CREATED + 5)
+    untrack_memory("m1")
+    untrack_memory("unknown")
+
+    expected = ["m5", "m4", "m3", "m2", "m0"]
+    assert _ids(snapshot.records(USER)) == expected
+    assert _ids(index.latest(USER, 10)) == expected
+    assert snapshot.get(USER, "m5")["metadata"] == {"url": "https://example.com/m5"}
+
+    # A fresh snapshot loaded from the index sees the same records
+    fresh = type(snapshot)()
+    fresh.load(USER)
+    assert _ids(fresh.records(USER)) == expected
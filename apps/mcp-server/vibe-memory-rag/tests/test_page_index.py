@@ -0,0 +1,109 @@
+import asyncio
+import math
+import threading
+
+import pytest
+
+import page_index
+import vector_store
+from chroma_setup import CONTENT_ROLE, PAGE_ROLE
+from page_index import backfill_page_index, build_page_vector, index_page, select_candidate_pages
+from store_access import write_store_sync, CHUNK_STORE
+from vector_store import LEGACY_PARTITION_USER
+
+USER = "alice"
+
+# Pages and the direction their chunks point in
+PAGES = {
+    "m_rust": ("doc.rust-lang.org", [[1.0, 0.1, 0.0], [0.9, 0.0, 0.1]]),
+    "m_python": ("docs.python.org", [[0.0, 1.0, 0.1], [0.1, 0.9, 0.0]]),
+    "m_go": ("go.dev", [[0.1, 0.0, 1.0], [0.0, 0.1, 0.9]]),
+    "m_rust_blog": ("blog.rust-lang.org", [[0.8, 0.2, 0.0]]),
+}
+
+@pytest.fixture
+def stores(local_db, tmp_path, monkeypatch):
+    """Flat chunk and page stores for USER and the legacy partition under tmp_path."""
+    monkeypatch.setattr(vector_store, "VECTOR_STORE_BACKEND", "flat")
+    monkeypatch.setattr(vector_store, "VECTOR_STORE_PATH", str(tmp_path / "vectors"))
+    monkeypatch.setattr(vector_store, "_stores", {})
+    monkeypatch.setattr(page_index, "_backfilled", False)
+    return tmp_path
+
+def _chunk_metadatas(memory_id, source_id, count):
+    return [
+        {"memory_id": memory_id, "source_id": source_id, "url": f"https://{source_id}/",
+         "title": "", "created_timestamp": 1_760_000_000.0, "chunk_index": index}
+        for index in range(count)
+    ]
+
+def _index_pages(user_id):
+    async def run():
+        for memory_id, (source_id, embeddings) in PAGES.items():
+            await index_page(memory_id, embeddings, _chunk_metadatas(memory_id, source_id, len(embeddings)), user_id=user_id)
+    asyncio.run(run())
+
+def test_page_vector_blends_the_centroid_and_the_summary(monkeypatch):
+    monkeypatch.setattr(page_index, "PAGE_CENTROID_WEIGHT", 0.5)
+
+    assert build_page_vector([[2.0, 0.0], [0.0, 2.0]]) == pytest.approx([math.sqrt(0.5)] * 2)
+    assert build_page_vector([], [3.0, 4.0]) == pytest.approx([0.6, 0.8])
+    blended = build_page_vector([[1.0, 0.0]], [0.0, 1.0])
+    assert blended == pytest.approx([math.sqrt(0.5)] * 2)
+
+def test_candidates_are_the_pages_closest_to_the_query(stores):
+    _index_pages(USER)
+
+    assert select_candidate_pages([1.0, 0.0, 0.0], limit=2, user_id=USER) == ["m_rust", "m_rust_blog"]
+    assert select_candidate_pages([0.0, 1.0, 0.0], limit=1, user_id=USER) == ["m_python"]
+    # Filters apply to the page stage too
+    assert select_candidate_pages(
+        [1.0, 0.0, 0.0], where={"source_id": "go.dev"}, limit=2, user_id=USER
+    ) == ["m_go"]
+
+def test_page_metadata_records_the_chunk_count(stores):
+    _index_pages(USER)
+
+    page = vector_store.get_vector_store(PAGE_ROLE, USER).get(ids=["m_rust"], include=["metadatas"])
+    assert page["metadatas"][0]["chunk_count"] == 2
+    assert page["metadatas"][0]["has_summary"] is False
+
+def test_empty_page_index_has_no_candidates(stores):
+    assert select_candidate_pages([1.0, 0.0, 0.0], user_id=USER) == []
+
+def test_legacy_partition_waits_for_the_backfill(stores):
+    chunks = vector_store.get_vector_store(CONTENT_ROLE, LEGACY_PARTITION_USER)
+    for memory_id, (source_id, embeddings) in PAGES.items():
+        chunks.add(
+            [f"{memory_id}_{index}" for index in range(len(embeddings))], embeddings,
+            [""] * len(embeddings), _chunk_metadatas(memory_id, source_id, len(embeddings))
+        )
+    _index_pages(LEGACY_PARTITION_USER)
+    vector_store.get_vector_store(PAGE_ROLE, LEGACY_PARTITION_USER).delete(ids=["m_go"])
+
+    assert select_candidate_pages([1.0, 0.0, 0.0], user_id=LEGACY_PARTITION_USER) == []
+
+    assert backfill_page_index() == {"memories": 4, "indexed": 1, "skipped": 3}
+    assert page_index.is_page_index_backfilled()
+    assert select_candidate_pages([0.0, 0.0, 1.0], limit=1, user_id=LEGACY_PARTITION_USER) == ["m_go"]
+
+def test_backfill_reads_ids_between_writes(stores, monkeypatch):
+    chunks = vector_store.get_vector_store(CONTENT_ROLE, LEGACY_PARTITION_USER)
+    source_id, embeddings = PAGES["m_go"]
+    chunks.add(["m_go_0"], embeddings[:1], [""], _chunk_metadatas("m_go", source_id, 1))
+    events = []
+    writers = []
+    read_ids = chunks.memory_ids
+
+    def memory_ids_with_a_concurrent_write(*args, **kwargs):
+        writer = threading.Thread(target=write_store_sync, args=(CHUNK_STORE, events.append, "write"))
+        writer.start()
+        writers.append(writer)
+        threading.Event().wait(0.05)
+        events.append("ids read")
+        return read_ids(*args, **kwargs)
+
+    monkeypatch.setattr(chunks, "memory_ids", memory_ids_with_a_concurrent_write)
+    assert backfill_page_index() == {"memories": 1, "indexed": 1, "skipped": 0}
+    writers[0].join()
+    assert events == ["ids read", "write"]
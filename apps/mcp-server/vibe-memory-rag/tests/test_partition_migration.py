@@ -0,0 +1,95 @@
+import asyncio
+
+import pytest
+
+import chunk_gc
+import page_index
+import partition_migration
+import vector_store
+from chroma_setup import CONTENT_ROLE, PAGE_ROLE
+from memory_aggregates import get_memory_aggregates
+from partition_migration import delete_legacy_memories, is_legacy_partition_migrated, migrate_legacy_partition
+from retention import get_cold_store
+from vector_store import LEGACY_PARTITION_USER, get_vector_store
+
+OWNERS = {"m_alice": "alice", "m_browser": LEGACY_PARTITION_USER}
+
+@pytest.fixture
+def stores(local_db, tmp_path, monkeypatch):
+    """Flat stores with a legacy partition holding chunks of several users' memories."""
+    monkeypatch.setattr(vector_store, "VECTOR_STORE_BACKEND", "flat")
+    monkeypatch.setattr(vector_store, "VECTOR_STORE_PATH", str(tmp_path / "vectors"))
+    monkeypatch.setattr(vector_store, "_stores", {})
+    monkeypatch.setattr(partition_migration, "_completed", False)
+    monkeypatch.setattr(page_index, "_backfilled", True)
+    monkeypatch.setattr(chunk_gc, "CHUNK_GC_BATCH_PAUSE", 0.0)
+
+    chunks = get_vector_store(CONTENT_ROLE)
+    pages = get_vector_store(PAGE_ROLE)
+    aggregates = get_memory_aggregates()
+    layout = {"m_alice": 2, "m_browser": 1, "m_gone": 1}
+    for position, (memory_id, count) in enumerate(layout.items()):
+        ids = [f"{memory_id}_{index}" for index in range(count)]
+        documents = [f"{memory_id} chunk {index}" for index in range(count)]
+        metadatas = [{"memory_id": memory_id, "chunk_index": index} for index in range(count)]
+        chunks.add(ids, [[1.0, float(position), float(index)] for index in range(count)], documents, metadatas)
+        pages.add([memory_id], [[1.0, float(position), 0.0]], [memory_id], [{"memory_id": memory_id}])
+        # Legacy chunk counters were kept under browser_user
+        aggregates.chunks_added(LEGACY_PARTITION_USER, memory_id, documents, metadatas)
+    get_cold_store().put_many(
+        LEGACY_PARTITION_USER, ["m_alice_old"], ["old chunk"], [{"memory_id": "m_alice", "created_timestamp": 1.0}]
+    )
+    return chunks, pages
+
+def _resolver(memory_ids, failed=()):
+    return {
+        "owners": {memory_id: OWNERS[memory_id] for memory_id in memory_ids if memory_id in OWNERS},
+        "unknown": [memory_id for memory_id in memory_ids if memory_id not in OWNERS and memory_id not in failed],
+        "failed": [memory_id for memory_id in memory_ids if memory_id in failed],
+    }
+
+def test_migration_moves_other_users_memories_into_their_partitions(stores, monkeypatch):
+    chunks, pages = stores
+    monkeypatch.setattr(partition_migration, "_resolve_owners", _resolver)
+
+    report = asyncio.run(migrate_legacy_partition())
+
+    assert report["completed"] and is_legacy_partition_migrated()
+    assert report["users"] == {"alice": 1}
+    assert report["moved_chunks"] == 2
+    assert report["unknown"] == 1
+
+    alice_chunks = get_vector_store(CONTENT_ROLE, "alice")
+    assert sorted(alice_chunks.get()["ids"]) == ["m_alice_0", "m_alice_1"]
+    assert get_vector_store(PAGE_ROLE, "alice").get()["ids"] == ["m_alice"]
+    # browser_user's memory and the one Mem0 does not know stay in the legacy partition
+    assert sorted(chunks.get()["ids"]) == ["m_browser_0", "m_gone_0"]
+    assert sorted(pages.get()["ids"]) == ["m_browser", "m_gone"]
+
+    aggregates = get_memory_aggregates()
+    assert aggregates.summary("alice")["chunk_count"] == 2
+    assert aggregates.summary(LEGACY_PARTITION_USER)["chunk_count"] == 2
+    assert get_cold_store().memory_ids("alice") == ["m_alice"]
+    assert get_cold_store().memory_ids(LEGACY_PARTITION_USER) == []
+
+def test_failed_lookups_keep_the_migration_pending(stores, monkeypatch):
+    chunks, _ = stores
+    monkeypatch.setattr(
+        partition_migration, "_resolve_owners", lambda memory_ids: _resolver(memory_ids, failed={"m_gone"})
+    )
+
+    report = asyncio.run(migrate_legacy_partition())
+
+    assert not report["completed"]
+    assert not is_legacy_partition_migrated()
+    assert report["users"] == {"alice": 1}
+    assert "m_gone_0" in chunks.get()["ids"]
+
+def test_clearing_the_legacy_partition_only_deletes_the_given_memories(stores):
+    chunks, pages = stores
+
+    deleted = delete_legacy_memories(["m_browser", "m_never_saved"])
+
+    assert deleted == {"vectors": {CONTENT_ROLE: 1, PAGE_ROLE: 1}, "memory_ids": ["m_browser"]}
+    assert sorted(chunks.get()["ids"]) == ["m_alice_0", "m_alice_1", "m_gone_0"]
+    assert sorted(pages.get()["ids"]) == ["m_alice", "m_gone"]
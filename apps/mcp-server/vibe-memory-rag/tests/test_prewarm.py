@@ -0,0 +1,170 @@
+import asyncio
+import threading
+
+import pytest
+
+import prewarm
+from prewarm import get_prewarm_status, run_prewarm
+
+class _Component:
+    """A loader and readiness check pair; loading makes it ready unless it fails."""
+
+    def __init__(self, ready=False, error=None, is_async=False):
+        self.loaded = ready
+        self.error = error
+        self.is_async = is_async
+        self.loads = 0
+
+    def _load(self):
+        self.loads += 1
+        if self.error:
+            raise RuntimeError(self.error)
+        self.loaded = True
+
+    def load(self):
+        if not self.is_async:
+            return self._load()
+
+        async def load_async():
+            await asyncio.sleep(0)
+            self._load()
+        return load_async()
+
+    def ready(self):
+        return self.loaded
+
+@pytest.fixture
+def components(monkeypatch):
+    """Fake components under the real names (skip rules are keyed by name)."""
+    fakes = {
+        "mem0": _Component(),
+        "chunk_store": _Component(is_async=True),
+        "snapshot": _Component(),
+        "reranker": _Component(ready=True),
+        "text_splitter": _Component(error="model download failed"),
+    }
+    monkeypatch.setattr(prewarm, "_COMPONENTS", {name: (fake.load, fake.ready) for name, fake in fakes.items()})
+    monkeypatch.setattr(prewarm, "PREWARM_COMPONENTS", list(fakes) + ["unknown"])
+    monkeypatch.setattr(prewarm, "_results", {})
+    monkeypatch.setattr(prewarm, "_state", {"status": "off", "started_at": None, "finished_at": None})
+    monkeypatch.delenv("OPENAI_API_KEY", raising=False)
+    monkeypatch.setenv("USE_RERANKING", "true")
+    return fakes
+
+def test_run_records_skipped_ready_and_failed_components(components):
+    results = asyncio.run(run_prewarm())
+
+    assert results["mem0"] == {"state": "skipped", "reason": "OPENAI_API_KEY not set"}
+    assert results["snapshot"]["state"] == "skipped"
+    assert components["mem0"].loads == 0
+    assert results["chunk_store"]["state"] == "ready"
+    assert results["chunk_store"]["load_ms"] >= 0
+    assert components["chunk_store"].loaded
+    # Loaded before the prewarm got to it
+    assert results["reranker"] == {"state": "ready", "load_ms": 0.0}
+    assert components["reranker"].loads == 0
+    assert results["text_splitter"] == {"state": "failed", "error": "model download failed"}
+    assert "unknown" not in results
+    assert prewarm._state["status"] == "done"
+
+def test_status_before_any_prewarm(components):
+    status = get_prewarm_status()
+
+    assert status["status"] == "off"
+    assert not status["ready"]
+    assert status["components"]["reranker"] == {"state": "ready"}
+    assert status["components"]["chunk_store"] == {"state": "cold"}
+
+def test_status_reports_components_a_tool_loaded_before_the_prewarm_reached_them(components, monkeypatch):
+    monkeypatch.setenv("OPENAI_API_KEY", "test-key")
+    seen = {}
+    mem0_load = components["mem0"].load
+
+    def load_mem0_while_a_tool_loads_the_snapshot():
+        mem0_load()
+        components["snapshot"].load()
+        seen.update(get_prewarm_status())
+
+    prewarm._COMPONENTS["mem0"] = (load_mem0_while_a_tool_loads_the_snapshot, components["mem0"].ready)
+    results = asyncio.run(run_prewarm())
+
+    assert seen["status"] == "running"
+    assert seen["components"]["mem0"] == {"state": "ready"}
+    assert seen["components"]["snapshot"] == {"state": "ready"}
+    assert seen["components"]["chunk_store"] == {"state": "cold"}
+    assert not seen["ready"]
+    # The prewarm found it loaded and did not load it again
+    assert results["snapshot"] == {"state": "ready", "load_ms": 0.0}
+    assert components["snapshot"].loads == 1
+
+def test_status_reports_a_failed_component_a_tool_loaded_later(components):
+    asyncio.run(run_prewarm())
+    assert not get_prewarm_status()["ready"]
+
+    components["text_splitter"].error = None
+    components["text_splitter"].load()
+    status = get_prewarm_status()
+
+    assert status["components"]["text_splitter"]["state"] == "ready"
+    assert status["ready"]
+
+def test_async_loaders_run_on_the_server_loop(components):
+    loops = []
+
+    async def load_chunk_store():
+        loops.append(asyncio.get_running_loop())
+
+    prewarm._COMPONENTS["chunk_store"] = (load_chunk_store, lambda: bool(loops))
+
+    async def serve():
+        thread = threading.Thread(target=asyncio.run, args=(run_prewarm(asyncio.get_running_loop()),))
+        thread.start()
+        await asyncio.to_thread(thread.join, 5)
+        return asyncio.get_running_loop()
+
+    server_loop = asyncio.run(serve())
+
+    assert loops == [server_loop]
+    assert prewarm._results["chunk_store"]["state"] == "ready"
+
+class _BlockingMem0:
+    """Mem0 client whose get_all waits until released."""
+
+    def __init__(self):
+        self.fetching = threading.Event()
+        self.release = threading.Event()
+        self.get_all_calls = 0
+
+    def get_all(self, user_id, limit=None):
+        self.get_all_calls += 1
+        self.fetching.set()
+        self.release.wait(5)
+        return {"results": [{"id": "m1", "memory": "Visited page m1", "metadata": {"creation_timestamp": 1_760_000_000.0}}]}
+
+def test_a_tool_waits_for_a_snapshot_load_started_on_another_loop(local_db, monkeypatch):
+    pytest.importorskip("mem0")
+    import mem0_utils
+
+    client = _BlockingMem0()
+    monkeypatch.setattr(mem0_utils, "get_mem0_client", lambda: client)
+    loaded = {}
+
+    def prewarm_snapshot():
+        loaded["prewarm"] = asyncio.run(mem0_utils.get_user_snapshot("browser_user"))
+
+    async def first_search():
+        thread = threading.Thread(target=prewarm_snapshot)
+        thread.start()
+        await asyncio.to_thread(client.fetching.wait, 5)
+        search = asyncio.ensure_future(mem0_utils.get_user_snapshot("browser_user"))
+        await asyncio.sleep(0.01)
+        client.release.set()
+        snapshot = await search
+        await asyncio.to_thread(thread.join, 5)
+        return snapshot
+
+    snapshot = asyncio.run(first_search())
+
+    assert loaded["prewarm"] is snapshot
+    assert client.get_all_calls == 1
+    assert [record["id"] for record in snapshot.records("browser_user")] == ["m1"]
@@ -0,0 +1,103 @@
+import json
+
+import pytest
+
+from response_format import (
+    dumps, project_fields, resolve_response_mode, shape_content_search, shape_unified_search
+)
+
+CHUNK = {
+    "id": "m1_0",
+    "content": "Rust has no garbage collector. The borrow checker enforces ownership at compile time.",
+    "url": "https://doc.rust-lang.org/book/",
+    "title": "The Rust Book",
+    "source_id": "doc.rust-lang.org",
+    "similarity": 0.8,
+    "rerank_score": 0.9,
+    "created_datetime": "2025-10-09T08:53:20+00:00",
+    "metadata": {"memory_id": "m1", "chunk_index": 0},
+}
+
+UNIFIED = {
+    "query": "borrow checker",
+    "results": [{
+        "id": "m1",
+        "memory_summary": "Read the Rust book",
+        "score": 0.7,
+        "created_at": "2025-10-09T08:53:20+00:00",
+        "source_url": "https://doc.rust-lang.org/book/",
+        "raw_memory": "Visited: The Rust Book",
+        "detailed_content": [CHUNK],
+    }],
+    "temporal_intelligence": {"explanation": "ranked by recency", "recency_weight": 0.3},
+}
+
+def test_resolve_response_mode():
+    assert resolve_response_mode("Summary") == "summary"
+    assert resolve_response_mode(None) == "full"
+    with pytest.raises(ValueError):
+        resolve_response_mode("tiny")
+
+def test_project_fields_selects_nested_keys_and_skips_missing_ones():
+    assert project_fields(CHUNK, ["id", "metadata.memory_id", "metadata.missing", "absent"]) == {
+        "id": "m1_0", "metadata": {"memory_id": "m1"}
+    }
+
+def test_project_fields_reaches_into_lists():
+    result = dict(UNIFIED["results"][0], detailed_content=[CHUNK, {"id": "m1_1"}])
+    projected = project_fields(result, ["id", "detailed_content.id", "detailed_content.metadata.chunk_index"])
+    assert projected == {
+        "id": "m1",
+        "detailed_content": [{"id": "m1_0", "metadata": {"chunk_index": 0}}, {"id": "m1_1"}],
+    }
+    assert CHUNK["metadata"] == {"memory_id": "m1", "chunk_index": 0}
+
+def test_full_mode_without_fields_is_unchanged():
+    result = {"query": "rust", "content_chunks": [CHUNK]}
+    assert shape_content_search(result, "full") is result
+    assert shape_unified_search(UNIFIED, "full") is UNIFIED
+
+def test_ids_mode_keeps_only_ids_and_scores():
+    shaped = shape_content_search({"query": "rust", "content_chunks": [CHUNK]}, "ids")
+
+    assert shaped["content_chunks"] == [{"id": "m1_0", "memory_id": "m1", "score": 0.9}]
+    assert shaped["response_mode"] == "ids"
+
+    unified = shape_unified_search(UNIFIED, "ids")
+    assert unified["results"] == [{"id": "m1", "score": 0.7, "chunk_ids": ["m1_0"]}]
+
+def test_summary_mode_drops_text_and_debug_output():
+    shaped = shape_unified_search(UNIFIED, "summary")
+    memory = shaped["results"][0]
+
+    assert "raw_memory" not in memory
+    assert memory["source_url"] == "https://doc.rust-lang.org/book/"
+    chunk = memory["detailed_content"][0]
+    assert "content" not in chunk and "metadata" not in chunk
+    assert chunk["memory_id"] == "m1"
+    assert chunk["title"] == "The Rust Book"
+    assert shaped["temporal_intelligence"] == {"recency_weight": 0.3}
+    # The caller's result is left alone
+    assert UNIFIED["temporal_intelligence"]["explanation"] == "ranked by recency"
+
+def test_snippet_mode_adds_query_focused_snippets():
+    shaped = shape_content_search({"query": "borrow checker", "content_chunks": [CHUNK]}, "snippet")
+    chunk = shaped["content_chunks"][0]
+
+    assert "content" not in chunk
+    assert chunk["snippets"]
+    assert "borrow checker" in chunk["snippets"][0]["text"]
+
+def test_fields_override_the_mode():
+    shaped = shape_content_search({"query": "rust", "content_chunks": [CHUNK]}, "ids", ["url", "metadata.chunk_index"])
+
+    assert shaped["content_chunks"] == [{"url": "https://doc.rust-lang.org/book/", "metadata": {"chunk_index": 0}}]
+
+def test_errors_pass_through():
+    error = {"error": "Search failed"}
+    assert shape_content_search(error, "ids") is error
+    assert shape_unified_search(error, "summary") is error
+
+def test_dumps_round_trips_non_ascii():
+    payload = {"title": "café ☕", "score": 0.5}
+    assert json.loads(dumps(payload)) == payload
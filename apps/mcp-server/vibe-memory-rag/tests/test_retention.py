@@ -0,0 +1,124 @@
+import asyncio
+import time
+
+import pytest
+
+import chunk_gc
+import retention
+import vector_store
+from chroma_setup import CONTENT_ROLE, PAGE_ROLE
+from retention import apply_retention, get_cold_store, hydrate_warm_results, search_warm_pages
+from vector_store import LEGACY_PARTITION_USER, get_vector_store
+
+DAY = 86400
+
+TEXTS = {
+    "m_old": ["Notes on the Rust borrow checker.", "A recipe for sourdough bread."],
+    "m_new": ["Release notes of the new Python version."],
+    "m_ancient": ["An article about medieval castles."],
+}
+
+@pytest.fixture
+def stores(local_db, tmp_path, monkeypatch):
+    """Flat stores holding one memory 40 days old, one saved now and one 90 days old."""
+    monkeypatch.setattr(vector_store, "VECTOR_STORE_BACKEND", "flat")
+    monkeypatch.setattr(vector_store, "VECTOR_STORE_PATH", str(tmp_path / "vectors"))
+    monkeypatch.setattr(vector_store, "_stores", {})
+    monkeypatch.setattr(chunk_gc, "CHUNK_GC_BATCH_PAUSE", 0.0)
+    monkeypatch.setattr(chunk_gc, "CHUNK_GC_IDLE_SECONDS", 0.0)
+    monkeypatch.setattr(retention, "RETENTION_WARM_DAYS", 30.0)
+    monkeypatch.setattr(retention, "RETENTION_DROP_DAYS", 0.0)
+
+    now = time.time()
+    ages = {"m_old": 40, "m_new": 0, "m_ancient": 90}
+    chunks = get_vector_store(CONTENT_ROLE)
+    for position, (memory_id, texts) in enumerate(TEXTS.items()):
+        created = now - ages[memory_id] * DAY
+        chunks.add(
+            [f"{memory_id}_{index}" for index in range(len(texts))],
+            [[1.0, float(position), float(index)] for index in range(len(texts))],
+            texts,
+            [
+                {"memory_id": memory_id, "chunk_index": index, "url": f"https://example.com/{memory_id}",
+                 "title": memory_id, "original_content": text, "created_timestamp": created}
+                for index, text in enumerate(texts)
+            ]
+        )
+    return chunks, get_vector_store(PAGE_ROLE)
+
+def test_aged_memories_move_to_the_warm_tier(stores):
+    chunks, pages = stores
+
+    report = asyncio.run(apply_retention())
+
+    assert report[LEGACY_PARTITION_USER]["moved_to_warm"]["memories"] == 2
+    assert report[LEGACY_PARTITION_USER]["moved_to_warm"]["chunks"] == 3
+    assert chunks.get()["ids"] == ["m_new_0"]
+    # Warm memories keep a page vector; their chunks live on in the cold table
+    warm_pages = pages.get(include=["metadatas"])
+    assert sorted(warm_pages["ids"]) == ["m_ancient", "m_old"]
+    assert all(metadata["tier"] == "warm" for metadata in warm_pages["metadatas"])
+    cold = get_cold_store().get_memories(["m_old", "m_ancient"])
+    assert [chunk["id"] for chunk in cold["m_old"]] == ["m_old_0", "m_old_1"]
+
+def test_dry_run_leaves_the_hot_tier_alone(stores):
+    chunks, pages = stores
+
+    report = asyncio.run(apply_retention(dry_run=True))
+
+    assert report[LEGACY_PARTITION_USER]["moved_to_warm"]["memories"] == 2
+    assert len(chunks.get()["ids"]) == 4
+    assert pages.get()["ids"] == []
+    assert not get_cold_store().has_memories(LEGACY_PARTITION_USER)
+
+def test_warm_results_are_hydrated_with_the_best_matching_chunk(stores):
+    asyncio.run(apply_retention())
+
+    placeholders = search_warm_pages([1.0, 0.0, 0.0], None, 5)
+    assert {placeholder["id"] for placeholder in placeholders} == {"m_old", "m_ancient"}
+    assert all(placeholder["content"] == "" for placeholder in placeholders)
+
+    hot = {"id": "m_new_0", "content": "Release notes", "metadata": {"memory_id": "m_new"}}
+    hydrated = hydrate_warm_results("sourdough bread", [hot] + placeholders)
+
+    by_memory = {result["metadata"]["memory_id"]: result for result in hydrated}
+    assert by_memory["m_new"] is hot
+    assert by_memory["m_old"]["id"] == "m_old_1"
+    assert by_memory["m_old"]["content"] == TEXTS["m_old"][1]
+    assert by_memory["m_old"]["metadata"]["tier"] == "warm"
+    assert by_memory["m_ancient"]["content"] == TEXTS["m_ancient"][0]
+
+def test_placeholders_without_cold_chunks_are_dropped(stores):
+    asyncio.run(apply_retention())
+    placeholders = search_warm_pages([1.0, 0.0, 0.0], None, 5)
+    get_cold_store().delete_memories(["m_ancient"])
+
+    hydrated = hydrate_warm_results("castles", placeholders)
+
+    assert [result["metadata"]["memory_id"] for result in hydrated] == ["m_old"]
+
+def test_content_past_the_drop_age_is_deleted_in_both_tiers(stores, monkeypatch):
+    chunks, pages = stores
+    # A first pass demotes both aged memories, the second one drops the oldest
+    asyncio.run(apply_retention())
+    monkeypatch.setattr(retention, "RETENTION_DROP_DAYS", 60.0)
+
+    report = asyncio.run(apply_retention())
+
+    dropped = report[LEGACY_PARTITION_USER]["dropped"]
+    assert dropped["memories"] == 1 and dropped["chunks"] == 1
+    assert sorted(pages.get()["ids"]) == ["m_old"]
+    assert get_cold_store().memory_ids(LEGACY_PARTITION_USER) == ["m_old"]
+    assert chunks.get()["ids"] == ["m_new_0"]
+
+def test_hot_content_past_the_drop_age_is_not_demoted_first(stores, monkeypatch):
+    chunks, pages = stores
+    monkeypatch.setattr(retention, "RETENTION_DROP_DAYS", 60.0)
+
+    report = asyncio.run(apply_retention())
+
+    assert report[LEGACY_PARTITION_USER]["dropped"]["memories"] == 1
+    assert report[LEGACY_PARTITION_USER]["moved_to_warm"]["memories"] == 1
+    assert sorted(chunks.get()["ids"]) == ["m_new_0"]
+    assert pages.get()["ids"] == ["m_old"]
+    assert get_cold_store().memory_ids(LEGACY_PARTITION_USER) == ["m_old"]
@@ -0,0 +1,58 @@
+from snippets import extract_snippets, query_terms, split_sentences
+
+CONTENT = (
+    "Rust is a systems programming language. It has no garbage collector. "
+    "The borrow checker enforces ownership at compile time. "
+    "Cargo builds crates and manages dependencies. "
+    "Lifetimes tell the borrow checker how long references live."
+)
+
+def test_query_terms_drop_stopwords_and_repeats():
+    assert query_terms("What is the borrow checker in Rust? borrow") == ["borrow", "checker", "rust"]
+
+def test_sentence_spans_are_trimmed_offsets():
+    spans = split_sentences("  One.  Two!\nThree")
+    assert [("  One.  Two!\nThree")[start:end] for start, end in spans] == ["One.", "Two!", "Three"]
+
+def test_snippets_point_into_the_content():
+    snippets = extract_snippets("borrow checker ownership", CONTENT, max_windows=2, max_chars=500)
+
+    assert snippets
+    for snippet in snippets:
+        assert CONTENT[snippet["start"]:snippet["end"]] == snippet["text"]
+        assert snippet["score"] > 0
+    assert "ownership" in snippets[0]["text"]
+
+def test_selected_windows_do_not_overlap_and_keep_document_order():
+    snippets = extract_snippets("borrow checker", CONTENT, max_windows=3, max_chars=500)
+
+    starts = [snippet["start"] for snippet in snippets]
+    assert starts == sorted(starts)
+    for previous, following in zip(snippets, snippets[1:]):
+        assert previous["end"] <= following["start"]
+
+def test_whole_words_only():
+    # "rusty" and "crusty" must not count as hits for "rust"
+    content = "Crusty old pipes. Rusty nails everywhere. Nothing else here. Rust the language."
+    snippets = extract_snippets("rust", content, max_windows=1, max_chars=500)
+    assert "Rust the language." in snippets[0]["text"]
+    assert "Rusty" not in snippets[0]["text"]
+
+def test_no_match_falls_back_to_the_opening_window():
+    snippets = extract_snippets("kubernetes", CONTENT, max_windows=2, max_chars=500)
+    assert len(snippets) == 1
+    assert snippets[0]["start"] == 0
+    assert snippets[0]["score"] == 0.0
+
+def test_long_windows_are_trimmed_to_word_boundaries_around_the_match():
+    content = " ".join(["filler"] * 80) + " needle " + " ".join(["padding"] * 80) + "."
+    snippet = extract_snippets("needle", content, max_windows=1, max_chars=100)[0]
+
+    assert len(snippet["text"]) <= 100
+    assert "needle" in snippet["text"]
+    assert content[snippet["start"] - 1] == " "
+    assert snippet["text"].split()[0] in ("filler", "needle")
+    assert snippet["text"].split()[-1] in ("padding", "needle")
+
+def test_empty_content():
+    assert extract_snippets("anything", "") == []
@@ -0,0 +1,106 @@
+import asyncio
+import threading
+
+import pytest
+
+import store_access
+from store_access import CHUNK_STORE, MEM0_STORE, get_store_access, share_store, write_store
+
+@pytest.fixture(autouse=True)
+def fresh_stores(monkeypatch):
+    monkeypatch.setattr(store_access, "_stores", {})
+    monkeypatch.setattr(store_access, "_shared", {})
+    monkeypatch.setattr(store_access, "_read_pool", None)
+    yield
+    store_access.shutdown_store_access()
+
+def test_shared_store_names_resolve_to_one_writer():
+    share_store(MEM0_STORE, CHUNK_STORE)
+
+    assert get_store_access(MEM0_STORE) is get_store_access(CHUNK_STORE)
+
+    async def writer_threads():
+        return await asyncio.gather(
+            write_store(MEM0_STORE, threading.get_ident),
+            write_store(CHUNK_STORE, threading.get_ident),
+        )
+
+    mem0_thread, chunk_thread = asyncio.run(writer_threads())
+    assert mem0_thread == chunk_thread
+    assert list(store_access._stores) == [CHUNK_STORE]
+
+def test_separate_stores_have_separate_writers():
+    assert get_store_access(MEM0_STORE) is not get_store_access(CHUNK_STORE)
+
+def test_sharing_a_store_already_in_use_raises():
+    get_store_access(MEM0_STORE)
+
+    with pytest.raises(RuntimeError):
+        share_store(MEM0_STORE, CHUNK_STORE)
+
+def test_sharing_twice_is_a_no_op():
+    share_store(MEM0_STORE, CHUNK_STORE)
+    get_store_access(MEM0_STORE)
+
+    share_store(MEM0_STORE, CHUNK_STORE)
+
+    assert get_store_access(MEM0_STORE) is get_store_access(CHUNK_STORE)
+
+def test_a_write_holds_off_readers():
+    events = []
+
+    def slow_write():
+        events.append("write start")
+        threading.Event().wait(0.05)
+        events.append("write end")
+
+    async def run():
+        write = asyncio.ensure_future(write_store(CHUNK_STORE, slow_write))
+        await asyncio.sleep(0.01)
+        await store_access.read_store(CHUNK_STORE, events.append, "read")
+        await write
+
+    asyncio.run(run())
+    assert events == ["write start", "write end", "read"]
+
+def test_chunk_content_writes_run_on_the_chunk_writer(local_db, monkeypatch):
+    import group_writer
+    import page_index
+    from content_store import ContentStore, get_content_store
+    from memory_aggregates import get_memory_aggregates
+    from utils import write_content_chunks
+
+    writer_threads = []
+    put_chunks = ContentStore.put_chunks
+
+    def recording_put_chunks(self, *args):
+        writer_threads.append(threading.get_ident())
+        return put_chunks(self, *args)
+
+    async def no_write(*args, **kwargs):
+        return None
+
+    monkeypatch.setattr(ContentStore, "put_chunks", recording_put_chunks)
+    monkeypatch.setattr(group_writer, "write_vectors", no_write)
+    monkeypatch.setattr(page_index, "index_page", no_write)
+    batch = {
+        "ids": ["m1_0", "m1_1"],
+        "texts": ["first chunk", "second chunk"],
+        "embeddings": [[1.0, 0.0], [0.0, 1.0]],
+        "metadatas": [{"memory_id": "m1", "source_id": "example.com", "content_bytes": 11}] * 2,
+        "url": "https://example.com/",
+        "title": "Example",
+        "source_id": "example.com",
+        "created_timestamp": 1_760_000_000.0,
+        "created_datetime": "2025-10-09T08:53:20+00:00",
+    }
+
+    async def run():
+        await write_content_chunks(batch, "m1", user_id="alice")
+        return await write_store(CHUNK_STORE, threading.get_ident)
+
+    chunk_writer = asyncio.run(run())
+
+    assert writer_threads == [chunk_writer]
+    assert get_content_store().get_texts(["m1_0"]) == {"m1_0": "first chunk"}
+    assert get_memory_aggregates().chunk_counts(["m1"]) == {"m1": 2}
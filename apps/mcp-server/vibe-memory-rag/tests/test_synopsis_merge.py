@@ -0,0 +1,76 @@
+import asyncio
+
+import pytest
+
+pytest.importorskip("mem0")
+
+import mem0_utils
+from synopsis_merge import merge_synopsis_records
+
+USER = "alice"
+
+class _CappedMem0:
+    """Mem0 client whose get_all only returns part of the user's memories."""
+
+    def __init__(self, listed, unlisted, flaky=()):
+        self.listed = {record["id"]: record for record in listed}
+        self.unlisted = set(unlisted)
+        self.flaky = set(flaky)
+
+    def get_all(self, user_id, limit=None):
+        return {"results": [dict(record) for record in self.listed.values()]}
+
+    def get(self, memory_id):
+        if memory_id in self.flaky:
+            raise RuntimeError("Mem0 timed out")
+        if memory_id in self.listed or memory_id in self.unlisted:
+            return {"id": memory_id}
+        return None
+
+    def delete(self, memory_id):
+        del self.listed[memory_id]
+
+def _synopsis(record_id, page_id):
+    return {
+        "id": record_id,
+        "memory": f"Synopsis: about {page_id}",
+        "created_at": "2025-10-09T08:53:20+00:00",
+        "metadata": {"type": "synopsis_update", "memory_id": page_id, "tags": "rust"},
+    }
+
+@pytest.fixture
+def client(local_db, monkeypatch):
+    # Only the synopsis records fit in get_all; p_far exists past its limit, p_gone is deleted
+    client = _CappedMem0(
+        [_synopsis("s_far", "p_far"), _synopsis("s_gone", "p_gone"), _synopsis("s_flaky", "p_flaky")],
+        unlisted=["p_far"],
+        flaky=["p_flaky"],
+    )
+    merged = []
+
+    async def merge(memory_id, synopsis, tags, user_id):
+        if memory_id in client.flaky:
+            raise RuntimeError("Mem0 timed out")
+        merged.append((memory_id, synopsis, tags))
+        return memory_id in client.unlisted
+
+    monkeypatch.setattr(mem0_utils, "get_mem0_client", lambda: client)
+    monkeypatch.setattr(mem0_utils, "merge_browser_memory_synopsis", merge)
+    client.merged = merged
+    return client
+
+def test_only_confirmed_orphans_are_deleted_without_a_merge(client):
+    report = asyncio.run(merge_synopsis_records(USER))
+
+    assert client.merged == [("p_far", "about p_far", ["rust"])]
+    assert (report["merged"], report["orphaned"], report["deleted"], report["failed"]) == (1, 1, 2, 1)
+    # The page whose lookup failed keeps its synopsis for a rerun
+    assert list(client.listed) == ["s_flaky"]
+
+def test_dry_run_counts_confirmed_orphans_only(client):
+    report = asyncio.run(merge_synopsis_records(USER, dry_run=True))
+
+    assert report["orphaned"] == 1
+    assert report["pages"] == 3
+    assert client.merged == []
+    assert len(client.listed) == 3
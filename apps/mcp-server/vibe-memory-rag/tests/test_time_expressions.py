@@ -0,0 +1,68 @@
+from datetime import datetime
+
+import pytest
+
+from time_expressions import parse_time_range
+
+# A Wednesday afternoon
+NOW = datetime(2026, 10, 14, 15, 0)
+
+def _span(query):
+    found = parse_time_range(query, NOW)
+    assert found is not None, query
+    return datetime.fromtimestamp(found.start_ts), datetime.fromtimestamp(found.end_ts), found.topic
+
+@pytest.mark.parametrize("query", [
+    "the first time I read about sunday school",
+    "what did I read sunday",
+    "monday.com pricing page",
+    "the last page I visited",
+    "last minute deals on flights",
+    "what to pack for the last day of school",
+    "articles about the friday night lights show",
+    "",
+])
+def test_queries_without_a_date_are_not_parsed(query):
+    assert parse_time_range(query, NOW) is None
+
+def test_weekday_after_on_is_its_most_recent_day():
+    assert _span("pages on monday about rust") == (
+        datetime(2026, 10, 12), datetime(2026, 10, 13), "pages about rust"
+    )
+
+def test_last_weekday_skips_today():
+    assert _span("last wednesday")[:2] == (datetime(2026, 10, 7), datetime(2026, 10, 8))
+    assert _span("this wednesday")[:2] == (datetime(2026, 10, 14), NOW)
+
+def test_since_weekday_runs_until_now():
+    assert _span("recipes since monday") == (datetime(2026, 10, 12), NOW, "recipes")
+
+def test_weekday_keeps_the_rest_of_the_topic():
+    assert _span("sunday school pages I read on sunday")[2] == "sunday school pages i read"
+
+def test_yesterday_afternoon():
+    assert _span("what did I read yesterday afternoon") == (
+        datetime(2026, 10, 13, 12), datetime(2026, 10, 13, 17), "what did i read"
+    )
+
+def test_relative_window():
+    assert _span("pages from the last 3 days about rust") == (
+        datetime(2026, 10, 11, 15), NOW, "pages about rust"
+    )
+    assert _span("the last 10 minutes")[:2] == (datetime(2026, 10, 14, 14, 50), NOW)
+
+def test_relative_window_without_a_number():
+    assert _span("past day")[:2] == (datetime(2026, 10, 13, 15), NOW)
+    assert _span("what did I read in the last hour")[:2] == (datetime(2026, 10, 14, 14), NOW)
+
+def test_ago_is_that_calendar_day():
+    assert _span("2 days ago")[:2] == (datetime(2026, 10, 12), datetime(2026, 10, 13))
+
+def test_calendar_periods():
+    assert _span("last week")[:2] == (datetime(2026, 10, 5), datetime(2026, 10, 12))
+    assert _span("this month")[:2] == (datetime(2026, 10, 1), NOW)
+    assert _span("last year")[:2] == (datetime(2025, 1, 1), datetime(2026, 1, 1))
+
+def test_ranges_never_reach_into_the_future():
+    assert _span("this afternoon")[:2] == (datetime(2026, 10, 14, 12), NOW)
+    assert parse_time_range("tonight", NOW) is None
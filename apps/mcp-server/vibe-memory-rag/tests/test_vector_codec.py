@@ -0,0 +1,60 @@
+import math
+
+import numpy as np
+import pytest
+
+import vector_codec
+from vector_codec import decode_vector, encode_vector, get_rescore_store, reduce_vector, rescore_chunks, to_index_vector
+
+def _unit(vector):
+    vector = np.asarray(vector, dtype=np.float64)
+    return (vector / np.linalg.norm(vector)).tolist()
+
+def test_reduce_vector_truncates_and_renormalizes():
+    reduced = reduce_vector([3.0, 4.0, 12.0], dimensions=2)
+    assert reduced == pytest.approx([0.6, 0.8])
+    assert reduce_vector([0.0, 0.0, 1.0], dimensions=2) == [0.0, 0.0]
+
+def test_index_vector_depends_on_the_storage_mode(monkeypatch):
+    vector = _unit(range(1, 9))
+    assert to_index_vector(vector) == vector
+
+    monkeypatch.setattr(vector_codec, "VECTOR_STORAGE_MODE", "reduced")
+    monkeypatch.setattr(vector_codec, "REDUCED_DIMENSIONS", 4)
+    index_vector = to_index_vector(vector)
+    assert len(index_vector) == 4
+    assert math.sqrt(sum(value * value for value in index_vector)) == pytest.approx(1.0)
+
+@pytest.mark.parametrize("vector_format, tolerance, size", [("float32", 1e-6, 4 * 64), ("int8", 0.01, 4 + 64)])
+def test_encoding_round_trip(vector_format, tolerance, size):
+    vector = _unit(np.random.default_rng(1).normal(size=64))
+    blob = encode_vector(vector, vector_format)
+
+    assert len(blob) == size
+    assert decode_vector(blob, vector_format) == pytest.approx(vector, abs=tolerance)
+
+def test_int8_keeps_a_zero_vector():
+    assert decode_vector(encode_vector([0.0, 0.0], "int8"), "int8") == [0.0, 0.0]
+
+@pytest.mark.parametrize("vector_format", ["float32", "int8"])
+def test_rescoring_restores_the_full_vector_ranking(local_db, monkeypatch, vector_format):
+    monkeypatch.setattr(vector_codec, "RESCORE_VECTOR_FORMAT", vector_format)
+    query = _unit([1.0, 0.0, 1.0, 0.0])
+    # Both chunks look identical in the leading two dimensions; only the tail tells them apart
+    vectors = {"close": _unit([1.0, 0.0, 0.9, 0.1]), "far": _unit([1.0, 0.0, -0.9, 0.1])}
+    assert reduce_vector(vectors["close"], 2) == pytest.approx(reduce_vector(vectors["far"], 2))
+
+    get_rescore_store().put_many(list(vectors), ["m1", "m2"], list(vectors.values()))
+    scores = rescore_chunks(query, ["far", "close", "missing"])
+
+    assert set(scores) == {"close", "far"}
+    assert scores["close"] > scores["far"]
+    assert scores["close"] == pytest.approx(float(np.dot(query, vectors["close"])), abs=0.01)
+
+def test_rescore_store_deletes_by_memory(local_db):
+    store = get_rescore_store()
+    store.put_many(["a", "b", "c"], ["m1", "m1", "m2"], [[1.0, 0.0], [0.0, 1.0], [1.0, 1.0]])
+
+    assert store.delete_memories(["m1"]) == 2
+    assert set(store.get_many(["a", "b", "c"])) == {"c"}
+    assert store.stats()["vectors"] == 1